@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Modules in this directory import each other by bare name (``from config import ...``),
+# so make them importable when started as ``python -m aishell``.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+sys.exit(main())
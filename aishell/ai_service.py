@@ -1,9 +1,10 @@
 import platform
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 from termcolor import colored
+from concurrent.futures import Future
+import asyncio
 import os
-import random
-from time import sleep
+import time
 
 # Try to import the config_manager
 try:
@@ -13,11 +14,48 @@ except ImportError:
 
 # Import APIs
 from apis import create_provider, PROVIDERS
+from apis.base_provider import hold_messages, report
+from apis.deadline import Deadline
+from apis.errors import classify_error, retry_after, response_headers, NETWORK, RATE_LIMIT
+from apis.rate_limiter import RateLimiter, request_tokens
+from async_runtime import get_runtime
+from circuit_breaker import CircuitBreaker, OfflineDetector
+from provider_stats import ProviderStats
+from query_classifier import QueryClassifier, COMPLEX
+from rules import get_rule_engine, RULES_PROVIDER, RULES_DESCRIPTION
+from single_flight import SingleFlight, flight_key
+
+# Hedge on observed p90 only once a provider has this many samples
+MIN_HEDGE_SAMPLES = 5
+MIN_HEDGE_DELAY = 0.5
+# Concurrent generations in generate_many unless the caller says otherwise
+DEFAULT_CONCURRENCY = 4
+# Time allowed for one background pre-connect
+PREWARM_TIMEOUT = 10.0
+
+class Generation(NamedTuple):
+    """Outcome of one run of the provider chain"""
+    command: Optional[str]
+    explanation: Optional[str]
+    provider: Optional[str] = None
+    confidence: Optional[float] = None
+    risk: Optional[str] = None
+    # (message, color) the generation held back (background generations only)
+    messages: Tuple[Tuple[str, str], ...] = ()
 
 class AIService:
-    def __init__(self, os_type=None):
-        """Initialize AI service with both local and cloud backends"""
+    def __init__(self, os_type=None, single_provider: bool = False, cache=None):
+        """Initialize AI service with both local and cloud backends
+        
+        Args:
+            os_type: Target operating system (defaults to the current one)
+            single_provider: Stop after the first provider that initializes
+                (used by one-shot mode to keep startup to a minimum)
+            cache: CommandCache whose DB coordinates identical generations
+                across processes (coalescing.cross_process)
+        """
         self.os_type = os_type or platform.system().lower()
+        self.single_provider = single_provider
         
         # Provider management
         self.providers = {}  # Initialized providers
@@ -27,8 +65,59 @@ class AIService:
         self.provider = None
         if config_manager:
             self.provider = config_manager.get_default_provider()
+            self.routing = config_manager.get_routing_config()
+            self.resilience = config_manager.get_resilience_config()
+            self.timeouts = config_manager.get_timeout_config()
+            self.rate_limits = config_manager.get_rate_limit_config()
+            self.coalescing = config_manager.get_coalescing_config()
+            self.streaming = config_manager.get_streaming_config()
+            self.structured_output = config_manager.get_structured_output_config()
+            self.explanations = config_manager.get_explanation_config()
+            self.prompt_caching = config_manager.get_prompt_caching_config()
+            self.prewarm = config_manager.get_prewarm_config()
+            self.speculation = config_manager.get_speculation_config()
+            self.alternatives = config_manager.get_alternatives_config()
+            self.batch = config_manager.get_batch_config()
         else:
             self.provider = "aws_bedrock"  # Fallback only if no config
+            self.routing = {"hedging": False, "hedge_delay": 3.0, "adaptive": False,
+                            "speed_weight": 0.5, "explore_rate": 0.0, "complexity_routing": False,
+                            "confidence_threshold": 0.0, "confidence_escalation": "immediate"}
+            self.resilience = {"failure_threshold": 3, "reset_timeout": 30,
+                               "auth_reset_timeout": 600, "offline_detection": False}
+            self.timeouts = {"query_timeout": 30, "connect_timeout": 3, "max_retries": 2}
+            self.rate_limits = {"retry_attempts": 3, "backoff_base": 0.5, "backoff_max": 20, "providers": {}}
+            self.coalescing = {"enabled": True, "cross_process": False}
+            self.streaming = {"enabled": True, "stop_after_command": True}
+            self.structured_output = {"enabled": True}
+            self.explanations = {"mode": "background", "command_max_tokens": 100, "max_tokens": 150}
+            self.prompt_caching = {"enabled": True}
+            self.prewarm = {"enabled": True, "idle_rewarm": 60, "max_idle": 1800}
+            self.speculation = {"enabled": True, "debounce": 0.6, "min_words": 3,
+                                "similarity": 0.9, "daily_budget": 100}
+            self.alternatives = {"enabled": True, "max_candidates": 2}
+            self.batch = {"concurrency": 8, "per_provider_concurrency": 4}
+            
+        self.last_provider = None  # Provider that produced the last command
+        self.last_confidence = None  # Its confidence score, if the provider reports one
+        self.last_risk = None  # Its risk level ("low"/"medium"/"high"), with structured output
+        self.last_generation = None  # (query, complexity class, provider) awaiting user feedback
+        self.last_rule = None  # (query, rule name) when the rule engine answered it
+        self.stats = ProviderStats()
+        self.last_used = {}  # provider name -> monotonic time of its last call
+        self.warmed = {}  # provider name -> monotonic time of its last pre-connect
+        self._prewarm_task = None
+        self.classifier = QueryClassifier() if self.routing["complexity_routing"] else None
+        self.breakers = {}  # provider name -> CircuitBreaker
+        self.limiters = {}  # provider name -> RateLimiter
+        self.slots = {}  # provider name -> Semaphore bounding its in-flight requests
+        self.offline = OfflineDetector() if self.resilience["offline_detection"] else None
+        self.runtime = get_runtime()
+        
+        if self.coalescing["cross_process"] and cache is None:
+            from cache import CommandCache
+            cache = CommandCache()
+        self.flights = SingleFlight(cache if self.coalescing["cross_process"] else None)
             
         # Initialize providers
         self._init_providers()
@@ -39,6 +128,16 @@ class AIService:
             print(colored("⚠️ No configuration found. Run '\\config' to set up your models", "yellow"))
             return
             
+        if self.single_provider:
+            # Same preference order as generation: local, default, then the rest
+            order = ["local", self.provider] + [p for p in PROVIDERS if p not in ("local", self.provider)]
+            for provider_name in order:
+                if provider_name in PROVIDERS and self._init_provider(provider_name, self._provider_config(provider_name)):
+                    break
+            if "local" in self.initialized_providers:
+                self.provider = "local"
+            return
+            
         # Initialize local LLM first, as it should be the default if available
         self._init_provider("local", config_manager.get_local_model_config())
             
@@ -52,80 +151,763 @@ class AIService:
             self.provider = "local"
             print(colored("✓ Using local LLM as default provider", "green"))
                 
-    def _init_provider(self, provider_name: str, config: dict):
+    def _provider_config(self, provider_name: str) -> dict:
+        """Get the configuration block for a provider"""
+        if provider_name == "local":
+            return config_manager.get_local_model_config()
+        return config_manager.get_api_credentials(provider_name)
+                
+    def _init_provider(self, provider_name: str, config: dict) -> bool:
         """Initialize a specific provider with its config"""
         provider = create_provider(provider_name)
-        if provider and provider.initialize(config):
+        if not provider:
+            return False
+        # Output settings first: initialize may prepare prompts with them
+        # (the local model evaluates its instruction prefix at load time)
+        provider.streaming = self.streaming["enabled"]
+        provider.stop_after_command = self.streaming["stop_after_command"]
+        provider.structured = self.structured_output["enabled"]
+        provider.command_only = self.explanations["mode"] != "inline"
+        provider.command_max_tokens = self.explanations["command_max_tokens"]
+        provider.explanation_max_tokens = self.explanations["max_tokens"]
+        provider.prompt_caching = self.prompt_caching["enabled"]
+        if provider.initialize(config):
             self.providers[provider_name] = provider
             self.initialized_providers.append(provider_name)
+            self.breakers[provider_name] = CircuitBreaker(
+                failure_threshold=self.resilience["failure_threshold"],
+                reset_timeout=self.resilience["reset_timeout"],
+                auth_reset_timeout=self.resilience["auth_reset_timeout"]
+            )
+            limits = self.rate_limits["providers"].get(provider_name, {})
+            provider.rate_limiter = self.limiters[provider_name] = RateLimiter(
+                requests_per_minute=limits.get("requests_per_minute"),
+                tokens_per_minute=limits.get("tokens_per_minute"),
+                backoff_base=self.rate_limits["backoff_base"],
+                backoff_max=self.rate_limits["backoff_max"]
+            )
+            self.slots[provider_name] = asyncio.Semaphore(self.batch["per_provider_concurrency"])
+            return True
+        return False
             
-    def generate_command(self, user_input: str, regenerate: bool = False) -> Tuple[Optional[str], Optional[str]]:
+    def generate_command(self, user_input: str, regenerate: bool = False,
+                         timeout: Optional[float] = None, rules: bool = True) -> Tuple[Optional[str], Optional[str]]:
         """Generate command using configured providers with smart fallback logic
         
+        Blocking wrapper around agenerate_command, run on the shared event loop.
+        A KeyboardInterrupt while waiting cancels the generation - in-flight
+        requests are aborted and the rest of the chain is skipped - before it
+        propagates to the caller.
+        
         Args:
             user_input: The user's natural language request
             regenerate: Whether this is a regeneration request (R option)
+            timeout: Overall budget in seconds for the whole fallback chain
+                (defaults to timeouts.query_timeout)
+            rules: Try the rule engine first (callers that already did pass False)
+        """
+        return self.runtime.run(self.agenerate_command(user_input, regenerate, timeout, rules))
+    
+    def submit_command(self, user_input: str, regenerate: bool = False,
+                       timeout: Optional[float] = None) -> Future:
+        """Start a generation without blocking; returns a Future of (command, explanation)"""
+        return self.runtime.submit(self.agenerate_command(user_input, regenerate, timeout))
+    
+    def generate_many(self, queries: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                      timeout: Optional[float] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Generate commands for several queries concurrently (results in input order)"""
+        return self.runtime.run(self.agenerate_many(queries, concurrency, timeout))
+    
+    async def agenerate_many(self, queries: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                             timeout: Optional[float] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Run generations concurrently on the event loop, at most `concurrency` at a time
+        
+        Each query gets its own deadline, started when it begins running.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def generate(query):
+            async with semaphore:
+                return await self.agenerate_command(query, timeout=timeout)
+                
+        return await asyncio.gather(*(generate(query) for query in queries))
+    
+    def generate_batch(self, queries: List[str], cache=None, save: bool = True,
+                       concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                       on_result: Optional[Callable[[Dict], None]] = None) -> Tuple[List[Dict], Dict]:
+        """Generate commands for many queries; blocking wrapper around agenerate_batch"""
+        return self.runtime.run(self.agenerate_batch(queries, cache, save, concurrency, timeout, on_result))
+    
+    async def agenerate_batch(self, queries: List[str], cache=None, save: bool = True,
+                              concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                              on_result: Optional[Callable[[Dict], None]] = None) -> Tuple[List[Dict], Dict]:
+        """Generate commands for many queries at once (pre-generating runbooks, warming the cache)
+        
+        Queries that are the same after normalization are generated once,
+        and queries already in the cache are answered from it. Up to
+        `concurrency` (batch.concurrency) queries run at a time, and each
+        provider's requests are bounded by batch.per_provider_concurrency.
+        
+        Args:
+            cache: CommandCache to answer from and, with save, to store new commands in
+            on_result: Called with each item as soon as it is done (on the event loop thread)
+        
+        Returns:
+            tuple: (items in input order, summary) - each item has index, query,
+                command, explanation, risk, provider, source ("cache",
+                "rule", "generated" or "duplicate") and latency in seconds; the
+                summary has counts, elapsed time, throughput and latency
+                percentiles
+        """
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.batch["concurrency"]))
+        items: List[Optional[Dict]] = [None] * len(queries)
+        groups: Dict[str, List[int]] = {}
+        for index, query in enumerate(queries):
+            groups.setdefault(flight_key(query or ""), []).append(index)
+            
+        def publish(index: int, item: Dict):
+            items[index] = dict(item, index=index, query=queries[index])
+            if on_result:
+                on_result(items[index])
+            
+        async def run(indexes: List[int]):
+            query = queries[indexes[0]].strip() if queries[indexes[0]] else ""
+            item = {"command": None, "explanation": None, "risk": None, "provider": None,
+                    "source": "generated", "latency": 0.0}
+            if query:
+                item_start = time.monotonic()
+                command, explanation = cache.get(query) if cache else (None, None)
+                # Not recorded: batch lookups would skew the interactive hit rate
+                rule = None if command else self.match_rule(query, record=False)
+                if command:
+                    item.update(command=command, explanation=explanation, source="cache")
+                elif rule:
+                    # Not saved: the rule answers it as fast as the cache would
+                    item.update(command=rule.command, explanation=rule.explanation,
+                                risk=rule.risk, provider=rule.provider, source="rule")
+                else:
+                    async with semaphore:
+                        item_start = time.monotonic()
+                        result = await self._generate_one(query, False, timeout)
+                    item.update(command=result.command, explanation=result.explanation,
+                                risk=result.risk, provider=result.provider)
+                    if result.command and cache and save:
+                        cache.save(query, result.command, result.explanation)
+                item["latency"] = round(time.monotonic() - item_start, 3)
+            publish(indexes[0], item)
+            for index in indexes[1:]:
+                publish(index, dict(item, source="duplicate", latency=0.0))
+                
+        await asyncio.gather(*(run(indexes) for indexes in groups.values()))
+        return items, self._batch_summary(items, time.monotonic() - start)
+    
+    @staticmethod
+    def _batch_summary(items: List[Dict], elapsed: float) -> Dict:
+        """Counts, throughput and latency percentiles for a finished batch"""
+        generated = [item for item in items if item["source"] == "generated"]
+        latencies = sorted(item["latency"] for item in generated if item["command"])
+        
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+            
+        providers: Dict[str, int] = {}
+        for item in generated:
+            if item["command"]:
+                providers[item["provider"]] = providers.get(item["provider"], 0) + 1
+        return {
+            "queries": len(items),
+            "unique": len(items) - sum(item["source"] == "duplicate" for item in items),
+            "cache_hits": sum(item["source"] == "cache" for item in items),
+            "rule_hits": sum(item["source"] == "rule" for item in items),
+            "generated": len(latencies),
+            "failed": sum(not item["command"] for item in items),
+            "providers": providers,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(len(items) / elapsed, 2) if elapsed > 0 else None,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+        }
+    
+    def speculate(self, user_input: str, local_only: bool = False) -> Future:
+        """Start a generation whose result may never be used; returns a Future of a Generation
+        
+        Unlike generate_command this leaves last_* alone and prints
+        nothing (the user is still typing) - adopt() the Generation if it
+        ends up being used.
+        Cancelling the Future stops the generation.
+        """
+        return self.runtime.submit(self._generate_one(user_input, False, None, local_only, quiet=True))
+    
+    def explain(self, user_input: str, command: str, provider_name: Optional[str] = None) -> Future:
+        """Start fetching the explanation of a command generated without one;
+        returns a Future of the explanation (None if no provider gave one)
+        
+        Cancelling the Future stops the request.
+        """
+        return self.runtime.submit(self.aexplain(user_input, command, provider_name))
+    
+    async def aexplain(self, user_input: str, command: str,
+                       provider_name: Optional[str] = None) -> Optional[str]:
+        """Async variant of explain
+        
+        The provider that generated the command is asked first, then the
+        others in routing order. Nothing is printed and no stats are kept:
+        it usually runs while the user is looking at the command.
+        """
+        if not command:
+            return None
+        order = self._provider_order(regenerate=False, explore=False)
+        if provider_name in order:
+            order.remove(provider_name)
+            order.insert(0, provider_name)
+        deadline = self.new_deadline()
+        try:
+            for name in order:
+                if deadline.expired():
+                    break
+                provider = self.providers[name]
+                slot = self.slots.get(name)
+                if slot is not None and not await self._acquire_slot(slot, deadline):
+                    continue
+                try:
+                    if not await self.limiters[name].acquire(request_tokens(command), deadline):
+                        continue
+                    provider.last_error = None
+                    explanation = await provider.aexplain_command(user_input, command, self.os_type, deadline)
+                finally:
+                    if slot is not None:
+                        slot.release()
+                if explanation:
+                    return explanation
+        except asyncio.CancelledError:
+            deadline.cancel()
+            raise
+        return None
+    
+    def match_rule(self, user_input: str, record: bool = True) -> Optional[Generation]:
+        """Command from the rule engine, if one of its rules covers the query
+        
+        Takes microseconds, so it is tried before the cache-miss path goes
+        to any provider. Pass record=False for lookups that shouldn't count
+        towards the hit rate (e.g. while the query is still being typed).
+        """
+        engine = get_rule_engine()
+        found = engine.match(user_input, self.os_type, record) if engine else None
+        if found is None:
+            return None
+        if record:
+            self.last_rule = (user_input, found.rule)
+        return Generation(found.command, found.explanation, RULES_PROVIDER, None, found.risk)
+    
+    def describe(self, provider_name: Optional[str]) -> Optional[str]:
+        """Display name of whatever produced a command (a provider or the rule engine)"""
+        if provider_name == RULES_PROVIDER:
+            return RULES_DESCRIPTION
+        provider = self.providers.get(provider_name) if provider_name else None
+        return provider.description if provider else None
+    
+    def adopt(self, generation: Generation):
+        """Make a speculative Generation the last one, as if generate_command had produced it"""
+        self.last_provider = generation.provider
+        self.last_confidence = generation.confidence
+        self.last_risk = generation.risk
+    
+    def alternative_providers(self, exclude: Optional[str] = None) -> List[str]:
+        """Providers to ask for an alternative command, best first (the one to exclude
+        is usually the provider of the command already shown)"""
+        return [p for p in self._provider_order(regenerate=True, explore=False) if p != exclude]
+    
+    def generate_alternative(self, provider_name: str, user_input: str) -> Future:
+        """Ask one provider for a command in the background; returns a Future of a Generation
+        
+        Goes through the same rate limits, circuit breaker and stats as a
+        normal call, but leaves last_* alone and prints nothing: what the
+        call would have printed comes back in the Generation's messages.
+        Cancelling the Future stops it.
+        """
+        return self.runtime.submit(self._agenerate_with(provider_name, user_input))
+    
+    async def _agenerate_with(self, provider_name: str, user_input: str) -> Generation:
+        # The user is reading another command meanwhile
+        held = hold_messages()
+        command, explanation, confidence, risk = await self._call_provider(
+            provider_name, user_input, self.new_deadline()
+        )
+        return Generation(command, explanation, provider_name, confidence, risk, tuple(held))
+    
+    async def agenerate_command(self, user_input: str, regenerate: bool = False,
+                                timeout: Optional[float] = None,
+                                rules: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """Async entry point: see generate_command
+        
+        Safe to run many at once on one loop; last_provider then reflects
+        whichever finished last. A query identical (after normalization) to
+        one already generating joins it instead of calling providers again.
         """
         # Empty input validation
         if not user_input or not user_input.strip():
+            self.last_provider = None
+            self.last_confidence = None
+            self.last_risk = None
             return None, None
+        
+        if rules and not regenerate:
+            generation = self.match_rule(user_input)
+            if generation:
+                self.adopt(generation)
+                return generation.command, generation.explanation
             
-        # If regenerating, prioritize API providers over local LLM
+        if not self.coalescing["enabled"]:
+            generation = await self._generate_one(user_input, regenerate, timeout)
+        else:
+            key = flight_key(user_input, self.os_type, "regenerate" if regenerate else "generate")
+            # Another process's flight comes back as a plain tuple of the same fields
+            generation = Generation(*await self.flights.run(
+                key,
+                lambda: self._generate_one(user_input, regenerate, timeout),
+                timeout or self.timeouts["query_timeout"]
+            ))
+        self.adopt(generation)
+        return generation.command, generation.explanation
+    
+    async def _generate_one(self, user_input: str, regenerate: bool, timeout: Optional[float],
+                            local_only: bool = False, quiet: bool = False) -> Generation:
+        """Run the provider chain for one query
+        
+        Args:
+            local_only: Leave out providers that cost money (cloud APIs)
+            quiet: Print nothing, not even a failure (nobody is waiting for it)
+        """
+        if quiet:
+            hold_messages()
+        deadline = self.new_deadline(timeout)
+        order = self._provider_order(regenerate)
+        if local_only:
+            order = [p for p in order if self.providers[p].is_local]
+        if order:
+            hedge = self.routing["hedging"] and len(order) > 1
+            parallel = 1
+            class_name = None
+            if not regenerate and self._can_route_by_complexity(order):
+                class_name = self.classifier.classify(user_input)
+                order, hedge, parallel = self._route_by_complexity(class_name, order, hedge)
+            try:
+                provider_name, command, explanation, confidence, risk = await self._run_chain(
+                    user_input, order, deadline, hedge, regenerate, parallel
+                )
+            except asyncio.CancelledError:
+                # Async requests are cancelled with their tasks; this stops
+                # the ones running in threads (llama.cpp checks it per token)
+                deadline.cancel()
+                raise
+            if class_name:
+                self._record_routing(user_input, class_name, provider_name, deadline.elapsed())
+            if command:
+                return Generation(command, explanation, provider_name, confidence, risk)
+            failed = Generation(None, None, provider_name)
+        else:
+            failed = Generation(None, None)
+        
+        # No provider available or all providers failed
+        if quiet:
+            return failed
+        if deadline.expired():
+            print(colored(f"⏱️ No command within {deadline.elapsed():.0f}s - giving up", "red"))
+            return failed
+        if not order and self.is_offline():
+            print(colored("⚠️ Offline and no local provider available", "red"))
+            return failed
+        available_providers = ", ".join(self.initialized_providers) or "None"
+        print(colored(f"⚠️ Command generation failed. Available providers: {available_providers}", "red"))
+        return failed
+    
+    def _can_route_by_complexity(self, order: List[str]) -> bool:
+        """Complexity routing only matters with both a local and a cloud provider"""
+        return (self.classifier is not None and any(self.providers[p].is_local for p in order)
+                and any(not self.providers[p].is_local for p in order))
+    
+    def _route_by_complexity(self, class_name: str, order: List[str],
+                             hedge: bool) -> Tuple[List[str], bool, int]:
+        """Adjust (order, hedge, providers started up front) for a complexity class
+        
+        simple:   local providers alone; cloud only if they return nothing
+        moderate: the first local and the best cloud provider race from the start
+        complex:  cloud first, local providers last
+        
+        Local means provider.is_local: the local model, or Ollama on this machine.
+        """
+        route = QueryClassifier.route_for(class_name)
+        local = [p for p in order if self.providers[p].is_local]
+        cloud = [p for p in order if not self.providers[p].is_local]
+        if route == "local":
+            return local + cloud, False, 1
+        if route == "both":
+            return local[:1] + cloud + local[1:], hedge, 2
+        return cloud + local, hedge, 1
+    
+    def _record_routing(self, user_input: str, class_name: str, provider_name: Optional[str], latency: float):
+        """Feed a routed query's outcome to the classifier"""
+        self.classifier.record_latency(class_name, latency)
+        if provider_name is None and class_name != COMPLEX:
+            # The local model was tried and came back empty
+            self.classifier.record_local_result(user_input, False)
+        self.last_generation = (user_input, class_name, provider_name) if provider_name else None
+    
+    def record_feedback(self, user_input: str, accepted: bool):
+        """Tell the classifier whether the user accepted the last generated command
+        
+        Accepting means running it; asking for a regeneration means it was wrong.
+        A command from the rule engine is counted against its rule instead.
+        """
+        if self.last_rule and self.last_rule[0] == user_input:
+            _, rule = self.last_rule
+            self.last_rule = None
+            get_rule_engine().record_feedback(rule, accepted)
+            return
+        if not self.classifier or not self.last_generation or self.last_generation[0] != user_input:
+            return
+        _, class_name, provider_name = self.last_generation
+        self.last_generation = None
+        self.classifier.record_feedback(user_input, class_name, self.providers[provider_name].is_local, accepted)
+    
+    def new_deadline(self, timeout: Optional[float] = None) -> Deadline:
+        """Deadline for one query using the configured timeouts"""
+        return Deadline(
+            timeout or self.timeouts["query_timeout"],
+            connect_timeout=self.timeouts["connect_timeout"],
+            max_retries=self.timeouts["max_retries"]
+        )
+    
+    def start_prewarm(self) -> Optional[Future]:
+        """Keep the first cloud provider's connection warm in the background
+        
+        Connects right away, so the first query skips DNS and the TCP/TLS
+        handshakes, then again whenever the provider has seen no traffic
+        for idle_rewarm seconds - until the shell has sat unused for
+        max_idle. Meant for the interactive shell; one-shot and batch runs
+        send their queries at once and gain nothing from it.
+        """
+        if not self.prewarm["enabled"] or self._prewarm_task is not None:
+            return None
+        self._prewarm_task = self.runtime.submit(self._keep_warm())
+        return self._prewarm_task
+    
+    def stop_prewarm(self):
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+            self._prewarm_task = None
+    
+    async def _keep_warm(self):
+        interval = self.prewarm["idle_rewarm"]
+        started = time.monotonic()
+        while True:
+            target = self._warm_target()
+            now = time.monotonic()
+            wait = interval
+            if target is not None:
+                active = max(self.last_used.values(), default=started)
+                last = max(self.last_used.get(target, 0.0), self.warmed.get(target, 0.0))
+                if now - active < self.prewarm["max_idle"] and now - last >= interval:
+                    await self.awarm_provider(target)
+                    last = time.monotonic()
+                wait = max(1.0, last + interval - time.monotonic())
+            await asyncio.sleep(wait)
+    
+    def _warm_target(self) -> Optional[str]:
+        """The cloud provider a query would reach first"""
+        return next((name for name in self.routing_order() if not self.providers[name].is_local), None)
+    
+    async def awarm_provider(self, provider_name: str) -> Optional[float]:
+        """Pre-connect one provider; returns the seconds it took, None if nothing was warmed"""
+        provider = self.providers[provider_name]
+        start = time.monotonic()
+        try:
+            if not await provider.awarm(self.new_deadline(PREWARM_TIMEOUT)):
+                return None
+        except Exception:
+            # Quietly: a real query reports (and handles) the same failure
+            return None
+        elapsed = time.monotonic() - start
+        self.warmed[provider_name] = time.monotonic()
+        self.stats.record_warmup(provider_name, elapsed)
+        return elapsed
+    
+    def is_offline(self) -> bool:
+        """Whether cloud providers are currently considered unreachable"""
+        return bool(self.offline and self.offline.is_offline())
+    
+    def routing_order(self) -> List[str]:
+        """Current preferred provider order for a normal request (no exploration)"""
+        return self._provider_order(regenerate=False, explore=False)
+    
+    def _provider_order(self, regenerate: bool, explore: bool = True) -> List[str]:
+        """Order in which providers are tried
+        
+        The base preference is local LLM first, then the default provider, then
+        the rest. Regeneration prefers API providers (default first) and only
+        falls back to the local LLM when all of them fail. With adaptive routing
+        the preferred group is re-ranked from observed latency and reliability;
+        the base order only breaks ties. Providers with an open circuit breaker
+        are left out, and while offline only local providers are used.
+        """
+        offline = self.is_offline()
+        available = [
+            p for p in self.initialized_providers
+            if not self.breakers[p].is_open() and (not offline or self.providers[p].is_local)
+        ]
+        
         if regenerate:
-            # Try APIs first (skip local even if it's the default)
-            api_providers = [p for p in self.initialized_providers if p != "local"]
+            order = [p for p in available if p != "local"]
+            if self.provider in order:
+                order.remove(self.provider)
+                order.insert(0, self.provider)
+            order = self._rank(order, explore)
+            if "local" in available:
+                order.append("local")
+            return order
             
-            # First try the configured default provider if it's an API
-            if self.provider in api_providers:
-                print(colored(f"↳ Regenerating with {self.providers[self.provider].description}...", "cyan"))
-                command, explanation = self.providers[self.provider].generate_command(user_input, self.os_type)
-                if command:
-                    return command, explanation
+        order = ["local"] if "local" in available else []
+        if self.provider in available and self.provider not in order:
+            order.append(self.provider)
+        order += [p for p in available if p not in order]
+        return self._rank(order, explore)
+    
+    def _rank(self, order: List[str], explore: bool = True) -> List[str]:
+        """Re-rank providers from their stats when adaptive routing is enabled"""
+        if not self.routing["adaptive"] or len(order) < 2:
+            return order
+        explore_rate = self.routing["explore_rate"] if explore else 0.0
+        return self.stats.rank(order, self.routing["speed_weight"], explore_rate)
+    
+    async def _call_provider(self, provider_name: str, user_input: str,
+                             deadline: Deadline) -> Tuple[Optional[str], Optional[str], Optional[float], Optional[str]]:
+        """Run a single provider and record the outcome in stats and its breaker
+        
+        Calls are paced by the provider's rate limiter (waiting in line
+        rather than failing), and rate-limit errors are retried with
+        jittered exponential backoff while the deadline allows.
+        
+        Returns:
+            tuple: (command, explanation, confidence or None if the provider has no score,
+                    risk or None without structured output)
+        """
+        provider = self.providers[provider_name]
+        limiter = self.limiters[provider_name]
+        tokens = request_tokens(user_input)
+        attempt = 0
+        
+        while True:
+            # A retry reuses the breaker slot taken by the first attempt
+            if deadline.expired() or (attempt == 0 and not self.breakers[provider_name].allow()):
+                return None, None, None, None
+            slot = self.slots.get(provider_name)
+            if slot is not None and not await self._acquire_slot(slot, deadline):
+                report(f"⏳ {provider.description} is busy until past the deadline - skipping", "yellow")
+                return None, None, None, None
+            try:
+                if not await limiter.acquire(tokens, deadline):
+                    report(f"⏳ {provider.description} rate limit leaves no time within the deadline - skipping", "yellow")
+                    return None, None, None, None
+                    
+                provider.last_error = None
+                provider.last_confidence = None
+                provider.last_risk = None
+                provider.last_usage = None
+                start = time.monotonic()
+                # First call after start-up or an idle spell, and whether a
+                # pre-connect since then should have left the connection open
+                first = start - self.last_used.get(provider_name, float("-inf")) >= self.prewarm["idle_rewarm"]
+                warm = start - self.warmed.get(provider_name, float("-inf")) < self.prewarm["idle_rewarm"]
+                self.last_used[provider_name] = start
+                command, explanation = await provider.agenerate_command(user_input, self.os_type, deadline)
+            finally:
+                if slot is not None:
+                    slot.release()
+            error = provider.last_error
             
-            # Then try other API providers
-            for provider_name in api_providers:
-                if provider_name == self.provider:  # Skip if we already tried it
+            if error is not None and classify_error(error) == RATE_LIMIT and attempt < self.rate_limits["retry_attempts"]:
+                delay = limiter.throttled(attempt, retry_after(error), response_headers(error))
+                remaining = deadline.remaining()
+                if remaining is None or delay < remaining:
+                    report(f"⏳ {provider.description} is rate limited - retrying in {delay:.1f}s", "yellow")
+                    attempt += 1
                     continue
-                    
-                print(colored(f"↳ Trying {self.providers[provider_name].description}...", "cyan"))
-                command, explanation = self.providers[provider_name].generate_command(user_input, self.os_type)
-                if command:
-                    return command, explanation
-                    
-            # Fall back to local LLM only if all APIs failed
-            if "local" in self.initialized_providers:
-                print(colored("↳ All APIs failed, falling back to local LLM", "yellow"))
-                command, explanation = self.providers["local"].generate_command(user_input, self.os_type)
-                if command:
-                    return command, explanation
+            break
+            
+        self.stats.record(
+            provider_name,
+            time.monotonic() - start,
+            success=bool(command),
+            # The model answered but nothing usable could be parsed out of it
+            parse_failure=not command and error is None
+        )
+        if first and command and not provider.is_local:
+            self.stats.record_first_call(provider_name, time.monotonic() - start, warm)
+        usage = provider.last_usage
+        if usage:
+            self.stats.record_prompt(provider_name, usage["prompt_tokens"], usage["cached_tokens"], usage["estimated"])
+        
+        if error is None:
+            # Reachable and answering, even if the answer didn't parse
+            self.breakers[provider_name].record_success()
+            if self.offline and not provider.is_local:
+                self.offline.report_success()
         else:
-            # Normal flow (not regenerating)
-            # First attempt: Use local LLM if available
-            if "local" in self.initialized_providers:
-                command, explanation = self.providers["local"].generate_command(user_input, self.os_type)
-                if command:
-                    return command, explanation
+            self._record_failure(provider_name, error)
+        if not command:
+            return command, explanation, None, None
+        return command, explanation, provider.last_confidence, provider.last_risk
+    
+    @staticmethod
+    async def _acquire_slot(slot: asyncio.Semaphore, deadline: Deadline) -> bool:
+        """Wait for one of a provider's concurrency slots; False if none frees up in time"""
+        try:
+            await asyncio.wait_for(slot.acquire(), deadline.remaining())
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def _record_failure(self, provider_name: str, error: Exception):
+        """Feed a failed call into the provider's breaker and the offline detector"""
+        error_class = classify_error(error)
+        breaker = self.breakers[provider_name]
+        if breaker.record_failure(error_class, retry_after(error)):
+            report(
+                f"⚡ Skipping {self.providers[provider_name].description} for "
+                f"{breaker.remaining_cooldown():.0f}s ({error_class.replace('_', ' ')} error)", "yellow"
+            )
+            
+        # Only failures to connect: a timeout may just be a slow model
+        if self.offline and error_class == NETWORK and not self.providers[provider_name].is_local:
+            cloud = [p for p in self.initialized_providers if not self.providers[p].is_local]
+            if self.offline.report_network_error(provider_name):
+                # Trip every cloud breaker at once instead of timing out on each
+                for name in cloud:
+                    self.breakers[name].trip(self.offline.offline_timeout)
+                report("⚡ Network appears to be down - using local providers only", "yellow")
+    
+    def _hedge_delay(self, provider_name: str) -> float:
+        """How long to wait on a provider before starting the next one in parallel
         
-            # Second attempt: Use default provider
-            if self.provider in self.initialized_providers:
-                command, explanation = self.providers[self.provider].generate_command(user_input, self.os_type)
-                if command:
-                    return command, explanation
+        Uses the provider's observed p90 latency once there are enough samples,
+        capped by the configured hedge delay.
+        """
+        configured = self.routing["hedge_delay"]
+        if self.stats.sample_count(provider_name) < MIN_HEDGE_SAMPLES:
+            return configured
+        p90 = self.stats.percentile(provider_name, 90)
+        return min(configured, max(MIN_HEDGE_DELAY, p90))
+    
+    def _announce(self, provider_name: str, first: bool):
+        """Tell the user which provider a regeneration is using"""
+        description = self.providers[provider_name].description
+        if provider_name == "local":
+            report("↳ All APIs failed, falling back to local LLM", "yellow")
+        elif first and provider_name == self.provider:
+            report(f"↳ Regenerating with {description}...", "cyan")
+        else:
+            report(f"↳ Trying {description}...", "cyan")
+    
+    async def _run_chain(self, user_input: str, order: List[str], deadline: Deadline,
+                         hedge: bool, regenerate: bool = False,
+                         parallel: int = 1) -> Tuple[Optional[str], Optional[str], Optional[str],
+                                                     Optional[float], Optional[str]]:
+        """Work through the providers in order until one produces a command
+        
+        Each provider runs as its own task and the next one is started as
+        soon as a running provider fails. With hedging, the next provider is
+        also started when the most recently started one has not answered
+        within its hedge delay. The first valid command wins and the other
+        tasks are cancelled. Nothing is waited on past the deadline, so the
+        chain as a whole never exceeds the query budget.
+        
+        A command scored below the confidence threshold (local LLM) does
+        not win outright: the next provider is asked as well, and the
+        low-confidence command is only used if nothing better arrives.
+        
+        Args:
+            parallel: Number of providers started straight away
+        
+        Returns:
+            tuple: (provider name, command, explanation, confidence or None
+                    if the provider has no score, risk or None without
+                    structured output); all None if no provider produced
+                    a command
+        """
+        pending = {}
+        remaining = list(order)
+        
+        def launch():
+            provider_name = remaining.pop(0)
+            if regenerate:
+                self._announce(provider_name, first=len(remaining) == len(order) - 1)
+            task = asyncio.ensure_future(self._call_provider(provider_name, user_input, deadline))
+            pending[task] = provider_name
+            return provider_name
             
-            # Third attempt: Try other providers if default failed
-            for provider_name in self.initialized_providers:
-                # Skip providers we've already tried
-                if provider_name == "local" or provider_name == self.provider:
+        if (order[0] == "local" and self.routing["confidence_escalation"] == "parallel"
+                and self.routing["confidence_threshold"] > 0):
+            # Race the next provider from the start in case the local answer is unsure
+            parallel = max(parallel, 2)
+        for _ in range(min(parallel, len(order))):
+            latest = launch()
+        fallback = None  # Best low-confidence result so far
+        try:
+            while pending:
+                timeout = deadline.remaining()
+                if hedge and remaining:
+                    delay = self._hedge_delay(latest)
+                    timeout = delay if timeout is None else min(timeout, delay)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    if deadline.expired():
+                        break
+                    # Nothing answered in time - hedge with the next provider
+                    slow = self.providers[latest].description
+                    latest = launch()
+                    report(f"↳ {slow} is slow, also trying {self.providers[latest].description}...", "cyan")
                     continue
                     
-                command, explanation = self.providers[provider_name].generate_command(user_input, self.os_type)
-                if command:
-                    return command, explanation
-        
-        # No provider available or all providers failed
-        available_providers = ", ".join(self.initialized_providers) or "None"
-        print(colored(f"⚠️ Command generation failed. Available providers: {available_providers}", "red"))
-        return None, None
+                for task in done:
+                    provider_name = pending.pop(task)
+                    try:
+                        command, explanation, confidence, risk = task.result()
+                    except Exception:
+                        command, explanation, confidence, risk = None, None, None, None
+                    if command and self._is_unsure(confidence) and (pending or remaining):
+                        if fallback is None or confidence > fallback[3]:
+                            fallback = (provider_name, command, explanation, confidence, risk)
+                        if not pending:
+                            latest = launch()
+                        escalation = ", ".join(self.providers[p].description for p in pending.values())
+                        report(
+                            f"↳ {self.providers[provider_name].description} is unsure "
+                            f"(confidence {confidence:.0%}) - checking with {escalation}...", "cyan"
+                        )
+                        continue
+                    if command:
+                        # Losers running in threads poll the deadline; end them too
+                        deadline.cancel()
+                        return provider_name, command, explanation, confidence, risk
+                        
+                    # This provider failed; move on to the next one straight away
+                    if remaining and not deadline.expired():
+                        latest = launch()
+        finally:
+            # Losers, or everything if we were cancelled or ran out of time
+            for task in pending:
+                task.cancel()
+                
+        return fallback or (None, None, None, None, None)
+    
+    def _is_unsure(self, confidence: Optional[float]) -> bool:
+        """Whether a scored command is below the confidence threshold"""
+        return confidence is not None and confidence < self.routing["confidence_threshold"]
 
 if __name__ == "__main__":
     print(colored("\n🔧 AI Command Generator Test", "green", attrs=["bold"]))
@@ -150,24 +932,15 @@ if __name__ == "__main__":
         "kill process on port 3000"
     ] + (["dir"] if platform.system() == 'Windows' else ["ls"])
     
-    for query in tests:
-        print(colored(f"\nInput: {query}", "yellow", attrs=["bold"]))
-        
-        # Generate command
-        cmd, explanation = ai.generate_command(query)
-        
-        if cmd:
-            print(colored(f"Command: {cmd}", "green"))
-            print(colored(f"Source: {explanation}", "cyan"))
+    # Concurrent, paced by each provider's rate limiter and concurrency slots
+    items, summary = ai.generate_batch(tests, save=False)
+    for item in items:
+        print(colored(f"\nInput: {item['query']}", "yellow", attrs=["bold"]))
+        if item["command"]:
+            print(colored(f"Command: {item['command']}", "green"))
+            print(colored(f"Source: {item['explanation']} ({item['provider']}, {item['latency']:.2f}s)", "cyan"))
         else:
             print(colored("❌ Failed to generate command", "red"))
             
-            # Try default AWS Bedrock if available and not already tried
-            if "aws_bedrock" in ai.initialized_providers and ai.provider != "aws_bedrock":
-                cmd, explanation = ai.generate_command(query, use_provider="aws_bedrock")
-                if cmd:
-                    print(colored(f"AWS Bedrock fallback: {cmd}", "green"))
-                else:
-                    print(colored("❌ AWS Bedrock also failed", "red"))
-        
-        sleep(random.uniform(0.5, 1.0))  # Rate limiting
\ No newline at end of file
+    print(colored(f"\n{summary['queries']} queries in {summary['elapsed']:.1f}s "
+                  f"({summary['throughput']} queries/s)", "cyan"))
@@ -10,15 +10,20 @@ from prompt_toolkit.history import FileHistory
 from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.styles import Style as PTStyle
 from prompt_toolkit.formatted_text import FormattedText
+from prompt_toolkit.patch_stdout import patch_stdout
 from colorama import init, Fore, Style
 import shutil
 import paramiko
 # Initialize colorama for better cross-platform color support
 init()
 
-from ai_service import AIService
+from ai_service import AIService, Generation
+from alternatives import Alternatives
 from cache import CommandCache
+from explanations import Explanations
 from help import Help
+from rules import RULES_PROVIDER, get_rule_engine
+from speculation import Speculator
 
 import paramiko
 from typing import Optional
@@ -34,14 +39,25 @@ class RemoteSession:
 class AIShell:
     def __init__(self):
         self.os_type = platform.system().lower()
-        self.ai = AIService()
         self.cache = CommandCache()
+        self.ai = AIService(cache=self.cache)
+        # Connect to the cloud provider while the user types the first query
+        self.ai.start_prewarm()
         self.help = Help()
         self.os_type = platform.system().lower()
         self.session = self._setup_prompt_session()
         self.WINDOWS_BUILTINS = self._get_windows_builtins()
         self.remote = RemoteSession()
         self.current_context = "local"  # or "remote"
+        self.speculator = None
+        if self.ai.speculation["enabled"] and self.ai.initialized_providers:
+            settings = self.ai.speculation
+            self.speculator = Speculator(
+                self.ai, self.cache, self._looks_like_query,
+                debounce=settings["debounce"], min_words=settings["min_words"],
+                similarity=settings["similarity"], daily_budget=settings["daily_budget"]
+            )
+            self.speculator.attach(self.session.default_buffer)
 
     def _setup_prompt_session(self):
         """Configure interactive prompt with history and autocomplete"""
@@ -208,6 +224,9 @@ class AIShell:
     
     def _get_windows_builtins(self):
         """Get Windows built-in commands dynamically"""
+        # Only meaningful on Windows; elsewhere this would just spawn a shell at startup
+        if self.os_type != 'windows':
+            return set()
         try:
             result = subprocess.run("help", shell=True, stdout=subprocess.PIPE, text=True)
             return set(line.split()[0].lower() for line in result.stdout.splitlines() if line.strip())
@@ -269,6 +288,14 @@ class AIShell:
         except:
             return False
 
+    def _looks_like_query(self, text: str) -> bool:
+        """Whether typed text will go to the AI (checked before speculating on it)"""
+        if self.current_context != "local" or text.startswith(("\\", "ssh")):
+            return False
+        if text.lower() in ('exit shell', 'quit', 'exit', 'local', 'remote', 'disconnect'):
+            return False
+        return not self._is_valid_command(text.split()[0])
+
     def _auto_correct(self, user_input: str) -> str:
         """Fix minor command typos"""
         commands = self._get_system_commands() + [
@@ -381,6 +408,109 @@ class AIShell:
             self._print(f"Command failed: {e.stderr}", color='red')
             return False
 
+    def _show_stats(self):
+        """Show per-provider latency and reliability stats used for routing"""
+        summary = self.ai.stats.summary()
+        if not summary:
+            self._print("No provider statistics yet", 'yellow')
+            self._show_rule_stats()
+            return
+        
+        def ms(value):
+            return f"{value * 1000:.0f} ms" if value is not None else "-"
+        
+        def tokens(value):
+            return f"{value:.0f}" if value is not None else "-"
+        
+        def share(value):
+            return f"{value:.0%}" if value is not None else "-"
+        
+        self._print(f"\n{'Provider':<14}{'Calls':>7}{'p50':>10}{'p95':>10}{'Success':>9}{'Parse fail':>12}"
+                    f"{'Prompt':>8}{'Cached':>8}  Circuit", 'cyan')
+        for name, entry in sorted(summary.items()):
+            breaker = self.ai.breakers.get(name)
+            circuit = breaker.state if breaker else "-"
+            if breaker and breaker.last_error_class and circuit != "closed":
+                circuit += f" ({breaker.last_error_class.replace('_', ' ')})"
+            self._print(
+                f"{name:<14}{entry['calls']:>7}{ms(entry['p50']):>10}{ms(entry['p95']):>10}"
+                f"{entry['success_rate']:>9.0%}{entry['parse_failure_rate']:>12.0%}"
+                f"{tokens(entry['prompt_tokens']):>8}{share(entry['cached_share']):>8}  {circuit}",
+                'green' if name in self.ai.initialized_providers else 'yellow'
+            )
+        for name, entry in sorted(summary.items()):
+            if entry["first_call_cold"] is None and entry["first_call_warm"] is None:
+                continue
+            self._print(
+                f"First call after start/idle to {name}: cold {ms(entry['first_call_cold'])}, "
+                f"pre-warmed {ms(entry['first_call_warm'])} (pre-connect {ms(entry['warmup'])})", 'cyan'
+            )
+        order = self.ai.routing_order()
+        self._print(f"Current routing order: {' -> '.join(order) or 'none'}", 'cyan')
+        if self.ai.is_offline():
+            self._print("Network: offline (cloud providers skipped)", 'yellow')
+        if self.ai.classifier:
+            routing = self.ai.classifier.summary()
+            self._print(f"\nComplexity routing (thresholds {routing['low']:.2f} / {routing['high']:.2f})", 'cyan')
+            for name in ("simple", "moderate", "complex"):
+                entry = routing["classes"].get(name)
+                if not entry:
+                    continue
+                accuracy = lambda value: f"{value:.0%}" if value is not None else "-"
+                self._print(
+                    f"  {name:<10} {entry['queries']:>5} queries  latency {ms(entry['latency']):>8}  "
+                    f"local accepted {accuracy(entry['local_accuracy']):>5}  cloud accepted {accuracy(entry['cloud_accuracy']):>5}",
+                    'green'
+                )
+        if self.speculator and self.speculator.started:
+            spec = self.speculator
+            self._print(
+                f"Speculative generations: {spec.started} started, {spec.used} used, {spec.cancelled} cancelled; "
+                f"paid today {spec.spent}/{spec.daily_budget}", 'cyan'
+            )
+        if self.ai.flights.coalesced:
+            self._print(f"Duplicate requests served by an in-flight generation: {self.ai.flights.coalesced}", 'cyan')
+        self._show_rule_stats()
+    
+    def _show_rule_stats(self):
+        """Rule engine coverage and how many queries it has answered"""
+        engine = get_rule_engine()
+        if not engine:
+            return
+        coverage = engine.coverage(self.os_type)
+        self._print(
+            f"\nRule engine: {coverage['for_os']}/{coverage['intents']} intents for {self.os_type} "
+            f"({coverage['user']} user rules, {coverage['phrases']} exact phrases)", 'cyan'
+        )
+        for error in engine.errors:
+            self._print(f"  Skipped user rule {error}", 'yellow')
+        rules = engine.summary()
+        if not rules["lookups"]:
+            return
+        match_time = f", {rules['match_us']:.0f} µs per lookup" if rules["match_us"] is not None else ""
+        self._print(
+            f"  {rules['hits']}/{rules['lookups']} queries answered ({rules['hit_rate']:.0%}){match_time}, "
+            f"{rules['rejected']} regenerated", 'green'
+        )
+        if rules["top"]:
+            self._print("  Top intents: " + ", ".join(f"{name} {count}" for name, count in rules["top"]), 'green')
+    
+    def _generate(self, user_input: str, regenerate: bool = False):
+        """Generate a command; Ctrl-C cancels it and returns ("", None)"""
+        try:
+            if self.speculator and not regenerate:
+                # Started while the query was being typed
+                generation = self.speculator.take(user_input)
+                if generation:
+                    self.ai.adopt(generation)
+                    return generation.command, generation.explanation
+            # The rule engine has already been tried
+            return self.ai.generate_command(user_input, regenerate=regenerate, rules=False)
+        except KeyboardInterrupt:
+            # generate_command has already cancelled the in-flight requests
+            self._print("\n⛔ Generation cancelled", 'yellow')
+            return "", None
+    
     def _print(self, message, color='green'):
         """Safe color printing across different environments"""
         colors = {
@@ -406,7 +536,14 @@ class AIShell:
         self._print("\n🚀 AI-Powered Shell (type 'exit shell' to quit)")
         while True:
             try:
-                user_input = self.session.prompt(self._get_prompt).strip()
+                if self.speculator:
+                    # Anything still running belongs to an earlier prompt
+                    self.speculator.cancel()
+                    # Background output (speculation) is printed above the prompt
+                    with patch_stdout():
+                        user_input = self.session.prompt(self._get_prompt).strip()
+                else:
+                    user_input = self.session.prompt(self._get_prompt).strip()
                 if user_input == '\\help':
                     self.help.show_guide()
                     continue
@@ -416,6 +553,9 @@ class AIShell:
                     from config import config_manager
                     config_manager.configure()
                     continue  # Skip further processing for this input
+                elif user_input == "\\stats":
+                    self._show_stats()
+                    continue
                 # Handle SSH connection
                 if user_input.startswith('ssh-connect '):
                     try:
@@ -493,40 +633,118 @@ class AIShell:
                     self._execute(cached)
                     continue
 
-                # AI generation for everything else
-                self._print("🤖 Generating command...", 'cyan')
-                command, explanation = self.ai.generate_command(user_input)
-                if not command:
-                    self._print("❌ Failed to generate command", 'red')
-                    continue
-                
-                regenerate = True
-                while regenerate:
-                    self._print(f"\nCommand: {command}", 'green')
-                    if explanation:
-                        self._print(f"Explanation: {explanation}", 'cyan')
-
-                    answer = input(f"{Fore.YELLOW}Run command? (y/N/R){Style.RESET_ALL} ").lower()
-
-                    if answer == 'y':
-                        success = self._execute(command)
-                        if success:
-                            self.cache.save(user_input, command, explanation)
-                        regenerate = False
-                    elif answer == 'r':
-                        self._print("🤖 Regenerating command...", 'cyan')
-                        # Use the new regenerate parameter instead of use_claude
-                        command, explanation = self.ai.generate_command(user_input, regenerate=True)
-                        if not command:
-                            self._print("❌ Regeneration failed!", 'red')
-                            regenerate = False
-                    else:
-                        regenerate = False
+                # Common requests have a fixed answer
+                first = self.ai.match_rule(user_input)
+                if first:
+                    self.ai.adopt(first)
+                else:
+                    # AI generation for everything else
+                    self._print("🤖 Generating command... (Ctrl-C to cancel)", 'cyan')
+                    command, explanation = self._generate(user_input)
+                    if not command:
+                        if command is None:
+                            self._print("❌ Failed to generate command", 'red')
+                        continue
+                    first = Generation(command, explanation, self.ai.last_provider,
+                                       self.ai.last_confidence, self.ai.last_risk)
+                alternatives = None
+                # Rule hits stay off the models unless the user asks (R regenerates)
+                if self.ai.alternatives["enabled"] and first.provider != RULES_PROVIDER:
+                    # Other providers work on it while the user reads this one
+                    alternatives = Alternatives(self.ai, user_input, first, self.ai.alternatives["max_candidates"])
+                explanations = None
+                mode = self.ai.explanations["mode"]
+                if mode != "inline":
+                    # Commands come first; their explanations are generated separately
+                    explanations = Explanations(self.ai, self.cache, user_input, background=mode == "background")
+                try:
+                    self._review(user_input, first, alternatives, explanations)
+                finally:
+                    if alternatives:
+                        alternatives.cancel()
+                    if explanations:
+                        explanations.cancel()
             except KeyboardInterrupt:
                 print("\nUse 'exit shell' to quit")
             except Exception as e:
                 self._print(f"Error: {str(e)}", 'red')
     
+    def _show_candidate(self, generation, alternatives: Optional[Alternatives],
+                        explanations: Optional[Explanations]):
+        description = self.ai.describe(generation.provider)
+        source = f"  [{description}]" if description else ""
+        score = f"  (confidence {generation.confidence:.0%})" if generation.confidence is not None else ""
+        if alternatives and len(alternatives.candidates) > 1:
+            self._print("\nCandidates:", 'cyan')
+            for current, command, description in alternatives.listing():
+                marker = "→" if current else " "
+                self._print(f" {marker} {command or '(generating...)':<50} {description}", 'green' if current else 'cyan')
+        self._print(f"\nCommand: {generation.command}{score}{source}", 'green')
+        explanation = explanations.get(generation) if explanations else generation.explanation
+        if explanation:
+            self._print(f"Explanation: {explanation}", 'cyan')
+        if generation.risk in ("medium", "high"):
+            self._print(f"⚠️ Risk: {generation.risk}", 'red' if generation.risk == "high" else 'yellow')
+        if explanations:
+            explanations.shown(generation)
+
+    def _review(self, user_input: str, generation, alternatives: Optional[Alternatives],
+                explanations: Optional[Explanations] = None):
+        """Show a command and ask whether to run it; R moves on to the next candidate, E explains it"""
+        options = "y/N/R/E" if explanations else "y/N/R"
+        while True:
+            self._show_candidate(generation, alternatives, explanations)
+            answer = input(f"{Fore.YELLOW}Run command? ({options}){Style.RESET_ALL} ").lower()
+
+            if answer == 'y':
+                self.ai.record_feedback(user_input, accepted=True)
+                success = self._execute(generation.command)
+                # Rule commands aren't cached: the rule answers as fast, and follows edits to it
+                if success and generation.provider != RULES_PROVIDER:
+                    if explanations:
+                        explanations.save(generation)
+                    else:
+                        self.cache.save(user_input, generation.command, generation.explanation)
+                return
+            if answer == 'e' and explanations:
+                if explanations.get(generation) is None:
+                    self._print("🤖 Explaining command... (Ctrl-C to cancel)", 'cyan')
+                    try:
+                        if not explanations.wait(generation):
+                            self._print("❌ No explanation available", 'red')
+                    except KeyboardInterrupt:
+                        self._print("\n⛔ Explanation cancelled", 'yellow')
+                continue
+            if answer != 'r':
+                return
+                
+            self.ai.record_feedback(user_input, accepted=False)
+            candidate = None
+            if alternatives:
+                if not alternatives.ready():
+                    self._print("🤖 Waiting for alternatives... (Ctrl-C to cancel)", 'cyan')
+                try:
+                    candidate = alternatives.next()
+                except KeyboardInterrupt:
+                    self._print("\n⛔ Generation cancelled", 'yellow')
+                    return
+                # Held back while they ran, so as not to interrupt the prompt
+                for message, color in alternatives.take_failures():
+                    self._print(message, color)
+            if candidate is None:
+                # No other candidate: run the regeneration chain
+                self._print("🤖 Regenerating command...", 'cyan')
+                command, explanation = self._generate(user_input, regenerate=True)
+                if not command:
+                    if command is None:
+                        self._print("❌ Regeneration failed!", 'red')
+                    return
+                candidate = Generation(command, explanation, self.ai.last_provider,
+                                       self.ai.last_confidence, self.ai.last_risk)
+                if alternatives:
+                    alternatives.add(candidate)
+            generation = candidate
+
     def _connect_ssh(self, hostname: str, username: str, key_path: str):
         self.remote.ssh = paramiko.SSHClient()
         self.remote.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -0,0 +1,96 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import List, Optional, Tuple
+
+from async_runtime import WAIT_SLICE
+
+class Alternatives:
+    """Candidate commands for one query, with alternatives generated in the background
+
+    As soon as the first command is shown, the next providers in the
+    regeneration order are asked for the same query, each on its own.
+    By the time the user has read the command and pressed R, the
+    alternatives are usually there already. Duplicates of a candidate
+    already listed are dropped.
+    """
+
+    def __init__(self, ai, user_input: str, first, limit: int):
+        self.ai = ai
+        self.user_input = user_input
+        self.candidates = [first]  # Generations, in order of arrival
+        self.index = 0  # Candidate currently shown
+        self.failures = []  # (message, color) from alternatives that produced no command
+        providers = ai.alternative_providers(exclude=first.provider)[:max(0, limit)]
+        self.pending = {name: ai.generate_alternative(name, user_input) for name in providers}
+
+    @property
+    def current(self):
+        return self.candidates[self.index]
+
+    def _collect(self):
+        for name, future in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[name]
+            if future.cancelled() or future.exception() is not None:
+                continue
+            generation = future.result()
+            if not generation.command:
+                self.failures.extend(generation.messages)
+            self.add(generation)
+
+    def add(self, generation) -> bool:
+        """Add a candidate unless it has no command or repeats one already listed"""
+        if not generation.command or any(c.command == generation.command for c in self.candidates):
+            return False
+        self.candidates.append(generation)
+        return True
+
+    def ready(self) -> bool:
+        """Whether next() can answer without waiting"""
+        self._collect()
+        return self.index + 1 < len(self.candidates) or not self.pending
+
+    def next(self):
+        """The next candidate, waiting only when none is ready yet
+
+        After the last one it wraps around to the first. Returns None
+        when there is no other candidate at all. An interrupted wait
+        (Ctrl-C) cancels the alternatives still being generated.
+        """
+        self._collect()
+        try:
+            while self.index + 1 >= len(self.candidates) and self.pending:
+                wait(list(self.pending.values()), timeout=WAIT_SLICE, return_when=FIRST_COMPLETED)
+                self._collect()
+        except BaseException:
+            self.cancel()
+            raise
+        if len(self.candidates) < 2:
+            return None
+        self.index = (self.index + 1) % len(self.candidates)
+        return self.current
+
+    def take_failures(self) -> List[Tuple[str, str]]:
+        """What the alternatives that failed so far reported, once each"""
+        self._collect()
+        failures, self.failures = self.failures, []
+        return failures
+
+    def listing(self) -> List[Tuple[bool, str, str]]:
+        """(is current, command, provider description) per candidate, then the ones still generating"""
+        self._collect()
+        rows = [
+            (i == self.index, c.command, self._describe(c.provider))
+            for i, c in enumerate(self.candidates)
+        ]
+        rows += [(False, "", self._describe(name)) for name in self.pending]
+        return rows
+
+    def cancel(self):
+        """Stop the generations still running (the user has decided)"""
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def _describe(self, provider_name: Optional[str]) -> str:
+        return self.ai.describe(provider_name) or "-"
@@ -1,9 +1,13 @@
 from typing import Tuple, Optional, Dict, Any
 from termcolor import colored
 import importlib.util
+import json
 
-from .base_provider import BaseProvider
-from .response_parser import ResponseParser
+from .base_provider import BaseProvider, report
+from .http_pool import get_async_client, get_sync_client, warm
+from .deadline import Deadline, DEFAULT_QUERY_TIMEOUT, DEFAULT_MAX_RETRIES
+from . import prompts
+from .response_parser import COMMAND_TOOL_DESCRIPTION, COMMAND_TOOL_NAME, ResponseParser
 
 class AnthropicProvider(BaseProvider):
     """Anthropic Claude API provider"""
@@ -11,6 +15,7 @@ class AnthropicProvider(BaseProvider):
     def __init__(self):
         self.client = None
         self.model = None
+        self._client_args = {}
         
     @property
     def name(self) -> str:
@@ -28,7 +33,6 @@ class AnthropicProvider(BaseProvider):
                 print(colored("⚠️ Anthropic package not installed. Run 'pip install anthropic'", "yellow"))
                 return False
                 
-            import anthropic
             api_key = config.get("api_key")
             self.model = config.get("model")
             
@@ -36,19 +40,20 @@ class AnthropicProvider(BaseProvider):
                 print(colored("⚠️ Anthropic API key not configured", "yellow"))
                 return False
                 
-            self.client = anthropic.Anthropic(api_key=api_key)
+            # Import only once we know it will be used; the SDK is slow to load
+            import anthropic
+            self._client_args = {
+                "api_key": api_key,
+                "timeout": DEFAULT_QUERY_TIMEOUT,
+                "max_retries": DEFAULT_MAX_RETRIES
+            }
+            self.client = anthropic.Anthropic(**self._client_args, http_client=get_sync_client(getattr(anthropic, "DefaultHttpxClient", None)))
             
             # Use default model if not specified
             if not self.model:
                 self.model = "claude-3-haiku-20240307"
                 
-            # Test connection
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=5,
-                messages=[{"role": "user", "content": "Hi"}]
-            )
-            
+            # No test call: AIService pre-warms the connection in the background
             print(colored(f"✓ Anthropic initialized successfully with model {self.model}", "green"))
             return True
             
@@ -56,40 +61,212 @@ class AnthropicProvider(BaseProvider):
             print(colored(f"⚠️ Anthropic initialization failed: {str(e)}", "yellow"))
             return False
     
-    def generate_command(self, user_input: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    def generate_command(self, user_input: str, os_type: str,
+                         deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate command using Anthropic direct API"""
         if not self.client:
             return None, None
             
+        deadline = deadline or Deadline()
         try:
-            system_prompt = f"""You are a {os_type} terminal expert. Follow STRICTLY:
-                1. Respond with ONLY the executable command on FIRST LINE
-                2. Use Windows cmd commands when target is windows
-                3. Use bash commands when target is linux/mac
-                4. Current system: {os_type}
-                5. Example Windows alternatives:
-                   - clear -> cls
-                   - ls -> dir
-                   - grep -> findstr"""
-            
-            response = self.client.messages.create(
-                model=self.model,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": f"Convert to terminal command: {user_input}\n\nCommand:"}
-                ],
-                temperature=0.5,
-                max_tokens=1000
+            import anthropic
+            client = self.client.with_options(
+                timeout=self._http_timeout(deadline, anthropic.Timeout),
+                max_retries=deadline.retries()
             )
+            request = self._request(user_input, os_type)
+            if not self.streaming:
+                raw = client.messages.with_raw_response.create(**request)
+                self._observe_headers(raw.headers)
+                return self._result(raw.parse())
+                
+            raw = client.messages.with_raw_response.create(**request, stream=True)
+            self._observe_headers(raw.headers)
+            stream = raw.parse()
+            parser = self._parser()
+            try:
+                stopped = self._read_stream(self._deltas(stream), parser)
+            finally:
+                # Closing the connection early also stops the generation
+                stream.close()
+            return self._explained(*self._stream_result(parser, stopped))
             
-            if not response.content:
-                return None, None
+        except Exception as e:
+            self.last_error = e
+            report(f"⚠️ Anthropic API Error: {str(e)}", "red")
+            return None, None
+    
+    async def agenerate_command(self, user_input: str, os_type: str,
+                                deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Generate command using Anthropic on the running event loop"""
+        if not self.client:
+            return None, None
+            
+        deadline = deadline or Deadline()
+        try:
+            import anthropic
+            client = self._loop_client(self._make_async_client).with_options(
+                timeout=self._http_timeout(deadline, anthropic.Timeout),
+                max_retries=deadline.retries()
+            )
+            request = self._request(user_input, os_type)
+            if not self.streaming:
+                raw = await client.messages.with_raw_response.create(**request)
+                self._observe_headers(raw.headers)
+                return self._result(await self._aparse(raw))
                 
-            full_response = response.content[0].text
-            command, explanation = ResponseParser.parse_response(full_response)
+            raw = await client.messages.with_raw_response.create(**request, stream=True)
+            self._observe_headers(raw.headers)
+            stream = await self._aparse(raw)
+            parser = self._parser()
+            try:
+                stopped = await self._aread_stream(self._adeltas(stream), parser)
+            finally:
+                await stream.close()
+            return self._explained(*self._stream_result(parser, stopped))
             
-            return command, explanation if explanation else f"Generated by Anthropic ({self.model})"
+        except Exception as e:
+            self.last_error = e
+            report(f"⚠️ Anthropic API Error: {str(e)}", "red")
+            return None, None
+    
+    def explain_command(self, user_input: str, command: str, os_type: str,
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using Anthropic direct API"""
+        if not self.client:
+            return None
             
+        deadline = deadline or Deadline()
+        try:
+            import anthropic
+            client = self.client.with_options(
+                timeout=self._http_timeout(deadline, anthropic.Timeout),
+                max_retries=deadline.retries()
+            )
+            return self._explanation(client.messages.create(**self._explanation_request(user_input, command, os_type)))
         except Exception as e:
-            print(colored(f"⚠️ Anthropic API Error: {str(e)}", "red"))
+            self.last_error = e
+            return None
+    
+    async def aexplain_command(self, user_input: str, command: str, os_type: str,
+                               deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using Anthropic on the running event loop"""
+        if not self.client:
+            return None
+            
+        deadline = deadline or Deadline()
+        try:
+            import anthropic
+            client = self._loop_client(self._make_async_client).with_options(
+                timeout=self._http_timeout(deadline, anthropic.Timeout),
+                max_retries=deadline.retries()
+            )
+            return self._explanation(await client.messages.create(**self._explanation_request(user_input, command, os_type)))
+        except Exception as e:
+            self.last_error = e
+            return None
+    
+    async def awarm(self, deadline: Optional[Deadline] = None) -> bool:
+        """Create the async client and open a pooled connection to its endpoint"""
+        if not self.client:
+            return False
+        import anthropic
+        client = self._loop_client(self._make_async_client)
+        await warm(client.base_url, getattr(anthropic, "DefaultAsyncHttpxClient", None),
+                   (deadline or Deadline()).timeout())
+        return True
+    
+    def _make_async_client(self):
+        import anthropic
+        return anthropic.AsyncAnthropic(**self._client_args, http_client=get_async_client(getattr(anthropic, "DefaultAsyncHttpxClient", None)))
+    
+    def _request(self, user_input: str, os_type: str) -> Dict[str, Any]:
+        """Messages API arguments, shared by the sync and async paths
+        
+        The tools and the registry's system prompt form a byte-stable
+        prefix; once it is long enough to be cached, a breakpoint after
+        it lets repeat calls read it from the prompt cache.
+        """
+        system = prompts.system_prompt(os_type, self.structured, explain=not self.command_only)
+        user = prompts.user_message(user_input, self.structured)
+        self._record_usage(prompts.estimate_tokens(system + user), estimated=True)
+        cache = self.prompt_caching and prompts.supports_cache_control(self.name, self.model)
+        request = {
+            "model": self.model,
+            "system": prompts.system_blocks(system, cache),
+            "messages": [
+                {"role": "user", "content": user}
+            ],
+            "temperature": 0.5,
+            # Command-first: just room for the command. The API rejects a
+            # newline stop sequence, so a streamed free-text answer is cut
+            # at the end of the command line by closing the stream instead.
+            "max_tokens": self.command_max_tokens if self.command_only else 1000
+        }
+        if self.structured:
+            # Forced tool use: the input follows the command schema
+            request["tools"] = [{
+                "name": COMMAND_TOOL_NAME,
+                "description": COMMAND_TOOL_DESCRIPTION,
+                "input_schema": self._schema()
+            }]
+            request["tool_choice"] = {"type": "tool", "name": COMMAND_TOOL_NAME}
+        return request
+    
+    def _explanation_request(self, user_input: str, command: str, os_type: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "system": prompts.explanation_prompt(os_type),
+            "messages": [
+                {"role": "user", "content": prompts.explanation_message(user_input, command)}
+            ],
+            "temperature": 0.3,
+            "max_tokens": self.explanation_max_tokens
+        }
+    
+    @staticmethod
+    def _explanation(response) -> Optional[str]:
+        text = next((b.text for b in response.content if b.type == "text"), None)
+        return ResponseParser.parse_explanation(text)
+    
+    def _result(self, response) -> Tuple[Optional[str], Optional[str]]:
+        self._usage(getattr(response, "usage", None))
+        if not response.content:
             return None, None
+            
+        block = next((b for b in response.content if b.type == "tool_use"), response.content[0])
+        text = json.dumps(block.input) if block.type == "tool_use" else block.text
+        return self._explained(*self._parse_text(text))
+    
+    def _explained(self, command: Optional[str], explanation: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        if explanation or self.command_only:
+            # Command-first: the explanation is fetched later
+            return command, explanation
+        return command, f"Generated by Anthropic ({self.model})"
+    
+    def _deltas(self, stream):
+        """Text of each streamed delta event (text, or tool input JSON)"""
+        for event in stream:
+            if event.type == "message_start":
+                self._usage(event.message.usage)
+            elif event.type == "content_block_delta":
+                yield self._delta_text(event.delta)
+    
+    async def _adeltas(self, stream):
+        async for event in stream:
+            if event.type == "message_start":
+                self._usage(event.message.usage)
+            elif event.type == "content_block_delta":
+                yield self._delta_text(event.delta)
+    
+    @staticmethod
+    def _delta_text(delta) -> Optional[str]:
+        return getattr(delta, "partial_json", None) or getattr(delta, "text", None)
+    
+    def _usage(self, usage):
+        """Prompt token counts; input_tokens excludes the cached part"""
+        if usage is None:
+            return
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        written = getattr(usage, "cache_creation_input_tokens", None) or 0
+        self._record_usage(usage.input_tokens + cached + written, cached)
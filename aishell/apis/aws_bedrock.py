@@ -1,11 +1,33 @@
-import boto3
+import asyncio
+import contextvars
 import json
+import importlib.util
+import time
 from typing import Tuple, Optional, Dict, Any
-from botocore.config import Config
 from termcolor import colored
 
-from .base_provider import BaseProvider
-from .response_parser import ResponseParser
+from .base_provider import BaseProvider, call_within, report, run_in_thread
+from .deadline import Deadline, DEFAULT_QUERY_TIMEOUT, DEFAULT_CONNECT_TIMEOUT, DEFAULT_MAX_RETRIES
+from .errors import NETWORK, RATE_LIMIT, SERVER, classify_error
+from . import prompts
+from .response_parser import COMMAND_TOOL_DESCRIPTION, COMMAND_TOOL_NAME, ResponseParser
+
+# The cheapest bedrock-runtime request, used to pre-warm the connection. It
+# generates nothing, and an AccessDenied answer opens the connection just as well
+WARM_OPERATION = "list_async_invokes"
+
+# Errors worth another attempt, as botocore's standard retry mode has it
+RETRYABLE_ERRORS = (SERVER, NETWORK, RATE_LIMIT)
+RETRY_BACKOFF = 0.5  # Seconds before the first retry, doubling after that
+
+# Read timeout of the call in progress in this context; a before-call hook
+# hands it to botocore, whose clients otherwise fix it at construction
+_read_timeout = contextvars.ContextVar("bedrock_read_timeout", default=None)
+
+def _set_read_timeout(context=None, **kwargs):
+    read_timeout = _read_timeout.get()
+    if read_timeout is not None and context is not None:
+        context['read_timeout'] = read_timeout
 
 class AWSBedrockProvider(BaseProvider):
     """AWS Bedrock provider for Claude models"""
@@ -14,6 +36,7 @@ class AWSBedrockProvider(BaseProvider):
         self.client = None
         self.model_id = None
         self.region = None
+        self._client_args = {}
         
     @property
     def name(self) -> str:
@@ -26,6 +49,11 @@ class AWSBedrockProvider(BaseProvider):
     def initialize(self, config: Dict[str, Any]) -> bool:
         """Initialize AWS Bedrock with configuration"""
         try:
+            # Check if boto3 is installed (imported lazily, it is slow to load)
+            if importlib.util.find_spec("boto3") is None:
+                print(colored("⚠️ boto3 package not installed. Run 'pip install boto3'", "yellow"))
+                return False
+                
             access_key = config.get("access_key_id")
             secret_key = config.get("secret_access_key")
             self.region = config.get("region")
@@ -35,29 +63,18 @@ class AWSBedrockProvider(BaseProvider):
                 print(colored("⚠️ AWS credentials not fully configured", "yellow"))
                 return False
                 
-            self.client = boto3.client(
-                'bedrock-runtime',
-                region_name=self.region,
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                config=Config(retries={'max_attempts': 5, 'mode': 'standard'})
-            )
-            
-            # Test the connection
+            self._client_args = {
+                "region_name": self.region,
+                "aws_access_key_id": access_key,
+                "aws_secret_access_key": secret_key,
+            }
+            self.client = self._make_client()
+            
             if not self.model_id:
                 self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
                 print(colored("⚠️ AWS Bedrock model ID not configured - using default", "yellow"))
                 
-            test_response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 5,
-                    "messages": [{"role": "user", "content": [{"type": "text", "text": "Hi"}]}],
-                    "temperature": 0
-                })
-            )
-            
+            # No test call: AIService pre-warms the connection in the background
             print(colored(f"✓ Claude (AWS Bedrock) initialized successfully with model {self.model_id}", "green"))
             return True
             
@@ -65,95 +82,369 @@ class AWSBedrockProvider(BaseProvider):
             print(colored(f"⚠️ AWS Bedrock initialization failed: {str(e)}", "yellow"))
             return False
             
-    def generate_command(self, user_input: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    def _make_client(self):
+        """bedrock-runtime client shared by every call
+        
+        Its read timeout is only a default: each call sets its own from
+        the deadline (see _attempts). botocore makes a single attempt, and
+        retries are left to _attempts, which fits them to the budget.
+        """
+        import boto3
+        from botocore.config import Config
+        client = boto3.client(
+            'bedrock-runtime',
+            config=Config(
+                connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                read_timeout=DEFAULT_QUERY_TIMEOUT,
+                retries={'total_max_attempts': 1, 'mode': 'standard'}
+            ),
+            **self._client_args
+        )
+        client.meta.events.register('before-call.bedrock-runtime', _set_read_timeout)
+        return client
+    
+    def generate_command(self, user_input: str, os_type: str,
+                         deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate command using Claude with AWS Bedrock"""
         if not self.client:
             return None, None
             
+        deadline = deadline or Deadline()
         try:
-            system_prompt = f"""You are a {os_type} terminal expert. Follow STRICTLY:
-                1. Respond with ONLY the executable command on FIRST LINE
-                2. Use Windows cmd commands when target is windows
-                3. Use bash commands when target is linux/mac
-                4. Current system: {os_type}
-                5. Example Windows alternatives:
-                   - clear -> cls
-                   - ls -> dir
-                   - grep -> findstr
-                6. For file size queries:
-                   - "under 100MB" -> use "-size -100M" in find command or "where size < 100000000" in PowerShell
-                   - "over 1GB" -> use "-size +1G" in find command or "where size > 1000000000" in PowerShell"""
-                
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "system": system_prompt,
-                    "messages": [{
-                        "role": "user",
-                        "content": [{
-                            "type": "text", 
-                            "text": f"Convert to terminal command: {user_input}\n\nCommand:"
-                        }]
-                    }],
-                    "temperature": 0.5
-                })
-            )
-            
-            # Handle the response properly
-            response_body = json.loads(response['body'].read())
-            if 'content' not in response_body or not response_body['content']:
-                print(colored("⚠️ Empty response from Claude", "red"))
-                return None, None
+            body = self._command_body(user_input, os_type)
+            if self.streaming:
+                command, explanation = self._stream(body, os_type, deadline)
+            else:
+                command, explanation = self._parse_body(self._invoke(body, deadline), os_type)
+            
+            # Special handling for queries with comparison operators (free-text
+            # answers only; structured output has nothing to mis-parse)
+            if (command is None and not self.structured and any(op in user_input for op in ['>', '<'])
+                    and not deadline.expired()):
+                return self._handle_special_char_query(user_input, os_type, deadline)
                 
-            full_response = response_body['content'][0]['text']
-            command, explanation = ResponseParser.parse_claude_response(full_response, os_type)
+            return command, explanation
             
-            # Special handling for queries with comparison operators
-            if command is None and any(op in user_input for op in ['>', '<']):
-                return self._handle_special_char_query(user_input, os_type)
+        except Exception as e:
+            self.last_error = e
+            report(f"⚠️ Claude API Error: {str(e)}", "red")
+            return None, None
+    
+    async def agenerate_command(self, user_input: str, os_type: str,
+                                deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Generate command using Claude with AWS Bedrock on the running event loop
+        
+        Native when aiobotocore is installed; otherwise the boto3 client runs
+        in a worker thread (boto3 keeps its own connection pool either way).
+        """
+        if not self.client:
+            return None, None
+        if importlib.util.find_spec("aiobotocore") is None:
+            return await super().agenerate_command(user_input, os_type, deadline)
+            
+        deadline = deadline or Deadline()
+        try:
+            body = self._command_body(user_input, os_type)
+            if self.streaming:
+                command, explanation = await self._astream(body, os_type, deadline)
+            else:
+                command, explanation = self._parse_body(await self._ainvoke(body, deadline), os_type)
+            
+            if (command is None and not self.structured and any(op in user_input for op in ['>', '<'])
+                    and not deadline.expired()):
+                response_body = await self._ainvoke(self._special_char_body(user_input, os_type), deadline)
+                command, explanation = self._parse_body(response_body, os_type, "Generated by Claude (special handling)")
                 
-            return command, explanation if explanation else f"Generated by Claude ({self.model_id.split('.')[-1]})"
+            return command, explanation
+            
+        except Exception as e:
+            self.last_error = e
+            report(f"⚠️ Claude API Error: {str(e) or type(e).__name__}", "red")
+            return None, None
+    
+    def explain_command(self, user_input: str, command: str, os_type: str,
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using Claude with AWS Bedrock"""
+        if not self.client:
+            return None
+            
+        deadline = deadline or Deadline()
+        try:
+            return self._explanation(self._invoke(self._explanation_body(user_input, command, os_type), deadline))
+        except Exception as e:
+            self.last_error = e
+            return None
+    
+    async def aexplain_command(self, user_input: str, command: str, os_type: str,
+                               deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command on the running event loop (in a thread without aiobotocore)"""
+        if not self.client:
+            return None
+        if importlib.util.find_spec("aiobotocore") is None:
+            return await super().aexplain_command(user_input, command, os_type, deadline)
+            
+        deadline = deadline or Deadline()
+        try:
+            return self._explanation(await self._ainvoke(self._explanation_body(user_input, command, os_type), deadline))
+        except Exception as e:
+            self.last_error = e
+            return None
+    
+    async def awarm(self, deadline: Optional[Deadline] = None) -> bool:
+        """Create the client generations will use and connect it to the endpoint"""
+        if not self.client:
+            return False
+        deadline = deadline or Deadline()
+        if importlib.util.find_spec("aiobotocore") is None:
+            # The one client every generation uses, so its pooled connection is the warm one
+            await asyncio.wrap_future(run_in_thread(self._warm, self.client))
+            return True
             
+        client = await self._loop_client(lambda: asyncio.ensure_future(self._open_async_client()))
+        operation = getattr(client, WARM_OPERATION, None)
+        if operation is not None:
+            try:
+                await asyncio.wait_for(operation(maxResults=1), deadline.timeout())
+            except Exception as e:
+                if not self._answered(e):
+                    raise
+        return True
+    
+    def _warm(self, client):
+        operation = getattr(client, WARM_OPERATION, None)
+        if operation is None:
+            return
+        try:
+            operation(maxResults=1)
         except Exception as e:
-            print(colored(f"⚠️ Claude API Error: {str(e)}", "red"))
+            if not self._answered(e):
+                raise
+    
+    @staticmethod
+    def _answered(error: Exception) -> bool:
+        """An error response from the service: the connection itself is open"""
+        from botocore.exceptions import ClientError
+        return isinstance(error, ClientError)
+    
+    def _attempts(self, deadline: Deadline, call):
+        """call() with the deadline's read timeout, retried while the budget allows
+        
+        As many retries as deadline.retries() grants when the call starts,
+        for the errors botocore would retry, never past the deadline.
+        """
+        attempts = deadline.retries() + 1
+        for attempt in range(1, attempts + 1):
+            _read_timeout.set(deadline.timeout(DEFAULT_QUERY_TIMEOUT))
+            try:
+                return call()
+            except Exception as e:
+                if attempt == attempts or classify_error(e) not in RETRYABLE_ERRORS or deadline.expired():
+                    raise
+            backoff = RETRY_BACKOFF * 2 ** (attempt - 1)
+            remaining = deadline.remaining()
+            time.sleep(backoff if remaining is None else min(backoff, remaining))
+    
+    def _invoke(self, body: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        def invoke():
+            response = self.client.invoke_model(modelId=self.model_id, body=json.dumps(body))
+            return json.loads(response['body'].read())
+            
+        # The call times out and stops retrying by itself near the deadline;
+        # call_within makes sure the caller is not held past it
+        return call_within(deadline, self._attempts, deadline, invoke)
+    
+    async def _ainvoke(self, body: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        client = await self._loop_client(lambda: asyncio.ensure_future(self._open_async_client()))
+        
+        async def invoke():
+            response = await client.invoke_model(modelId=self.model_id, body=json.dumps(body))
+            async with response['body'] as stream:
+                return json.loads(await stream.read())
+                
+        # One long-lived client per loop; the deadline is enforced by cancellation
+        return await asyncio.wait_for(invoke(), deadline.timeout())
+    
+    def _stream(self, body: Dict[str, Any], os_type: str,
+                deadline: Deadline) -> Tuple[Optional[str], Optional[str]]:
+        """Streamed invocation, cut off once the command line is complete"""
+        def read():
+            # A parser of its own: a read abandoned at the deadline may still
+            # be feeding it after this call has returned
+            parser = self._parser(os_type, strict=True)
+            response = self._attempts(deadline, lambda: self.client.invoke_model_with_response_stream(
+                modelId=self.model_id, body=json.dumps(body)))
+            stream = response['body']
+            try:
+                return parser, self._read_stream(self._deltas(stream), parser, deadline)
+            finally:
+                # Closing the connection early also stops the generation
+                stream.close()
+                
+        parser, stopped = call_within(deadline, read)
+        return self._explained(*self._stream_result(parser, stopped))
+    
+    async def _astream(self, body: Dict[str, Any], os_type: str,
+                       deadline: Deadline) -> Tuple[Optional[str], Optional[str]]:
+        client = await self._loop_client(lambda: asyncio.ensure_future(self._open_async_client()))
+        parser = self._parser(os_type, strict=True)
+        
+        async def read():
+            response = await client.invoke_model_with_response_stream(modelId=self.model_id, body=json.dumps(body))
+            stream = response['body']
+            try:
+                return await self._aread_stream(self._adeltas(stream), parser)
+            finally:
+                stream.close()
+                
+        stopped = await asyncio.wait_for(read(), deadline.timeout())
+        return self._explained(*self._stream_result(parser, stopped))
+    
+    def _delta_text(self, event: Dict[str, Any]) -> Optional[str]:
+        """Text (or tool input JSON) of a streamed content_block_delta event"""
+        chunk = event.get('chunk')
+        if not chunk:
+            return None
+        data = json.loads(chunk['bytes'])
+        if data.get('type') == 'message_start':
+            self._usage(data.get('message', {}).get('usage'))
+        elif data.get('type') == 'content_block_delta':
+            delta = data.get('delta', {})
+            return delta.get('partial_json') or delta.get('text')
+        return None
+    
+    def _deltas(self, stream):
+        for event in stream:
+            yield self._delta_text(event)
+    
+    async def _adeltas(self, stream):
+        async for event in stream:
+            yield self._delta_text(event)
+    
+    async def _open_async_client(self):
+        from aiobotocore.session import get_session
+        from botocore.config import Config
+        context = get_session().create_client(
+            'bedrock-runtime',
+            config=Config(
+                connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                read_timeout=DEFAULT_QUERY_TIMEOUT,
+                retries={'total_max_attempts': DEFAULT_MAX_RETRIES + 1, 'mode': 'standard'}
+            ),
+            **self._client_args
+        )
+        # Kept open for the life of the loop so its connections are reused
+        return await context.__aenter__()
+    
+    def _command_body(self, user_input: str, os_type: str) -> Dict[str, Any]:
+        system = prompts.system_prompt(os_type, self.structured, explain=not self.command_only)
+        user = prompts.user_message(user_input, self.structured)
+        self._record_usage(prompts.estimate_tokens(system + user), estimated=True)
+        # Only some Bedrock models accept a cache breakpoint on the prefix
+        cache = self.prompt_caching and prompts.supports_cache_control(self.name, self.model_id)
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            # Command-first: just room for the command (as with the Anthropic
+            # API, a streamed answer is cut at the end of its line instead of
+            # by a newline stop sequence)
+            "max_tokens": self.command_max_tokens if self.command_only else 1000,
+            "system": prompts.system_blocks(system, cache),
+            "messages": [{
+                "role": "user",
+                "content": [{
+                    "type": "text", 
+                    "text": user
+                }]
+            }],
+            "temperature": 0.5
+        }
+        if self.structured:
+            # Forced tool use: the input follows the command schema
+            body["tools"] = [{
+                "name": COMMAND_TOOL_NAME,
+                "description": COMMAND_TOOL_DESCRIPTION,
+                "input_schema": self._schema()
+            }]
+            body["tool_choice"] = {"type": "tool", "name": COMMAND_TOOL_NAME}
+        return body
+    
+    def _explanation_body(self, user_input: str, command: str, os_type: str) -> Dict[str, Any]:
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": self.explanation_max_tokens,
+            "system": prompts.explanation_prompt(os_type),
+            "messages": [{
+                "role": "user",
+                "content": [{
+                    "type": "text",
+                    "text": prompts.explanation_message(user_input, command)
+                }]
+            }],
+            "temperature": 0.3
+        }
+    
+    @staticmethod
+    def _explanation(response_body: Dict[str, Any]) -> Optional[str]:
+        text = next((b.get('text') for b in response_body.get('content') or [] if b.get('type') == 'text'), None)
+        return ResponseParser.parse_explanation(text)
+    
+    @staticmethod
+    def _special_char_body(query: str, os_type: str) -> Dict[str, Any]:
+        # Replace comparison operators with words to avoid parsing issues
+        clean_query = query.replace(">", " greater than ").replace("<", " less than ")
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 500,
+            "system": f"Generate a {os_type} terminal command with proper operator handling",
+            "messages": [{
+                "role": "user",
+                "content": [{
+                    "type": "text",
+                    "text": f"Convert to safe terminal command (use PowerShell or appropriate alternatives for Windows): {clean_query}"
+                }]
+            }],
+            "temperature": 0.3
+        }
+    
+    def _parse_body(self, response_body: Dict[str, Any], os_type: str,
+                    default_explanation: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        if 'content' not in response_body or not response_body['content']:
+            report("⚠️ Empty response from Claude", "red")
             return None, None
+            
+        self._usage(response_body.get('usage'))
+        content = response_body['content']
+        block = next((b for b in content if b.get('type') == 'tool_use'), content[0])
+        text = json.dumps(block['input']) if block.get('type') == 'tool_use' else block.get('text')
+        command, explanation = self._parse_text(text, os_type, strict=True)
+        return self._explained(command, explanation, default_explanation)
+    
+    def _explained(self, command: Optional[str], explanation: Optional[str],
+                   default_explanation: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        if explanation or self.command_only:
+            # Command-first: the explanation is fetched later
+            return command, explanation
+        return command, (
+            default_explanation or f"Generated by Claude ({self.model_id.split('.')[-1]})")
     
-    def _handle_special_char_query(self, query: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    def _usage(self, usage: Optional[Dict[str, Any]]):
+        """Prompt token counts; input_tokens excludes the cached part"""
+        if not usage or 'input_tokens' not in usage:
+            return
+        cached = usage.get('cache_read_input_tokens') or 0
+        written = usage.get('cache_creation_input_tokens') or 0
+        self._record_usage(usage['input_tokens'] + cached + written, cached)
+    
+    def _handle_special_char_query(self, query: str, os_type: str,
+                                   deadline: Deadline) -> Tuple[Optional[str], Optional[str]]:
         """Special handling for comparison operators with proper escaping"""
         if not self.client:
             return None, None
             
         try:
-            # Replace comparison operators with words to avoid parsing issues
-            clean_query = query.replace(">", " greater than ").replace("<", " less than ")
-            
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 500,
-                    "system": f"Generate a {os_type} terminal command with proper operator handling",
-                    "messages": [{
-                        "role": "user",
-                        "content": [{
-                            "type": "text",
-                            "text": f"Convert to safe terminal command (use PowerShell or appropriate alternatives for Windows): {clean_query}"
-                        }]
-                    }],
-                    "temperature": 0.3
-                })
-            )
-            
-            response_body = json.loads(response['body'].read())
-            if 'content' not in response_body or not response_body['content']:
-                return None, None
-                
-            full_response = response_body['content'][0]['text']
-            command, explanation = ResponseParser.parse_claude_response(full_response, os_type)
-            return command, explanation if explanation else f"Generated by Claude (special handling)"
+            response_body = self._invoke(self._special_char_body(query, os_type), deadline)
+            return self._parse_body(response_body, os_type, "Generated by Claude (special handling)")
             
         except Exception as e:
-            print(colored(f"⚠️ Fallback Error: {str(e)}", "red"))
+            self.last_error = e
+            report(f"⚠️ Fallback Error: {str(e)}", "red")
             return None, None
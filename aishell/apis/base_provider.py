@@ -1,23 +1,112 @@
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Iterable, AsyncIterable, List
+from concurrent.futures import Future
+from termcolor import colored
 import abc
+import concurrent.futures
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import weakref
+
+from .deadline import Deadline
+from .response_parser import COMMAND_ONLY_SCHEMA, COMMAND_SCHEMA, ResponseParser, StreamingCommandParser
+
+# Per-call provider state (e.g. last_error). A context variable rather than
+# instance attributes, so concurrent calls - in threads or asyncio tasks -
+# each see their own results.
+_call_state = contextvars.ContextVar("provider_call_state", default=None)
+# Messages of calls nobody is watching (alternatives generated in the
+# background, speculation) go to this list instead of the terminal
+_held_messages = contextvars.ContextVar("held_provider_messages", default=None)
 
 class BaseProvider(abc.ABC):
     """Base interface that all API providers must implement"""
     
+    # Attached by AIService; providers feed it the rate-limit headers they see
+    rate_limiter = None
+    # Set by AIService from the "streaming" config section: stream responses,
+    # and stop reading once the command line is complete
+    streaming = True
+    stop_after_command = True
+    # Ask for {command, explanation, risk} as structured output instead of free text
+    structured = True
+    # Mark the static prompt prefix for provider-side caching where supported
+    prompt_caching = True
+    # Set by AIService from the "explanations" config section: ask for the
+    # command alone, in a short completion that ends with its line, and
+    # leave the explanation to explain_command
+    command_only = False
+    command_max_tokens = 100
+    explanation_max_tokens = 150
+    
     @abc.abstractmethod
     def initialize(self, config: Dict[str, Any]) -> bool:
         """Initialize the provider with configuration"""
         pass
         
     @abc.abstractmethod
-    def generate_command(self, user_input: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    def generate_command(self, user_input: str, os_type: str,
+                         deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate a command from user input
         
+        Args:
+            deadline: Time budget for the query; timeouts and retries are
+                derived from what is left of it
+        
         Returns:
             tuple: (command, explanation) or (None, None) on failure
         """
         pass
         
+    async def agenerate_command(self, user_input: str, os_type: str,
+                                deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Async variant of generate_command
+        
+        The default runs the synchronous implementation in a worker thread;
+        providers with an async SDK override it so calls share the event
+        loop (and its pooled connections) instead of needing a thread each.
+        """
+        def call():
+            # The thread runs in a copy of this context: hand back what the call set
+            result = self.generate_command(user_input, os_type, deadline)
+            return result, self._own_call_state()
+            
+        result, state = await asyncio.wrap_future(run_in_thread(contextvars.copy_context().run, call))
+        for key in ("error", "confidence", "risk", "usage"):
+            self._set_call_state(key, state.get(key))
+        return result
+        
+    def explain_command(self, user_input: str, command: str, os_type: str,
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command that was generated without its explanation
+        
+        Returns one short sentence, or None on failure (last_error says why)
+        or if the provider has no way to explain commands.
+        """
+        return None
+        
+    async def aexplain_command(self, user_input: str, command: str, os_type: str,
+                               deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Async variant of explain_command, run in a worker thread by default"""
+        def call():
+            result = self.explain_command(user_input, command, os_type, deadline)
+            return result, self._own_call_state()
+            
+        result, state = await asyncio.wrap_future(run_in_thread(contextvars.copy_context().run, call))
+        self.last_error = state.get("error")
+        return result
+        
+    async def awarm(self, deadline: Optional[Deadline] = None) -> bool:
+        """Connect to the provider's endpoint ahead of the first query
+        
+        Runs on the event loop generations use, so the connection lands in
+        the pool they draw from. No generation is requested. Returns False
+        when the provider has nothing to warm (e.g. it runs locally).
+        """
+        return False
+        
     @property
     @abc.abstractmethod
     def name(self) -> str:
@@ -28,3 +117,208 @@ class BaseProvider(abc.ABC):
     def description(self) -> str:
         """Return human-readable description of provider"""
         return self.name.replace('_', ' ').title()
+    
+    @property
+    def is_local(self) -> bool:
+        """Whether the provider runs on this machine (usable while offline)"""
+        return False
+    
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Exception raised by the last generate_command call in this thread/task
+        
+        None means the request reached the model, so a missing command was a
+        parsing/validation failure rather than a call failure.
+        """
+        return self._get_call_state("error")
+    
+    @last_error.setter
+    def last_error(self, error: Optional[Exception]):
+        self._set_call_state("error", error)
+    
+    @property
+    def last_confidence(self) -> Optional[float]:
+        """Confidence (0-1) in the last command from this thread/task, if the provider scores it"""
+        return self._get_call_state("confidence")
+    
+    @last_confidence.setter
+    def last_confidence(self, confidence: Optional[float]):
+        self._set_call_state("confidence", confidence)
+    
+    @property
+    def last_risk(self) -> Optional[str]:
+        """Risk ("low"/"medium"/"high") the model gave the last command, with structured output"""
+        return self._get_call_state("risk")
+    
+    @last_risk.setter
+    def last_risk(self, risk: Optional[str]):
+        self._set_call_state("risk", risk)
+    
+    @property
+    def last_usage(self) -> Optional[Dict[str, Any]]:
+        """Prompt token counts of the last call: prompt_tokens, cached_tokens and
+        whether they are estimated (the provider reported none)"""
+        return self._get_call_state("usage")
+    
+    @last_usage.setter
+    def last_usage(self, usage: Optional[Dict[str, Any]]):
+        self._set_call_state("usage", usage)
+        
+    def _record_usage(self, prompt_tokens: Optional[int], cached_tokens: Optional[int] = 0,
+                      estimated: bool = False):
+        """Note the prompt size of this call (reported counts replace estimates)"""
+        if prompt_tokens is None:
+            return
+        self.last_usage = {
+            "prompt_tokens": int(prompt_tokens),
+            "cached_tokens": int(cached_tokens or 0),
+            "estimated": estimated,
+        }
+        
+    def _observe_headers(self, headers):
+        """Pass response headers on to the rate limiter (limits/remaining/reset)"""
+        if self.rate_limiter is not None and headers:
+            self.rate_limiter.update_from_headers(headers)
+        
+    @staticmethod
+    def _http_timeout(deadline: Deadline, timeout_class=None):
+        """httpx timeout (for the OpenAI/Anthropic/Ollama clients) from a deadline
+        
+        SDKs that bundle their own httpx pass their Timeout class.
+        """
+        if timeout_class is None:
+            import httpx
+            timeout_class = httpx.Timeout
+        return timeout_class(deadline.timeout(), connect=deadline.connect_timeout())
+        
+    def _read_stream(self, chunks: Iterable[str], parser, deadline: Optional[Deadline] = None) -> bool:
+        """Feed streamed text to a StreamingCommandParser
+        
+        Returns True if reading stopped early because the command was
+        complete; the caller closes the stream so generation stops too.
+        With a deadline, reading also stops once it expires.
+        """
+        for text in chunks:
+            if deadline is not None and deadline.expired():
+                return False
+            if parser.feed(text) and self.stop_after_command:
+                return True
+        return False
+        
+    async def _aread_stream(self, chunks: AsyncIterable[str], parser) -> bool:
+        """Async variant of _read_stream"""
+        async for text in chunks:
+            if parser.feed(text) and self.stop_after_command:
+                return True
+        return False
+        
+    @staticmethod
+    async def _aparse(raw):
+        """Parse an async SDK raw response; parse() is a coroutine in newer SDKs"""
+        result = raw.parse()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+        
+    def _schema(self) -> Dict[str, Any]:
+        """Schema of the structured answer; without the explanation when it is asked for separately"""
+        return COMMAND_ONLY_SCHEMA if self.command_only else COMMAND_SCHEMA
+        
+    def _parser(self, os_type: Optional[str] = None, strict: bool = False) -> StreamingCommandParser:
+        return StreamingCommandParser(os_type, strict, structured=self.structured)
+        
+    def _stream_result(self, parser: StreamingCommandParser, stopped: bool) -> Tuple[Optional[str], Optional[str]]:
+        """(command, explanation) from a stream; no explanation if it was cut short"""
+        result = (parser.command, None) if stopped else parser.finish()
+        self.last_risk = parser.risk if result[0] else None
+        return result
+        
+    def _parse_text(self, text: Optional[str], os_type: Optional[str] = None,
+                    strict: bool = False) -> Tuple[Optional[str], Optional[str]]:
+        """(command, explanation) from a complete, non-streamed response"""
+        command, explanation, risk = ResponseParser.parse(text, os_type, strict, self.structured)
+        self.last_risk = risk if command else None
+        return command, explanation
+        
+    def _loop_client(self, factory):
+        """Async SDK client for the running event loop, created on first use
+        
+        Async clients (and their connection pools) are bound to the loop
+        they were created on, so each loop gets its own.
+        """
+        loop = asyncio.get_running_loop()
+        clients = self.__dict__.setdefault("_async_clients", weakref.WeakKeyDictionary())
+        client = clients.get(loop)
+        if client is None:
+            client = clients[loop] = factory()
+        return client
+        
+    def _get_call_state(self, key: str):
+        state = _call_state.get()
+        return state.get((id(self), key)) if state else None
+        
+    def _own_call_state(self) -> Dict[str, Any]:
+        state = _call_state.get() or {}
+        return {key: value for (owner, key), value in state.items() if owner == id(self)}
+        
+    def _set_call_state(self, key: str, value):
+        # Copy rather than mutate: contexts copied into other tasks share the dict
+        state = dict(_call_state.get() or {})
+        state[(id(self), key)] = value
+        _call_state.set(state)
+
+def report(message: str, color: str):
+    """Print a message about a call, or hold it back if the call runs in the background"""
+    held = _held_messages.get()
+    if held is None:
+        print(colored(message, color))
+    else:
+        held.append((message, color))
+
+def hold_messages() -> List[Tuple[str, str]]:
+    """Hold back report()s from the current task and the threads it starts
+    
+    Returns the list they are collected in as (message, color), to show
+    if the user ends up asking for the call's result.
+    """
+    held = []
+    _held_messages.set(held)
+    return held
+
+def run_in_thread(fn, *args) -> Future:
+    """Run fn in a daemon thread and return a Future for its result
+    
+    Daemon threads (rather than an executor) so that an abandoned provider
+    call never keeps the process alive at exit.
+    """
+    future = Future()
+    
+    def runner():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+            
+    threading.Thread(target=runner, daemon=True).start()
+    return future
+
+def call_within(deadline: Deadline, fn, *args, **kwargs):
+    """Run a blocking SDK call in a thread, waiting for it only until the deadline
+    
+    The call itself should time out and stop retrying by the deadline
+    (read timeouts restart with every byte, so it can run a little over);
+    this only makes sure the caller is not held past it. Anything the
+    call writes to must be its own, since it may outlive the caller.
+    Call state the call records (last_usage, ...) is carried back.
+    """
+    context = contextvars.copy_context()
+    future = run_in_thread(functools.partial(context.run, fn, *args, **kwargs))
+    try:
+        return future.result(timeout=deadline.timeout())
+    except concurrent.futures.TimeoutError:
+        raise TimeoutError("Request timed out") from None
+    finally:
+        if future.done():
+            _call_state.set(context.get(_call_state))
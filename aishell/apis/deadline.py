@@ -0,0 +1,68 @@
+import time
+from typing import Optional
+
+# Client-level defaults; per-call values come from the query's Deadline
+DEFAULT_QUERY_TIMEOUT = 30.0
+DEFAULT_CONNECT_TIMEOUT = 3.0
+DEFAULT_MAX_RETRIES = 2
+
+# Below this much remaining time a retry is not worth starting
+MIN_ATTEMPT_TIME = 3.0
+# Never hand an SDK a timeout so small it fails before sending anything
+MIN_TIMEOUT = 0.1
+
+class Deadline:
+    """Time budget for one query, shared by every provider in the fallback chain
+
+    AIService creates one per generate_command call and passes it down;
+    providers derive their connect/read timeouts and retry budget from what
+    is left, so the whole chain finishes within the configured SLA.
+    Cancelling a deadline (e.g. on Ctrl-C) makes it expire at once, which
+    stops work that only polls it, such as llama.cpp token generation.
+    """
+
+    def __init__(self, timeout: Optional[float] = DEFAULT_QUERY_TIMEOUT,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + timeout if timeout else None
+        self.connect_timeout_cap = connect_timeout
+        self.max_retries = max_retries
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None for an unlimited budget"""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """Per-request timeout: what is left of the budget, optionally capped"""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        if cap is not None:
+            remaining = min(remaining, cap)
+        return max(MIN_TIMEOUT, remaining)
+
+    def connect_timeout(self) -> float:
+        return self.timeout(self.connect_timeout_cap)
+
+    def retries(self) -> int:
+        """How many SDK-level retries still fit in the budget"""
+        remaining = self.remaining()
+        if remaining is None:
+            return self.max_retries
+        return max(0, min(self.max_retries, int(remaining // MIN_ATTEMPT_TIME) - 1))
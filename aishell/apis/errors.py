@@ -0,0 +1,82 @@
+import socket
+from typing import Optional
+
+# Error classes used by circuit breakers and retry logic
+AUTH = "auth"
+RATE_LIMIT = "rate_limit"
+NETWORK = "network"
+TIMEOUT = "timeout"
+SERVER = "server"
+OTHER = "other"
+
+AUTH_CODES = {
+    "UnrecognizedClientException", "ExpiredTokenException", "AccessDeniedException",
+    "InvalidSignatureException", "UnauthorizedException", "ExpiredToken",
+}
+THROTTLE_CODES = {
+    "ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException",
+    "RequestLimitExceeded", "Throttling",
+}
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an SDK error, whichever SDK raised it"""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):  # botocore ClientError
+        return response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+def _aws_error_code(error: Exception) -> Optional[str]:
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code")
+    return None
+
+def classify_error(error: Optional[Exception]) -> str:
+    """Map a provider exception to one of the error classes above
+
+    Works on exception names and status codes so no SDK has to be imported:
+    openai/anthropic/ollama errors carry ``status_code``, botocore errors
+    carry an error code in ``response``.
+    """
+    if error is None:
+        return OTHER
+
+    names = " ".join(cls.__name__ for cls in type(error).__mro__)
+    code = _aws_error_code(error)
+    status = _status_code(error)
+
+    if code in AUTH_CODES or status in (401, 403) or "Authentication" in names or "PermissionDenied" in names:
+        return AUTH
+    if code in THROTTLE_CODES or status == 429 or "RateLimit" in names or "Throttl" in names:
+        return RATE_LIMIT
+    if "Timeout" in names or isinstance(error, socket.timeout):
+        return TIMEOUT
+    if ("Connection" in names or "ConnectError" in names or "EndpointConnectionError" in names
+            or isinstance(error, (ConnectionError, socket.gaierror))):
+        return NETWORK
+    if status is not None and status >= 500:
+        return SERVER
+    return OTHER
+
+def response_headers(error: Optional[Exception]):
+    """HTTP response headers attached to an SDK error, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None and isinstance(response, dict):
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders")
+    return headers or None
+
+def retry_after(error: Optional[Exception]) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After header), if any"""
+    headers = response_headers(error)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
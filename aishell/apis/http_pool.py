@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import weakref
+
+# Shared keep-alive pools for the HTTP-based providers. Pools are keyed by
+# client class, since each SDK may insist on its own httpx flavour (pass its
+# DefaultHttpxClient / DefaultAsyncHttpxClient). Sync clients are shared
+# process-wide; async clients are bound to an event loop, so there is one
+# per loop.
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 120.0  # httpx defaults to 5s, which drops connections between queries
+
+_lock = threading.Lock()
+_sync_clients = {}  # client class -> client
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {client class -> client}
+
+def _limits(client_class):
+    # Limits from the same package as the client (httpx or an SDK's fork of it)
+    package = __import__(client_class.__mro__[1].__module__.split(".")[0])
+    return package.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+def get_sync_client(client_class=None):
+    """Process-wide pooled client for the synchronous SDK clients"""
+    if client_class is None:
+        import httpx
+        client_class = httpx.Client
+    with _lock:
+        client = _sync_clients.get(client_class)
+        if client is None:
+            client = _sync_clients[client_class] = client_class(limits=_limits(client_class))
+        return client
+
+def get_async_client(client_class=None):
+    """Pooled async client for the running event loop"""
+    if client_class is None:
+        import httpx
+        client_class = httpx.AsyncClient
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(client_class)
+        if client is None:
+            client = clients[client_class] = client_class(limits=_limits(client_class))
+        return client
+
+async def warm(url, client_class=None, timeout=None):
+    """Open a keep-alive connection to url's host in the loop's pool
+
+    A HEAD request needs no authentication and any status will do: the
+    point is the DNS lookup and the TCP and TLS handshakes, which later
+    requests on the same pool then skip.
+    """
+    await get_async_client(client_class).head(str(url), timeout=timeout)
@@ -0,0 +1,219 @@
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .deadline import Deadline
+from .prefix_cache import PrefixCache
+from .response_parser import RISK_LEVELS
+
+# Structured output for llama.cpp. The prompt already opens the JSON object
+# and its "command" string, so the first tokens sampled are the command
+# itself (which keeps the confidence score about the command); the grammar
+# then forces the rest of the object in COMMAND_SCHEMA's field order.
+JSON_GRAMMAR = r'''
+root ::= char+ "\", \"risk\": \"" risk "\", \"explanation\": \"" char* "\"}"
+risk ::= %s
+char ::= [^"\\\x7F\x00-\x1F] | "\\" ["\\/bfnrt]
+''' % " | ".join(f'"{level}"' for level in RISK_LEVELS)
+# Plain-text output: a single shell command line per OS family, so the
+# model can't answer with prose around it, code fences, comments or an
+# unclosed quote. Arguments are built one character at a time (no nested
+# repetition), which keeps llama.cpp's grammar stacks small. The leading
+# space lets the model use its usual " word" tokens after "Command:"; the
+# closing newline is the stop string.
+COMMAND_GRAMMARS = {
+    "unix": r"""
+root ::= " "? list "\n"
+list ::= pipeline (sep pipeline)*
+sep ::= " && " | " || " | "; "
+pipeline ::= simple (" | " simple)*
+simple ::= assign* program (" " arg)*
+assign ::= [A-Za-z_] [A-Za-z0-9_]* "=" part* " "
+program ::= [a-zA-Z0-9_./~] [a-zA-Z0-9_./~+-]* | subst
+arg ::= redirect | part+ redirect?
+redirect ::= [0-9]? (">" ">"? | "<") " "? part+ | [0-9]? ">&" [0-9]
+part ::= [^ \t\r\n"'`|&;<>()#\\$] | "'" [^'\r\n]* "'" | "\"" dchar* "\"" | "\\" [^\r\n] | subst
+dchar ::= [^"\\\r\n$`] | "\\" [^\r\n] | subst
+subst ::= "$" ([A-Za-z_] [A-Za-z0-9_]* | [0-9?#@*$!] | "{" [^}\r\n]+ "}" | "(" list ")")
+""",
+    "windows": r"""
+root ::= " "? list "\n"
+list ::= pipeline (sep pipeline)*
+sep ::= " && " | " || " | " & "
+pipeline ::= simple (" | " simple)*
+simple ::= program (" " arg)*
+program ::= [a-zA-Z0-9_.\\~] [a-zA-Z0-9_.\\~+-]*
+arg ::= redirect | part+ redirect?
+redirect ::= [0-9]? (">" ">"? | "<") " "? part+ | [0-9]? ">&" [0-9]
+part ::= [^ \t\r\n"|&<>^%] | "\"" [^"\r\n]* "\"" | "^" [^\r\n] | "%" [^%\r\n ]* "%" | "%" "%"? [A-Za-z]
+""",
+}
+# Grammars by the name completions ask for them with
+GRAMMARS = dict(COMMAND_GRAMMARS, json=JSON_GRAMMAR)
+
+# Requests that may wait for a free context before new ones are turned away
+DEFAULT_MAX_QUEUE = 16
+# How often a waiting request checks whether its caller gave up (seconds)
+QUEUE_POLL_INTERVAL = 0.5
+
+def confidence_score(logprobs: List[float], tokens: Optional[int] = None) -> Optional[float]:
+    """Geometric mean probability over all sampled tokens, or only the first `tokens`"""
+    logprobs = logprobs[:tokens] if tokens else logprobs
+    if not logprobs:
+        return None
+    return math.exp(sum(logprobs) / len(logprobs))
+
+class TokenConfidence:
+    """Confidence score for a llama.cpp generation, from sampled-token probabilities
+
+    llama.cpp only returns logprobs when the model keeps logits for every
+    position (logits_all=True, a large memory cost), so instead this is
+    hooked in as a stopping criterion: each call gets the logits the next
+    token is sampled from, and that token shows up as the last input id on
+    the following call. The score is the geometric mean of the sampled
+    tokens' probabilities (the final stop token is not scored).
+    """
+
+    def __init__(self):
+        self.logprobs: List[float] = []
+        self._logits = None
+
+    def __call__(self, input_ids, logits) -> bool:
+        if self._logits is not None:
+            self.logprobs.append(self._logprob(self._logits, input_ids[-1]))
+        # llama.cpp reuses the score buffer, so keep a copy
+        self._logits = logits.copy()
+        return False  # Never stops generation
+
+    @staticmethod
+    def _logprob(logits, token: int) -> float:
+        import numpy as np
+        top = float(np.max(logits))
+        return float(logits[token]) - top - math.log(float(np.sum(np.exp(logits - top))))
+
+    def score(self, tokens: Optional[int] = None) -> Optional[float]:
+        """Score over all sampled tokens, or only the first `tokens` of them"""
+        return confidence_score(self.logprobs, tokens)
+
+class _Context:
+    """One llama.cpp context, generating one sequence at a time"""
+
+    def __init__(self, llm, prefixes: Optional[PrefixCache]):
+        self.llm = llm
+        self.prefixes = prefixes
+        self.grammars = {}  # name -> compiled grammar (grammar state is per context)
+        self.prefix = None  # Prompt prefix of the last completion
+        self.busy = False
+        self.used_at = 0.0
+
+class LocalEngine:
+    """A GGUF model served by llama.cpp, for one process or the shared worker
+
+    parallel contexts generate at once. Each maps the same model file, so
+    the weights are in memory once (the page cache) while every context
+    has its own KV cache and prompt prefix cache. Requests wait in line for
+    a free context, preferring the one whose last prompt had the same
+    prefix, and are turned away once max_queue of them are waiting.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int = 2048, n_threads: int = 4, parallel: int = 1,
+                 max_queue: int = DEFAULT_MAX_QUEUE, prefix_cache: bool = True,
+                 persist_prefix_cache: bool = False):
+        from llama_cpp import Llama
+        self.model_path = model_path
+        self.max_queue = max_queue
+        self.contexts = []
+        for _ in range(max(1, parallel)):
+            llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+            prefixes = PrefixCache(llm, model_path, n_ctx, persist_prefix_cache) if prefix_cache else None
+            self.contexts.append(_Context(llm, prefixes))
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    def prepare(self, prefix: str):
+        """Evaluate a prompt prefix in every context ahead of its first use"""
+        for context in self.contexts:
+            if context.prefixes is not None:
+                context.prefixes.prepare(prefix)
+                context.prefix = prefix
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.contexts[0].llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+    def complete(self, prompt: str, deadline: Deadline, prefix: Optional[str] = None,
+                 grammar: Optional[str] = None, confidence: bool = False, **kwargs) -> Dict[str, Any]:
+        """One completion, stopping at the deadline
+
+        prefix is the static start of the prompt: its evaluated state is
+        restored from the prefix cache, so only the rest is evaluated.
+        grammar names an entry of GRAMMARS. Returns the text, finish
+        reason, prompt token counts and, with confidence, the sampled
+        tokens' logprobs.
+        """
+        from llama_cpp import StoppingCriteriaList
+
+        # Called after every token: ends generation when the budget does
+        # and scores each sampled token
+        criteria = [lambda input_ids, logits: deadline.expired()]
+        scorer = TokenConfidence() if confidence else None
+        if scorer is not None:
+            criteria.append(scorer)
+        context = self._acquire(prefix, deadline)
+        try:
+            reused = context.prefixes.use(prefix) if context.prefixes and prefix else 0
+            context.prefix = prefix
+            response = context.llm(
+                prompt,
+                temperature=0.7,
+                echo=False,
+                stopping_criteria=StoppingCriteriaList(criteria),
+                grammar=self._grammar(context, grammar),
+                **kwargs
+            )
+        finally:
+            self._release(context)
+        choice = response['choices'][0]
+        return {
+            "text": choice['text'],
+            "finish_reason": choice.get('finish_reason'),
+            "prompt_tokens": response.get('usage', {}).get('prompt_tokens'),
+            "cached_tokens": reused,
+            "logprobs": scorer.logprobs if scorer is not None else None,
+        }
+
+    @staticmethod
+    def _grammar(context: _Context, name: Optional[str]):
+        if name is None:
+            return None
+        if name not in context.grammars:
+            from llama_cpp import LlamaGrammar
+            context.grammars[name] = LlamaGrammar.from_string(GRAMMARS[name], verbose=False)
+        return context.grammars[name]
+
+    def _acquire(self, prefix: Optional[str], deadline: Deadline) -> _Context:
+        """Wait in line for a free context, until the deadline"""
+        with self._cond:
+            if self._waiting >= self.max_queue and all(c.busy for c in self.contexts):
+                raise TimeoutError("Local LLM queue is full")
+            self._waiting += 1
+            try:
+                while True:
+                    free = [c for c in self.contexts if not c.busy]
+                    if free:
+                        context = next((c for c in free if c.prefix == prefix),
+                                       min(free, key=lambda c: c.used_at))
+                        context.busy = True
+                        return context
+                    if deadline.expired():
+                        raise TimeoutError("Local LLM busy with another generation")
+                    wait = deadline.timeout()
+                    self._cond.wait(QUEUE_POLL_INTERVAL if wait is None else min(wait, QUEUE_POLL_INTERVAL))
+            finally:
+                self._waiting -= 1
+
+    def _release(self, context: _Context):
+        with self._cond:
+            context.busy = False
+            context.used_at = time.monotonic()
+            self._cond.notify()
@@ -1,16 +1,34 @@
 from typing import Tuple, Optional, Dict, Any
 from termcolor import colored
+import importlib.util
 import os
+import platform
 
-from .base_provider import BaseProvider
+from . import prompts
+from .base_provider import BaseProvider, report
+from .deadline import Deadline
+from .local_engine import LocalEngine, confidence_score
 from .response_parser import ResponseParser
 
+# The prompt opens the JSON object and its "command" string, and the
+# engine's "json" grammar completes it
+JSON_PREFIX = '{"command": "'
+# Generation stops here when the explanation isn't wanted
+EXPLANATION_STOP = '", "explanation'
+
 class LocalLLMProvider(BaseProvider):
-    """Provider for local LLM using llama.cpp"""
+    """Provider for local LLM using llama.cpp
+    
+    The model runs in the shared worker (local_worker), which every shell
+    session on the machine talks to, or in this process where Unix
+    sockets aren't available or shared_worker is off. Either backend
+    takes the same completion requests.
+    """
     
     def __init__(self):
-        self.llm = None
+        self.backend = None  # WorkerClient, or an in-process LocalEngine
         self.model_path = None
+        self.command_grammar = True  # Constrain plain-text output to one command line
         
     @property
     def name(self) -> str:
@@ -20,14 +38,15 @@ class LocalLLMProvider(BaseProvider):
     def description(self) -> str:
         return f"Local LLM ({os.path.basename(self.model_path)})" if self.model_path else "Local LLM"
     
+    @property
+    def is_local(self) -> bool:
+        return True
+    
     def initialize(self, config: Dict[str, Any]) -> bool:
         """Initialize local LLM with configuration"""
         try:
-            from llama_cpp import Llama
-            
             model_path = config.get("path")
-            n_ctx = config.get("n_ctx") or 2048
-            n_threads = config.get("n_threads") or 4
+            self.command_grammar = config.get("command_grammar", True)
             
             if not model_path:
                 print(colored("⚠️ Model path not configured", "yellow"))
@@ -37,14 +56,14 @@ class LocalLLMProvider(BaseProvider):
                 print(colored(f"⚠️ Model file not found: {model_path}", "yellow"))
                 return False
                 
-            self.llm = Llama(
-                model_path=model_path,
-                n_ctx=n_ctx,
-                n_threads=n_threads,
-                verbose=False
-            )
-            
+            self.backend = self._start_backend(config)
             self.model_path = model_path
+            if config.get("prefix_cache", True):
+                try:
+                    # The instructions are evaluated now rather than on the first query
+                    self.backend.prepare(self._command_prefix(platform.system().lower()))
+                except Exception as e:
+                    print(colored(f"⚠️ Local LLM prompt prefix not cached: {str(e)}", "yellow"))
             print(colored(f"✓ Local LLM initialized successfully with {os.path.basename(model_path)}", "green"))
             return True
             
@@ -52,32 +71,119 @@ class LocalLLMProvider(BaseProvider):
             print(colored(f"⚠️ Local LLM initialization failed: {str(e)}", "yellow"))
             return False
     
-    def generate_command(self, user_input: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    @staticmethod
+    def _start_backend(config: Dict[str, Any]):
+        """Connect to (or start) the shared worker, or load the model here"""
+        if importlib.util.find_spec("llama_cpp") is None:
+            raise ImportError("llama-cpp-python is not installed")
+        # Imported here: the worker runs this module as __main__ (python -m)
+        from . import local_worker
+        if config.get("shared_worker", True) and local_worker.available():
+            client = local_worker.WorkerClient(config)
+            try:
+                client.start()
+                return client
+            except Exception as e:
+                print(colored(f"⚠️ Shared local LLM worker unavailable, loading the model here: {str(e)}", "yellow"))
+        return LocalEngine(
+            config["path"], config.get("n_ctx") or 2048, config.get("n_threads") or 4,
+            prefix_cache=config.get("prefix_cache", True),
+            persist_prefix_cache=config.get("persist_prefix_cache", False)
+        )
+    
+    def generate_command(self, user_input: str, os_type: str,
+                         deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate command using local LLM"""
-        if not self.llm:
+        if not self.backend:
             return None, None
             
+        deadline = deadline or Deadline()
         try:
-            prompt = f"""Convert this to a {os_type} terminal command.
-            Only output the command, nothing else.
-            Request: {user_input}
-            Command:"""
+            if self.structured:
+                return self._generate_structured(user_input, os_type, deadline)
+                
+            # Compact registry prompt: its fixed prefix stays in llama.cpp's
+            # context, so only the request tokens are evaluated on the next call
+            prompt = prompts.completion_prompt(os_type, user_input, compact=prompts.is_compact(self.name))
             
-            response = self.llm(
-                prompt,
-                max_tokens=50,
-                temperature=0.7,
-                stop=["\n"],
-                echo=False
-            )
+            max_tokens = self.command_max_tokens if self.command_only else 50
+            grammar = ("windows" if os_type == "windows" else "unix") if self.command_grammar else None
+            result = self._complete(prompt, deadline, self._command_prefix(os_type), grammar=grammar,
+                                    confidence=True, max_tokens=max_tokens, stop=["\n"])
             
-            raw_command = response['choices'][0]['text'].strip()
-            command = ResponseParser.clean_command(raw_command)
+            raw_command = result['text'].strip()
+            if grammar is None:
+                command = ResponseParser.clean_command(raw_command)
+            elif result['finish_reason'] == "length" or deadline.expired():
+                # Cut off mid-command: the grammar only guarantees complete lines
+                command = None
+            else:
+                # Already a bare command line (quotes in it are the command's
+                # own, so they are kept); only the safety checks apply
+                command = raw_command if ResponseParser.is_valid_command(raw_command) else None
             
             if command:
-                return command, f"Generated by local LLM"
+                self.last_confidence = confidence_score(result['logprobs'])
+                return command, None if self.command_only else f"Generated by local LLM"
             return None, None
             
         except Exception as e:
-            print(colored(f"⚠️ Local LLM error: {str(e)}", "red"))
+            self.last_error = e
+            report(f"⚠️ Local LLM error: {str(e)}", "red")
+            return None, None
+    
+    def _generate_structured(self, user_input: str, os_type: str,
+                             deadline: Deadline) -> Tuple[Optional[str], Optional[str]]:
+        """Generate {command, risk, explanation} under the JSON grammar"""
+        prompt = prompts.completion_prompt(os_type, user_input, structured=True, compact=prompts.is_compact(self.name),
+                                           answer_prefix=f"JSON: {JSON_PREFIX}")
+        
+        # Command-first: the grammar still describes the whole object, but
+        # generation always ends before the explanation
+        stop = self.stop_after_command or self.command_only
+        result = self._complete(
+            prompt, deadline, self._command_prefix(os_type), grammar="json", confidence=True,
+            max_tokens=self.command_max_tokens if self.command_only else 150,
+            stop=[EXPLANATION_STOP] if stop else []
+        )
+        text = JSON_PREFIX + result['text']
+        if result['finish_reason'] == "stop" and stop:
+            # Cut at the stop string: close the risk field and the object
+            text += '"}'
+            
+        command, explanation, risk = ResponseParser.parse_structured(text) or (None, None, None)
+        if not command:
             return None, None
+        # Score the command's tokens only, not the JSON around the risk and explanation
+        self.last_confidence = confidence_score(result['logprobs'], self.backend.count_tokens(command))
+        self.last_risk = risk
+        if self.command_only:
+            return command, None
+        return command, explanation or "Generated by local LLM"
+    
+    def explain_command(self, user_input: str, command: str, os_type: str,
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using local LLM (waits for the model like a generation)"""
+        if not self.backend:
+            return None
+            
+        deadline = deadline or Deadline()
+        try:
+            prompt = prompts.explanation_completion_prompt(os_type, user_input, command)
+            result = self._complete(prompt, deadline, prompts.explanation_prompt(os_type),
+                                    max_tokens=self.explanation_max_tokens, stop=["\n"])
+            return ResponseParser.parse_explanation(result['text'])
+        except Exception as e:
+            self.last_error = e
+            return None
+    
+    def _command_prefix(self, os_type: str) -> str:
+        """Static start of the command prompt (completion_prompt's system part)"""
+        return prompts.system_prompt(os_type, self.structured, prompts.is_compact(self.name))
+    
+    def _complete(self, prompt: str, deadline: Deadline, prefix: Optional[str] = None,
+                  **kwargs) -> Dict[str, Any]:
+        """One completion from the backend (see LocalEngine.complete), recording its prompt size"""
+        result = self.backend.complete(prompt, deadline, prefix, **kwargs)
+        self._record_usage(result['prompt_tokens'], result['cached_tokens'])
+        return result
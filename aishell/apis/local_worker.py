@@ -0,0 +1,281 @@
+"""Shared local inference worker
+
+One process holds the local model and serves every shell session over a
+Unix socket, so five terminals share one copy of the model and only the
+first pays for loading it. Shells start the worker on demand
+(WorkerClient.start); it exits after idle_timeout seconds without
+requests, and the next request starts a new one.
+
+The protocol is one JSON request line and one JSON reply line per
+connection. A client that disconnects before its reply (Ctrl-C, a lost
+hedge, an expired deadline) cancels its generation.
+
+    python -m apis.local_worker --socket ~/.ai_shell/local-<key>.sock --config '{"path": ...}'
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from .deadline import Deadline
+from .local_engine import DEFAULT_MAX_QUEUE, LocalEngine
+
+# Sockets, lock files and worker logs live next to the configuration
+WORKER_DIR = os.path.join(os.path.expanduser("~"), ".ai_shell")
+# Seconds a shell waits for a new worker to load the model
+START_TIMEOUT = 60.0
+# Seconds between a new worker's readiness checks
+START_POLL_INTERVAL = 0.1
+# Tries at taking the worker lock, START_POLL_INTERVAL apart
+LOCK_ATTEMPTS = 5
+# Seconds of no requests after which the worker exits
+DEFAULT_IDLE_TIMEOUT = 600
+# Seconds between idle checks, and between a waiting client's checks for cancellation
+POLL_INTERVAL = 0.5
+# Settings that make two shells' workers different (the rest is client-side)
+WORKER_SETTINGS = ("path", "n_ctx", "n_threads", "prefix_cache", "persist_prefix_cache",
+                   "worker_parallel", "worker_idle_timeout")
+
+def available() -> bool:
+    """Whether this platform can run the shared worker (Unix domain sockets)"""
+    return os.name != "nt" and hasattr(socket, "AF_UNIX")
+
+def worker_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: config.get(key) for key in WORKER_SETTINGS}
+
+def socket_path(config: Dict[str, Any]) -> str:
+    """Socket of the worker for a model configuration (one worker per configuration)"""
+    key = json.dumps(worker_config(config), sort_keys=True)
+    return os.path.join(WORKER_DIR, f"local-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}.sock")
+
+def lock_path(path: str) -> str:
+    """Lock file held by the worker serving a socket for as long as it runs"""
+    return path[:-len(".sock")] + ".lock"
+
+class WorkerClient:
+    """Thin client to the shared worker: one connection per request
+
+    Mirrors LocalEngine's prepare / count_tokens / complete, so the local
+    provider uses either the same way.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = worker_config(config)
+        self.path = socket_path(config)
+        self._process = None  # Worker started by this process, reaped on restart
+
+    def start(self, timeout: float = START_TIMEOUT):
+        """Connect to the worker, starting it (and waiting for the model to load) if needed"""
+        if self._ping():
+            return
+        if self._process is not None:
+            self._process.poll()
+        os.makedirs(WORKER_DIR, exist_ok=True)
+        log_path = self.path[:-len(".sock")] + ".log"
+        # A worker holding the lock is up, just not answering yet (still
+        # loading the model): wait for it rather than start another
+        process = None if self._running() else self._spawn(log_path)
+        started = time.monotonic()
+        while time.monotonic() - started < timeout:
+            if self._ping():
+                return
+            if process is not None and process.poll() not in (None, 0):
+                raise RuntimeError(f"Local LLM worker failed to start (see {log_path})")
+            time.sleep(START_POLL_INTERVAL)
+        raise TimeoutError("Local LLM worker did not start in time")
+
+    def _spawn(self, log_path: str) -> subprocess.Popen:
+        aishell_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = aishell_dir + os.pathsep + env.get("PYTHONPATH", "")
+        with open(log_path, "ab") as log:
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "apis.local_worker", "--socket", self.path,
+                 "--config", json.dumps(self.config)],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=log, env=env, cwd=aishell_dir,
+                start_new_session=True  # Outlives the shell that started it, and its Ctrl-C
+            )
+        return self._process
+
+    def _running(self) -> bool:
+        """Whether a worker process holds this socket's lock"""
+        import fcntl
+        try:
+            with open(lock_path(self.path), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        return False
+
+    def prepare(self, prefix: str):
+        self._request({"op": "prepare", "prefix": prefix}, Deadline(START_TIMEOUT))
+
+    def count_tokens(self, text: str) -> int:
+        return self._request({"op": "count_tokens", "text": text}, Deadline(START_TIMEOUT))["tokens"]
+
+    def complete(self, prompt: str, deadline: Deadline, prefix: Optional[str] = None,
+                 grammar: Optional[str] = None, confidence: bool = False, **kwargs) -> Dict[str, Any]:
+        request = {"op": "complete", "prompt": prompt, "prefix": prefix, "grammar": grammar,
+                   "confidence": confidence, "options": kwargs}
+        return self._request(request, deadline)
+
+    def _ping(self) -> bool:
+        try:
+            self._send({"op": "ping"}, Deadline(START_POLL_INTERVAL * 10))
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _request(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        try:
+            return self._send(request, deadline)
+        except (FileNotFoundError, ConnectionError):
+            # The worker exited (idle, or shutting down as this connected):
+            # start another one and try again
+            self.start(deadline.timeout(START_TIMEOUT))
+            return self._send(request, deadline)
+
+    def _send(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        """One request/reply exchange; closing early cancels the request in the worker"""
+        if deadline.expired():
+            raise TimeoutError("Local LLM request timed out")
+        request["timeout"] = deadline.remaining()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(deadline.connect_timeout())
+            sock.connect(self.path)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            chunks = []
+            while not chunks or not chunks[-1].endswith(b"\n"):
+                if deadline.expired():
+                    raise TimeoutError("Local LLM request timed out")
+                sock.settimeout(min(POLL_INTERVAL, deadline.timeout(POLL_INTERVAL)))
+                try:
+                    chunk = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    raise ConnectionError("Local LLM worker closed the connection")
+                chunks.append(chunk)
+        reply = json.loads(b"".join(chunks))
+        if "error" in reply:
+            raise (TimeoutError if reply.get("timeout") else RuntimeError)(reply["error"])
+        return reply
+
+class Worker:
+    """Serves an engine on a Unix socket until it has been idle for idle_timeout seconds"""
+
+    def __init__(self, engine: LocalEngine, path: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.engine = engine
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.active = 0
+        self.last_active = time.monotonic()
+        # Waiting requests block in the engine's queue, so they need threads too
+        self.executor = ThreadPoolExecutor(max_workers=len(engine.contexts) + engine.max_queue + 1)
+
+    async def serve(self):
+        server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o600)
+        try:
+            while self.active or time.monotonic() - self.last_active < self.idle_timeout:
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            server.close()
+            await server.wait_closed()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.active += 1
+        try:
+            request = json.loads(await reader.readline())
+            if request.get("op") == "ping":
+                # Answered here: the executor may be busy generating for a while
+                writer.write(json.dumps(self._ping()).encode("utf-8") + b"\n")
+                await writer.drain()
+                return
+            deadline = Deadline(request.get("timeout"))
+            job = asyncio.get_running_loop().run_in_executor(self.executor, self._run, request, deadline)
+            # The client sends nothing more, so this only returns when it hangs up
+            hangup = asyncio.ensure_future(reader.read(1))
+            await asyncio.wait({job, hangup}, return_when=asyncio.FIRST_COMPLETED)
+            if not job.done():
+                deadline.cancel()  # Generation stops at its next token
+                await asyncio.wait({job})
+                job.exception()
+                return
+            hangup.cancel()
+            try:
+                reply = job.result()
+            except TimeoutError as e:
+                reply = {"error": str(e), "timeout": True}
+            except Exception as e:
+                reply = {"error": str(e)}
+            writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+            await writer.drain()
+        except (ValueError, OSError):
+            pass  # Malformed request or client gone
+        finally:
+            self.active -= 1
+            self.last_active = time.monotonic()
+            writer.close()
+
+    def _ping(self) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "model": self.engine.model_path}
+
+    def _run(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "prepare":
+            self.engine.prepare(request["prefix"])
+            return {}
+        if op == "count_tokens":
+            return {"tokens": self.engine.count_tokens(request["text"])}
+        if op == "complete":
+            return self.engine.complete(request["prompt"], deadline, request.get("prefix"),
+                                        request.get("grammar"), request.get("confidence", False),
+                                        **request.get("options", {}))
+        raise ValueError(f"Unknown request: {op}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Shared local LLM worker for AI Shell")
+    parser.add_argument("--socket", required=True, help="Unix socket to serve on")
+    parser.add_argument("--config", required=True, help="local_model settings as JSON")
+    args = parser.parse_args(argv)
+    config = json.loads(args.config)
+
+    # Only one worker per socket: a shell that lost the start-up race exits
+    # here. Clients checking for a running worker hold the lock for an
+    # instant, so it is tried for a little while before giving up.
+    import fcntl
+    lock = open(lock_path(args.socket), "w")
+    for attempt in range(LOCK_ATTEMPTS):
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except OSError:
+            if attempt == LOCK_ATTEMPTS - 1:
+                return 0
+            time.sleep(START_POLL_INTERVAL)
+
+    engine = LocalEngine(
+        config["path"], config.get("n_ctx") or 2048, config.get("n_threads") or 4,
+        parallel=config.get("worker_parallel") or 1, max_queue=DEFAULT_MAX_QUEUE,
+        prefix_cache=config.get("prefix_cache", True),
+        persist_prefix_cache=config.get("persist_prefix_cache", False)
+    )
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)  # Left behind by a worker that didn't exit cleanly
+    asyncio.run(Worker(engine, args.socket, config.get("worker_idle_timeout") or DEFAULT_IDLE_TIMEOUT).serve())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
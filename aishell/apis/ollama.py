@@ -1,8 +1,14 @@
 from typing import Tuple, Optional, Dict, Any
 from termcolor import colored
+import asyncio
 import importlib.util
+import json
+from urllib.parse import urlparse
 
-from .base_provider import BaseProvider
+from .base_provider import BaseProvider, call_within, report
+from .deadline import Deadline, DEFAULT_QUERY_TIMEOUT
+from .http_pool import get_sync_client
+from . import prompts
 from .response_parser import ResponseParser
 
 class OllamaProvider(BaseProvider):
@@ -21,6 +27,11 @@ class OllamaProvider(BaseProvider):
     def description(self) -> str:
         return f"Ollama ({self.model})" if self.model else "Ollama"
     
+    @property
+    def is_local(self) -> bool:
+        host = urlparse(self.host if "://" in (self.host or "") else f"http://{self.host}").hostname
+        return host in ("localhost", "127.0.0.1", "::1")
+    
     def initialize(self, config: Dict[str, Any]) -> bool:
         """Initialize Ollama with configuration"""
         try:
@@ -29,7 +40,6 @@ class OllamaProvider(BaseProvider):
                 print(colored("⚠️ Ollama package not installed. Run 'pip install ollama'", "yellow"))
                 return False
                 
-            import ollama
             self.host = config.get("host")
             self.model = config.get("model")
             
@@ -37,11 +47,12 @@ class OllamaProvider(BaseProvider):
                 print(colored("⚠️ Ollama host not configured", "yellow"))
                 return False
                 
-            # Set Ollama host
-            ollama.set_host(self.host)
+            import ollama
+            # Client bound to the configured host, with a bounded default timeout
+            client = ollama.Client(host=self.host, timeout=DEFAULT_QUERY_TIMEOUT)
             
             # Test connection by listing models
-            model_list = ollama.list()
+            model_list = client.list()
             
             # Check if the specified model exists
             if self.model and not any(m['name'] == self.model for m in model_list.get('models', [])):
@@ -58,7 +69,7 @@ class OllamaProvider(BaseProvider):
                 # Use first available model if not specified
                 self.model = model_list.get('models')[0]['name']
             
-            self.client = ollama
+            self.client = client
             print(colored(f"✓ Ollama initialized successfully with model {self.model}", "green"))
             return True
             
@@ -66,31 +77,196 @@ class OllamaProvider(BaseProvider):
             print(colored(f"⚠️ Ollama initialization failed: {str(e)}", "yellow"))
             return False
     
-    def generate_command(self, user_input: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    def generate_command(self, user_input: str, os_type: str,
+                         deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate command using Ollama"""
         if not self.client or not self.model:
             return None, None
             
+        deadline = deadline or Deadline()
         try:
-            prompt = f"""Convert this to a {os_type} terminal command.
-            Only output the command, nothing else.
-            Request: {user_input}
-            Command:"""
+            # The requests carry timeouts from the deadline, so they end soon
+            # after it; call_within makes sure the caller is not held past it
+            if not self.streaming:
+                response = call_within(deadline, self._generate, self._request(user_input, os_type), deadline)
+                self._usage(response)
+                return self._result(self._parse_text(response.get("response") if response else None))
+                
+            def read():
+                # A parser of its own: a read abandoned at the deadline may
+                # still be feeding it after this call has returned
+                parser = self._parser()
+                with self._stream(self._request(user_input, os_type), deadline) as stream:
+                    # Leaving the block early drops the connection, which stops generation
+                    return parser, self._read_stream(self._deltas(self._parts(stream)), parser, deadline)
+                    
+            parser, stopped = call_within(deadline, read)
+            return self._result(self._stream_result(parser, stopped))
             
-            response = self.client.generate(
-                model=self.model,
-                prompt=prompt,
-                options={"num_predict": 100}
-            )
+        except Exception as e:
+            self.last_error = e
+            report(f"⚠️ Ollama Error: {str(e)}", "red")
+            return None, None
+    
+    async def agenerate_command(self, user_input: str, os_type: str,
+                                deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Generate command using Ollama on the running event loop
+        
+        One AsyncClient (and keep-alive pool) per loop; the deadline is
+        enforced by cancelling the request rather than by a client timeout.
+        """
+        if not self.client or not self.model:
+            return None, None
             
-            if not response or not response.get("response"):
-                return None, None
+        deadline = deadline or Deadline()
+        try:
+            import ollama
+            client = self._loop_client(lambda: ollama.AsyncClient(host=self.host, timeout=DEFAULT_QUERY_TIMEOUT))
+            if not self.streaming:
+                response = await asyncio.wait_for(
+                    client.generate(**self._request(user_input, os_type)),
+                    deadline.timeout()
+                )
+                self._usage(response)
+                return self._result(self._parse_text(response.get("response") if response else None))
                 
-            raw_command = response["response"].strip()
-            command = ResponseParser.clean_command(raw_command)
+            parser = self._parser()
             
-            return command, f"Generated by Ollama ({self.model})" if command else None
+            async def read():
+                stream = await client.generate(**self._request(user_input, os_type), stream=True)
+                try:
+                    return await self._aread_stream(self._adeltas(stream), parser)
+                finally:
+                    await stream.aclose()
+                    
+            stopped = await asyncio.wait_for(read(), deadline.timeout())
+            return self._result(self._stream_result(parser, stopped))
             
         except Exception as e:
-            print(colored(f"⚠️ Ollama Error: {str(e)}", "red"))
+            self.last_error = e
+            report(f"⚠️ Ollama Error: {str(e) or type(e).__name__}", "red")
             return None, None
+    
+    def explain_command(self, user_input: str, command: str, os_type: str,
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using Ollama"""
+        if not self.client or not self.model:
+            return None
+            
+        deadline = deadline or Deadline()
+        try:
+            response = call_within(deadline, self._generate,
+                                   self._explanation_request(user_input, command, os_type), deadline)
+            return ResponseParser.parse_explanation(response.get("response") if response else None)
+        except Exception as e:
+            self.last_error = e
+            return None
+    
+    async def aexplain_command(self, user_input: str, command: str, os_type: str,
+                               deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using Ollama on the running event loop"""
+        if not self.client or not self.model:
+            return None
+            
+        deadline = deadline or Deadline()
+        try:
+            import ollama
+            client = self._loop_client(lambda: ollama.AsyncClient(host=self.host, timeout=DEFAULT_QUERY_TIMEOUT))
+            response = await asyncio.wait_for(
+                client.generate(**self._explanation_request(user_input, command, os_type)),
+                deadline.timeout()
+            )
+            return ResponseParser.parse_explanation(response.get("response") if response else None)
+        except Exception as e:
+            self.last_error = e
+            return None
+    
+    def _url(self, path: str) -> str:
+        host = self.host if "://" in self.host else f"http://{self.host}"
+        return f"{host.rstrip('/')}{path}"
+    
+    def _generate(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        """POST /api/generate with a timeout from the deadline
+        
+        The ollama client only takes its timeout at construction, so the
+        synchronous calls go to the API directly on the shared httpx pool.
+        """
+        response = get_sync_client().post(self._url("/api/generate"), json={**request, "stream": False},
+                                          timeout=self._http_timeout(deadline))
+        response.raise_for_status()
+        return response.json()
+    
+    def _stream(self, request: Dict[str, Any], deadline: Deadline):
+        """Streamed /api/generate response (a context manager), as in _generate"""
+        return get_sync_client().stream("POST", self._url("/api/generate"), json={**request, "stream": True},
+                                        timeout=self._http_timeout(deadline))
+    
+    @staticmethod
+    def _parts(response):
+        """The JSON objects of a streamed response, one per line"""
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            part = json.loads(line)
+            if part.get("error"):
+                import ollama
+                raise ollama.ResponseError(part["error"])
+            yield part
+    
+    def _request(self, user_input: str, os_type: str) -> Dict[str, Any]:
+        # The registry's system prompt is a fixed prefix, so Ollama can keep
+        # it in the model's KV cache between requests
+        system = prompts.system_prompt(os_type, self.structured, explain=not self.command_only)
+        user = prompts.user_message(user_input, self.structured)
+        self._record_usage(prompts.estimate_tokens(system + user), estimated=True)
+        request = {"model": self.model, "system": system, "prompt": user, "options": {"num_predict": 100}}
+        if self.structured:
+            # JSON mode constrains the output to a JSON object
+            request["format"] = "json"
+            request["options"]["num_predict"] = 150
+        if self.command_only:
+            request["options"]["num_predict"] = self.command_max_tokens
+            if not self.structured:
+                # The answer is the command line and nothing after it
+                request["options"]["stop"] = ["\n"]
+        return request
+    
+    def _explanation_request(self, user_input: str, command: str, os_type: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "system": prompts.explanation_prompt(os_type),
+            "prompt": prompts.explanation_message(user_input, command),
+            "options": {"num_predict": self.explanation_max_tokens, "temperature": 0.3}
+        }
+    
+    def _result(self, parsed: Tuple[Optional[str], Optional[str]]) -> Tuple[Optional[str], Optional[str]]:
+        command, explanation = parsed
+        if not command:
+            return None, None
+        # Free-text answers are the command alone; only JSON ones explain it
+        if self.command_only:
+            explanation = None  # Fetched later, if wanted
+        elif not (self.structured and explanation):
+            explanation = f"Generated by Ollama ({self.model})"
+        return command, explanation
+    
+    def _deltas(self, stream):
+        for part in stream:
+            self._usage(part)
+            yield part.get("response")
+    
+    async def _adeltas(self, stream):
+        async for part in stream:
+            self._usage(part)
+            yield part.get("response")
+    
+    def _usage(self, response):
+        """Prompt tokens Ollama evaluated (sent with the final part)
+        
+        A prefix still in Ollama's KV cache is not evaluated again, so
+        the count drops on cache hits; the cached share is not reported.
+        """
+        count = response.get("prompt_eval_count") if response else None
+        if count is not None:
+            self._record_usage(count)
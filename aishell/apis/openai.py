@@ -2,8 +2,11 @@ from typing import Tuple, Optional, Dict, Any
 from termcolor import colored
 import importlib.util
 
-from .base_provider import BaseProvider
-from .response_parser import ResponseParser
+from .base_provider import BaseProvider, report
+from .http_pool import get_async_client, get_sync_client, warm
+from .deadline import Deadline, DEFAULT_QUERY_TIMEOUT, DEFAULT_MAX_RETRIES
+from . import prompts
+from .response_parser import COMMAND_TOOL_DESCRIPTION, COMMAND_TOOL_NAME, ResponseParser
 
 class OpenAIProvider(BaseProvider):
     """OpenAI API provider"""
@@ -11,6 +14,7 @@ class OpenAIProvider(BaseProvider):
     def __init__(self):
         self.client = None
         self.model = None
+        self._client_args = {}
         
     @property
     def name(self) -> str:
@@ -28,7 +32,6 @@ class OpenAIProvider(BaseProvider):
                 print(colored("⚠️ OpenAI package not installed. Run 'pip install openai'", "yellow"))
                 return False
                 
-            import openai
             api_key = config.get("api_key")
             base_url = config.get("base_url")
             self.model = config.get("model")
@@ -37,64 +40,239 @@ class OpenAIProvider(BaseProvider):
                 print(colored("⚠️ OpenAI API key not configured", "yellow"))
                 return False
                 
-            client_args = {"api_key": api_key}
+            # Import only once we know it will be used; the SDK is slow to load
+            import openai
+            client_args = {"api_key": api_key, "timeout": DEFAULT_QUERY_TIMEOUT, "max_retries": DEFAULT_MAX_RETRIES}
             if base_url:
                 client_args["base_url"] = base_url
                 
-            self.client = openai.OpenAI(**client_args)
-            
-            # Test connection with a simple request
-            model = self.model or "gpt-3.5-turbo"
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": "Hi"}],
-                max_tokens=5
-            )
+            self._client_args = client_args
+            self.client = openai.OpenAI(**client_args, http_client=get_sync_client(getattr(openai, "DefaultHttpxClient", None)))
             
             # Set the model if not already set
             if not self.model:
                 self.model = "gpt-3.5-turbo"
                 
-            print(colored(f"✓ OpenAI initialized successfully with model {model}", "green"))
+            # No test call: AIService pre-warms the connection in the background
+            print(colored(f"✓ OpenAI initialized successfully with model {self.model}", "green"))
             return True
             
         except Exception as e:
             print(colored(f"⚠️ OpenAI initialization failed: {str(e)}", "yellow"))
             return False
     
-    def generate_command(self, user_input: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    def generate_command(self, user_input: str, os_type: str,
+                         deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate command using OpenAI"""
         if not self.client:
             return None, None
             
+        deadline = deadline or Deadline()
         try:
-            system_prompt = f"""You are a {os_type} terminal expert. Follow STRICTLY:
-                1. Respond with ONLY the executable command on FIRST LINE
-                2. Use Windows cmd commands when target is windows
-                3. Use bash commands when target is linux/mac
-                4. Current system: {os_type}
-                5. Example Windows alternatives:
-                   - clear -> cls
-                   - ls -> dir
-                   - grep -> findstr"""
+            import openai
+            client = self.client.with_options(
+                timeout=self._http_timeout(deadline, openai.Timeout),
+                max_retries=deadline.retries()
+            )
+            request = self._request(user_input, os_type)
+            if not self.streaming:
+                raw = client.chat.completions.with_raw_response.create(**request)
+                self._observe_headers(raw.headers)
+                return self._result(raw.parse())
                 
-            response = self.client.chat.completions.create(
-                model=self.model or "gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Convert to terminal command: {user_input}\n\nCommand:"}
-                ],
-                temperature=0.5
+            raw = client.chat.completions.with_raw_response.create(
+                **request, stream=True, stream_options={"include_usage": True}
             )
+            self._observe_headers(raw.headers)
+            stream = raw.parse()
+            parser = self._parser()
+            try:
+                stopped = self._read_stream(self._deltas(stream), parser)
+            finally:
+                # Closing the connection early also stops the generation
+                stream.close()
+            return self._explained(*self._stream_result(parser, stopped))
+            
+        except Exception as e:
+            self.last_error = e
+            report(f"⚠️ OpenAI API Error: {str(e)}", "red")
+            return None, None
+    
+    async def agenerate_command(self, user_input: str, os_type: str,
+                                deadline: Optional[Deadline] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Generate command using OpenAI on the running event loop"""
+        if not self.client:
+            return None, None
             
-            if not response.choices:
-                return None, None
+        deadline = deadline or Deadline()
+        try:
+            import openai
+            client = self._loop_client(self._make_async_client).with_options(
+                timeout=self._http_timeout(deadline, openai.Timeout),
+                max_retries=deadline.retries()
+            )
+            request = self._request(user_input, os_type)
+            if not self.streaming:
+                raw = await client.chat.completions.with_raw_response.create(**request)
+                self._observe_headers(raw.headers)
+                return self._result(await self._aparse(raw))
                 
-            full_response = response.choices[0].message.content
-            command, explanation = ResponseParser.parse_response(full_response)
+            raw = await client.chat.completions.with_raw_response.create(
+                **request, stream=True, stream_options={"include_usage": True}
+            )
+            self._observe_headers(raw.headers)
+            stream = await self._aparse(raw)
+            parser = self._parser()
+            try:
+                stopped = await self._aread_stream(self._adeltas(stream), parser)
+            finally:
+                await stream.close()
+            return self._explained(*self._stream_result(parser, stopped))
             
-            return command, explanation if explanation else f"Generated by OpenAI ({self.model})"
+        except Exception as e:
+            self.last_error = e
+            report(f"⚠️ OpenAI API Error: {str(e)}", "red")
+            return None, None
+    
+    def explain_command(self, user_input: str, command: str, os_type: str,
+                        deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using OpenAI"""
+        if not self.client:
+            return None
             
+        deadline = deadline or Deadline()
+        try:
+            import openai
+            client = self.client.with_options(
+                timeout=self._http_timeout(deadline, openai.Timeout),
+                max_retries=deadline.retries()
+            )
+            return self._explanation(client.chat.completions.create(**self._explanation_request(user_input, command, os_type)))
         except Exception as e:
-            print(colored(f"⚠️ OpenAI API Error: {str(e)}", "red"))
+            self.last_error = e
+            return None
+    
+    async def aexplain_command(self, user_input: str, command: str, os_type: str,
+                               deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Explain a command using OpenAI on the running event loop"""
+        if not self.client:
+            return None
+            
+        deadline = deadline or Deadline()
+        try:
+            import openai
+            client = self._loop_client(self._make_async_client).with_options(
+                timeout=self._http_timeout(deadline, openai.Timeout),
+                max_retries=deadline.retries()
+            )
+            return self._explanation(await client.chat.completions.create(**self._explanation_request(user_input, command, os_type)))
+        except Exception as e:
+            self.last_error = e
+            return None
+    
+    async def awarm(self, deadline: Optional[Deadline] = None) -> bool:
+        """Create the async client and open a pooled connection to its endpoint"""
+        if not self.client:
+            return False
+        import openai
+        client = self._loop_client(self._make_async_client)
+        await warm(client.base_url, getattr(openai, "DefaultAsyncHttpxClient", None),
+                   (deadline or Deadline()).timeout())
+        return True
+    
+    def _make_async_client(self):
+        import openai
+        return openai.AsyncOpenAI(**self._client_args, http_client=get_async_client(getattr(openai, "DefaultAsyncHttpxClient", None)))
+    
+    def _request(self, user_input: str, os_type: str) -> Dict[str, Any]:
+        """Chat completion arguments, shared by the sync and async paths
+        
+        The system message is the registry's byte-stable prefix, which
+        the API caches automatically once it is long enough.
+        """
+        system = prompts.system_prompt(os_type, self.structured, explain=not self.command_only)
+        user = prompts.user_message(user_input, self.structured)
+        self._record_usage(prompts.estimate_tokens(system + user), estimated=True)
+        request = {
+            "model": self.model or "gpt-3.5-turbo",
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            "temperature": 0.5
+        }
+        if self.command_only:
+            request["max_tokens"] = self.command_max_tokens
+            if not self.structured:
+                # The answer is the command line and nothing after it
+                request["stop"] = ["\n"]
+        if self.structured:
+            # Forced tool call: the arguments follow the command schema
+            request["tools"] = [{
+                "type": "function",
+                "function": {
+                    "name": COMMAND_TOOL_NAME,
+                    "description": COMMAND_TOOL_DESCRIPTION,
+                    "parameters": self._schema()
+                }
+            }]
+            request["tool_choice"] = {"type": "function", "function": {"name": COMMAND_TOOL_NAME}}
+        return request
+    
+    def _explanation_request(self, user_input: str, command: str, os_type: str) -> Dict[str, Any]:
+        return {
+            "model": self.model or "gpt-3.5-turbo",
+            "messages": [
+                {"role": "system", "content": prompts.explanation_prompt(os_type)},
+                {"role": "user", "content": prompts.explanation_message(user_input, command)}
+            ],
+            "temperature": 0.3,
+            "max_tokens": self.explanation_max_tokens
+        }
+    
+    @staticmethod
+    def _explanation(response) -> Optional[str]:
+        if not response.choices:
+            return None
+        return ResponseParser.parse_explanation(response.choices[0].message.content)
+    
+    def _result(self, response) -> Tuple[Optional[str], Optional[str]]:
+        self._usage(getattr(response, "usage", None))
+        if not response.choices:
             return None, None
+            
+        message = response.choices[0].message
+        text = message.tool_calls[0].function.arguments if message.tool_calls else message.content
+        return self._explained(*self._parse_text(text))
+    
+    def _explained(self, command: Optional[str], explanation: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        if explanation or self.command_only:
+            # Command-first: the explanation is fetched later
+            return command, explanation
+        return command, f"Generated by OpenAI ({self.model})"
+    
+    def _deltas(self, stream):
+        """Text of each streamed chunk (content, or tool call arguments)"""
+        for chunk in stream:
+            self._usage(chunk.usage)
+            if chunk.choices:
+                yield self._delta_text(chunk.choices[0].delta)
+    
+    async def _adeltas(self, stream):
+        async for chunk in stream:
+            self._usage(chunk.usage)
+            if chunk.choices:
+                yield self._delta_text(chunk.choices[0].delta)
+    
+    @staticmethod
+    def _delta_text(delta) -> Optional[str]:
+        if delta.tool_calls:
+            return delta.tool_calls[0].function.arguments
+        return delta.content
+    
+    def _usage(self, usage):
+        """Prompt token counts, from a response or the final stream chunk"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self._record_usage(usage.prompt_tokens, getattr(details, "cached_tokens", None) or 0)
@@ -0,0 +1,105 @@
+import glob
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Evaluated prefixes kept in memory; each one is a snapshot of the whole context
+MAX_PREFIXES = 4
+# Snapshot files kept next to a model (the most recently written ones)
+MAX_PREFIX_FILES = 4
+
+class PrefixCache:
+    """Evaluated static prompt prefixes for a llama.cpp model
+
+    Every local prompt starts with one of a few fixed instruction blocks
+    (the registry's system and explanation prompts). Each is evaluated
+    once and the context state saved (Llama.save_state). Before a
+    completion the prefix's state is loaded back if the context holds
+    something else, and llama.cpp then only evaluates the tokens after it:
+    it skips whatever part of a prompt matches the tokens already in the
+    context. With persist, snapshots are also written next to the model
+    file, so a new process doesn't evaluate the prefix at all.
+
+    Not thread-safe: one per llama.cpp context, used by whoever holds it.
+    """
+
+    def __init__(self, llm, model_path: str, n_ctx: int, persist: bool = False,
+                 capacity: int = MAX_PREFIXES):
+        self.llm = llm
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.persist = persist
+        self.capacity = capacity
+        self.states = OrderedDict()  # prefix -> LlamaState, least recently used first
+
+    def prepare(self, prefix: str) -> int:
+        """Evaluate (or load) a prefix ahead of its first use; returns its token count"""
+        return self._state(prefix).n_tokens
+
+    def use(self, prefix: str) -> int:
+        """Make the context start with the prefix; returns the prefix tokens reused"""
+        import numpy as np
+        state = self._state(prefix)
+        n_tokens = state.n_tokens
+        current = self.llm.input_ids
+        if len(current) < n_tokens or not np.array_equal(current[:n_tokens], state.input_ids[:n_tokens]):
+            self.llm.load_state(state)
+        return n_tokens
+
+    def _state(self, prefix: str):
+        state = self.states.get(prefix)
+        if state is not None:
+            self.states.move_to_end(prefix)
+            return state
+        path = self._path(prefix) if self.persist else None
+        state = self._load(path) if path else None
+        if state is None:
+            self.llm.reset()
+            self.llm.eval(self.llm.tokenize(prefix.encode("utf-8")))
+            state = self.llm.save_state()
+            if path:
+                self._save(path, state)
+        self.states[prefix] = state
+        while len(self.states) > self.capacity:
+            self.states.popitem(last=False)
+        return state
+
+    def _path(self, prefix: str) -> Optional[str]:
+        """Snapshot file for a prefix, specific to the model file, context size and llama.cpp build"""
+        import llama_cpp
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            return None
+        key = "\0".join([prefix, str(self.n_ctx), getattr(llama_cpp, "__version__", ""),
+                         str(stat.st_size), str(int(stat.st_mtime))])
+        return f"{self.model_path}.prefix-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.state"
+
+    @staticmethod
+    def _load(path: str):
+        from llama_cpp import LlamaState
+        try:
+            # Written by _save for this model; the same format llama.cpp's disk cache uses
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception:
+            return None
+        return state if isinstance(state, LlamaState) else None
+
+    def _save(self, path: str, state):
+        try:
+            # Contexts of the same model may save the same prefix at once
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            # Snapshots for prompts that have since changed are dropped
+            files = sorted(glob.glob(f"{glob.escape(self.model_path)}.prefix-*.state"),
+                           key=os.path.getmtime, reverse=True)
+            for old in files[MAX_PREFIX_FILES:]:
+                os.remove(old)
+        except OSError:
+            pass
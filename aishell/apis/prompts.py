@@ -0,0 +1,147 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from .response_parser import COMMAND_ONLY_INSTRUCTIONS, STRUCTURED_INSTRUCTIONS
+
+# One place for every provider's prompt. The system prompt depends only on
+# the target OS, the output mode and the prompt size - never on the query -
+# and is built once, so its bytes are identical on every call. That stable
+# prefix is what provider-side prompt caching (Anthropic/Bedrock
+# cache_control, OpenAI's automatic prefix cache, Ollama's and llama.cpp's
+# KV reuse) keys on; the query always comes last.
+
+# Bedrock Claude models that accept cache_control (others reject the field)
+BEDROCK_CACHE_MODELS = ("claude-3-5-haiku", "claude-3-7-sonnet", "claude-sonnet-4", "claude-opus-4",
+                        "claude-haiku-4")
+# Anthropic's minimum cacheable prefix (Claude Haiku models need twice that)
+MIN_CACHE_TOKENS = 1024
+# Small local models get the short prompt: every prompt token costs CPU time
+COMPACT_PROVIDERS = ("local",)
+
+_EXAMPLES = {
+    "unix": [
+        ("list all files including hidden ones", "ls -la"),
+        ("show disk usage", "df -h"),
+        ("size of this folder", "du -sh ."),
+        ("find python files", "find . -name '*.py'"),
+        ("files over 1GB", "find . -type f -size +1G"),
+        ("files under 100MB", "find . -type f -size -100M"),
+        ("search for TODO in source files", "grep -rn 'TODO' ."),
+        ("show memory usage", "free -h"),
+        ("what is listening on port 3000", "lsof -i :3000"),
+        ("kill process on port 3000", "kill $(lsof -t -i :3000)"),
+        ("show running docker containers", "docker ps"),
+        ("last 50 lines of app.log and follow it", "tail -n 50 -f app.log"),
+        ("count lines in all python files", "find . -name '*.py' | xargs wc -l"),
+        ("compress the logs folder", "tar -czf logs.tar.gz logs"),
+        ("show my ip address", "ip addr show"),
+        ("clear screen", "clear"),
+    ],
+    "windows": [
+        ("list all files including hidden ones", "dir /a"),
+        ("show disk usage", "wmic logicaldisk get caption,freespace,size"),
+        ("find python files", "dir /s /b *.py"),
+        ("files over 1GB", "powershell \"Get-ChildItem -Recurse -File | Where-Object Length -gt 1GB\""),
+        ("files under 100MB", "powershell \"Get-ChildItem -Recurse -File | Where-Object Length -lt 100MB\""),
+        ("search for TODO in source files", "findstr /s /n \"TODO\" *.*"),
+        ("show memory usage", "systeminfo | findstr /C:\"Memory\""),
+        ("what is listening on port 3000", "netstat -ano | findstr :3000"),
+        ("show running docker containers", "docker ps"),
+        ("show my ip address", "ipconfig"),
+        ("list running processes", "tasklist"),
+        ("clear screen", "cls"),
+    ],
+}
+# Examples kept in the compact prompt (the most common requests come first)
+_COMPACT_EXAMPLES = 3
+
+def _family(os_type: str) -> str:
+    return "windows" if os_type == "windows" else "unix"
+
+@lru_cache(maxsize=None)
+def system_prompt(os_type: str, structured: bool = False, compact: bool = False,
+                  explain: bool = True) -> str:
+    """Static instructions for a target OS, identical byte for byte on every call
+    
+    explain=False leaves the explanation out of the structured answer
+    (command-first generation asks for it separately).
+    """
+    windows = _family(os_type) == "windows"
+    if structured:
+        answer = STRUCTURED_INSTRUCTIONS if explain else COMMAND_ONLY_INSTRUCTIONS
+    else:
+        answer = "Respond with ONLY the executable command on the FIRST LINE"
+    rules = [
+        answer,
+        f"Current system: {os_type}",
+        "Use Windows cmd commands (PowerShell only when cmd can't do it)" if windows
+        else "Use bash commands",
+    ]
+    if windows:
+        rules.append("Windows alternatives: clear -> cls, ls -> dir, grep -> findstr")
+    rules.append(
+        'File sizes: "over 1GB" -> Where-Object Length -gt 1GB, "under 100MB" -> Where-Object Length -lt 100MB'
+        if windows else 'File sizes: "over 1GB" -> find -size +1G, "under 100MB" -> find -size -100M'
+    )
+    rules.append("No markdown, code fences or comments in the command")
+
+    examples = _EXAMPLES[_family(os_type)]
+    if compact:
+        examples = examples[:_COMPACT_EXAMPLES]
+    lines = [f"You are a {os_type} terminal expert. Follow STRICTLY:"]
+    lines += [f"{i}. {rule}" for i, rule in enumerate(rules, 1)]
+    lines.append("Examples:")
+    lines += [f"- {request} -> {command}" for request, command in examples]
+    return "\n".join(lines)
+
+def user_message(user_input: str, structured: bool = False) -> str:
+    """The per-query part, always placed after the static prefix"""
+    if structured:
+        return f"Convert to terminal command: {user_input}"
+    return f"Convert to terminal command: {user_input}\n\nCommand:"
+
+def completion_prompt(os_type: str, user_input: str, structured: bool = False,
+                      compact: bool = False, answer_prefix: str = "Command:") -> str:
+    """Single-string prompt for completion models; the static prefix comes first"""
+    return f"{system_prompt(os_type, structured, compact)}\n\nRequest: {user_input}\n{answer_prefix}"
+
+@lru_cache(maxsize=None)
+def explanation_prompt(os_type: str) -> str:
+    """Static instructions for explaining a command that was generated on its own"""
+    return (f"You are a {os_type} terminal expert. Explain in one short sentence what the given "
+            "command does, mentioning anything it changes or deletes. Plain text only, no markdown.")
+
+def explanation_message(user_input: str, command: str) -> str:
+    """The per-command part of an explanation request"""
+    return f"Request: {user_input}\nCommand: {command}\n\nExplanation:"
+
+def explanation_completion_prompt(os_type: str, user_input: str, command: str) -> str:
+    """Single-string explanation prompt for completion models"""
+    return f"{explanation_prompt(os_type)}\n\n{explanation_message(user_input, command)}"
+
+def is_compact(provider: str) -> bool:
+    return provider in COMPACT_PROVIDERS
+
+def supports_cache_control(provider: str, model: Optional[str]) -> bool:
+    """Whether a cache breakpoint can be set on the prefix for this provider/model"""
+    if provider == "anthropic":
+        return True
+    if provider == "aws_bedrock":
+        return bool(model) and any(name in model for name in BEDROCK_CACHE_MODELS)
+    return False
+
+def system_blocks(text: str, cache: bool) -> List[Dict[str, Any]]:
+    """Anthropic-style system content, with a cache breakpoint after the static prefix
+
+    Tools come before the system prompt in the cached prefix, so the
+    breakpoint covers the tool schema as well. No breakpoint is set on a
+    prompt shorter than MIN_CACHE_TOKENS: the API would not cache it.
+    """
+    block = {"type": "text", "text": text}
+    if cache and estimate_tokens(text) >= MIN_CACHE_TOKENS:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) when the provider reports none"""
+    return len(text) // 4 + 1
@@ -0,0 +1,268 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from .deadline import Deadline
+from .prompts import estimate_tokens
+
+# Rough token accounting for the tokens/min bucket: the prompt template and a
+# typical one-line answer on top of the user's request
+PROMPT_OVERHEAD_TOKENS = 300
+COMPLETION_TOKENS = 100
+
+# A reported limit that is back to full within this many seconds is a
+# per-minute one; anything longer (a daily quota, say) is not
+MINUTE_WINDOW = 60.0
+
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 20.0
+
+def request_tokens(text: str) -> int:
+    """Tokens a request for `text` will use, prompt template and answer included"""
+    return estimate_tokens(text) + PROMPT_OVERHEAD_TOKENS + COMPLETION_TOKENS
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_MAX) -> float:
+    """Exponential backoff with full jitter, never shorter than the server's Retry-After
+
+    Jitter spreads out retries from concurrent callers that were throttled
+    at the same moment, so they don't all come back at once.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        delay = retry_after + random.uniform(0, base)
+    return delay
+
+class TokenBucket:
+    """Token bucket that hands out reservations in arrival order
+
+    reserve() takes the tokens immediately - letting the balance go
+    negative - and returns how long the caller has to wait before using
+    them. Each caller therefore queues behind everyone who reserved
+    before it, which makes waiting fair (FIFO) for threads and asyncio
+    tasks alike. A bucket without a rate never limits.
+    """
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.per_minute = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.set_rate(per_minute)
+
+    @property
+    def limited(self) -> bool:
+        return self.per_minute is not None
+
+    def set_rate(self, per_minute: Optional[float]):
+        with self._lock:
+            self._refill(time.monotonic())
+            was_limited = self.limited
+            self.per_minute = float(per_minute) if per_minute else None
+            if self.limited and not was_limited:
+                self.tokens = self.per_minute
+
+    def _refill(self, now: float):
+        # Nothing accrues while paused
+        start = max(self.updated, self.paused_until)
+        if self.limited and now > start:
+            self.tokens = min(self.per_minute, self.tokens + (now - start) * self.per_minute / 60.0)
+        self.updated = max(self.updated, now)
+
+    def reserve(self, amount: float, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take `amount` tokens; returns the seconds to wait before using them
+
+        Returns None (and takes nothing) if the wait would exceed max_wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self.paused_until - now)
+            if self.limited:
+                amount = min(amount, self.per_minute)
+                if self.tokens < amount:
+                    wait += (amount - self.tokens) * 60.0 / self.per_minute
+            if max_wait is not None and wait > max_wait:
+                return None
+            if self.limited:
+                self.tokens -= amount
+            return wait
+
+    def refund(self, amount: float):
+        """Give back a reservation that was never used"""
+        with self._lock:
+            if self.limited:
+                self.tokens = min(self.per_minute, self.tokens + amount)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds` (e.g. after a 429)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = min(self.tokens, 0.0)
+
+    def observe(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float]):
+        """Align the bucket with what the server reported
+
+        The reset time tells the window apart. Only per-minute limits set
+        the rate; a longer one just holds callers once it is used up, and
+        one without a reset can't be classified and is ignored.
+        """
+        if reset is None:
+            return
+        if reset > MINUTE_WINDOW:
+            if remaining is not None and remaining <= 0:
+                self.pause(reset)
+            return
+        if limit and (not self.limited or limit < self.per_minute):
+            self.set_rate(limit)
+        with self._lock:
+            self._refill(time.monotonic())
+            if remaining is not None and self.limited:
+                # Only ever lower: requests still in flight aren't counted yet
+                self.tokens = min(self.tokens, remaining)
+        if remaining is not None and remaining <= 0 and reset:
+            self.pause(reset)
+
+class RateLimiter:
+    """Requests/min and tokens/min limits for one provider
+
+    Limits come from config and are tightened from the rate-limit headers
+    the provider sends back; a limit that is neither configured nor
+    reported is not enforced.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def reserve(self, tokens: int, deadline: Deadline) -> Optional[float]:
+        """Reserve one request and `tokens` tokens; returns the wait, or None if it won't fit the deadline"""
+        max_wait = deadline.remaining()
+        request_wait = self.requests.reserve(1, max_wait)
+        if request_wait is None:
+            return None
+        token_wait = self.tokens.reserve(tokens, max_wait)
+        if token_wait is None:
+            self.requests.refund(1)
+            return None
+        return max(request_wait, token_wait)
+
+    def release(self, tokens: int):
+        self.requests.refund(1)
+        self.tokens.refund(tokens)
+
+    async def acquire(self, tokens: int, deadline: Deadline) -> bool:
+        """Wait for a slot in arrival order; False if none is available before the deadline"""
+        wait = self.reserve(tokens, deadline)
+        if wait is None:
+            return False
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.release(tokens)
+                raise
+        return True
+
+    def throttled(self, attempt: int, retry_after: Optional[float] = None,
+                  headers: Optional[Dict[str, str]] = None) -> float:
+        """Record a rate-limit error; returns the backoff before the next attempt
+
+        Every caller of this provider is held for the backoff, not just the
+        one that was throttled.
+        """
+        if headers:
+            self.update_from_headers(headers)
+        delay = backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+        self.requests.pause(delay)
+        self.tokens.pause(delay)
+        return delay
+
+    def update_from_headers(self, headers):
+        """Adjust the buckets from rate-limit response headers, whichever provider sent them"""
+        limits = parse_rate_limit_headers(headers)
+        if "requests" in limits:
+            self.requests.observe(*limits["requests"])
+        if "tokens" in limits:
+            self.tokens.observe(*limits["tokens"])
+
+# (limit, remaining, reset) header names per bucket:
+#   OpenAI:     x-ratelimit-{limit,remaining,reset}-{requests,tokens}
+#   Anthropic:  anthropic-ratelimit-{requests,tokens}-{limit,remaining,reset}
+#   OpenRouter: x-ratelimit-{limit,remaining,reset} (requests)
+_HEADER_NAMES = {
+    "requests": [
+        ("x-ratelimit-limit-requests", "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+        ("anthropic-ratelimit-requests-limit", "anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+        ("x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"),
+    ],
+    "tokens": [
+        ("x-ratelimit-limit-tokens", "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+        ("anthropic-ratelimit-tokens-limit", "anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset"),
+    ],
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_reset(value) -> Optional[float]:
+    """Seconds until a limit resets
+
+    Accepts durations ("1s", "6m0s", "20ms"), epoch timestamps in seconds or
+    milliseconds, plain seconds and RFC 3339 timestamps.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    number = _number(value)
+    if number is not None:
+        if number > 1e11:  # epoch milliseconds
+            return max(0.0, number / 1000 - time.time())
+        if number > 1e9:  # epoch seconds
+            return max(0.0, number - time.time())
+        return max(0.0, number)
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+
+def parse_rate_limit_headers(headers) -> Dict[str, Tuple[Optional[float], Optional[float], Optional[float]]]:
+    """Map rate-limit headers to {"requests"/"tokens": (limit, remaining, reset seconds)}"""
+    if not headers:
+        return {}
+    headers = {str(k).lower(): v for k, v in dict(headers).items()}
+    limits = {}
+    for bucket, families in _HEADER_NAMES.items():
+        for limit, remaining, reset in families:
+            if limit in headers or remaining in headers:
+                limits[bucket] = (
+                    _number(headers.get(limit)),
+                    _number(headers.get(remaining)),
+                    parse_reset(headers.get(reset))
+                )
+                break
+    return limits
@@ -1,28 +1,117 @@
+import json
 import re
-from typing import Tuple, Optional
+from typing import Any, Dict, Tuple, Optional, Union
+
+# Structured output: every provider is asked for this object (JSON schema /
+# tool calling / JSON mode / grammar), so no free text has to be parsed
+RISK_LEVELS = ("low", "medium", "high")
+COMMAND_TOOL_NAME = "shell_command"
+COMMAND_TOOL_DESCRIPTION = "Return the terminal command for the user's request"
+COMMAND_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "command": {
+            "type": "string",
+            "description": "The executable command, on a single line"
+        },
+        "risk": {
+            "type": "string",
+            "enum": list(RISK_LEVELS),
+            "description": "low: read-only; medium: changes files or settings; "
+                           "high: destructive, irreversible or needs admin rights"
+        },
+        "explanation": {
+            "type": "string",
+            "description": "One short sentence on what the command does"
+        }
+    },
+    "required": ["command", "risk", "explanation"],
+    "additionalProperties": False
+}
+STRUCTURED_INSTRUCTIONS = (
+    'Answer with a JSON object: {"command": the executable command on one line, '
+    '"risk": "low" (read-only), "medium" (changes files or settings) or "high" '
+    '(destructive, irreversible or needs admin rights), "explanation": one short sentence}'
+)
+# Command-first generation: the explanation is asked for separately, if at all
+COMMAND_ONLY_SCHEMA = {
+    "type": "object",
+    "properties": {name: COMMAND_SCHEMA["properties"][name] for name in ("command", "risk")},
+    "required": ["command", "risk"],
+    "additionalProperties": False
+}
+COMMAND_ONLY_INSTRUCTIONS = (
+    'Answer with a JSON object: {"command": the executable command on one line, '
+    '"risk": "low" (read-only), "medium" (changes files or settings) or "high" '
+    '(destructive, irreversible or needs admin rights)}'
+)
+
+# A complete string field in (possibly still streaming) JSON
+_JSON_FIELDS = {
+    name: re.compile(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)"' % name)
+    for name in ("command", "risk", "explanation")
+}
+
+# Fields that decide a streamed structured command, and how much text to keep
+# when none of their names has arrived yet (one may be split across chunks)
+_DECIDING_FIELDS = {name: f'"{name}"' for name in ("command", "risk")}
+_NAME_OVERLAP = max(map(len, _DECIDING_FIELDS.values())) - 1
+
+# Every pattern is compiled once here: the parser runs on every response
+# and, when streaming, on every line
+_CODE_BLOCK = re.compile(r"```(?:bash|shell|cmd|powershell)?\s*\n?(.+?)\n```", re.DOTALL)
+# What may come between the opening fence and the block content
+_BLOCK_HEADER = re.compile(r"(?:bash|shell|cmd|powershell)?\s*")
+_FALLBACK_LINE = re.compile(r'(?:^|\n)([^\n`{}\]>]+?)(?:\n|$)')
+_WINDOWS_SIZE = re.compile(r'(powershell.*where.*size|Get-ChildItem.*where)', re.IGNORECASE)
+_UNIX_SIZE = re.compile(r'(find\s+.*-size\s+[-+]\d+[MGK])')
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+# Not a command: starts with code block or JSON characters, ends with a
+# command separator, or is a dangerous command
+_BANNED = re.compile(r'^[`{}\[\]\\]|[;&|]\s*$|\b(?:rm\s+-rf|chmod\s+777|dd\s+if=)')
+_NO_QUOTES = str.maketrans("", "", "\"'")
+_PREFIXES = ("command:", "cmd:", "$ ", "`")
 
 class ResponseParser:
-    """Helper class to parse and clean responses from LLMs"""
+    """Helper class to parse and clean responses from LLMs
     
+    Patterns are compiled once at import and the text is split into lines
+    once per parse. Streamed responses go through StreamingCommandParser,
+    which gives the same results.
+    """
+    
+    @staticmethod
+    def parse(text: Optional[str], os_type: Optional[str] = None, strict: bool = False,
+              structured: bool = False) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """(command, explanation, risk) from a complete response, in one pass
+        
+        structured tries the text as the JSON object first; otherwise, or
+        if it isn't JSON, strict picks parse_claude_response over
+        parse_response. Risk is only known for structured responses.
+        """
+        if structured:
+            parsed = ResponseParser.parse_structured(text)
+            if parsed is not None:
+                return parsed
+        if strict:
+            return ResponseParser.parse_claude_response(text, os_type) + (None,)
+        return ResponseParser.parse_response(text) + (None,)
+        
     @staticmethod
     def parse_response(text: str) -> Tuple[Optional[str], Optional[str]]:
-        """Parse response from API calls to extract command and explanation"""
+        """Parse response from API calls to extract command and explanation
+        
+        The first line is the command, the rest is the explanation.
+        """
         if not text or not isinstance(text, str):
             return None, None
             
-        # Clean and split by lines
-        text = text.strip()
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
+        lines = ResponseParser._lines(text)
         if not lines:
             return None, None
             
-        # First line should be the command
         command = ResponseParser.clean_command(lines[0])
-        
-        # Rest is explanation
         explanation = ' '.join(lines[1:]) if len(lines) > 1 else None
-        
         return command, explanation
         
     @staticmethod
@@ -33,35 +122,54 @@ class ResponseParser:
         3. Fallback patterns"""
         if not text or not isinstance(text, str):
             return None, None
-            
         text = text.strip()
-
+        
         # Stage 1: Check for code blocks
-        code_block_match = re.search(r"```(?:bash|shell|cmd|powershell)?\s*\n?(.+?)\n```", text, re.DOTALL)
-        if code_block_match:
-            content = code_block_match.group(1).strip()
-            lines = [line.strip() for line in content.split('\n') if line.strip()]
-            if lines and ResponseParser.is_valid_command(lines[0]):
-                explanation = ' '.join(lines[1:]) if len(lines) > 1 else None
-                return lines[0], explanation
-
+        block = ResponseParser._code_block(text)
+        if block is not None and block[0] is not None:
+            return block
+            
         # Stage 2: Line-by-line parsing
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        lines = ResponseParser._lines(text)
         for i, line in enumerate(lines):
             if ResponseParser.is_valid_command(line):
                 explanation = ' '.join(lines[i+1:]) if i+1 < len(lines) else None
                 return line, explanation
-
+                
         # Stage 3: Fallback pattern matching
-        command_match = re.search(r'(?:^|\n)([^\n`{}\]>]+?)(?:\n|$)', text)
+        return ResponseParser._fallback(text, os_type)
+        
+    @staticmethod
+    def _lines(text: str):
+        """Non-empty lines, stripped"""
+        return [line for line in map(str.strip, text.split('\n')) if line]
+    
+    @staticmethod
+    def _code_block(text: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Stage 1: (command, explanation) from the first code block; None
+        without a complete block, (None, None) if its first line isn't a command"""
+        match = _CODE_BLOCK.search(text)
+        return ResponseParser._block_lines(match) if match else None
+        
+    @staticmethod
+    def _block_lines(match) -> Tuple[Optional[str], Optional[str]]:
+        lines = ResponseParser._lines(match.group(1).strip())
+        if lines and ResponseParser.is_valid_command(lines[0]):
+            return lines[0], ' '.join(lines[1:]) if len(lines) > 1 else None
+        return None, None
+        
+    @staticmethod
+    def _fallback(text: str, os_type: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Stage 3: pattern matching on the (stripped) text when no line is a valid command"""
+        command_match = _FALLBACK_LINE.search(text)
         
         # Special patterns
         if os_type == 'windows':
-            powershell_pattern = re.search(r'(powershell.*where.*size|Get-ChildItem.*where)', text, re.IGNORECASE)
+            powershell_pattern = _WINDOWS_SIZE.search(text)
             if powershell_pattern:
                 return powershell_pattern.group().strip(), None
         else:
-            size_pattern = re.search(r'(find\s+.*-size\s+[-+]\d+[MGK])', text)
+            size_pattern = _UNIX_SIZE.search(text)
             if size_pattern:
                 return size_pattern.group().strip(), None
                 
@@ -70,6 +178,60 @@ class ResponseParser:
             
         return None, None
     
+    @staticmethod
+    def parse_structured(data: Union[str, Dict[str, Any], None]) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+        """Parse a structured {command, explanation, risk} response
+        
+        Accepts the decoded object or its JSON text; text that is cut short
+        (a stream stopped early) still yields the fields that are complete.
+        Returns (command, explanation, risk), or None if this isn't a
+        structured response at all.
+        """
+        if isinstance(data, str):
+            text = data.strip()
+            if text.startswith("```"):
+                text = _JSON_FENCE.sub("", text)
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = ResponseParser._partial_fields(text)
+        if not isinstance(data, dict) or "command" not in data:
+            return None
+            
+        # Quotes are kept as they are: in a JSON string they belong to the command
+        command = str(data.get("command") or "").strip().strip('`').strip()
+        if command.startswith("$ "):
+            command = command[2:].strip()
+        if "\n" in command or not ResponseParser.is_valid_command(command):
+            command = None
+        explanation = str(data.get("explanation") or "").strip() or None
+        risk = str(data.get("risk") or "").strip().lower()
+        return command, explanation, risk if risk in RISK_LEVELS else None
+        
+    @staticmethod
+    def _partial_fields(text: str) -> Dict[str, str]:
+        """String fields that are complete in partial JSON text"""
+        fields = {}
+        for name, pattern in _JSON_FIELDS.items():
+            match = pattern.search(text)
+            if match:
+                try:
+                    fields[name] = json.loads(f'"{match.group(1)}"')
+                except ValueError:
+                    pass
+        return fields
+        
+    @staticmethod
+    def parse_explanation(text: Optional[str]) -> Optional[str]:
+        """The explanation from an explanation request's answer: its first paragraph,
+        without an "Explanation:" label or quotes around it"""
+        if not text or not isinstance(text, str):
+            return None
+        explanation = " ".join(text.strip().split("\n\n")[0].split())
+        if explanation.lower().startswith("explanation:"):
+            explanation = explanation[len("explanation:"):].strip()
+        return explanation.strip('"`').strip() or None
+        
     @staticmethod
     def is_valid_command(command: str) -> bool:
         """Strict validation for safe, executable commands"""
@@ -83,14 +245,7 @@ class ResponseParser:
         if command.startswith('```') or command.endswith('```'):
             return False
             
-        banned_patterns = [
-            r'^[`{}\[\]\\]',  # Starts with code block or JSON characters
-            r'[;&|]\s*$',  # Ends with command separator
-            r'\b(rm\s+-rf|chmod\s+777|dd\s+if=)',  # Dangerous commands
-        ]
-        
-        return (len(command) < 250 and 
-                not any(re.search(pattern, command) for pattern in banned_patterns))
+        return len(command) < 250 and not _BANNED.search(command)
 
     @staticmethod
     def clean_command(command: str) -> Optional[str]:
@@ -99,14 +254,14 @@ class ResponseParser:
             return None
             
         # Remove quotes and comments
-        command = re.sub(r'["\']', '', command.split('#')[0].split('//')[0].strip())
+        command = command.split('#')[0].split('//')[0].strip().translate(_NO_QUOTES)
         
         # Basic validation
         if len(command) > 200:
             return None
             
         # Remove common prefixes
-        for prefix in ["command:", "cmd:", "$ ", "`"]:
+        for prefix in _PREFIXES:
             if command.lower().startswith(prefix):
                 command = command[len(prefix):].strip()
                 
@@ -114,3 +269,177 @@ class ResponseParser:
         command = command.strip('`')
                 
         return command if command and ResponseParser.is_valid_command(command) else None
+
+class StreamingCommandParser:
+    """Incremental parser for streamed responses
+    
+    Text is fed in as it arrives and each complete line is looked at once,
+    only until the command is decided; feed() reports when it is, so the
+    caller can show it and, if wanted, stop reading. finish() parses
+    everything received with the batch parser (ResponseParser.parse), so
+    its result is the one the complete response would give. Responses
+    that arrive complete skip this class and go to ResponseParser.parse.
+    
+    Two modes mirror the batch parsers: the default takes the first
+    non-empty line (parse_response); strict mode (parse_claude_response)
+    prefers the first code block, then the first valid command line, then
+    fallback patterns. In strict mode the command is decided for certain
+    once a code block closes; before that, the first valid line that is
+    not a preamble such as "Here is the command:" is taken. In structured
+    mode the text is the JSON object (or tool arguments), and the command
+    is decided once its "command" and "risk" fields are complete; a
+    response that turns out not to be JSON falls back to the text rules.
+    """
+    
+    def __init__(self, os_type: Optional[str] = None, strict: bool = False,
+                 structured: bool = False):
+        self.os_type = os_type
+        self.strict = strict
+        self.structured = structured
+        self.chunks = []
+        self.first_valid = None  # First valid command line (strict)
+        self.block = None  # Code block result (strict), once a block has closed
+        self.command = None
+        self.risk = None
+        self.decided = False  # The command (or its absence) is known
+        self.in_fence = False
+        self._partial = []  # Pieces of the incomplete last line
+        self._text = ""
+        self._joined = 0  # Chunks in _text
+        self._json = None  # Structured mode: whether the text is a JSON object
+        self._fields = {}  # Structured mode: deciding fields found so far
+        self._tail = ""  # Structured mode: text that may hold an incomplete field
+        self._open = False  # Structured mode: _tail starts at a field name
+        self._result = None
+        
+    def feed(self, text: str) -> bool:
+        """Add streamed text; True once the command has been decided"""
+        if not text:
+            return self.decided
+        self.chunks.append(text)
+        if self.decided:
+            return True
+        if self.structured and self._json is not False:
+            if self._json is None:
+                start = self.text.lstrip()[:1]
+                if not start:
+                    return False
+                self._json = start in ("{", "`")
+                # All the text so far goes to the JSON scan or, if it isn't JSON after all, the line rules
+                text = self.text
+            if self._json:
+                self._scan_fields(text)
+                return self.decided
+        if "\n" not in text:
+            self._partial.append(text)
+            return False
+        lines = text.split("\n")
+        self._partial.append(lines[0])
+        lines[0] = "".join(self._partial)
+        self._partial = [lines.pop()]
+        for line in lines:
+            self._line(line)
+            if self.decided:
+                break
+        return self.decided
+        
+    def _scan_fields(self, text: str):
+        """Structured mode: look for the complete "command" and "risk" fields
+        
+        Only the text from the first name of a field still missing is kept
+        and searched again, so each chunk costs about its own length
+        rather than the length of everything received.
+        """
+        tail = self._tail + text
+        keep = max(0, len(tail) - _NAME_OVERLAP)
+        if '"' not in text:
+            # Nothing completes without a closing quote
+            self._tail = tail if self._open else tail[keep:]
+            return
+        self._open = False
+        for name, quoted in _DECIDING_FIELDS.items():
+            if name in self._fields:
+                continue
+            # The field can only start at its name
+            found = tail.find(quoted)
+            if found < 0:
+                continue
+            match = _JSON_FIELDS[name].search(tail, found)
+            if match is None:
+                keep, self._open = min(keep, found), True
+                continue
+            try:
+                self._fields[name] = json.loads(f'"{match.group(1)}"')
+            except ValueError:
+                # As in _partial_fields: the first occurrence is the field, and it is unreadable
+                self._fields[name] = None
+        self._tail = tail[keep:]
+        # With a field unreadable the command is left to finish()
+        if len(self._fields) == len(_DECIDING_FIELDS) and None not in self._fields.values():
+            self.command, _, self.risk = ResponseParser.parse_structured(self._fields)
+            self.decided = True
+        
+    def _line(self, raw: str):
+        line = raw.strip()
+        if not line:
+            return
+        if not self.strict:
+            # parse_response only ever looks at the first line
+            self.command = ResponseParser.clean_command(line)
+            self.decided = True
+            return
+        valid = None
+        if self.first_valid is None:
+            valid = ResponseParser.is_valid_command(line)
+            if valid:
+                self.first_valid = line
+        fence = line.startswith("```")
+        if fence:
+            self.in_fence = not self.in_fence
+        if self.block is None and raw.startswith("```"):
+            # "\n```" can close a code block
+            self._find_block()
+        if self.block is not None:
+            # The code block decides; if its first line isn't a command, the first valid line does
+            if self.block[0] is not None:
+                self.command, self.decided = self.block[0], True
+            elif self.first_valid is not None:
+                self.command, self.decided = self.first_valid, True
+            return
+        if fence or (line.endswith(":") and not self.in_fence):
+            return
+        if valid is None:
+            valid = ResponseParser.is_valid_command(line)
+        if valid:
+            self.command = line
+            self.decided = True
+            
+    def _find_block(self):
+        """Look for a closed code block in the text received so far
+        
+        The first block found in a prefix is the one found in the whole
+        text, except when nothing but a language name and whitespace
+        separates its fences: more text may then close a block that starts
+        at the same fence but after the language name, which the pattern
+        prefers. Such a block is left open until more text settles it.
+        """
+        text = self.text
+        match = _CODE_BLOCK.search(text)
+        if match and not _BLOCK_HEADER.fullmatch(text, match.start() + 3, match.end() - 4):
+            self.block = ResponseParser._block_lines(match)
+            
+    @property
+    def text(self) -> str:
+        if self._joined < len(self.chunks):
+            self._text += "".join(self.chunks[self._joined:])
+            self._joined = len(self.chunks)
+        return self._text
+        
+    def finish(self) -> Tuple[Optional[str], Optional[str]]:
+        """(command, explanation) from everything received"""
+        if self._result is None:
+            command, explanation, self.risk = ResponseParser.parse(self.text, self.os_type, self.strict,
+                                                                   self.structured)
+            self._result = command, explanation
+            self.command, self.decided = command, True
+        return self._result
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from concurrent.futures import Future, wait
+from typing import Coroutine
+
+# run() waits in slices so Ctrl-C is noticed promptly everywhere (a plain
+# blocking wait can't be interrupted on Windows)
+WAIT_SLICE = 0.05
+
+class AsyncRuntime:
+    """Event loop running in a background daemon thread
+
+    Async provider calls (and the pooled connections behind them) live on
+    this loop, while the REPL keeps running its own synchronous loop on the
+    main thread. Coroutines are handed over with submit() or run().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="ai-shell-async", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop; returns a concurrent Future
+
+        Cancelling the Future cancels the underlying task.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine):
+        """Run a coroutine on the loop and block until it finishes
+
+        If the wait is interrupted (e.g. Ctrl-C), the task is cancelled
+        before the exception propagates.
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run() called from the event loop thread; await the coroutine instead")
+        return self.wait_future(self.submit(coro))
+
+    @staticmethod
+    def wait_future(future: Future):
+        """Block until a submitted Future finishes; an interrupted wait cancels it"""
+        try:
+            while not wait([future], timeout=WAIT_SLICE).done:
+                pass
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+def get_runtime() -> AsyncRuntime:
+    """Process-wide runtime, so every AIService shares one loop and its connection pools"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+        return _runtime
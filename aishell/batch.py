@@ -0,0 +1,103 @@
+import json
+import sys
+import threading
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional, TextIO
+from termcolor import colored
+
+from cache import CommandCache
+
+class Batch:
+    """Batch mode: one query per input line in, one NDJSON result per line out
+
+    Results are written as soon as each one is done (so the output is not
+    in input order; every line carries its index, the query's 0-based line
+    in the input, blank lines included). Progress and the final
+    throughput report go to stderr, keeping stdout machine-readable.
+    """
+
+    def __init__(self, output: TextIO, concurrency: Optional[int] = None, save: bool = True):
+        self.output = output
+        self.concurrency = concurrency
+        self.save = save
+        self.cache = CommandCache()
+        self._write_lock = threading.Lock()
+        self._lines: List[int] = []  # Input line of each query
+
+    def _status(self, message: str, color: str = "cyan"):
+        print(colored(message, color), file=sys.stderr)
+
+    def _write(self, item: Dict):
+        with self._write_lock:
+            item = dict(item, index=self._lines[item["index"]])
+            self.output.write(json.dumps(item, ensure_ascii=False) + "\n")
+            self.output.flush()
+
+    def run(self, queries: List[str]) -> int:
+        """Generate every query; returns 0 if all got a command, 1 otherwise"""
+        self._lines = [number for number, query in enumerate(queries) if query.strip()]
+        queries = [queries[number].strip() for number in self._lines]
+        if not queries:
+            self._status("❌ No queries given", "red")
+            return 2
+
+        # Providers report progress on stdout; keep it off the result stream
+        with redirect_stdout(sys.stderr):
+            from ai_service import AIService
+            ai = AIService(cache=self.cache)
+            self._status(f"🤖 Generating {len(queries)} commands...")
+            try:
+                _, summary = ai.generate_batch(
+                    queries, cache=self.cache, save=self.save,
+                    concurrency=self.concurrency, on_result=self._write
+                )
+            except KeyboardInterrupt:
+                self._status("\n⛔ Cancelled", "yellow")
+                return 130
+
+        self._report(summary)
+        return 0 if summary["failed"] == 0 else 1
+
+    def _report(self, summary: Dict):
+        def seconds(value: Optional[float]) -> str:
+            return f"{value:.2f}s" if value is not None else "-"
+
+        ok = summary["failed"] == 0
+        self._status(
+            f"{'✓' if ok else '⚠️'} {summary['queries']} queries ({summary['unique']} unique) in "
+            f"{summary['elapsed']:.1f}s - {summary['throughput']} queries/s", "green" if ok else "yellow"
+        )
+        self._status(
+            f"  cache hits: {summary['cache_hits']}, rule hits: {summary['rule_hits']}, "
+            f"generated: {summary['generated']}, "
+            f"failed: {summary['failed']}"
+        )
+        self._status(
+            f"  latency p50 {seconds(summary['latency_p50'])}, p95 {seconds(summary['latency_p95'])}, "
+            f"max {seconds(summary['latency_max'])}"
+        )
+        if summary["providers"]:
+            by_provider = ", ".join(f"{name}: {count}" for name, count in summary["providers"].items())
+            self._status(f"  providers: {by_provider}")
+
+def run_batch(path: Optional[str] = None, output_path: Optional[str] = None,
+              concurrency: Optional[int] = None, save: bool = True) -> int:
+    """Read queries from a file (or stdin) and write NDJSON results to a file (or stdout)"""
+    try:
+        if path and path != "-":
+            with open(path, "r", encoding="utf-8") as f:
+                queries = f.read().splitlines()
+        else:
+            queries = sys.stdin.read().splitlines()
+    except OSError as e:
+        print(colored(f"❌ Cannot read queries: {e}", "red"), file=sys.stderr)
+        return 2
+
+    if not output_path:
+        return Batch(sys.stdout, concurrency, save).run(queries)
+    try:
+        with open(output_path, "w", encoding="utf-8") as output:
+            return Batch(output, concurrency, save).run(queries)
+    except OSError as e:
+        print(colored(f"❌ Cannot write results: {e}", "red"), file=sys.stderr)
+        return 2
@@ -1,47 +1,166 @@
+import os
 import sqlite3
+import threading
+import time
 from typing import Tuple, Optional
 
+# Shared by every shell on the host, whatever directory it was started in
+DB_FILE = os.path.join(os.path.expanduser("~"), ".ai_shell", "ai_shell.db")
+
+# Finished flights are kept this long (seconds) for slow-polling waiters
+FLIGHT_RETENTION = 60
+
 class CommandCache:
-    def __init__(self, db_file="ai_shell.db"):
-        self.conn = sqlite3.connect(db_file)
+    def __init__(self, db_file: str = DB_FILE):
+        if os.path.dirname(db_file):
+            os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        # Shared with the AI service's event loop thread (single-flight locks)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False, timeout=5)
+        self.lock = threading.RLock()
         self._init_db()
 
     def _init_db(self):
-        self.conn.execute("""
-        CREATE TABLE IF NOT EXISTS commands (
-            query TEXT PRIMARY KEY,
-            command TEXT NOT NULL,
-            explanation TEXT,
-            usage_count INTEGER DEFAULT 1,
-            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        self.conn.commit()
+        with self.lock:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS commands (
+                query TEXT PRIMARY KEY,
+                command TEXT NOT NULL,
+                explanation TEXT,
+                usage_count INTEGER DEFAULT 1,
+                last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            # In-flight generations, for coalescing across processes
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS flights (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                command TEXT,
+                explanation TEXT,
+                provider TEXT,
+                confidence REAL,
+                risk TEXT
+            )
+            """)
+            # Flights tables from before provider, confidence and risk were kept
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(flights)")}
+            for column, kind in (("provider", "TEXT"), ("confidence", "REAL"), ("risk", "TEXT")):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE flights ADD COLUMN {column} {kind}")
+            self.conn.commit()
 
     def get(self, query: str) -> Tuple[Optional[str], Optional[str]]:
-        cursor = self.conn.execute(
-            "SELECT command, explanation FROM commands WHERE query = ?",
-            (query,)
-        )
-        result = cursor.fetchone()
-        if result:
-            self.conn.execute(
-                "UPDATE commands SET usage_count = usage_count + 1 WHERE query = ?",
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT command, explanation FROM commands WHERE query = ?",
                 (query,)
             )
-            self.conn.commit()
-        return result or (None, None)
+            result = cursor.fetchone()
+            if result:
+                self.conn.execute(
+                    "UPDATE commands SET usage_count = usage_count + 1 WHERE query = ?",
+                    (query,)
+                )
+                self.conn.commit()
+            return result or (None, None)
+
+    def contains(self, query: str) -> bool:
+        """Whether a command is cached for query, without counting it as a use"""
+        with self.lock:
+            cursor = self.conn.execute("SELECT 1 FROM commands WHERE query = ?", (query,))
+            return cursor.fetchone() is not None
 
     def save(self, query: str, command: str, explanation: str = None):
-        self.conn.execute(
-            """
-            INSERT INTO commands (query, command, explanation) 
-            VALUES (?, ?, ?)
-            ON CONFLICT(query) DO UPDATE SET
-                command = excluded.command,
-                explanation = excluded.explanation,
-                usage_count = usage_count + 1
-            """,
-            (query, command, explanation)
-        )
-        self.conn.commit()
\ No newline at end of file
+        with self.lock:
+            self.conn.execute(
+                """
+                INSERT INTO commands (query, command, explanation)
+                VALUES (?, ?, ?)
+                ON CONFLICT(query) DO UPDATE SET
+                    command = excluded.command,
+                    explanation = excluded.explanation,
+                    usage_count = usage_count + 1
+                """,
+                (query, command, explanation)
+            )
+            self.conn.commit()
+
+    def save_explanation(self, query: str, command: str, explanation: str):
+        """Fill in the explanation of a cached command once it has been generated"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE commands SET explanation = ? WHERE query = ? AND command = ?",
+                (explanation, query, command)
+            )
+            self.conn.commit()
+
+    def acquire_flight(self, key: str, owner: str, since: float, stale_after: float) -> bool:
+        """Claim the generation for key; False if another process is on it
+
+        A flight can be taken over when it finished before `since` (the
+        caller arrived afterwards) or its owner went quiet for stale_after
+        seconds.
+        """
+        with self.lock:
+            now = time.time()
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.execute(
+                    "DELETE FROM flights WHERE finished_at < ?", (now - FLIGHT_RETENTION,)
+                )
+                row = self.conn.execute(
+                    "SELECT started_at, finished_at FROM flights WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    started_at, finished_at = row
+                    if finished_at is not None and finished_at >= since:
+                        self.conn.commit()
+                        return False
+                    if finished_at is None and now - started_at < stale_after:
+                        self.conn.commit()
+                        return False
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO flights (key, owner, started_at) VALUES (?, ?, ?)",
+                    (key, owner, now)
+                )
+                self.conn.commit()
+                return True
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+
+    def finish_flight(self, key: str, owner: str, result: Tuple):
+        """Publish the result of a flight for processes waiting on it
+
+        result is (command, explanation, provider, confidence, risk).
+        """
+        with self.lock:
+            self.conn.execute(
+                """
+                UPDATE flights SET finished_at = ?, command = ?, explanation = ?,
+                    provider = ?, confidence = ?, risk = ?
+                WHERE key = ? AND owner = ?
+                """,
+                (time.time(), *result, key, owner)
+            )
+            self.conn.commit()
+
+    def flight_result(self, key: str, since: float) -> Optional[Tuple]:
+        """(command, explanation, provider, confidence, risk) of a flight that
+        finished after `since`, or None if there is none (yet)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT finished_at, command, explanation, provider, confidence, risk FROM flights WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None or row[0] is None or row[0] < since:
+                return None
+            return tuple(row[1:])
+
+    def abandon_flight(self, key: str, owner: str):
+        """Drop an unfinished flight so a waiting process can claim it"""
+        with self.lock:
+            self.conn.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, owner))
+            self.conn.commit()
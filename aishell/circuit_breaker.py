@@ -0,0 +1,193 @@
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+from apis.errors import AUTH, RATE_LIMIT, NETWORK
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+# Distinct cloud providers that must fail to connect before the host counts as offline
+MIN_FAILED_PROVIDERS = 2
+
+class CircuitBreaker:
+    """Per-provider circuit breaker
+
+    closed:    calls go through; consecutive failures are counted.
+    open:      calls are skipped until the cooldown expires.
+    half-open: one trial call is let through; success closes the breaker,
+               failure re-opens it with a doubled cooldown.
+
+    Auth and rate-limit errors open the breaker immediately (retrying with an
+    expired key or while throttled only wastes a round-trip); other errors
+    open it after failure_threshold consecutive failures.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 auth_reset_timeout: float = 600.0, max_reset_timeout: float = 600.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.auth_reset_timeout = auth_reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._cooldown = reset_timeout
+        self._trial_started = None
+        self.last_error_class = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._cooldown:
+            self._state = HALF_OPEN
+            self._trial_started = None
+        return self._state
+
+    def is_open(self) -> bool:
+        """True while calls should be skipped (no trial slot available)"""
+        return not self._can_call(acquire=False)
+
+    def allow(self) -> bool:
+        """Check whether a call may go through, taking the half-open trial slot"""
+        return self._can_call(acquire=True)
+
+    def _can_call(self, acquire: bool) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == OPEN:
+                return False
+            # Half-open: a single trial at a time; a trial that never reported
+            # back (e.g. abandoned by hedging) frees the slot after a cooldown
+            now = time.monotonic()
+            if self._trial_started is None or now - self._trial_started > self.reset_timeout:
+                if acquire:
+                    self._trial_started = now
+                return True
+            return False
+
+    def remaining_cooldown(self) -> float:
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self._cooldown - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._cooldown = self.reset_timeout
+            self._trial_started = None
+            self.last_error_class = None
+
+    def record_failure(self, error_class: str, retry_after: Optional[float] = None) -> bool:
+        """Count a failed call; returns True if this opened the breaker"""
+        with self._lock:
+            self.last_error_class = error_class
+            self._failures += 1
+            state = self._current_state()
+            if state == OPEN:
+                # A call that started before the breaker opened; already counted
+                return False
+            was_half_open = state == HALF_OPEN
+
+            if error_class == AUTH:
+                cooldown = self.auth_reset_timeout
+            elif error_class == RATE_LIMIT:
+                cooldown = retry_after or self.reset_timeout
+            elif was_half_open:
+                cooldown = min(self._cooldown * 2, self.max_reset_timeout)
+            elif self._failures >= self.failure_threshold:
+                cooldown = self.reset_timeout
+            else:
+                return False
+
+            self._open(cooldown)
+            return True
+
+    def trip(self, cooldown: float, error_class: str = NETWORK):
+        """Open the breaker from outside (e.g. when the host goes offline)"""
+        with self._lock:
+            self.last_error_class = error_class
+            self._open(cooldown)
+
+    def _open(self, cooldown: float):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._cooldown = cooldown
+        self._trial_started = None
+
+class OfflineDetector:
+    """Cheap global connectivity check
+
+    Two signals, neither of which blocks a request:
+    - a route probe: "connecting" a UDP socket sends no packets but fails
+      immediately when the host has no route to the internet;
+    - evidence: connection errors from several cloud providers within a
+      short window mean the network is down even if a route exists.
+
+    Timeouts are not evidence: a slow model running out of its deadline
+    looks the same as a dead network.
+    """
+
+    def __init__(self, probe_host: str = "8.8.8.8", probe_ttl: float = 5.0,
+                 error_window: float = 30.0, offline_timeout: float = 15.0):
+        self.probe_host = probe_host
+        self.probe_ttl = probe_ttl
+        self.error_window = error_window
+        self.offline_timeout = offline_timeout
+
+        self._lock = threading.Lock()
+        self._probe_result = True
+        self._probe_time = 0.0
+        self._offline_until = 0.0
+        self._network_errors: Dict[str, float] = {}
+
+    def _has_route(self) -> bool:
+        now = time.monotonic()
+        if now - self._probe_time < self.probe_ttl:
+            return self._probe_result
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect((self.probe_host, 53))
+            result = True
+        except OSError:
+            result = False
+        self._probe_time = now
+        self._probe_result = result
+        return result
+
+    def is_offline(self) -> bool:
+        with self._lock:
+            if time.monotonic() < self._offline_until:
+                return True
+            return not self._has_route()
+
+    def report_network_error(self, provider: str) -> bool:
+        """Record a connection failure; returns True if we now consider the host offline
+
+        Offline is declared once at least two cloud providers failed to
+        connect within the error window, or when one did and the route
+        probe fails too.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._network_errors[provider] = now
+            recent = [t for t in self._network_errors.values() if now - t <= self.error_window]
+            if len(recent) >= MIN_FAILED_PROVIDERS or not self._has_route():
+                self._offline_until = now + self.offline_timeout
+                return True
+            return False
+
+    def report_success(self):
+        with self._lock:
+            self._network_errors.clear()
+            self._offline_until = 0.0
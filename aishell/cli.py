@@ -0,0 +1,57 @@
+import argparse
+import sys
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ai-shell",
+        description="Convert natural language into CLI commands"
+    )
+    parser.add_argument("-c", "--command", metavar="QUERY",
+                        help="generate a command for QUERY non-interactively and exit")
+    parser.add_argument("--print-only", action="store_true",
+                        help="with -c: print the command to stdout instead of running it")
+    parser.add_argument("--yes", "-y", action="store_true",
+                        help="with -c: run the command without asking for confirmation")
+
+    subparsers = parser.add_subparsers(dest="mode", metavar="{batch}")
+    batch = subparsers.add_parser(
+        "batch", help="generate commands for many queries (one per line) and write NDJSON results"
+    )
+    batch.add_argument("file", nargs="?",
+                       help="file with one query per line (default: stdin)")
+    batch.add_argument("--output", "-o", metavar="FILE",
+                       help="write the NDJSON results to FILE instead of stdout")
+    batch.add_argument("--concurrency", "-j", type=int, metavar="N",
+                       help="queries generated at once (default: batch.concurrency)")
+    batch.add_argument("--no-save", action="store_true",
+                       help="don't store the generated commands in the command cache")
+    return parser
+
+def main(argv=None) -> int:
+    """Entry point for the ai-shell launcher
+
+    Arguments are parsed before anything heavy is imported, so the one-shot
+    path never pays for prompt_toolkit, paramiko or the provider SDKs.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.mode == "batch":
+        if args.command is not None or args.print_only or args.yes:
+            parser.error("-c, --print-only and --yes can't be combined with batch")
+        from batch import run_batch
+        return run_batch(args.file, args.output, args.concurrency, save=not args.no_save)
+
+    if args.command is not None:
+        from oneshot import run_oneshot
+        return run_oneshot(args.command, print_only=args.print_only, assume_yes=args.yes)
+
+    if args.print_only or args.yes:
+        parser.error("--print-only and --yes can only be used with -c")
+
+    from ai_shell import main as shell_main
+    shell_main()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
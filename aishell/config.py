@@ -1,6 +1,5 @@
 import os
 import json
-import requests
 import shutil
 import getpass
 from pathlib import Path
@@ -11,6 +10,8 @@ from model_manager import model_manager, get_default_model_path
 # Path for storing configuration
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".ai_shell")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+# How explanations are generated (see get_explanation_config)
+EXPLANATION_MODES = ("background", "on_request", "inline")
 
 # Default configuration structure
 DEFAULT_CONFIG = {
@@ -52,9 +53,86 @@ DEFAULT_CONFIG = {
     "local_model": {
         "path": "",
         "n_ctx": 0,
-        "n_threads": 0
+        "n_threads": 0,
+        "prefix_cache": True,
+        "persist_prefix_cache": False,
+        "command_grammar": True,
+        "shared_worker": True,
+        "worker_parallel": 2,
+        "worker_idle_timeout": 600
     },
-    "default_provider": ""
+    "default_provider": "",
+    "routing": {
+        "hedging": True,
+        "hedge_delay": 3.0,
+        "adaptive": True,
+        "speed_weight": 0.5,
+        "explore_rate": 0.05,
+        "complexity_routing": True,
+        "confidence_threshold": 0.6,
+        "confidence_escalation": "immediate"
+    },
+    "resilience": {
+        "failure_threshold": 3,
+        "reset_timeout": 30,
+        "auth_reset_timeout": 600,
+        "offline_detection": True
+    },
+    "timeouts": {
+        "query_timeout": 30,
+        "connect_timeout": 3,
+        "max_retries": 2
+    },
+    "rate_limits": {
+        "retry_attempts": 3,
+        "backoff_base": 0.5,
+        "backoff_max": 20,
+        # provider name -> {"requests_per_minute": N, "tokens_per_minute": N}
+        "providers": {}
+    },
+    "coalescing": {
+        "enabled": True,
+        "cross_process": False
+    },
+    "streaming": {
+        "enabled": True,
+        "stop_after_command": True
+    },
+    "structured_output": {
+        "enabled": True
+    },
+    "explanations": {
+        "mode": "background",
+        "command_max_tokens": 100,
+        "max_tokens": 150
+    },
+    "prompt_caching": {
+        "enabled": True
+    },
+    "speculation": {
+        "enabled": True,
+        "debounce": 0.6,
+        "min_words": 3,
+        "similarity": 0.9,
+        "daily_budget": 100
+    },
+    "alternatives": {
+        "enabled": True,
+        "max_candidates": 2
+    },
+    "prewarm": {
+        "enabled": True,
+        "idle_rewarm": 60,
+        "max_idle": 1800
+    },
+    "rules": {
+        "enabled": True,
+        "user_rules": "~/.ai_shell/rules.json"
+    },
+    "batch": {
+        "concurrency": 8,
+        "per_provider_concurrency": 4
+    }
 }
 
 class Config:
@@ -113,7 +191,196 @@ class Config:
         return {
             "path": model_config.get("path") or "tinyllama.gguf",  # Fallback only if not configured
             "n_ctx": model_config.get("n_ctx") or 2048,
-            "n_threads": model_config.get("n_threads") or 4
+            "n_threads": model_config.get("n_threads") or 4,
+            # Keep the evaluated instruction prefix and restore it before each
+            # prompt, so llama.cpp only evaluates the query
+            "prefix_cache": model_config.get("prefix_cache", True),
+            # Also save those prefix snapshots next to the model file for the next start
+            "persist_prefix_cache": model_config.get("persist_prefix_cache", False),
+            # Constrain plain-text output to a single well-formed command line
+            # (a grammar per OS family) instead of cleaning up what comes back
+            "command_grammar": model_config.get("command_grammar", True),
+            # Serve every shell session from one background process holding
+            # the model (Unix only; otherwise each process loads its own)
+            "shared_worker": model_config.get("shared_worker", True),
+            # Sequences the worker generates at once, each in its own context
+            "worker_parallel": model_config.get("worker_parallel") or 2,
+            # Seconds without requests after which the worker exits
+            "worker_idle_timeout": model_config.get("worker_idle_timeout") or 600
+        }
+    
+    def get_routing_config(self) -> Dict[str, Any]:
+        """Get provider routing settings with fallbacks"""
+        routing = self.config.get("routing", {})
+        return {
+            # Start the next provider in parallel when the current one is slow
+            "hedging": routing.get("hedging", True),
+            # Upper bound (seconds) on how long to wait before hedging
+            "hedge_delay": routing.get("hedge_delay") or 3.0,
+            # Re-rank providers per request from their observed latency and reliability
+            "adaptive": routing.get("adaptive", True),
+            # 1.0 ranks purely on speed, 0.0 purely on success/parse rates
+            "speed_weight": routing.get("speed_weight", 0.5),
+            # Fraction of requests that try the stalest non-preferred provider first
+            "explore_rate": routing.get("explore_rate", 0.05),
+            # Classify each query up front: local only, local and cloud in parallel, or cloud first
+            "complexity_routing": routing.get("complexity_routing", True),
+            # Local LLM answers scored below this (0-1, 0 disables) are checked with a cloud provider
+            "confidence_threshold": routing.get("confidence_threshold", 0.6),
+            # "immediate": ask the cloud once the local answer turns out unsure;
+            # "parallel": race the cloud alongside the local model from the start
+            "confidence_escalation": routing.get("confidence_escalation") or "immediate"
+        }
+    
+    def get_resilience_config(self) -> Dict[str, Any]:
+        """Get circuit breaker and offline detection settings with fallbacks"""
+        resilience = self.config.get("resilience", {})
+        return {
+            # Consecutive failures before a provider is skipped
+            "failure_threshold": resilience.get("failure_threshold") or 3,
+            # Seconds a tripped provider is skipped before a trial call
+            "reset_timeout": resilience.get("reset_timeout") or 30,
+            # Auth failures (bad/expired key) won't fix themselves quickly
+            "auth_reset_timeout": resilience.get("auth_reset_timeout") or 600,
+            "offline_detection": resilience.get("offline_detection", True)
+        }
+    
+    def get_timeout_config(self) -> Dict[str, Any]:
+        """Get per-query deadline settings with fallbacks"""
+        timeouts = self.config.get("timeouts", {})
+        return {
+            # Upper bound (seconds) for one query across the whole fallback chain
+            "query_timeout": timeouts.get("query_timeout") or 30,
+            # Cap on TCP/TLS connect time for each request
+            "connect_timeout": timeouts.get("connect_timeout") or 3,
+            # SDK-level retries per provider, if the remaining budget allows
+            "max_retries": timeouts.get("max_retries", 2)
+        }
+    
+    def get_rate_limit_config(self) -> Dict[str, Any]:
+        """Get client-side rate limiting settings with fallbacks"""
+        rate_limits = self.config.get("rate_limits", {})
+        return {
+            # Retries after a 429/throttling error before moving to the next provider
+            "retry_attempts": rate_limits.get("retry_attempts", 3),
+            # Exponential backoff (seconds) between those retries, with jitter
+            "backoff_base": rate_limits.get("backoff_base") or 0.5,
+            "backoff_max": rate_limits.get("backoff_max") or 20,
+            # Per-provider requests/tokens per minute; unset limits are learned from response headers
+            "providers": rate_limits.get("providers") or {}
+        }
+    
+    def get_coalescing_config(self) -> Dict[str, Any]:
+        """Get single-flight settings with fallbacks"""
+        coalescing = self.config.get("coalescing", {})
+        return {
+            # Identical queries submitted while one is generating share its result
+            "enabled": coalescing.get("enabled", True),
+            # Also coalesce with other ai-shell processes through the cache DB
+            "cross_process": coalescing.get("cross_process", False)
+        }
+    
+    def get_streaming_config(self) -> Dict[str, Any]:
+        """Get response streaming settings with fallbacks"""
+        streaming = self.config.get("streaming", {})
+        return {
+            # Stream responses so the command is available as soon as its line is complete
+            "enabled": streaming.get("enabled", True),
+            # Close the stream at that point instead of reading the explanation too
+            "stop_after_command": streaming.get("stop_after_command", True)
+        }
+    
+    def get_structured_output_config(self) -> Dict[str, Any]:
+        """Get structured output settings with fallbacks"""
+        structured = self.config.get("structured_output", {})
+        return {
+            # Ask providers for {command, explanation, risk} (tool calling, JSON mode
+            # or a grammar) instead of free text that has to be parsed
+            "enabled": structured.get("enabled", True)
+        }
+    
+    def get_explanation_config(self) -> Dict[str, Any]:
+        """Get command-first generation settings with fallbacks"""
+        explanations = self.config.get("explanations", {})
+        mode = explanations.get("mode")
+        return {
+            # "background": ask for the command alone and fetch its explanation
+            # while it is shown; "on_request": only when asked for (E);
+            # "inline": command and explanation in one completion
+            "mode": mode if mode in EXPLANATION_MODES else "background",
+            # Output budget of a command-only request
+            "command_max_tokens": explanations.get("command_max_tokens") or 100,
+            # Output budget of an explanation request
+            "max_tokens": explanations.get("max_tokens") or 150
+        }
+    
+    def get_prompt_caching_config(self) -> Dict[str, Any]:
+        """Get prompt caching settings with fallbacks"""
+        caching = self.config.get("prompt_caching", {})
+        return {
+            # Mark the static system prompt as cacheable where the provider needs it
+            # (Anthropic, supported Bedrock models); OpenAI caches prefixes on its own
+            "enabled": caching.get("enabled", True)
+        }
+    
+    def get_speculation_config(self) -> Dict[str, Any]:
+        """Get speculative generation settings with fallbacks"""
+        speculation = self.config.get("speculation", {})
+        return {
+            # Start generating while the user is still typing a query
+            "enabled": speculation.get("enabled", True),
+            # Seconds of no typing before a speculative generation starts
+            "debounce": speculation.get("debounce") or 0.6,
+            # Shorter input is not worth speculating on
+            "min_words": speculation.get("min_words") or 3,
+            # How closely the submitted query must match to reuse the result (0-1)
+            "similarity": speculation.get("similarity") or 0.9,
+            # Speculative generations per day that may use paid (cloud) providers;
+            # past it only local providers speculate
+            "daily_budget": speculation.get("daily_budget", 100)
+        }
+    
+    def get_alternatives_config(self) -> Dict[str, Any]:
+        """Get background alternative generation settings with fallbacks"""
+        alternatives = self.config.get("alternatives", {})
+        return {
+            # Ask other providers for alternatives while the first command is shown,
+            # so R (regenerate) doesn't have to wait
+            "enabled": alternatives.get("enabled", True),
+            # Providers asked per query
+            "max_candidates": alternatives.get("max_candidates") or 2
+        }
+    
+    def get_prewarm_config(self) -> Dict[str, Any]:
+        """Get connection pre-warming settings with fallbacks"""
+        prewarm = self.config.get("prewarm", {})
+        return {
+            # Connect to the first cloud provider in the background when the shell starts
+            "enabled": prewarm.get("enabled", True),
+            # Seconds without traffic to it before the connection is warmed again
+            "idle_rewarm": prewarm.get("idle_rewarm") or 60,
+            # Stop re-warming once the shell has been unused this long (seconds)
+            "max_idle": prewarm.get("max_idle") or 1800
+        }
+    
+    def get_rules_config(self) -> Dict[str, Any]:
+        """Get rule engine settings with fallbacks"""
+        rules = self.config.get("rules", {})
+        return {
+            # Answer common requests from built-in templates before asking any model
+            "enabled": rules.get("enabled", True),
+            # JSON file with extra rules, tried before the built-in ones
+            "user_rules": rules.get("user_rules") or "~/.ai_shell/rules.json"
+        }
+    
+    def get_batch_config(self) -> Dict[str, Any]:
+        """Get batch generation settings with fallbacks"""
+        batch = self.config.get("batch", {})
+        return {
+            # Queries generated at once by generate_batch / ai-shell batch
+            "concurrency": batch.get("concurrency") or 8,
+            # In-flight requests per provider, for batches and interactive use alike
+            "per_provider_concurrency": batch.get("per_provider_concurrency") or 4
         }
     
     def get_default_provider(self) -> str:
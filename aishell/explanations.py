@@ -0,0 +1,85 @@
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+class Explanations:
+    """Explanations for the commands offered for one query, generated apart from them
+
+    With command-first generation a command comes without its
+    explanation. In background mode the explanation is asked for as soon
+    as the command is shown, so it is usually there by the time the user
+    presses E; in on_request mode only when E is pressed. A command that is
+    run gets its explanation stored with it in the cache, also when the
+    explanation arrives afterwards.
+    """
+
+    def __init__(self, ai, cache, user_input: str, background: bool):
+        self.ai = ai
+        self.cache = cache
+        self.user_input = user_input
+        self.background = background
+        self.known: Dict[str, Optional[str]] = {}  # command -> explanation, once there
+        self.pending: Dict[str, Future] = {}  # command -> explanation being generated
+        self.kept = set()  # Commands whose explanation is still wanted after cancel()
+
+    def shown(self, generation):
+        """A command is on screen: start on its explanation in background mode"""
+        if self.background:
+            self._start(generation)
+
+    def _start(self, generation) -> Optional[Future]:
+        command = generation.command
+        if generation.explanation is not None:
+            self.known.setdefault(command, generation.explanation)
+        if not command or command in self.known:
+            return None
+        if command not in self.pending:
+            self.pending[command] = self.ai.explain(self.user_input, command, generation.provider)
+        return self.pending[command]
+
+    def get(self, generation) -> Optional[str]:
+        """The explanation, if it is there already"""
+        if generation.explanation is not None:
+            return generation.explanation
+        future = self.pending.get(generation.command)
+        if future is not None and future.done():
+            self._collect(generation.command, future)
+        return self.known.get(generation.command)
+
+    def wait(self, generation) -> Optional[str]:
+        """The explanation, generating it if needed (Ctrl-C cancels the wait)"""
+        future = self._start(generation)
+        if future is not None:
+            try:
+                self.ai.runtime.wait_future(future)
+            except KeyboardInterrupt:
+                self.pending.pop(generation.command, None)
+                raise
+            self._collect(generation.command, future)
+        return self.known.get(generation.command)
+
+    def _collect(self, command: str, future: Future):
+        if self.pending.get(command) is future:
+            del self.pending[command]
+        if not future.cancelled() and future.exception() is None:
+            self.known[command] = future.result()
+
+    def save(self, generation):
+        """Cache a command that was run, with its explanation now or once it arrives"""
+        command = generation.command
+        self.cache.save(self.user_input, command, self.get(generation))
+        future = self.pending.get(command)
+        if future is None:
+            return
+        self.kept.add(command)
+
+        def store(future: Future):
+            if not future.cancelled() and future.exception() is None and future.result():
+                self.cache.save_explanation(self.user_input, command, future.result())
+        future.add_done_callback(store)
+
+    def cancel(self):
+        """Stop the explanations nobody is going to see or store"""
+        for command, future in self.pending.items():
+            if command not in self.kept:
+                future.cancel()
+        self.pending.clear()
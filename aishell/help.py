@@ -13,10 +13,12 @@ class Help:
         print("- y: Execute generated command")
         print("- n: Skip execution")
         print("- R: Regenerate command using Claude API")
+        print("- E: Explain the command (generated separately from it, usually ready by the time you ask)")
         
         print(Fore.GREEN + "\n3. Special Commands:")
         print("- \\help: Show this guide")
         print("- \\config: Configure API keys and local model")
+        print("- \\stats: Show provider latency/reliability stats, routing order and rule engine hit rate")
         print("- ssh-connect: Connect to remote host")
         print("- local/remote: Switch contexts")
         
@@ -0,0 +1,1135 @@
+from typing import Dict, List
+
+# Built-in rules for the deterministic fast path (see rules.RuleEngine).
+#
+# Same format as the user rules file (~/.ai_shell/rules.json):
+#   name         unique intent name, reported in the hit statistics
+#   patterns     phrasings: (a|b) alternatives, [optional] words and
+#                {name:type} placeholders (int, size, word, path, file,
+#                host, url, pkg, ext, envvar, zip, tar, gz, py, remote)
+#   explanation  shown with the command; may use the placeholders
+#   risk         "low" (default), "medium" or "high"
+#   unix / linux / darwin / windows
+#                command template per OS; "unix" covers linux and darwin
+#                unless they have their own. Placeholder values are
+#                shell-quoted; {name.raw} is the value as typed. Literal
+#                braces are doubled ({{ }}).
+#
+# Queries are matched after dropping filler words (the, a, an, my,
+# please), polite openings ("can you", "how do i", ...) and "me" after
+# show/list/give/tell, so patterns leave those out. Filler words next to
+# a placeholder are not dropped (they may be part of the value), so such
+# queries don't match.
+
+def _intent(name: str, patterns: List[str], explanation: str, risk: str = "low", **templates) -> Dict:
+    return dict(name=name, patterns=patterns, explanation=explanation, risk=risk, **templates)
+
+_FILES = "[all] files"
+_HERE = "[in|of] [this|current] [folder|directory|dir]"
+
+INTENTS: List[Dict] = [
+    # Screen and shell
+    _intent("clear_screen", ["(clear|clean|cls) [terminal|screen|console]", "clear (terminal|screen|console)",
+                             "clear"], "Clear the terminal screen",
+            unix="clear", windows="cls"),
+    _intent("shell_history", ["(show|list) [command|shell] history", "history", "previous commands"],
+            "Show the shell command history",
+            unix="history", windows="doskey /history"),
+    _intent("current_shell", ["(what|which) shell [am i using|is this]", "current shell"],
+            "Show the current shell",
+            unix="echo $SHELL", windows="echo %COMSPEC%"),
+    _intent("exit_shell", ["exit [shell|terminal]", "close [this] (shell|terminal)"], "Exit the shell",
+            unix="exit", windows="exit"),
+
+    # Navigation
+    _intent("pwd", ["(where am i|pwd)", "(show|print|what is|what's) [current|present] working (directory|dir|folder)",
+                    "(show|print|what is|what's) current (directory|dir|folder|path)",
+                    "which (directory|folder) am i in"],
+            "Print the current working directory",
+            unix="pwd", windows="cd"),
+    _intent("cd_home", ["(go|cd|change) [to] home [directory|folder]", "(go|cd) [back] home"],
+            "Change to the home directory",
+            unix="cd ~", windows="cd %USERPROFILE%"),
+    _intent("cd_up", ["(go|move|cd) up [one] [level|directory|folder]", "(go|cd) to parent (directory|folder)",
+                      "(go|cd) back [one] (directory|folder|level)"],
+            "Change to the parent directory",
+            unix="cd ..", windows="cd .."),
+    _intent("cd_root", ["(go|cd|change) [to] root [directory|folder]"], "Change to the root directory",
+            unix="cd /", windows="cd \\"),
+    _intent("cd_dir", ["(go|cd|change|move|switch) (to|into) [directory|folder|dir] {dir:path}",
+                       "(open|enter) (directory|folder|dir) {dir:path}"],
+            "Change to the {dir} directory",
+            unix="cd {dir}", windows="cd /d {dir}"),
+    _intent("cd_previous", ["(go|cd) [back] to previous (directory|folder)", "cd -"],
+            "Change back to the previous directory",
+            unix="cd -", windows="popd"),
+
+    # Listing
+    _intent("list_files", ["(list|show|display|ls) [all] (files|contents|everything)" + " " + _HERE,
+                           "(list|show) (directory|folder) (contents|listing)",
+                           "what (files are|is) here", "what is in this (folder|directory)", "ls", "dir"],
+            "List the files in the current directory",
+            unix="ls", windows="dir"),
+    _intent("list_all_files", ["(list|show) all files including hidden [ones|files]",
+                               "(list|show) [all] (hidden files|dotfiles)" + " " + _HERE,
+                               "(list|show) [all] files with hidden [ones|files]", "ls -la", "ls -a"],
+            "List all files, including hidden ones, with details",
+            unix="ls -la", windows="dir /a"),
+    _intent("list_long", ["(list|show) files with (details|sizes|permissions)", "(list|show) [files] in long format",
+                          "detailed (file list|listing)", "ls -l"],
+            "List files with details",
+            unix="ls -lh", windows="dir"),
+    _intent("list_by_size", ["(list|show|sort) files (by|sorted by) size", "largest files " + _HERE,
+                             "biggest files " + _HERE],
+            "List files sorted by size, largest first",
+            unix="ls -lS", windows="dir /o-s"),
+    _intent("list_by_time", ["(list|show|sort) files (by|sorted by) (date|time|modification time|modified)",
+                             "(recently|latest) modified files " + _HERE, "newest files " + _HERE],
+            "List files sorted by modification time, newest first",
+            unix="ls -lt", windows="dir /o-d"),
+    _intent("list_dirs", ["(list|show) [only] (directories|folders|subdirectories|subfolders)" + " " + _HERE],
+            "List only directories",
+            unix="ls -d */", windows="dir /ad"),
+    _intent("list_dir_path", ["(list|show) [all] (files|contents) (in|of) [directory|folder] {dir:path}",
+                              "ls {dir:path}", "what is in [directory|folder] {dir:path}"],
+            "List the files in {dir}",
+            unix="ls -la {dir}", windows="dir {dir}"),
+    _intent("tree", ["(show|display|print) [directory|folder|file] tree", "tree [view|structure]",
+                     "(show|display) (directory|folder|project) structure"],
+            "Show the directory tree",
+            unix="find . -not -path '*/.*' | sed -e 's/[^-][^\\/]*\\//  /g'", linux="tree", windows="tree /f"),
+    _intent("count_files", ["(count|how many) files " + _HERE, "number of files " + _HERE],
+            "Count the files under the current directory",
+            unix="find . -type f | wc -l", windows="dir /s /b /a-d | find /c /v \"\""),
+
+    # Viewing files
+    _intent("show_file", ["(show|display|print|cat|view|read|output) (contents|content) of [file] {file:path}",
+                          "(show|display|print|cat|view|read|output) file {file:path}",
+                          "(show|display|print|cat|view|read|output) {file:file}",
+                          "(show|display|print) {file:file} contents"],
+            "Print the contents of {file}",
+            unix="cat {file}", windows="type {file}"),
+    _intent("head_file", ["(show|display|print) first {n:int} lines (of|in|from) [file] {file:path}",
+                          "first {n:int} lines (of|in|from) [file] {file:path}"],
+            "Show the first lines of {file}",
+            unix="head -n {n} {file}", windows="powershell -Command \"Get-Content {file} -TotalCount {n}\""),
+    _intent("head_file_default", ["(show|display|print) (beginning|start|first lines) of [file] {file:path}",
+                                  "head [of] file {file:path}", "head [of] {file:file}"],
+            "Show the first 10 lines of {file}",
+            unix="head {file}", windows="powershell -Command \"Get-Content {file} -TotalCount 10\""),
+    _intent("tail_file", ["(show|display|print) last {n:int} lines (of|in|from) [file] {file:path}",
+                          "last {n:int} lines (of|in|from) [file] {file:path}"],
+            "Show the last {n} lines of {file}",
+            unix="tail -n {n} {file}", windows="powershell -Command \"Get-Content {file} -Tail {n}\""),
+    _intent("tail_file_default", ["(show|display|print) (end|last lines) of [file] {file:path}",
+                                  "tail [of] file {file:path}", "tail [of] {file:file}"],
+            "Show the last 10 lines of {file}",
+            unix="tail {file}", windows="powershell -Command \"Get-Content {file} -Tail 10\""),
+    _intent("follow_file", ["(follow|watch|tail -f|monitor) {file:file}",
+                            "(follow|watch|tail -f|monitor) (log|file) {file:path}"],
+            "Follow {file} as it grows (Ctrl-C to stop)",
+            unix="tail -f {file}", windows="powershell -Command \"Get-Content {file} -Wait -Tail 10\""),
+    _intent("tail_follow_n", ["last {n:int} lines of {file:path} and follow it",
+                              "(follow|tail) last {n:int} lines of {file:path}"],
+            "Show the last {n} lines of {file} and follow it",
+            unix="tail -n {n} -f {file}", windows="powershell -Command \"Get-Content {file} -Wait -Tail {n}\""),
+    _intent("page_file", ["(page through|less|more) file {file:path}", "(page through|less|more) {file:file}"], "Page through {file}",
+            unix="less {file}", windows="more {file}"),
+    _intent("count_lines", ["(count|number of) lines (in|of) [file] {file:path}", "how many lines (in|does) {file:path} [have]",
+                            "wc -l {file:path}"],
+            "Count the lines in {file}",
+            unix="wc -l {file}", windows="find /c /v \"\" {file}"),
+    _intent("count_words", ["(count|number of) words (in|of) [file] {file:path}", "how many words (in|does) {file:path} [have]"],
+            "Count the words in {file}",
+            unix="wc -w {file}", windows="powershell -Command \"(Get-Content {file} | Measure-Object -Word).Words\""),
+    _intent("count_py_lines", ["count lines in all python files", "(total|count) lines of python code"],
+            "Count the lines of every Python file",
+            unix="find . -name '*.py' | xargs wc -l",
+            windows="powershell -Command \"Get-ChildItem -Recurse -Filter *.py | Get-Content | Measure-Object -Line\""),
+    _intent("count_ext_lines", ["count lines in all {ext:ext} files", "(total|count) lines of {ext:ext} code"],
+            "Count the lines of every .{ext} file",
+            unix="find . -name '*.{ext.raw}' | xargs wc -l",
+            windows="powershell -Command \"Get-ChildItem -Recurse -Filter *.{ext.raw} | Get-Content | Measure-Object -Line\""),
+    _intent("sort_file", ["sort lines (of|in) [file] {file:path}", "sort file {file:path}", "sort {file:file}"], "Print the lines of {file} sorted",
+            unix="sort {file}", windows="sort {file}"),
+    _intent("unique_lines", ["(unique|distinct) lines (in|of) [file] {file:path}", "remove duplicate lines (from|in) {file:path}"],
+            "Print the distinct lines of {file}",
+            unix="sort -u {file}", windows="powershell -Command \"Get-Content {file} | Sort-Object -Unique\""),
+    _intent("diff_files", ["(diff|compare) [files] {a:path} (and|with|to) {b:path}",
+                           "(difference|differences) between {a:path} and {b:path}"],
+            "Show the differences between {a} and {b}",
+            unix="diff -u {a} {b}", windows="fc {a} {b}"),
+    _intent("file_type", ["(what|which) (type|kind) of file is {file:path}", "file type of {file:path}"],
+            "Show what kind of file {file} is",
+            unix="file {file}"),
+    _intent("checksum_sha256", ["(sha256|sha-256|sha256sum) [checksum|hash] (of|for) {file:path}",
+                                "(checksum|hash) (of|for) {file:path}"],
+            "Compute the SHA-256 checksum of {file}",
+            linux="sha256sum {file}", darwin="shasum -a 256 {file}", windows="certutil -hashfile {file} SHA256"),
+    _intent("checksum_md5", ["(md5|md5sum) [checksum|hash] (of|for) {file:path}"], "Compute the MD5 checksum of {file}",
+            linux="md5sum {file}", darwin="md5 {file}", windows="certutil -hashfile {file} MD5"),
+
+    # Creating, copying, moving, removing
+    _intent("make_dir", ["(create|make|mkdir|new) [a] (directory|folder|dir) [called|named] {dir:path}",
+                         "mkdir {dir:path}"],
+            "Create the directory {dir} (and any missing parents)",
+            unix="mkdir -p {dir}", windows="mkdir {dir}"),
+    _intent("touch_file", ["(create|make|new) [an] [empty] file [called|named] {file:path}", "touch {file:path}"],
+            "Create the file {file} (or update its timestamp)",
+            unix="touch {file}", windows="type nul >> {file}"),
+    _intent("scp_upload", ["(copy|upload|scp) {src:path} to {dst:remote}"], "Copy {src} to {dst} over SSH",
+            unix="scp {src} {dst}", windows="scp {src} {dst}"),
+    _intent("scp_download", ["(copy|download|scp) {src:remote} to {dst:path}"], "Copy {src} to {dst} over SSH",
+            unix="scp {src} {dst}", windows="scp {src} {dst}"),
+    _intent("clipboard_copy", ["copy [contents of] [file] {file:path} to clipboard"], "Copy the contents of {file} to the clipboard",
+            linux="xclip -selection clipboard < {file}", darwin="pbcopy < {file}", windows="clip < {file}"),
+    _intent("copy_file", ["(copy|cp) [file] {src:path} (to|into) {dst:path}", "cp {src:path} {dst:path}"],
+            "Copy {src} to {dst}",
+            unix="cp {src} {dst}", windows="copy {src} {dst}"),
+    _intent("copy_dir", ["(copy|cp) (directory|folder|dir) {src:path} (to|into) {dst:path}"],
+            "Copy the directory {src} to {dst}",
+            unix="cp -r {src} {dst}", windows="xcopy {src} {dst} /e /i"),
+    _intent("move_file", ["(move|mv) [file|directory|folder] {src:path} (to|into) {dst:path}", "mv {src:path} {dst:path}"],
+            "Move {src} to {dst}", risk="medium",
+            unix="mv {src} {dst}", windows="move {src} {dst}"),
+    _intent("rename_file", ["rename [file|directory|folder] {src:path} to {dst:path}"],
+            "Rename {src} to {dst}", risk="medium",
+            unix="mv {src} {dst}", windows="ren {src} {dst}"),
+    _intent("remove_file", ["(delete|remove|rm|erase) file {file:path}", "(delete|remove|erase) {file:file}", "rm {file:path}"],
+            "Delete the file {file}", risk="high",
+            unix="rm {file}", windows="del {file}"),
+    _intent("remove_dir", ["(delete|remove|rm) (directory|folder|dir) {dir:path}",
+                           "(delete|remove) {dir:path} (directory|folder) [recursively]"],
+            "Delete the directory {dir} and everything in it", risk="high",
+            unix="rm -r {dir}", windows="rmdir /s {dir}"),
+    _intent("remove_empty_dir", ["(delete|remove) empty (directory|folder|dir) {dir:path}", "rmdir {dir:path}"],
+            "Delete the empty directory {dir}", risk="medium",
+            unix="rmdir {dir}", windows="rmdir {dir}"),
+    _intent("remove_ext_files", ["(delete|remove) all {ext:ext} files " + _HERE],
+            "Delete every .{ext} file in the current directory", risk="high",
+            unix="rm -- *.{ext.raw}", windows="del *.{ext.raw}"),
+    _intent("remove_pycache", ["(delete|remove|clean|clear) [all] (pycache|__pycache__) [folders|directories]",
+                               "(delete|remove|clean) [all] (pyc files|python cache)"],
+            "Delete Python bytecode caches", risk="medium",
+            unix="find . -type d -name __pycache__ -prune -exec rm -rf {{}} +",
+            windows="for /d /r . %d in (__pycache__) do @if exist \"%d\" rd /s /q \"%d\""),
+    _intent("remove_empty_files", ["(delete|remove) [all] empty files " + _HERE], "Delete empty files", risk="high",
+            unix="find . -type f -empty -delete"),
+    _intent("remove_empty_dirs", ["(delete|remove) [all] empty (directories|folders) " + _HERE],
+            "Delete empty directories", risk="medium",
+            unix="find . -type d -empty -delete"),
+    _intent("symlink", ["(create|make) [a] (symlink|symbolic link|link) (from|to) {target:path} (called|named|at) {link:path}",
+                        "(symlink|link) {target:path} (to|as) {link:path}"],
+            "Create a symbolic link {link} pointing to {target}",
+            unix="ln -s {target} {link}", windows="mklink {link} {target}"),
+    _intent("make_executable", ["make {file:path} executable", "(chmod|add) (+x|execute permission) [to|on] {file:path}",
+                                "chmod +x {file:path}"],
+            "Make {file} executable",
+            unix="chmod +x {file}"),
+    _intent("file_permissions", ["(show|what are|check) permissions (of|for|on) {file:path}"],
+            "Show the permissions of {file}",
+            unix="ls -l {file}", windows="icacls {file}"),
+    _intent("chmod_numeric", ["(chmod|change permissions of|set permissions of) {file:path} to {mode:int}",
+                              "chmod {mode:int} {file:path}"],
+            "Set the permissions of {file} to {mode}", risk="medium",
+            unix="chmod {mode} {file}"),
+    _intent("chown", ["(change owner of|chown) {file:path} to {owner:word}"],
+            "Make {owner} the owner of {file}", risk="medium",
+            unix="sudo chown {owner} {file}"),
+    _intent("open_file", ["open file {file:path} [in default app]", "open {file:file} [in default app]"], "Open {file} with its default application",
+            linux="xdg-open {file}", darwin="open {file}", windows="start \"\" {file}"),
+    _intent("open_here", ["open (this|current) (folder|directory) [in file manager|in finder|in explorer]",
+                          "open (file manager|finder|explorer) here"],
+            "Open the current directory in the file manager",
+            linux="xdg-open .", darwin="open .", windows="explorer ."),
+    _intent("edit_file", ["(edit|modify) file {file:path}", "(edit|modify) {file:file}"], "Open {file} in a text editor",
+            unix="${{EDITOR:-nano}} {file}", windows="notepad {file}"),
+
+    # Finding files
+    _intent("find_ext", ["(find|search for|search|locate|list|show) [all] {ext:ext} files " + _HERE,
+                         "(find|search for|locate|list|show) [all] files (ending with|with extension) {ext:ext}"],
+            "Find every .{ext} file under the current directory",
+            unix="find . -name '*.{ext.raw}'", windows="dir /s /b *.{ext.raw}"),
+    _intent("find_name", ["(find|locate|search for) [file|files] (named|called) {name:path}",
+                          "where is file {name:path}"],
+            "Find files named {name} under the current directory",
+            unix="find . -name {name}", windows="dir /s /b {name}"),
+    _intent("find_name_contains", ["(find|search for|locate) files (whose name contains|containing) {name:word} in [their] name",
+                                   "(find|search for|locate) files with {name:word} in [their|the] name"],
+            "Find files with {name} in their name",
+            unix="find . -iname '*{name.raw}*'", windows="dir /s /b *{name.raw}*"),
+    _intent("find_large", ["(find|list|show) [all] files (over|larger than|bigger than|above|greater than|>) {size:size}",
+                           "files (over|larger than|bigger than|above|>) {size:size}",
+                           "(find|list|show) large files (over|larger than|bigger than|>) {size:size}"],
+            "Find files larger than {size}",
+            unix="find . -type f -size +{size.find}",
+            windows="powershell -Command \"Get-ChildItem -Recurse -File | Where-Object Length -gt {size.ps}\""),
+    _intent("find_small", ["(find|list|show) [all] files (under|smaller than|less than|below|<) {size:size}",
+                           "files (under|smaller than|less than|below|<) {size:size}"],
+            "Find files smaller than {size}",
+            unix="find . -type f -size -{size.find}",
+            windows="powershell -Command \"Get-ChildItem -Recurse -File | Where-Object Length -lt {size.ps}\""),
+    _intent("find_large_default", ["(find|list|show) (large|big|huge|largest|biggest) files [recursively]"],
+            "Show the 20 largest files under the current directory",
+            unix="find . -type f -exec du -h {{}} + | sort -rh | head -n 20",
+            windows="powershell -Command \"Get-ChildItem -Recurse -File | Sort-Object Length -Descending | "
+                    "Select-Object -First 20 FullName, Length\""),
+    _intent("find_modified_days", ["(find|list|show) files (modified|changed|edited) in last {n:int} days",
+                                   "files (modified|changed) (within|in) [the] last {n:int} days"],
+            "Find files modified in the last {n} days",
+            unix="find . -type f -mtime -{n}",
+            windows="powershell -Command \"Get-ChildItem -Recurse -File | "
+                    "Where-Object LastWriteTime -gt (Get-Date).AddDays(-{n})\""),
+    _intent("find_modified_today", ["(find|list|show) files (modified|changed|edited) today",
+                                    "files (modified|changed) (today|in last 24 hours)"],
+            "Find files modified in the last 24 hours",
+            unix="find . -type f -mtime -1",
+            windows="powershell -Command \"Get-ChildItem -Recurse -File | "
+                    "Where-Object LastWriteTime -gt (Get-Date).AddDays(-1)\""),
+    _intent("find_empty_files", ["(find|list|show) [all] empty files " + _HERE], "Find empty files",
+            unix="find . -type f -empty",
+            windows="powershell -Command \"Get-ChildItem -Recurse -File | Where-Object Length -eq 0\""),
+    _intent("find_empty_dirs", ["(find|list|show) [all] empty (directories|folders) " + _HERE], "Find empty directories",
+            unix="find . -type d -empty"),
+    _intent("find_dir", ["(find|locate|search for) (directory|folder|directories|folders) (named|called) {name:path}"],
+            "Find directories named {name}",
+            unix="find . -type d -name {name}", windows="dir /s /b /ad {name}"),
+    _intent("find_symlinks", ["(find|list|show) [all] (symlinks|symbolic links) " + _HERE], "Find symbolic links",
+            unix="find . -type l", windows="dir /s /al"),
+    _intent("find_executables", ["(find|list|show) [all] executable files " + _HERE], "Find executable files",
+            unix="find . -type f -perm -u+x"),
+
+    # Searching text
+    _intent("grep_recursive", ["(search|grep|look) for {text:text} in [all] files",
+                               "(find|search) [all] files containing {text:text}",
+                               "(search|grep) [for] {text:text} recursively",
+                               "which files contain {text:text}"],
+            "Search for '{text}' in all files under the current directory",
+            unix="grep -rn {text} .", windows="findstr /s /n /i /c:{text} *.*"),
+    _intent("grep_file", ["(search|grep|look) for {text:text} in [file] {file:path}",
+                          "(find|show) lines (containing|with) {text:text} in {file:path}",
+                          "grep {text:text} in {file:path}"],
+            "Show the lines of {file} containing '{text}'",
+            unix="grep -n {text} {file}", windows="findstr /n /i /c:{text} {file}"),
+    _intent("grep_ext", ["(search|grep|look) for {text:text} in [all] {ext:ext} files"],
+            "Search for '{text}' in all .{ext} files",
+            unix="grep -rn --include='*.{ext.raw}' {text} .", windows="findstr /s /n /i /c:{text} *.{ext.raw}"),
+    _intent("grep_todo", ["(find|search for|show|list) [all] (todo|todos|fixme|todo comments)",
+                          "search for todo in [all] [source] files"],
+            "Search for TODO and FIXME comments",
+            unix="grep -rnE 'TODO|FIXME' .", windows="findstr /s /n /r \"TODO FIXME\" *.*"),
+    _intent("grep_count", ["(count|how many) (occurrences|times) (of|does) {text:text} in {file:path}"],
+            "Count the lines of {file} containing '{text}'",
+            unix="grep -c {text} {file}", windows="find /c {text} {file}"),
+    _intent("replace_text", ["(replace|substitute) {old:text} with {new:text} in [file] {file:path}"],
+            "Replace '{old}' with '{new}' in {file} (in place)", risk="medium",
+            linux="sed -i 's/{old.raw}/{new.raw}/g' {file}", darwin="sed -i '' 's/{old.raw}/{new.raw}/g' {file}",
+            windows="powershell -Command \"(Get-Content {file}) -replace '{old.raw}', '{new.raw}' | Set-Content {file}\""),
+
+    # Archives
+    _intent("extract_zip", ["(extract|unzip|unpack|decompress|open) {archive:zip}", "unzip {archive:zip}"],
+            "Extract {archive}",
+            unix="unzip {archive}", windows="powershell -Command \"Expand-Archive {archive}\""),
+    _intent("extract_zip_to", ["(extract|unzip|unpack) {archive:zip} (to|into) {dir:path}"],
+            "Extract {archive} into {dir}",
+            unix="unzip {archive} -d {dir}", windows="powershell -Command \"Expand-Archive {archive} -DestinationPath {dir}\""),
+    _intent("extract_tar", ["(extract|untar|unpack|decompress|open) {archive:tar}"], "Extract {archive}",
+            unix="tar -xf {archive}", windows="tar -xf {archive}"),
+    _intent("extract_tar_to", ["(extract|untar|unpack) {archive:tar} (to|into) {dir:path}"], "Extract {archive} into {dir}",
+            unix="tar -xf {archive} -C {dir}", windows="tar -xf {archive} -C {dir}"),
+    _intent("list_zip", ["(list|show) (contents|files) (of|in) {archive:zip}"], "List the files in {archive}",
+            unix="unzip -l {archive}", windows="tar -tf {archive}"),
+    _intent("list_tar", ["(list|show) (contents|files) (of|in) {archive:tar}"], "List the files in {archive}",
+            unix="tar -tf {archive}", windows="tar -tf {archive}"),
+    _intent("gunzip", ["(decompress|gunzip|unzip|extract) {archive:gz}"], "Decompress {archive}",
+            unix="gunzip {archive}", windows="tar -xf {archive}"),
+    _intent("zip_dir", ["(zip|compress) [directory|folder|file] {src:path} (to|into|as) {archive:zip}",
+                        "create {archive:zip} (from|of) {src:path}"],
+            "Create the zip archive {archive} from {src}",
+            unix="zip -r {archive} {src}",
+            windows="powershell -Command \"Compress-Archive {src} {archive}\""),
+    _intent("zip_dir_default", ["zip [directory|folder] {src:path}"], "Create {src}.zip from {src}",
+            unix="zip -r {src.raw}.zip {src}",
+            windows="powershell -Command \"Compress-Archive {src} {src.raw}.zip\""),
+    _intent("tar_dir", ["(compress|archive|tar) [directory|folder] {src:path} (to|into|as) {archive:tar}",
+                        "create {archive:tar} (from|of) {src:path}"],
+            "Create the archive {archive} from {src}",
+            unix="tar -czf {archive} {src}", windows="tar -czf {archive} {src}"),
+    _intent("tar_dir_default", ["(compress|archive|tar|tarball) [the] [directory|folder] {src:path} [folder|directory]"],
+            "Create {src}.tar.gz from {src}",
+            unix="tar -czf {src.raw}.tar.gz {src}", windows="tar -czf {src.raw}.tar.gz {src}"),
+
+    # Disk
+    _intent("disk_usage", ["(show|check|display) [free] disk (usage|space)", "(how much|what is) [free] disk space [is left|left|do i have]",
+                           "disk (usage|space|free)", "free (disk|storage) space", "df", "df -h"],
+            "Show disk usage of mounted filesystems",
+            unix="df -h", windows="wmic logicaldisk get caption,freespace,size"),
+    _intent("dir_size", ["(size|disk usage) of (this|current) (folder|directory|dir)",
+                         "how (big|large) is (this|current) (folder|directory)", "du -sh ."],
+            "Show the total size of the current directory",
+            unix="du -sh .",
+            windows="powershell -Command \"(Get-ChildItem -Recurse -File | Measure-Object Length -Sum).Sum / 1MB\""),
+    _intent("dir_size_path", ["(size|disk usage) of [directory|folder|file] {dir:path}",
+                              "how (big|large) is [directory|folder|file] {dir:path}", "du -sh {dir:path}"],
+            "Show the total size of {dir}",
+            unix="du -sh {dir}",
+            windows="powershell -Command \"(Get-ChildItem {dir} -Recurse -File | Measure-Object Length -Sum).Sum / 1MB\""),
+    _intent("subdir_sizes", ["(size|sizes) of (each|all) (folder|folders|directory|directories|subdirectory|subdirectories)",
+                             "(which|what) (folders|directories) (take|use) [the] most space",
+                             "(largest|biggest) (folders|directories)"],
+            "Show the size of each subdirectory, largest first",
+            unix="du -sh -- */ | sort -rh",
+            windows="powershell -Command \"Get-ChildItem -Directory | ForEach-Object {{ [PSCustomObject]@{{ Name = $_.Name; "
+                    "MB = [math]::Round((Get-ChildItem $_ -Recurse -File | Measure-Object Length -Sum).Sum / 1MB, 1) }} }} | "
+                    "Sort-Object MB -Descending\""),
+    _intent("list_disks", ["(list|show) [all] (disks|drives|partitions|block devices)", "lsblk"],
+            "List disks and partitions",
+            linux="lsblk", darwin="diskutil list", windows="wmic diskdrive list brief"),
+    _intent("list_mounts", ["(list|show) [all] (mounts|mount points|mounted filesystems|mounted drives|mounted volumes)"],
+            "List mounted filesystems",
+            unix="mount", windows="mountvol"),
+    _intent("inode_usage", ["(show|check) inode usage", "inodes"], "Show inode usage",
+            unix="df -i"),
+
+    # Memory, CPU and processes
+    _intent("memory_usage", ["(show|check|display) (memory|ram) (usage|info)", "(how much|what is) [free] (memory|ram) [is left|is free|is used|do i have]",
+                             "(memory|ram) (usage|free)", "free (memory|ram)", "free -h"],
+            "Show memory usage",
+            linux="free -h", darwin="vm_stat", windows="systeminfo | findstr /C:\"Memory\""),
+    _intent("cpu_info", ["(show|display) (cpu|processor) (info|information|details|model)",
+                         "(what|which) (cpu|processor) (do i have|is this)", "lscpu"],
+            "Show CPU information",
+            linux="lscpu", darwin="sysctl -n machdep.cpu.brand_string", windows="wmic cpu get name,numberofcores,maxclockspeed"),
+    _intent("cpu_count", ["(how many|number of) (cpus|cpu cores|cores|processors)", "(cpu|core) count", "nproc"],
+            "Show the number of CPU cores",
+            linux="nproc", darwin="sysctl -n hw.ncpu", windows="echo %NUMBER_OF_PROCESSORS%"),
+    _intent("cpu_usage", ["(show|check|display) (cpu|processor) (usage|load|utilization)", "(cpu|system) load",
+                          "load average"],
+            "Show CPU load",
+            linux="top -bn1 | head -n 15", darwin="top -l 1 | head -n 15",
+            windows="wmic cpu get loadpercentage"),
+    _intent("top", ["(show|open|run|start) (top|htop|task manager|process monitor|system monitor)",
+                    "monitor (processes|system|resources)", "top"],
+            "Show running processes interactively",
+            unix="top", windows="taskmgr"),
+    _intent("list_processes", ["(list|show|display) [all] [running] processes", "(what|which) processes are running",
+                               "running processes", "ps", "ps aux"],
+            "List running processes",
+            unix="ps aux", windows="tasklist"),
+    _intent("top_memory_processes", ["(processes|process) using [the] most (memory|ram)",
+                                     "(top|largest) (memory|ram) (processes|consumers|hogs)",
+                                     "(list|show|what|which) processes (use|using|uses) [the] most (memory|ram)"],
+            "Show the processes using the most memory",
+            linux="ps aux --sort=-%mem | head -n 15", darwin="ps aux -m | head -n 15",
+            windows="powershell -Command \"Get-Process | Sort-Object WorkingSet -Descending | Select-Object -First 15\""),
+    _intent("top_cpu_processes", ["(processes|process) using [the] most cpu",
+                                  "(top|largest) cpu (processes|consumers|hogs)",
+                                  "(list|show|what|which) processes (use|using|uses) [the] most cpu"],
+            "Show the processes using the most CPU",
+            linux="ps aux --sort=-%cpu | head -n 15", darwin="ps aux -r | head -n 15",
+            windows="powershell -Command \"Get-Process | Sort-Object CPU -Descending | Select-Object -First 15\""),
+    _intent("find_process", ["(find|show|is|check if) [process] {name:word} [process] (running|is running)",
+                             "(find|search for|show) (process|processes) [named|called] {name:word}",
+                             "pid of {name:word}", "is {name:word} running"],
+            "Find running processes matching {name}",
+            unix="pgrep -fl {name}", windows="tasklist /fi \"imagename eq {name.raw}*\""),
+    _intent("kill_pid", ["(kill|stop|terminate|end) (process|pid) {pid:int}", "kill {pid:int}"],
+            "Terminate process {pid}", risk="medium",
+            unix="kill {pid}", windows="taskkill /pid {pid}"),
+    _intent("force_kill_pid", ["(force kill|kill -9|force stop|force terminate) [process|pid] {pid:int}"],
+            "Force-kill process {pid}", risk="high",
+            unix="kill -9 {pid}", windows="taskkill /f /pid {pid}"),
+    _intent("kill_name", ["(kill|stop|terminate|end) [all] {name:word} (process|processes)",
+                          "(kill|terminate) (process|processes) (named|called) {name:word}", "killall {name:word}"],
+            "Terminate all processes named {name}", risk="medium",
+            unix="pkill {name}", windows="taskkill /im {name.raw}.exe"),
+    _intent("kill_port", ["(kill|stop|terminate|end) (process|whatever|what is|app|server) (on|using|listening on) port {port:int}",
+                          "(free|free up|release) port {port:int}"],
+            "Terminate the process listening on port {port}", risk="medium",
+            unix="kill $(lsof -t -i :{port})",
+            windows="for /f \"tokens=5\" %a in ('netstat -ano ^| findstr :{port}') do taskkill /f /pid %a"),
+    _intent("process_tree", ["(show|display) process tree", "pstree"], "Show the process tree",
+            linux="ps auxf", darwin="ps -ejH", windows="wmic process get name,processid,parentprocessid"),
+    _intent("background_jobs", ["(list|show) [background] jobs", "jobs"], "List the shell's background jobs",
+            unix="jobs"),
+
+    # Ports and network
+    _intent("port_listener", ["(what|which) (process|program|app) is (listening|running) on port {port:int}",
+                              "(what|who) is (using|on) port {port:int}",
+                              "(what|which) (process|program|app) is using port {port:int}", "(check|show) port {port:int}",
+                              "is port {port:int} (open|in use|free|used)", "what is listening on port {port:int}"],
+            "Show what is listening on port {port}",
+            unix="lsof -i :{port}", windows="netstat -ano | findstr :{port}"),
+    _intent("listening_ports", ["(list|show) [all] (open|listening|used) ports", "(what|which) ports are (open|listening|in use)",
+                                "open ports", "listening ports"],
+            "List listening ports",
+            linux="ss -tulpn", darwin="lsof -iTCP -sTCP:LISTEN -n -P", windows="netstat -ano | findstr LISTENING"),
+    _intent("connections", ["(list|show) [all] [active|open|network] connections", "netstat"],
+            "List network connections",
+            linux="ss -tunap", darwin="netstat -an", windows="netstat -ano"),
+    _intent("local_ip", ["(show|what is|what's|get|find) (ip|ip address|local ip|local ip address|private ip)",
+                         "(what is|what's) ip", "ip address", "ip addr", "ifconfig", "ipconfig"],
+            "Show the local IP addresses",
+            linux="ip addr show", darwin="ifconfig", windows="ipconfig"),
+    _intent("public_ip", ["(show|what is|what's|get|find) (public|external) ip [address]", "public ip"],
+            "Show the public IP address",
+            unix="curl -s https://ifconfig.me", windows="curl -s https://ifconfig.me"),
+    _intent("network_interfaces", ["(list|show) [all] network (interfaces|adapters|devices)"],
+            "List network interfaces",
+            linux="ip link show", darwin="networksetup -listallhardwareports", windows="ipconfig /all"),
+    _intent("ping_host", ["ping {host:host}", "(check|test) (connection|connectivity) to {host:host}",
+                          "is {host:host} (up|reachable|down|online)"],
+            "Send 4 pings to {host}",
+            unix="ping -c 4 {host}", windows="ping -n 4 {host}"),
+    _intent("ping_internet", ["(check|test) [internet|network] (connection|connectivity)", "am i online",
+                              "is internet (working|up)"],
+            "Check internet connectivity",
+            unix="ping -c 4 8.8.8.8", windows="ping -n 4 8.8.8.8"),
+    _intent("traceroute", ["(traceroute|trace route|tracert) [to] {host:host}"], "Trace the network route to {host}",
+            unix="traceroute {host}", windows="tracert {host}"),
+    _intent("dns_lookup", ["(dns lookup|lookup|nslookup|resolve|dig) {host:host}", "(ip|ip address) of {host:host}",
+                           "what is ip of {host:host}"],
+            "Look up the DNS records of {host}",
+            unix="nslookup {host}", windows="nslookup {host}"),
+    _intent("dns_servers", ["(show|what are|list) [my] dns servers"], "Show the configured DNS servers",
+            linux="cat /etc/resolv.conf", darwin="scutil --dns | grep nameserver", windows="ipconfig /all | findstr DNS"),
+    _intent("flush_dns", ["(flush|clear|reset) dns [cache]"], "Flush the DNS cache", risk="medium",
+            linux="resolvectl flush-caches", darwin="sudo dscacheutil -flushcache; sudo killall -HUP mDNSResponder",
+            windows="ipconfig /flushdns"),
+    _intent("download_file", ["(download|fetch|get) [file] {url:url}", "wget {url:url}"],
+            "Download {url}",
+            unix="curl -LO {url}", windows="curl -LO {url}"),
+    _intent("download_file_to", ["(download|save) {url:url} (to|as) {file:path}"], "Download {url} to {file}",
+            unix="curl -L -o {file} {url}", windows="curl -L -o {file} {url}"),
+    _intent("http_headers", ["(show|get|check) (headers|http headers|response headers) (of|for|from) {url:url}"],
+            "Show the HTTP response headers of {url}",
+            unix="curl -sI {url}", windows="curl -sI {url}"),
+    _intent("http_get", ["(curl|request|fetch|get) {url:url}"], "Fetch {url}",
+            unix="curl -s {url}", windows="curl -s {url}"),
+    _intent("ssh", ["(ssh|connect) (to|into) {host:host}", "ssh {host:host}"], "Open an SSH session to {host}",
+            unix="ssh {host}", windows="ssh {host}"),
+    _intent("ssh_keygen", ["(generate|create|make) [new] ssh key [pair]", "ssh-keygen"],
+            "Generate a new SSH key pair",
+            unix="ssh-keygen -t ed25519", windows="ssh-keygen -t ed25519"),
+    _intent("show_ssh_key", ["(show|print|copy|display) [public] ssh key", "cat ssh key"],
+            "Print the public SSH key",
+            unix="cat ~/.ssh/id_ed25519.pub 2>/dev/null || cat ~/.ssh/id_rsa.pub",
+            windows="type %USERPROFILE%\\.ssh\\id_ed25519.pub"),
+    _intent("wifi_networks", ["(list|show|scan) [available|nearby] (wifi|wi-fi|wireless) networks"],
+            "List nearby Wi-Fi networks",
+            linux="nmcli device wifi list",
+            darwin="/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport -s",
+            windows="netsh wlan show networks"),
+    _intent("hostname", ["(show|what is|what's|print) [computer|machine] (hostname|host name|computer name)",
+                         "hostname"],
+            "Show the host name",
+            unix="hostname", windows="hostname"),
+    _intent("speed_test", ["(test|check|run) [internet|network] speed [test]", "speedtest"],
+            "Measure the internet connection speed",
+            unix="curl -s https://raw.githubusercontent.com/sivel/speedtest-cli/master/speedtest.py | python3 -",
+            windows="powershell -Command \"Measure-Command {{ Invoke-WebRequest https://speed.cloudflare.com/__down?bytes=25000000 -OutFile NUL }}\""),
+
+    # Services and logs
+    _intent("list_services", ["(list|show) [all] [running] services", "(what|which) services are running"],
+            "List running services",
+            linux="systemctl list-units --type=service --state=running", darwin="launchctl list",
+            windows="sc query state= all"),
+    _intent("service_status", ["(status of|check) [service] {svc:word} service [status]", "status of service {svc:word}",
+                               "is [service] {svc:word} service running", "systemctl status {svc:word}"],
+            "Show the status of the {svc} service",
+            linux="systemctl status {svc}", darwin="launchctl list | grep {svc}", windows="sc query {svc}"),
+    _intent("service_start", ["start [service] {svc:word} service", "start service {svc:word}"],
+            "Start the {svc} service", risk="medium",
+            linux="sudo systemctl start {svc}", darwin="brew services start {svc}", windows="net start {svc}"),
+    _intent("service_stop", ["stop [service] {svc:word} service", "stop service {svc:word}"],
+            "Stop the {svc} service", risk="medium",
+            linux="sudo systemctl stop {svc}", darwin="brew services stop {svc}", windows="net stop {svc}"),
+    _intent("service_restart", ["restart [service] {svc:word} service", "restart service {svc:word}"],
+            "Restart the {svc} service", risk="medium",
+            linux="sudo systemctl restart {svc}", darwin="brew services restart {svc}",
+            windows="net stop {svc} && net start {svc}"),
+    _intent("service_enable", ["enable [service] {svc:word} [service] [at boot|at startup]"],
+            "Start the {svc} service at boot", risk="medium",
+            linux="sudo systemctl enable {svc}"),
+    _intent("service_logs", ["(show|view|display) logs (of|for) [service] {svc:word} [service]",
+                             "{svc:word} service logs"],
+            "Show the recent logs of the {svc} service",
+            linux="journalctl -u {svc} -n 100 --no-pager",
+            darwin="log show --last 1h --predicate 'process == \"{svc.raw}\"'"),
+    _intent("system_logs", ["(show|view|display) (system logs|syslog)", "(recent|latest) system (logs|messages)"],
+            "Show recent system log messages",
+            linux="journalctl -n 100 --no-pager", darwin="log show --last 10m",
+            windows="wevtutil qe System /c:50 /rd:true /f:text"),
+    _intent("kernel_messages", ["(show|view) (kernel messages|kernel log|dmesg)", "dmesg"],
+            "Show kernel messages",
+            linux="sudo dmesg | tail -n 50", darwin="sudo dmesg | tail -n 50"),
+    _intent("boot_errors", ["(show|view) (boot errors|errors since boot|system errors)"],
+            "Show errors logged since the last boot",
+            linux="journalctl -b -p err --no-pager", windows="wevtutil qe System /q:\"*[System[(Level=2)]]\" /c:50 /rd:true /f:text"),
+    _intent("cron_list", ["(list|show) [my] (cron jobs|crontab|scheduled tasks)", "crontab -l"],
+            "List scheduled jobs",
+            unix="crontab -l", windows="schtasks /query"),
+    _intent("cron_edit", ["(edit|add) [a] (cron job|crontab)"], "Edit the crontab",
+            unix="crontab -e"),
+
+    # Power
+    _intent("shutdown", ["(shutdown|shut down|power off) [computer|machine|system|pc] [now]",
+                        "turn off (computer|machine|system|pc) [now]"],
+            "Shut the computer down", risk="high",
+            linux="sudo shutdown now", darwin="sudo shutdown -h now", windows="shutdown /s /t 0"),
+    _intent("reboot", ["(reboot|restart) (computer|machine|system|pc) [now]", "reboot [now]"], "Restart the computer", risk="high",
+            linux="sudo reboot", darwin="sudo shutdown -r now", windows="shutdown /r /t 0"),
+    _intent("sleep", ["(sleep|suspend) (computer|machine|system|pc)", "suspend", "put (computer|machine|system|pc) to sleep"],
+            "Put the computer to sleep", risk="medium",
+            linux="systemctl suspend", darwin="pmset sleepnow",
+            windows="rundll32.exe powrprof.dll,SetSuspendState 0,1,0"),
+    _intent("lock_screen", ["lock [the] (screen|computer|pc)"], "Lock the screen",
+            linux="loginctl lock-session", darwin="pmset displaysleepnow",
+            windows="rundll32.exe user32.dll,LockWorkStation"),
+    _intent("battery", ["(show|check|what is) battery [status|level|percentage|life]", "battery"],
+            "Show the battery status",
+            linux="upower -i $(upower -e | grep BAT)", darwin="pmset -g batt",
+            windows="wmic path Win32_Battery get EstimatedChargeRemaining"),
+
+    # System information
+    _intent("os_version", ["(show|what is|what's|which|check) [os|operating system] version",
+                           "(what|which) (os|operating system|distro|distribution) [is this|am i running|am i using|do i have]",
+                           "(os|system) (info|information|version)"],
+            "Show the operating system version",
+            linux="cat /etc/os-release", darwin="sw_vers", windows="ver"),
+    _intent("kernel_version", ["(show|what is|what's|check) kernel [version]", "uname -a"],
+            "Show the kernel version",
+            unix="uname -a", windows="ver"),
+    _intent("system_info", ["(show|display) (system|hardware|computer) (info|information|details|specs)",
+                            "systeminfo"],
+            "Show system details",
+            linux="hostnamectl", darwin="system_profiler SPSoftwareDataType SPHardwareDataType", windows="systeminfo"),
+    _intent("uptime", ["(show|what is|check) [system] uptime", "how long (has|is) (system|computer|machine) [been] (up|running|on)",
+                       "uptime"],
+            "Show how long the system has been running",
+            unix="uptime", windows="net statistics workstation | findstr /C:\"since\""),
+    _intent("date_time", ["(show|what is|what's) [current] (date|time|date and time)", "what time is it", "date"],
+            "Show the current date and time",
+            unix="date", windows="echo %date% %time%"),
+    _intent("calendar", ["(show|display) calendar", "cal"], "Show a calendar of this month",
+            unix="cal"),
+    _intent("whoami", ["(who am i|whoami)", "(show|what is|what's) (current user|username|user name)",
+                       "(which|what) user am i"],
+            "Show the current user",
+            unix="whoami", windows="whoami"),
+    _intent("logged_in_users", ["(who is|who's) logged in", "(list|show) logged in users", "who"],
+            "List logged-in users",
+            unix="who", windows="query user"),
+    _intent("list_users", ["(list|show) [all] users [on this system|on this machine|on this computer]", "(list|show) [all] user accounts"],
+            "List user accounts",
+            linux="cut -d: -f1 /etc/passwd", darwin="dscl . list /Users | grep -v '^_'", windows="net user"),
+    _intent("list_groups", ["(list|show) [my] groups", "(what|which) groups am i in"],
+            "List the current user's groups",
+            unix="groups", windows="whoami /groups"),
+    _intent("gpu_info", ["(show|display|what) (gpu|graphics card|video card) [info|information|do i have]",
+                         "nvidia-smi"],
+            "Show GPU information",
+            linux="lspci | grep -iE 'vga|3d'", darwin="system_profiler SPDisplaysDataType",
+            windows="wmic path win32_VideoController get name"),
+    _intent("nvidia_usage", ["(show|check) (gpu|nvidia) (usage|utilization|memory)"], "Show NVIDIA GPU usage",
+            unix="nvidia-smi", windows="nvidia-smi"),
+    _intent("usb_devices", ["(list|show) [all] (usb devices|usb)", "lsusb"], "List USB devices",
+            linux="lsusb", darwin="system_profiler SPUSBDataType",
+            windows="powershell -Command \"Get-PnpDevice -PresentOnly | Where-Object InstanceId -like 'USB*'\""),
+    _intent("pci_devices", ["(list|show) [all] (pci devices|hardware devices)", "lspci"], "List PCI devices",
+            linux="lspci", darwin="system_profiler SPPCIDataType"),
+    _intent("installed_fonts", ["(list|show) [installed] fonts"], "List installed fonts",
+            linux="fc-list", darwin="system_profiler SPFontsDataType",
+            windows="dir %WINDIR%\\Fonts"),
+    _intent("last_logins", ["(show|list) [recent|last] logins", "login history", "last"], "Show recent logins",
+            unix="last | head -n 20"),
+    _intent("temperature", ["(show|check) (cpu|system) (temperature|temp)", "sensors"], "Show hardware temperatures",
+            linux="sensors", darwin="sudo powermetrics --samplers smc -n 1"),
+
+    # Environment
+    _intent("env_vars", ["(show|list|print|display) [all] environment variables", "(show|list) env [vars|variables]",
+                         "env", "printenv"],
+            "List the environment variables",
+            unix="env", windows="set"),
+    _intent("env_var", ["(show|print|display|what is|echo|get) [value of] [environment variable|env var|variable] {var:envvar}",
+                        "echo {var:envvar}"],
+            "Print the {var} environment variable",
+            unix="echo ${var.raw}", windows="echo %{var.raw}%"),
+    _intent("set_env_var", ["(set|export) [environment variable|env var|variable] {var:envvar} (to|=) {value:text}"],
+            "Set {var} to {value} in this shell",
+            unix="export {var.raw}={value}", windows="set {var.raw}={value.raw}"),
+    _intent("unset_env_var", ["(unset|remove|delete) [environment variable|env var|variable] {var:envvar}"],
+            "Remove the {var} environment variable from this shell",
+            unix="unset {var.raw}", windows="set {var.raw}="),
+    _intent("show_path", ["(show|print|display|what is) [system] path [variable]", "echo $path", "echo %path%"],
+            "Print the PATH, one entry per line",
+            unix="echo \"$PATH\" | tr ':' '\\n'", windows="echo %PATH:;=&echo.%"),
+    _intent("which_command", ["(where is|which|locate|path of|path to) [command|program|executable] {cmd:word} [installed|located]",
+                              "(where|which) {cmd:word} is installed"],
+            "Show where the {cmd} command is installed",
+            unix="command -v {cmd}", windows="where {cmd}"),
+    _intent("command_help", ["(help|manual|man page|docs) (for|on) [command] {cmd:word}", "(man|help) {cmd:word}",
+                             "how (does|do i use) {cmd:word} (work|command)"],
+            "Show the manual for {cmd}",
+            unix="man {cmd}", windows="help {cmd}"),
+    _intent("aliases", ["(list|show) [all] [shell] aliases", "alias"], "List shell aliases",
+            unix="alias", windows="doskey /macros"),
+    _intent("reload_shell_config", ["(reload|source|refresh) (bashrc|bash config|shell config|zshrc|profile)"],
+            "Reload the shell configuration",
+            linux="source ~/.bashrc", darwin="source ~/.zshrc"),
+
+    # Git
+    _intent("git_status", ["(show|check) git status", "git status", "(what|which) files (changed|have changed|are modified)",
+                           "(show|list) (changed|modified|uncommitted) files"],
+            "Show the working tree status",
+            unix="git status", windows="git status"),
+    _intent("git_log", ["(show|display|view) (git log|commit history|git history|commits)", "git log",
+                        "(recent|last|latest) commits"],
+            "Show the recent commit history",
+            unix="git log --oneline -n 20", windows="git log --oneline -n 20"),
+    _intent("git_log_n", ["(show|list) last {n:int} commits", "last {n:int} [git] commits", "git log -n {n:int}"],
+            "Show the last {n} commits",
+            unix="git log --oneline -n {n}", windows="git log --oneline -n {n}"),
+    _intent("git_log_graph", ["(show|display) (git graph|commit graph|branch graph)", "git log graph"],
+            "Show the commit graph of all branches",
+            unix="git log --oneline --graph --all --decorate", windows="git log --oneline --graph --all --decorate"),
+    _intent("git_diff", ["(show|display|view) [git] (diff|changes|unstaged changes)", "git diff",
+                         "what (did i change|changed)"],
+            "Show unstaged changes",
+            unix="git diff", windows="git diff"),
+    _intent("git_diff_staged", ["(show|display|view) [git] (staged|cached) (diff|changes)", "git diff --staged"],
+            "Show staged changes",
+            unix="git diff --staged", windows="git diff --staged"),
+    _intent("git_add_all", ["(stage|add) all [changes|files] [to git]", "git add all", "git add ."],
+            "Stage all changes",
+            unix="git add -A", windows="git add -A"),
+    _intent("git_add_file", ["(stage|git add|add) [file] {file:path} to git", "git add {file:path}", "stage [file] {file:path}"],
+            "Stage {file}",
+            unix="git add {file}", windows="git add {file}"),
+    _intent("git_commit", ["[git] commit [changes] with message {msg:text}", "git commit -m {msg:text}"],
+            "Commit the staged changes with the message '{msg}'",
+            unix="git commit -m {msg}", windows="git commit -m \"{msg.raw}\""),
+    _intent("git_commit_all", ["commit all [changes] with message {msg:text}"],
+            "Stage all changes and commit them with the message '{msg}'",
+            unix="git add -A && git commit -m {msg}", windows="git add -A && git commit -m \"{msg.raw}\""),
+    _intent("git_amend", ["(amend|fix) [last] commit [message]", "git commit --amend"], "Amend the last commit",
+            risk="medium",
+            unix="git commit --amend", windows="git commit --amend"),
+    _intent("git_push", ["(git push|push) [changes|commits] [to remote|to origin]", "push [to] (github|gitlab|remote|origin)"],
+            "Push commits to the remote", risk="medium",
+            unix="git push", windows="git push"),
+    _intent("git_push_upstream", ["push [new] branch {branch:word} [to origin|to remote]",
+                                  "push and set upstream [for] [branch] {branch:word}"],
+            "Push {branch} and set it as the upstream branch", risk="medium",
+            unix="git push -u origin {branch}", windows="git push -u origin {branch}"),
+    _intent("git_pull", ["(git pull|pull) [latest] [changes] [from remote|from origin]", "(update|sync) [from] (repo|repository|remote)"],
+            "Pull the latest changes from the remote",
+            unix="git pull", windows="git pull"),
+    _intent("git_fetch", ["(git fetch|fetch) [all] [remotes|branches|changes]"], "Fetch all remotes",
+            unix="git fetch --all --prune", windows="git fetch --all --prune"),
+    _intent("git_branches", ["(list|show) [all] [git] branches", "git branch", "(what|which) branches (are there|exist)"],
+            "List branches",
+            unix="git branch -a", windows="git branch -a"),
+    _intent("git_current_branch", ["(what|which) branch am i on", "(show|what is|what's) current branch",
+                                   "current [git] branch"],
+            "Show the current branch",
+            unix="git branch --show-current", windows="git branch --show-current"),
+    _intent("git_new_branch", ["(create|make|new) [git] branch [called|named] {branch:word}",
+                               "(create|make) [and] (switch|checkout) to [new] branch {branch:word}",
+                               "git checkout -b {branch:word}"],
+            "Create the branch {branch} and switch to it",
+            unix="git switch -c {branch}", windows="git switch -c {branch}"),
+    _intent("git_switch_branch", ["(switch|checkout|change|go) to [git] branch {branch:word}",
+                                  "(git switch|git checkout|checkout) {branch:word}"],
+            "Switch to the branch {branch}",
+            unix="git switch {branch}", windows="git switch {branch}"),
+    _intent("git_delete_branch", ["(delete|remove) [git] [local] branch {branch:word}"],
+            "Delete the local branch {branch} (if it is merged)", risk="medium",
+            unix="git branch -d {branch}", windows="git branch -d {branch}"),
+    _intent("git_merge", ["merge [branch] {branch:word} [into current branch|into this branch]", "git merge {branch:word}"],
+            "Merge {branch} into the current branch", risk="medium",
+            unix="git merge {branch}", windows="git merge {branch}"),
+    _intent("git_rebase", ["rebase (on|onto) [branch] {branch:word}", "git rebase {branch:word}"],
+            "Rebase the current branch onto {branch}", risk="medium",
+            unix="git rebase {branch}", windows="git rebase {branch}"),
+    _intent("git_clone", ["(clone|git clone) [repo|repository] {url:url}", "git clone {url:url}"],
+            "Clone the repository {url}",
+            unix="git clone {url}", windows="git clone {url}"),
+    _intent("git_init", ["(git init|initialize git|initialize git repo|initialize git repository)", "create [new] git (repo|repository)",
+                         "(init|initialize) [new] (repo|repository)"],
+            "Create a new Git repository here",
+            unix="git init", windows="git init"),
+    _intent("git_stash", ["(stash|git stash) [my] [changes]", "save changes (for later|temporarily)"],
+            "Stash uncommitted changes",
+            unix="git stash", windows="git stash"),
+    _intent("git_stash_pop", ["(pop|apply|restore) [git] stash", "git stash pop", "(restore|unstash) stashed changes"],
+            "Restore the most recently stashed changes",
+            unix="git stash pop", windows="git stash pop"),
+    _intent("git_stash_list", ["(list|show) [git] stashes", "git stash list"], "List stashes",
+            unix="git stash list", windows="git stash list"),
+    _intent("git_discard_file", ["(discard|undo|revert) changes (to|in) [file] {file:path}", "git restore {file:path}"],
+            "Discard uncommitted changes to {file}", risk="high",
+            unix="git restore {file}", windows="git restore {file}"),
+    _intent("git_discard_all", ["(discard|undo|throw away) all [local|uncommitted] changes",
+                                "(reset|revert) [all] uncommitted changes"],
+            "Discard all uncommitted changes to tracked files", risk="high",
+            unix="git reset --hard", windows="git reset --hard"),
+    _intent("git_unstage", ["unstage [all] [changes|files]", "git reset"], "Unstage all staged changes",
+            unix="git reset", windows="git reset"),
+    _intent("git_unstage_file", ["unstage [file] {file:path}"], "Unstage {file}",
+            unix="git restore --staged {file}", windows="git restore --staged {file}"),
+    _intent("git_undo_commit", ["(undo|revert|cancel) (last|latest|previous) commit [but keep changes]",
+                                "uncommit [last commit]"],
+            "Undo the last commit, keeping its changes staged", risk="medium",
+            unix="git reset --soft HEAD~1", windows="git reset --soft HEAD~1"),
+    _intent("git_remotes", ["(list|show) [git] remotes", "git remote -v", "(what is|show) remote url"],
+            "List remotes with their URLs",
+            unix="git remote -v", windows="git remote -v"),
+    _intent("git_add_remote", ["add [git] remote {name:word} {url:url}", "add remote {url:url} as {name:word}"],
+            "Add the remote {name} at {url}",
+            unix="git remote add {name} {url}", windows="git remote add {name} {url}"),
+    _intent("git_tags", ["(list|show) [git] tags", "git tag"], "List tags",
+            unix="git tag", windows="git tag"),
+    _intent("git_tag", ["(create|add|make) [git] tag {tag:word}", "tag [this|current] (commit|version) [as] {tag:word}"],
+            "Tag the current commit as {tag}",
+            unix="git tag {tag}", windows="git tag {tag}"),
+    _intent("git_blame", ["(git blame|blame|who changed) {file:path}", "who (wrote|changed|edited) [lines in] {file:path}"],
+            "Show who last changed each line of {file}",
+            unix="git blame {file}", windows="git blame {file}"),
+    _intent("git_show_last", ["(show|display) (last|latest) commit", "git show"], "Show the last commit",
+            unix="git show", windows="git show"),
+    _intent("git_clean", ["(remove|delete|clean) untracked files", "git clean"],
+            "Delete untracked files and directories", risk="high",
+            unix="git clean -fd", windows="git clean -fd"),
+    _intent("git_config_user", ["(show|what is) [my] git (user|username|config|identity)", "git config --list"],
+            "Show the Git configuration",
+            unix="git config --list", windows="git config --list"),
+    _intent("git_contributors", ["(list|show) [git] (contributors|authors)", "who (contributed|committed) [to this repo|to repo]"],
+            "List contributors by number of commits",
+            unix="git shortlog -sn", windows="git shortlog -sn"),
+
+    # Docker
+    _intent("docker_ps", ["(list|show) [running] [docker] containers", "(show|list) running docker containers",
+                          "docker ps", "(what|which) containers are running"],
+            "List running containers",
+            unix="docker ps", windows="docker ps"),
+    _intent("docker_ps_all", ["(list|show) all [docker] containers", "docker ps -a", "(list|show) [all] stopped containers"],
+            "List all containers, including stopped ones",
+            unix="docker ps -a", windows="docker ps -a"),
+    _intent("docker_images", ["(list|show) [all] [docker] images", "docker images"], "List images",
+            unix="docker images", windows="docker images"),
+    _intent("docker_logs", ["(show|view|display|get) [docker] logs (of|for|from) [container] {name:word} [container]",
+                            "docker logs {name:word}"],
+            "Show the logs of the {name} container",
+            unix="docker logs --tail 100 {name}", windows="docker logs --tail 100 {name}"),
+    _intent("docker_logs_follow", ["(follow|tail|stream) [docker] logs (of|for|from) [container] {name:word} [container]"],
+            "Follow the logs of the {name} container",
+            unix="docker logs -f {name}", windows="docker logs -f {name}"),
+    _intent("docker_stop", ["stop [docker] container {name:word}", "docker stop {name:word}"],
+            "Stop the {name} container", risk="medium",
+            unix="docker stop {name}", windows="docker stop {name}"),
+    _intent("docker_stop_all", ["stop all [running] [docker] containers"], "Stop all running containers", risk="medium",
+            unix="docker stop $(docker ps -q)",
+            windows="powershell -Command \"docker ps -q | ForEach-Object {{ docker stop $_ }}\""),
+    _intent("docker_start", ["start [docker] container {name:word}", "docker start {name:word}"],
+            "Start the {name} container",
+            unix="docker start {name}", windows="docker start {name}"),
+    _intent("docker_restart", ["restart [docker] container {name:word}", "docker restart {name:word}"],
+            "Restart the {name} container", risk="medium",
+            unix="docker restart {name}", windows="docker restart {name}"),
+    _intent("docker_rm", ["(remove|delete) [docker] container {name:word}", "docker rm {name:word}"],
+            "Remove the {name} container", risk="high",
+            unix="docker rm {name}", windows="docker rm {name}"),
+    _intent("docker_rmi", ["(remove|delete) [docker] image {name:pkg}", "docker rmi {name:pkg}"],
+            "Remove the image {name}", risk="medium",
+            unix="docker rmi {name}", windows="docker rmi {name}"),
+    _intent("docker_exec", ["(open|get|start) [a] shell in [docker] container {name:word}",
+                            "(exec|ssh|connect) into [docker] container {name:word}"],
+            "Open a shell inside the {name} container",
+            unix="docker exec -it {name} sh", windows="docker exec -it {name} sh"),
+    _intent("docker_pull", ["(pull|download) [docker] image {name:pkg}", "docker pull {name:pkg}"],
+            "Pull the image {name}",
+            unix="docker pull {name}", windows="docker pull {name}"),
+    _intent("docker_run", ["(run|start) [a] [docker] container (from|of) [image] {name:pkg}", "docker run {name:pkg}"],
+            "Run a container from the image {name}",
+            unix="docker run --rm -it {name}", windows="docker run --rm -it {name}"),
+    _intent("docker_build", ["(build|create) [a] docker image [from dockerfile] [here]", "docker build"],
+            "Build an image from the Dockerfile in the current directory",
+            unix="docker build .", windows="docker build ."),
+    _intent("docker_build_tag", ["(build|create) [a] docker image (called|named|tagged) {tag:pkg}"],
+            "Build an image tagged {tag} from the Dockerfile here",
+            unix="docker build -t {tag} .", windows="docker build -t {tag} ."),
+    _intent("docker_prune", ["(clean up|cleanup|prune|clean) docker", "(remove|delete) unused docker (data|images|containers|resources)",
+                             "docker system prune"],
+            "Remove stopped containers, unused networks and dangling images", risk="high",
+            unix="docker system prune", windows="docker system prune"),
+    _intent("docker_disk", ["(show|check) docker disk usage", "how much space (does|is) docker (use|using)"],
+            "Show Docker's disk usage",
+            unix="docker system df", windows="docker system df"),
+    _intent("docker_stats", ["(show|display) [docker] container (stats|resource usage)", "docker stats"],
+            "Show live resource usage of containers",
+            unix="docker stats", windows="docker stats"),
+    _intent("docker_volumes", ["(list|show) [all] docker volumes", "docker volume ls"], "List volumes",
+            unix="docker volume ls", windows="docker volume ls"),
+    _intent("docker_networks", ["(list|show) [all] docker networks", "docker network ls"], "List networks",
+            unix="docker network ls", windows="docker network ls"),
+    _intent("docker_inspect", ["inspect [docker] (container|image) {name:pkg}"], "Show the details of {name}",
+            unix="docker inspect {name}", windows="docker inspect {name}"),
+    _intent("compose_up", ["(start|run|bring up) [docker] compose [services|stack] [in background]",
+                           "docker compose up", "docker-compose up"],
+            "Start the Compose services in the background",
+            unix="docker compose up -d", windows="docker compose up -d"),
+    _intent("compose_down", ["(stop|bring down|shut down) [docker] compose [services|stack]",
+                             "docker compose down", "docker-compose down"],
+            "Stop and remove the Compose services", risk="medium",
+            unix="docker compose down", windows="docker compose down"),
+    _intent("compose_logs", ["(show|view|follow) [docker] compose logs", "docker compose logs"],
+            "Follow the logs of the Compose services",
+            unix="docker compose logs -f", windows="docker compose logs -f"),
+    _intent("compose_ps", ["(list|show) [docker] compose (services|containers)", "docker compose ps"],
+            "List the Compose services",
+            unix="docker compose ps", windows="docker compose ps"),
+    _intent("compose_build", ["(build|rebuild) [docker] compose [services|images]", "docker compose build"],
+            "Build the Compose service images",
+            unix="docker compose build", windows="docker compose build"),
+
+    # Kubernetes
+    _intent("kubectl_pods", ["(list|show|get) [all] [kubernetes|k8s] pods", "kubectl get pods"], "List pods",
+            unix="kubectl get pods", windows="kubectl get pods"),
+    _intent("kubectl_pods_all", ["(list|show|get) pods in all namespaces", "(list|show) all pods"],
+            "List pods in every namespace",
+            unix="kubectl get pods -A", windows="kubectl get pods -A"),
+    _intent("kubectl_services", ["(list|show|get) [all] [kubernetes|k8s] services", "kubectl get services"],
+            "List services",
+            unix="kubectl get services", windows="kubectl get services"),
+    _intent("kubectl_deployments", ["(list|show|get) [all] [kubernetes|k8s] deployments", "kubectl get deployments"],
+            "List deployments",
+            unix="kubectl get deployments", windows="kubectl get deployments"),
+    _intent("kubectl_nodes", ["(list|show|get) [all] [kubernetes|k8s] nodes", "kubectl get nodes"], "List nodes",
+            unix="kubectl get nodes", windows="kubectl get nodes"),
+    _intent("kubectl_namespaces", ["(list|show|get) [all] [kubernetes|k8s] namespaces", "kubectl get namespaces"],
+            "List namespaces",
+            unix="kubectl get namespaces", windows="kubectl get namespaces"),
+    _intent("kubectl_logs", ["(show|view|get) logs (of|for|from) pod {pod:word}", "kubectl logs {pod:word}"],
+            "Show the logs of the pod {pod}",
+            unix="kubectl logs {pod}", windows="kubectl logs {pod}"),
+    _intent("kubectl_describe", ["describe pod {pod:word}", "kubectl describe pod {pod:word}"],
+            "Show the details and events of the pod {pod}",
+            unix="kubectl describe pod {pod}", windows="kubectl describe pod {pod}"),
+    _intent("kubectl_exec", ["(open|get) [a] shell in pod {pod:word}", "(exec|ssh|connect) into pod {pod:word}"],
+            "Open a shell inside the pod {pod}",
+            unix="kubectl exec -it {pod} -- sh", windows="kubectl exec -it {pod} -- sh"),
+    _intent("kubectl_delete_pod", ["(delete|remove|kill) pod {pod:word}"], "Delete the pod {pod}", risk="high",
+            unix="kubectl delete pod {pod}", windows="kubectl delete pod {pod}"),
+    _intent("kubectl_context", ["(show|what is) [current] (kubernetes|k8s|kubectl) context", "current [kube] context"],
+            "Show the current kubectl context",
+            unix="kubectl config current-context", windows="kubectl config current-context"),
+    _intent("kubectl_contexts", ["(list|show) [all] (kubernetes|k8s|kubectl|kube) contexts"], "List kubectl contexts",
+            unix="kubectl config get-contexts", windows="kubectl config get-contexts"),
+    _intent("kubectl_apply", ["apply [kubernetes|k8s] (manifest|config|file) {file:path}", "kubectl apply {file:path}"],
+            "Apply the manifest {file}", risk="medium",
+            unix="kubectl apply -f {file}", windows="kubectl apply -f {file}"),
+    _intent("kubectl_top", ["(show|check) (pod|pods) (resource usage|cpu|memory)", "kubectl top pods"],
+            "Show pod CPU and memory usage",
+            unix="kubectl top pods", windows="kubectl top pods"),
+
+    # Python
+    _intent("python_version", ["(show|check|what) python version [do i have|is installed]", "python --version",
+                               "which python version"],
+            "Show the Python version",
+            unix="python3 --version", windows="python --version"),
+    _intent("run_python", ["(run|execute|start) [python] [script|file] {script:py}", "python {script:py}"],
+            "Run {script} with Python",
+            unix="python3 {script}", windows="python {script}"),
+    _intent("make_venv", ["(create|make|new|set up|setup) [a] [python] (venv|virtualenv|virtual environment)"],
+            "Create a virtual environment in .venv",
+            unix="python3 -m venv .venv", windows="python -m venv .venv"),
+    _intent("activate_venv", ["(activate|enable|enter) [python] (venv|virtualenv|virtual environment)", "source venv"],
+            "Activate the virtual environment in .venv",
+            unix="source .venv/bin/activate", windows=".venv\\Scripts\\activate"),
+    _intent("deactivate_venv", ["(deactivate|exit|leave) [python] (venv|virtualenv|virtual environment)"],
+            "Leave the active virtual environment",
+            unix="deactivate", windows="deactivate"),
+    _intent("pip_install", ["(pip install|install python package|install python library|install python module) {pkg:pkg}",
+                            "install {pkg:pkg} with pip", "pip install {pkg:pkg}"],
+            "Install the Python package {pkg}",
+            unix="pip install {pkg}", windows="pip install {pkg}"),
+    _intent("pip_uninstall", ["(pip uninstall|uninstall python package|uninstall python library|uninstall python module) {pkg:pkg}",
+                              "(uninstall|remove) {pkg:pkg} with pip"],
+            "Uninstall the Python package {pkg}", risk="medium",
+            unix="pip uninstall {pkg}", windows="pip uninstall {pkg}"),
+    _intent("pip_requirements", ["(install|pip install) [python] (requirements|dependencies) [from requirements.txt]",
+                                 "pip install -r requirements.txt"],
+            "Install the packages listed in requirements.txt",
+            unix="pip install -r requirements.txt", windows="pip install -r requirements.txt"),
+    _intent("pip_freeze", ["(save|export|write|generate) [python] requirements [to requirements.txt|file]",
+                           "pip freeze to requirements.txt"],
+            "Write the installed packages to requirements.txt", risk="medium",
+            unix="pip freeze > requirements.txt", windows="pip freeze > requirements.txt"),
+    _intent("pip_list", ["(list|show) [all] installed (python|pip) (packages|libraries|modules)", "pip list",
+                         "pip freeze"],
+            "List installed Python packages",
+            unix="pip list", windows="pip list"),
+    _intent("pip_outdated", ["(list|show) outdated (python|pip) packages", "pip list --outdated"],
+            "List outdated Python packages",
+            unix="pip list --outdated", windows="pip list --outdated"),
+    _intent("pip_upgrade", ["(upgrade|update) [python|pip] package {pkg:pkg}", "pip install --upgrade {pkg:pkg}"],
+            "Upgrade the Python package {pkg}",
+            unix="pip install --upgrade {pkg}", windows="pip install --upgrade {pkg}"),
+    _intent("pip_upgrade_pip", ["(upgrade|update) pip"], "Upgrade pip",
+            unix="python3 -m pip install --upgrade pip", windows="python -m pip install --upgrade pip"),
+    _intent("pip_show", ["(show|info about|details of) (python|pip) package {pkg:pkg}", "pip show {pkg:pkg}"],
+            "Show details of the Python package {pkg}",
+            unix="pip show {pkg}", windows="pip show {pkg}"),
+    _intent("pytest", ["(run|execute) [python|all] tests", "(run|start) pytest", "pytest"], "Run the test suite",
+            unix="python3 -m pytest", windows="python -m pytest"),
+    _intent("http_server", ["(start|run|serve) [a] [simple|local|python] (http|web|file) server [here]",
+                            "serve (this|current) (folder|directory) [over http]"],
+            "Serve the current directory over HTTP on port 8000",
+            unix="python3 -m http.server 8000", windows="python -m http.server 8000"),
+    _intent("http_server_port", ["(start|run) [a] [simple|local|python] (http|web|file) server on port {port:int}",
+                                 "serve (this|current) (folder|directory) on port {port:int}"],
+            "Serve the current directory over HTTP on port {port}",
+            unix="python3 -m http.server {port}", windows="python -m http.server {port}"),
+    _intent("python_repl", ["(open|start|launch) [a] python (shell|repl|interpreter|console)", "python"],
+            "Start an interactive Python shell",
+            unix="python3", windows="python"),
+    _intent("json_pretty", ["(pretty print|format|prettify) (json|json file) {file:path}"],
+            "Pretty-print the JSON in {file}",
+            unix="python3 -m json.tool {file}", windows="python -m json.tool {file}"),
+
+    # Node
+    _intent("node_version", ["(show|check|what) (node|nodejs|node.js) version [do i have|is installed]", "node --version"],
+            "Show the Node.js version",
+            unix="node --version", windows="node --version"),
+    _intent("npm_install", ["(npm install|install node package|install node module) {pkg:pkg}", "install {pkg:pkg} with npm"],
+            "Install the npm package {pkg}",
+            unix="npm install {pkg}", windows="npm install {pkg}"),
+    _intent("npm_install_dev", ["(npm install|install) {pkg:pkg} as [a] dev dependency"],
+            "Install {pkg} as a development dependency",
+            unix="npm install --save-dev {pkg}", windows="npm install --save-dev {pkg}"),
+    _intent("npm_install_global", ["(npm install|install) {pkg:pkg} globally [with npm]"],
+            "Install the npm package {pkg} globally",
+            unix="npm install -g {pkg}", windows="npm install -g {pkg}"),
+    _intent("npm_deps", ["(install|npm install) [node|npm|project] (dependencies|packages|modules)", "npm install", "npm i"],
+            "Install the project's npm dependencies",
+            unix="npm install", windows="npm install"),
+    _intent("npm_uninstall", ["(npm uninstall|uninstall node package|uninstall node module) {pkg:pkg}",
+                              "(uninstall|remove) {pkg:pkg} with npm"],
+            "Uninstall the npm package {pkg}",
+            unix="npm uninstall {pkg}", windows="npm uninstall {pkg}"),
+    _intent("npm_start", ["(npm start|start node app|start node project|start node server|start npm project)", "(run|start) dev server",
+                          "npm run dev"],
+            "Start the development server",
+            unix="npm run dev", windows="npm run dev"),
+    _intent("npm_build", ["(build|npm build) [node|npm] (project|app)", "npm run build"], "Build the project",
+            unix="npm run build", windows="npm run build"),
+    _intent("npm_test", ["(run|execute) (npm|node|javascript|js) tests", "npm test"], "Run the npm test script",
+            unix="npm test", windows="npm test"),
+    _intent("npm_run", ["(npm run|run npm script) {script:word}"], "Run the npm script {script}",
+            unix="npm run {script}", windows="npm run {script}"),
+    _intent("npm_list", ["(list|show) [installed] (npm|node) (packages|modules|dependencies)", "npm list", "npm ls"],
+            "List the project's installed npm packages",
+            unix="npm ls --depth=0", windows="npm ls --depth=0"),
+    _intent("npm_global_list", ["(list|show) global (npm|node) (packages|modules)"], "List globally installed npm packages",
+            unix="npm ls -g --depth=0", windows="npm ls -g --depth=0"),
+    _intent("npm_outdated", ["(list|show) outdated (npm|node) (packages|modules|dependencies)", "npm outdated"],
+            "List outdated npm packages",
+            unix="npm outdated", windows="npm outdated"),
+    _intent("npm_init", ["(init|initialize|create) [new] (npm|node) (project|package)", "npm init"],
+            "Create a package.json",
+            unix="npm init -y", windows="npm init -y"),
+    _intent("npm_audit", ["(audit|check) (npm|node) (packages|dependencies) [for vulnerabilities]", "npm audit"],
+            "Check npm dependencies for known vulnerabilities",
+            unix="npm audit", windows="npm audit"),
+    _intent("run_node", ["(run|execute) [node] [script|file] {script:path} with node", "node {script:path}"],
+            "Run {script} with Node.js",
+            unix="node {script}", windows="node {script}"),
+
+    # System packages. Installs only when the package manager is named: a
+    # bare "install X" may be a pip, npm, snap or cask package, and is left
+    # to the model.
+    _intent("apt_install", ["(apt|apt-get) install {pkg:pkg}", "install {pkg:pkg} with (apt|apt-get)"],
+            "Install {pkg} with apt", risk="medium",
+            linux="sudo apt install {pkg}"),
+    _intent("brew_install", ["brew install {pkg:pkg}", "install {pkg:pkg} with (brew|homebrew)"],
+            "Install {pkg} with Homebrew", risk="medium",
+            darwin="brew install {pkg}"),
+    _intent("winget_install", ["winget install {pkg:pkg}", "install {pkg:pkg} with winget"],
+            "Install {pkg} with winget", risk="medium",
+            windows="winget install {pkg}"),
+    _intent("apt_remove", ["(apt|apt-get) remove {pkg:pkg}", "(uninstall|remove) {pkg:pkg} with (apt|apt-get)"],
+            "Uninstall {pkg} with apt", risk="medium",
+            linux="sudo apt remove {pkg}"),
+    _intent("brew_uninstall", ["brew uninstall {pkg:pkg}", "(uninstall|remove) {pkg:pkg} with (brew|homebrew)"],
+            "Uninstall {pkg} with Homebrew", risk="medium",
+            darwin="brew uninstall {pkg}"),
+    _intent("winget_uninstall", ["winget uninstall {pkg:pkg}", "(uninstall|remove) {pkg:pkg} with winget"],
+            "Uninstall {pkg} with winget", risk="medium",
+            windows="winget uninstall {pkg}"),
+    _intent("pkg_search", ["search [for] (package|program|app) {pkg:pkg}", "(find|search) {pkg:pkg} package"],
+            "Search the package repositories for {pkg}",
+            linux="apt search {pkg}", darwin="brew search {pkg}", windows="winget search {pkg}"),
+    _intent("pkg_update", ["(update|refresh) (package lists|packages list|package index|apt|brew)", "apt update"],
+            "Refresh the package lists",
+            linux="sudo apt update", darwin="brew update", windows="winget source update"),
+    _intent("pkg_upgrade", ["(upgrade|update) [all] [installed] (packages|software|programs|apps)",
+                            "(upgrade|update) (system|everything)"],
+            "Upgrade all installed packages", risk="medium",
+            linux="sudo apt update && sudo apt upgrade", darwin="brew upgrade", windows="winget upgrade --all"),
+    _intent("pkg_list", ["(list|show) [all] installed (packages|programs|software|apps)"], "List installed packages",
+            linux="apt list --installed", darwin="brew list", windows="winget list"),
+    _intent("pkg_info", ["(show|info about|details of) package {pkg:pkg}"], "Show details of the package {pkg}",
+            linux="apt show {pkg}", darwin="brew info {pkg}", windows="winget show {pkg}"),
+    _intent("pkg_cleanup", ["(clean|clean up|cleanup) (package cache|apt|brew|packages)",
+                            "(remove|delete) unused packages"],
+            "Remove packages that are no longer needed", risk="medium",
+            linux="sudo apt autoremove", darwin="brew cleanup"),
+
+    # Miscellaneous
+    _intent("echo_text", ["(echo|say) {text:text}"], "Print '{text}'",
+            unix="echo {text}", windows="echo {text.raw}"),
+    _intent("write_file", ["(write|put) {text:text} (to|in|into) [file] {file:path}"],
+            "Write '{text}' to {file}, replacing its contents", risk="medium",
+            unix="echo {text} > {file}", windows="echo {text.raw}> {file}"),
+    _intent("append_file", ["(append|add) {text:text} to [end of] [file] {file:path}"], "Append '{text}' to {file}",
+            unix="echo {text} >> {file}", windows="echo {text.raw}>> {file}"),
+    _intent("weather", ["(show|what is|what's|check) [the] weather [forecast|today]", "weather"],
+            "Show the weather forecast for your location",
+            unix="curl -s wttr.in", windows="curl -s wttr.in"),
+    _intent("weather_city", ["(show|what is|what's|check) [the] weather in {city:word}", "weather (in|for) {city:word}"],
+            "Show the weather forecast for {city}",
+            unix="curl -s wttr.in/{city.raw}", windows="curl -s wttr.in/{city.raw}"),
+    _intent("random_password", ["(generate|create|make) [a] [random|strong|secure] password"],
+            "Generate a random password",
+            unix="openssl rand -base64 24",
+            windows="powershell -Command \"[Convert]::ToBase64String((1..18 | ForEach-Object {{ Get-Random -Maximum 256 }}))\""),
+    _intent("uuid", ["(generate|create|make) [a] [random|new] (uuid|guid)", "uuid"], "Generate a random UUID",
+            linux="cat /proc/sys/kernel/random/uuid", darwin="uuidgen",
+            windows="powershell -Command \"[guid]::NewGuid()\""),
+    _intent("base64_encode", ["(base64 encode|encode) {file:path} [in|as|to] base64"], "Base64-encode {file}",
+            unix="base64 {file}", windows="certutil -encode {file} {file.raw}.b64"),
+    _intent("sleep_seconds", ["(sleep|wait|pause) [for] {n:int} (seconds|secs|s)"], "Wait {n} seconds",
+            unix="sleep {n}", windows="timeout /t {n}"),
+    _intent("reverse_dns", ["(reverse dns|reverse lookup) [of|for] {host:host}"], "Look up the host name of {host}",
+            unix="nslookup {host}", windows="nslookup {host}"),
+    _intent("watch_command", ["(watch|repeat|run) {cmd:text} every {n:int} seconds"], "Run {cmd} every {n} seconds",
+            linux="watch -n {n} {cmd.raw}", darwin="while true; do {cmd.raw}; sleep {n}; done"),
+    _intent("time_command", ["(time|measure) how long {cmd:text} takes"],
+            "Measure how long {cmd} takes",
+            unix="time {cmd.raw}", windows="powershell -Command \"Measure-Command {{ {cmd.raw} }}\""),
+    _intent("clipboard_paste", ["(show|paste|print) clipboard [contents]"], "Print the clipboard contents",
+            linux="xclip -selection clipboard -o", darwin="pbpaste", windows="powershell -Command Get-Clipboard"),
+    _intent("screenshot", ["(take|capture) [a] screenshot"], "Take a screenshot",
+            linux="gnome-screenshot", darwin="screencapture ~/Desktop/screenshot.png",
+            windows="snippingtool"),
+    _intent("open_url", ["open {url:url} [in browser]", "(browse|go) to {url:url}"], "Open {url} in the browser",
+            linux="xdg-open {url}", darwin="open {url}", windows="start \"\" {url}"),
+    _intent("trash_empty", ["(empty|clear) [the] (trash|recycle bin)"], "Empty the trash", risk="high",
+            linux="rm -rf ~/.local/share/Trash/*", darwin="rm -rf ~/.Trash/*",
+            windows="powershell -Command \"Clear-RecycleBin -Force\""),
+    _intent("ls_recursive", ["(list|show) [all] files recursively", "(list|show) files in all (subdirectories|subfolders)",
+                             "ls -R"],
+            "List files in all subdirectories",
+            unix="ls -R", windows="dir /s"),
+]
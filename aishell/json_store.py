@@ -0,0 +1,68 @@
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+SAVE_INTERVAL = 5.0  # Seconds between writes to disk
+
+class JsonStore:
+    """A JSON file that state kept in memory is saved to, across sessions
+
+    The owner calls changed() after each update and maybe_save() where it
+    is fine to write; writes happen at most every interval seconds, and
+    once more at exit. snapshot() returns the data to write (taking the
+    owner's lock if it needs one). Files are replaced atomically, so a
+    crash never leaves a half-written one. Without a path nothing is read
+    or written.
+    """
+
+    def __init__(self, path: Optional[str], snapshot: Callable[[], Any],
+                 interval: float = SAVE_INTERVAL, indent: Optional[int] = 2):
+        self.path = path
+        self.interval = interval
+        self.indent = indent
+        self._snapshot = snapshot
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = float("-inf")  # The first save is never held back
+        if path:
+            atexit.register(self.save)
+
+    def load(self) -> Optional[Any]:
+        """What was saved last, or None if the file is missing or corrupt"""
+        if not self.path:
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def changed(self):
+        self._dirty = True
+
+    def maybe_save(self):
+        """Save unless the last save was less than interval seconds ago"""
+        if time.monotonic() - self._last_save > self.interval:
+            self.save()
+
+    def save(self):
+        """Write the snapshot to disk if anything changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_save = time.monotonic()
+            data = self._snapshot()
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f, indent=self.indent)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
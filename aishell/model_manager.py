@@ -1,5 +1,4 @@
 import os
-import requests
 import time
 import shutil
 from pathlib import Path
@@ -111,6 +110,7 @@ class ModelManager:
             headers['Range'] = f'bytes={resume_byte_pos}-'
         
         try:
+            import requests  # Only needed for downloads; keep it off the startup path
             print(f"Downloading model from {url}...")
             response = requests.get(url, headers=headers, stream=True)
             
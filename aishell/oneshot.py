@@ -0,0 +1,99 @@
+import platform
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from typing import Optional, Tuple
+from termcolor import colored
+
+from cache import CommandCache
+
+class OneShot:
+    """Non-interactive mode: answer a single query and exit.
+
+    The hot path only touches the command cache and the rule engine. The AI
+    service (and with it the provider SDKs) is imported when neither has an
+    answer, and even then only the first provider that initializes is started.
+    """
+
+    def __init__(self, print_only: bool = False, assume_yes: bool = False):
+        self.print_only = print_only
+        self.assume_yes = assume_yes
+        self.cache = CommandCache()
+        self.confidence = None  # Score of the generated command, if the provider gives one
+        self.risk = None  # Risk level the model gave it, with structured output
+
+    def _status(self, message: str, color: str = "cyan"):
+        """Status output goes to stderr so stdout only ever carries the command"""
+        print(colored(message, color), file=sys.stderr)
+
+    def _generate(self, query: str) -> Tuple[Optional[str], Optional[str]]:
+        """Start a single provider and generate the command"""
+        # Providers report progress on stdout; keep it off the command channel
+        with redirect_stdout(sys.stderr):
+            from ai_service import AIService
+            ai = AIService(single_provider=True, cache=self.cache)
+            result = ai.generate_command(query)
+            self.confidence = ai.last_confidence
+            self.risk = ai.last_risk
+            return result
+
+    def _match_rule(self, query: str) -> Tuple[Optional[str], Optional[str]]:
+        """Command from the rule engine, if one of its rules covers the query"""
+        from rules import get_rule_engine
+        engine = get_rule_engine()
+        found = engine.match(query, platform.system().lower()) if engine else None
+        if found is None:
+            return None, None
+        self.risk = found.risk
+        return found.command, found.explanation
+
+    def _confirm(self, command: str) -> bool:
+        """Ask for confirmation on the terminal unless --yes was given"""
+        if self.assume_yes:
+            return True
+        score = f"  (confidence {self.confidence:.0%})" if self.confidence is not None else ""
+        self._status(f"Command: {command}{score}", "green")
+        if self.risk in ("medium", "high"):
+            self._status(f"⚠️ Risk: {self.risk}", "red" if self.risk == "high" else "yellow")
+        try:
+            print(colored("Run command? (y/N) ", "yellow"), end="", file=sys.stderr, flush=True)
+            return sys.stdin.readline().strip().lower() == "y"
+        except (EOFError, KeyboardInterrupt):
+            return False
+
+    def run(self, query: str) -> int:
+        """Resolve the query and print or run the command; returns an exit code"""
+        query = query.strip()
+        if not query:
+            self._status("❌ Empty query", "red")
+            return 2
+
+        command, explanation = self.cache.get(query)
+        if command is None:
+            command, explanation = self._match_rule(query)
+        # Only generated commands are cached: a rule answers as fast as the cache
+        generated = command is None
+        if generated:
+            try:
+                command, explanation = self._generate(query)
+            except KeyboardInterrupt:
+                self._status("\n⛔ Cancelled", "yellow")
+                return 130
+            if not command:
+                self._status("❌ Failed to generate command", "red")
+                return 1
+
+        if self.print_only:
+            print(command)
+            return 0
+
+        if not self._confirm(command):
+            return 0
+
+        result = subprocess.run(command, shell=True)
+        if result.returncode == 0 and generated:
+            self.cache.save(query, command, explanation)
+        return result.returncode
+
+def run_oneshot(query: str, print_only: bool = False, assume_yes: bool = False) -> int:
+    return OneShot(print_only=print_only, assume_yes=assume_yes).run(query)
@@ -0,0 +1,178 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from json_store import JsonStore
+
+# Stored next to the configuration so stats survive across sessions
+STATS_FILE = os.path.join(os.path.expanduser("~"), ".ai_shell", "provider_stats.json")
+
+LATENCY_WINDOW = 50  # Recent successful latencies kept for percentiles
+
+class ProviderStats:
+    """Per-provider latency and reliability statistics, persisted across sessions
+
+    For each provider this keeps exponentially weighted moving averages of
+    latency, success rate and parse-failure rate, plus a rolling window of
+    recent latencies for p50/p90/p95. The stats drive provider ranking and
+    hedge delays in AIService.
+    """
+
+    def __init__(self, path: str = STATS_FILE, alpha: float = 0.2):
+        self.path = path
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._store = JsonStore(path, self._snapshot)
+        self._stats = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        """Load stats from disk, ignoring a missing or corrupt file"""
+        data = self._store.load() or {}
+        stats = {}
+        for name, entry in data.get("providers", {}).items():
+            entry["latencies"] = deque(entry.get("latencies", []), maxlen=LATENCY_WINDOW)
+            stats[name] = entry
+        return stats
+
+    def _entry(self, provider: str) -> Dict:
+        entry = self._stats.get(provider)
+        if entry is None:
+            # Optimistic prior: unknown providers look healthy until proven otherwise
+            entry = {
+                "latency": None,
+                "success_rate": 1.0,
+                "parse_failure_rate": 0.0,
+                "calls": 0,
+                "updated": 0.0,
+                "latencies": deque(maxlen=LATENCY_WINDOW),
+            }
+            self._stats[provider] = entry
+        return entry
+
+    def _ewma(self, old: Optional[float], value: float) -> float:
+        return value if old is None else old + self.alpha * (value - old)
+
+    def record(self, provider: str, latency: float, success: bool, parse_failure: bool = False):
+        """Record the outcome of one provider call
+
+        Args:
+            provider: Provider name
+            latency: Wall time of the call in seconds
+            success: Whether a usable command came back
+            parse_failure: The provider answered but no command could be parsed
+        """
+        with self._lock:
+            entry = self._entry(provider)
+            entry["calls"] += 1
+            entry["updated"] = time.time()
+            entry["success_rate"] = self._ewma(entry["success_rate"], 1.0 if success else 0.0)
+            entry["parse_failure_rate"] = self._ewma(entry["parse_failure_rate"], 1.0 if parse_failure else 0.0)
+            if success:
+                entry["latency"] = self._ewma(entry["latency"], latency)
+                entry["latencies"].append(round(latency, 4))
+            self._store.changed()
+        self._store.maybe_save()
+
+    def record_prompt(self, provider: str, prompt_tokens: int, cached_tokens: int = 0, estimated: bool = False):
+        """Record the prompt size of one call and how much of it was a cache hit"""
+        with self._lock:
+            entry = self._entry(provider)
+            entry["prompt_tokens"] = self._ewma(entry.get("prompt_tokens"), prompt_tokens)
+            if not estimated:
+                # Only reported counts say anything about the cache
+                share = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+                entry["cached_share"] = self._ewma(entry.get("cached_share"), share)
+            self._store.changed()
+
+    def record_warmup(self, provider: str, seconds: float):
+        """Record how long a background pre-connect took"""
+        with self._lock:
+            entry = self._entry(provider)
+            entry["warmup"] = self._ewma(entry.get("warmup"), seconds)
+            self._store.changed()
+
+    def record_first_call(self, provider: str, latency: float, warm: bool):
+        """Record the latency of a first call after start-up or idle, with or without a warm connection"""
+        key = "first_call_warm" if warm else "first_call_cold"
+        with self._lock:
+            entry = self._entry(provider)
+            entry[key] = self._ewma(entry.get(key), latency)
+            self._store.changed()
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of recent successful latencies, None without data"""
+        with self._lock:
+            samples = sorted(self._stats.get(provider, {}).get("latencies", ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q / 100.0 * len(samples)))]
+
+    def sample_count(self, provider: str) -> int:
+        with self._lock:
+            return len(self._stats.get(provider, {}).get("latencies", ()))
+
+    def score(self, provider: str, speed_weight: float, reference_latency: float) -> float:
+        """Blend of speed and quality in [0, 1]; higher is better
+
+        Speed compares the provider's p50 to the reference (fastest known) p50.
+        Quality is the success rate discounted by the parse-failure rate.
+        """
+        with self._lock:
+            entry = self._stats.get(provider)
+            quality = 1.0 if entry is None else entry["success_rate"] * (1.0 - entry["parse_failure_rate"])
+        p50 = self.percentile(provider, 50)
+        speed = 0.5 if p50 is None or not reference_latency else min(1.0, reference_latency / max(p50, 1e-3))
+        return speed_weight * speed + (1.0 - speed_weight) * quality
+
+    def rank(self, providers: List[str], speed_weight: float = 0.5, explore_rate: float = 0.0) -> List[str]:
+        """Order providers best-first
+
+        Ties keep the incoming order, so with no data the caller's default
+        preference is preserved. With probability explore_rate the provider
+        whose stats are stalest is moved to the front to keep its data fresh.
+        """
+        known = [p for p in (self.percentile(name, 50) for name in providers) if p is not None]
+        reference = min(known) if known else 0.0
+        ranked = sorted(providers, key=lambda name: -self.score(name, speed_weight, reference))
+
+        if len(ranked) > 1 and explore_rate > 0 and random.random() < explore_rate:
+            with self._lock:
+                stalest = min(ranked[1:], key=lambda name: self._stats.get(name, {}).get("updated", 0.0))
+            ranked.remove(stalest)
+            ranked.insert(0, stalest)
+        return ranked
+
+    def summary(self) -> Dict[str, Dict]:
+        """Snapshot of the stats for display"""
+        snapshot = {}
+        for name in list(self._stats):
+            with self._lock:
+                entry = self._stats[name]
+                snapshot[name] = {
+                    "calls": entry["calls"],
+                    "success_rate": entry["success_rate"],
+                    "parse_failure_rate": entry["parse_failure_rate"],
+                    "latency": entry["latency"],
+                    "prompt_tokens": entry.get("prompt_tokens"),
+                    "cached_share": entry.get("cached_share"),
+                    "warmup": entry.get("warmup"),
+                    "first_call_cold": entry.get("first_call_cold"),
+                    "first_call_warm": entry.get("first_call_warm"),
+                }
+            snapshot[name]["p50"] = self.percentile(name, 50)
+            snapshot[name]["p95"] = self.percentile(name, 95)
+        return snapshot
+
+    def save(self):
+        """Write stats to disk if anything changed"""
+        self._store.save()
+
+    def _snapshot(self) -> Dict:
+        with self._lock:
+            return {"providers": {
+                name: dict(entry, latencies=list(entry["latencies"]))
+                for name, entry in self._stats.items()
+            }}
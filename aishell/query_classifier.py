@@ -0,0 +1,214 @@
+import os
+import re
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from json_store import JsonStore
+
+# Stored next to the configuration so tuning survives across sessions
+CLASSIFIER_FILE = os.path.join(os.path.expanduser("~"), ".ai_shell", "query_classifier.json")
+
+# Complexity classes and where they are sent
+SIMPLE = "simple"      # local model only (cloud only if it returns nothing)
+MODERATE = "moderate"  # local and cloud in parallel, first valid answer wins
+COMPLEX = "complex"    # cloud first, local model as the last resort
+ROUTES = {SIMPLE: "local", MODERATE: "both", COMPLEX: "cloud"}
+
+DEFAULT_LOW_THRESHOLD = 0.3
+DEFAULT_HIGH_THRESHOLD = 0.6
+# Local answers should be accepted this often for a class to stay local
+TARGET_ACCURACY = 0.85
+# Below this the local model is not worth racing either
+FLOOR_ACCURACY = 0.5
+TUNE_STEP = 0.01
+MIN_FEEDBACK = 5  # Outcomes in a class before its threshold moves
+HISTORY_SIZE = 300  # Past local outcomes kept for similarity lookups
+SIMILARITY = 0.5  # Jaccard overlap for two queries to count as similar
+
+CONJUNCTIONS = {"and", "then", "after", "before", "also", "while", "unless", "except", "but", "each", "every"}
+CONSTRAINT_WORDS = {"older", "newer", "larger", "smaller", "bigger", "than", "between", "last", "recursively",
+                    "excluding", "only", "sorted", "sort", "top", "count", "unique", "modified", "days", "hours"}
+# Tools whose flags the small local model rarely gets right
+TOOLS = {
+    "awk", "sed", "xargs", "find", "jq", "rsync", "tar", "ffmpeg", "openssl", "iptables", "docker",
+    "kubectl", "helm", "git", "systemctl", "journalctl", "crontab", "cron", "ssh", "scp", "curl",
+    "netstat", "lsof", "ss", "nmap", "tcpdump", "sqlite", "psql", "mysql", "powershell", "regex",
+    "chmod", "chown", "du", "zip", "unzip", "gpg", "aws", "terraform", "npm", "pip", "conda",
+}
+STOPWORDS = {"a", "an", "the", "to", "of", "in", "on", "for", "all", "my", "me", "with", "from", "this", "that",
+             "it", "is", "are", "and", "or", "please", "show", "list", "get", "how", "do", "i"}
+OPERATORS = re.compile(r"\|\||&&|[|;>]")
+NUMBER = re.compile(r"\d+\s*(?:[kmgt]i?b|[kmgt]|days?|hours?|mins?|minutes?|%)?\b", re.IGNORECASE)
+
+def _words(query: str) -> List[str]:
+    return re.findall(r"[a-z0-9_.+-]+", query.lower())
+
+def _content_words(query: str) -> Set[str]:
+    return {w for w in _words(query) if w not in STOPWORDS}
+
+class QueryClassifier:
+    """Cheap up-front complexity estimate used to pick local, cloud or both
+
+    The score blends query length, pipes/conjunctions, specialised tool
+    names, numeric constraints and how the local model did on similar
+    queries before. Two thresholds split it into simple/moderate/complex.
+    Accuracy (was the command accepted?) and latency are tracked per
+    class, and the thresholds move so that the local model keeps getting
+    the queries it answers well.
+    """
+
+    def __init__(self, path: str = CLASSIFIER_FILE, alpha: float = 0.1):
+        self.path = path
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.low = DEFAULT_LOW_THRESHOLD
+        self.high = DEFAULT_HIGH_THRESHOLD
+        self.classes: Dict[str, Dict] = {}
+        self.history = deque(maxlen=HISTORY_SIZE)  # (content words, local answer accepted)
+        self._store = JsonStore(path, self._snapshot)
+        self._load()
+
+    def _load(self):
+        data = self._store.load()
+        if data is None:
+            return
+        self.low = data.get("low", self.low)
+        self.high = data.get("high", self.high)
+        self.classes = data.get("classes", {})
+        self.history.extend((set(words), ok) for words, ok in data.get("history", []))
+
+    def _class_entry(self, name: str) -> Dict:
+        entry = self.classes.get(name)
+        if entry is None:
+            entry = self.classes[name] = {
+                "queries": 0, "local_accuracy": None, "cloud_accuracy": None,
+                "local_feedback": 0, "cloud_feedback": 0, "latency": None,
+            }
+        return entry
+
+    def _ewma(self, old: Optional[float], value: float) -> float:
+        return value if old is None else old + self.alpha * (value - old)
+
+    def local_success_rate(self, query: str) -> Optional[float]:
+        """How often the local model's answer was accepted for similar queries"""
+        words = _content_words(query)
+        if not words:
+            return None
+        total = weight = 0.0
+        with self._lock:
+            for past, ok in self.history:
+                union = len(words | past)
+                similarity = len(words & past) / union if union else 0.0
+                if similarity >= SIMILARITY:
+                    weight += similarity
+                    total += similarity * (1.0 if ok else 0.0)
+        return total / weight if weight >= 2 * SIMILARITY else None
+
+    def score(self, query: str) -> float:
+        """Complexity score, roughly 0 (trivial) to 1 (hard)"""
+        words = _words(query)
+        joins = len(OPERATORS.findall(query)) + sum(w in CONJUNCTIONS for w in words)
+        tools = len(set(words) & TOOLS)
+        constraints = len(NUMBER.findall(query)) + sum(w in CONSTRAINT_WORDS for w in words)
+
+        score = (
+            0.35 * min(len(words), 20) / 20
+            + 0.25 * min(joins, 2) / 2
+            + 0.2 * min(tools, 2) / 2
+            + 0.2 * min(constraints, 3) / 3
+        )
+        rate = self.local_success_rate(query)
+        if rate is not None:
+            # Past local results on similar queries outweigh the surface features
+            score += 0.4 * (0.5 - rate)
+        return max(0.0, score)
+
+    def classify(self, query: str) -> str:
+        score = self.score(query)
+        if score < self.low:
+            return SIMPLE
+        if score < self.high:
+            return MODERATE
+        return COMPLEX
+
+    def route(self, query: str) -> str:
+        """'local', 'both' or 'cloud'"""
+        return ROUTES[self.classify(query)]
+
+    @staticmethod
+    def route_for(class_name: str) -> str:
+        return ROUTES[class_name]
+
+    def record_latency(self, class_name: str, latency: float):
+        with self._lock:
+            entry = self._class_entry(class_name)
+            entry["queries"] += 1
+            entry["latency"] = self._ewma(entry["latency"], latency)
+            self._store.changed()
+        self._store.maybe_save()
+
+    def record_local_result(self, query: str, accepted: bool):
+        """Remember how the local model did on a query (for similarity lookups)"""
+        with self._lock:
+            self.history.append((_content_words(query), accepted))
+            self._store.changed()
+
+    def record_feedback(self, query: str, class_name: str, local: bool, accepted: bool):
+        """Whether the user accepted the command for a query of this class
+
+        Local outcomes tune the thresholds: a simple class the local model
+        keeps getting wrong shrinks, a moderate class it answers well grows
+        the local-only band, and a moderate class where it is hopeless
+        pushes more queries to cloud-first.
+        """
+        if local:
+            self.record_local_result(query, accepted)
+        with self._lock:
+            entry = self._class_entry(class_name)
+            side = "local" if local else "cloud"
+            entry[f"{side}_feedback"] += 1
+            entry[f"{side}_accuracy"] = self._ewma(entry[f"{side}_accuracy"], 1.0 if accepted else 0.0)
+            if local and entry["local_feedback"] >= MIN_FEEDBACK:
+                self._tune(class_name, entry["local_accuracy"])
+            self._store.changed()
+        self._store.maybe_save()
+
+    def _tune(self, class_name: str, accuracy: float):
+        if class_name == SIMPLE:
+            if accuracy < TARGET_ACCURACY:
+                self.low -= TUNE_STEP
+            elif accuracy > TARGET_ACCURACY + 0.05:
+                self.low += TUNE_STEP
+        elif class_name == MODERATE:
+            if accuracy > TARGET_ACCURACY:
+                self.low += TUNE_STEP
+                self.high += TUNE_STEP
+            elif accuracy < FLOOR_ACCURACY:
+                self.high -= TUNE_STEP
+        elif class_name == COMPLEX and accuracy > TARGET_ACCURACY:
+            # Local fallbacks on "complex" queries keep succeeding
+            self.high += TUNE_STEP
+        self.low = min(max(0.05, self.low), 0.9)
+        self.high = min(max(self.low + 0.05, self.high), 1.5)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "low": self.low,
+                "high": self.high,
+                "classes": {name: dict(entry) for name, entry in self.classes.items()},
+            }
+
+    def save(self):
+        """Write thresholds, class stats and history to disk if anything changed"""
+        self._store.save()
+
+    def _snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "low": self.low,
+                "high": self.high,
+                "classes": {name: dict(entry) for name, entry in self.classes.items()},
+                "history": [[sorted(words), ok] for words, ok in self.history],
+            }
@@ -0,0 +1,443 @@
+import itertools
+import json
+import os
+import re
+import shlex
+import threading
+import time
+from string import Formatter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from json_store import JsonStore
+
+# Stored next to the configuration
+USER_RULES_FILE = os.path.join(os.path.expanduser("~"), ".ai_shell", "rules.json")
+RULE_STATS_FILE = os.path.join(os.path.expanduser("~"), ".ai_shell", "rule_stats.json")
+
+# Name reported as the "provider" of rule-engine commands
+RULES_PROVIDER = "rules"
+RULES_DESCRIPTION = "Rule engine"
+
+# Patterns with more literal variants than this are matched by regex
+# instead of being expanded into the exact-phrase table
+MAX_EXPANSIONS = 256
+OS_KEYS = ("unix", "linux", "darwin", "windows")
+
+# Dropped from queries and patterns alike before matching
+FILLER_WORDS = {"the", "a", "an", "my", "please"}
+LEADING_PHRASES = [p.split() for p in (
+    "can you", "could you", "would you", "how do i", "how can i", "how to",
+    "i want to", "i need to", "help me", "i'd like to",
+)]
+# "show me X" -> "show X"
+ME_VERBS = {"show", "give", "tell", "list", "find", "get"}
+
+EXTENSIONS = {
+    "python": "py", "javascript": "js", "typescript": "ts", "java": "java", "rust": "rs",
+    "ruby": "rb", "golang": "go", "go": "go", "shell": "sh", "bash": "sh", "text": "txt",
+    "markdown": "md", "json": "json", "yaml": "yml", "yml": "yml", "xml": "xml", "html": "html",
+    "css": "css", "csv": "csv", "log": "log", "pdf": "pdf", "jpg": "jpg", "jpeg": "jpeg",
+    "png": "png", "gif": "gif", "svg": "svg", "mp3": "mp3", "mp4": "mp4", "zip": "zip",
+    "sql": "sql", "c": "c", "cpp": "cpp", "h": "h", "php": "php", "powershell": "ps1",
+    "ps1": "ps1", "bat": "bat", "ini": "ini", "toml": "toml", "conf": "conf", "txt": "txt",
+    "md": "md", "py": "py", "js": "js", "ts": "ts", "rs": "rs", "rb": "rb", "sh": "sh",
+    "jsx": "jsx", "tsx": "tsx", "kt": "kt", "swift": "swift", "docx": "docx", "xlsx": "xlsx",
+    "iso": "iso", "exe": "exe", "dll": "dll", "tar": "tar", "gz": "gz", "env": "env",
+}
+
+_SIZE_UNITS = {"": 1, "b": 1, "byte": 1, "bytes": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+class Size:
+    """A file size as find (-size) and PowerShell want it: {size.find}, {size.ps}"""
+
+    def __init__(self, raw: str, size: int):
+        self.raw = raw
+        for unit, suffix, ps in ((1024 ** 3, "G", "GB"), (1024 ** 2, "M", "MB"), (1024, "k", "KB")):
+            if size >= unit and size % unit == 0:
+                self.find, self.ps = f"{size // unit}{suffix}", f"{size // unit}{ps}"
+                break
+        else:
+            self.find, self.ps = f"{size}c", str(size)
+
+    def __str__(self):
+        return self.raw
+
+def _size(value: str) -> Optional[Size]:
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b|ytes?|yte)?", value.lower())
+    if not match:
+        return None
+    unit = match.group(2) or ""
+    return Size(value, int(float(match.group(1)) * _SIZE_UNITS[unit]))
+
+def _unquote(value: str) -> str:
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+def _extension(value: str) -> Optional[str]:
+    return EXTENSIONS.get(value.lower().lstrip("."))
+
+# Placeholder types: (regex, converter returning the raw value or None)
+TYPES = {
+    "int": (r"\d+", str),
+    "size": (r"\d+(?:\.\d+)?\s?(?:[kmgt]i?b?|bytes?|b)?", _size),
+    "word": (r"[\w./@:+-]+", str),
+    "path": (r"\"[^\"]+\"|'[^']+'|[^\s'\"]+", _unquote),
+    # A path that looks like one (has a dot or a slash), for verbs that also take other objects
+    "file": (r"\"[^\"]+\"|'[^']+'|[^\s'\"]*[./~\\][^\s'\"]*", _unquote),
+    "text": (r".+?", _unquote),
+    "host": (r"[\w.@-]*\w", str),
+    "url": (r"(?:https?|ftp)://\S+|www\.\S+", str),
+    "pkg": (r"[\w.@/\[\]=<>~+-]+", str),
+    "ext": (r"\.?[\w+]+", _extension),
+    "envvar": (r"(?-i:[A-Z_][A-Z0-9_]*)", str),
+    "zip": (r"\S+\.zip", str),
+    "tar": (r"\S+\.(?:tar(?:\.(?:gz|bz2|xz))?|tgz)", str),
+    "gz": (r"\S+\.gz", str),
+    "py": (r"\S+\.py", str),
+    "remote": (r"[\w.-]+@[\w.-]+:\S*", str),
+}
+
+_TOKEN = re.compile(r"\[[^\]]*\]|\([^)]*\)|\{[^}]*\}|\S+")
+_PLACEHOLDER = re.compile(r"\{(\w+)(?::(\w+))?\}")
+
+class Arg(str):
+    """A captured value, shell-quoted for the target OS; {name.raw} is the value as typed"""
+
+    def __new__(cls, raw: str, windows: bool):
+        if windows:
+            quoted = f'"{raw}"' if re.search(r"[\s&|<>^]", raw) else raw
+        else:
+            quoted = shlex.quote(raw)
+        arg = super().__new__(cls, quoted)
+        arg.raw = raw
+        return arg
+
+class Rule(NamedTuple):
+    name: str
+    explanation: str
+    risk: str
+    templates: Dict[str, str]  # OS key -> command template
+    user: bool = False
+
+    def template(self, os_type: str) -> Optional[str]:
+        if os_type in self.templates:
+            return self.templates[os_type]
+        if os_type != "windows":
+            return self.templates.get("unix")
+        return None
+
+class RuleMatch(NamedTuple):
+    rule: str
+    command: str
+    explanation: str
+    risk: str
+
+def split_words(text: str, keep_fillers: bool = False) -> List[str]:
+    """Query words with polite openings, "me" after a verb and (unless kept) fillers removed"""
+    words = text.strip().rstrip("?!. ").split()
+    lowered = [w.lower() for w in words]
+    changed = True
+    while changed:
+        changed = False
+        for phrase in LEADING_PHRASES:
+            if lowered[:len(phrase)] == phrase:
+                words, lowered = words[len(phrase):], lowered[len(phrase):]
+                changed = True
+    kept = []
+    for word, low in zip(words, lowered):
+        if low in FILLER_WORDS and not keep_fillers:
+            continue
+        if low == "me" and kept and kept[-1].lower() in ME_VERBS:
+            continue
+        kept.append(word)
+    return kept
+
+_FILLER = "(?:" + "|".join(sorted(FILLER_WORDS)) + ")"
+
+class _Entry:
+    """A parametric pattern, compiled the first time a query reaches it"""
+    __slots__ = ("source", "types", "rule", "_regex")
+
+    def __init__(self, source: str, types: Dict[str, str], rule: Rule):
+        self.source = source
+        self.types = types  # placeholder name -> type
+        self.rule = rule
+        self._regex = None
+
+    @property
+    def regex(self) -> re.Pattern:
+        if self._regex is None:
+            self._regex = re.compile(self.source, re.IGNORECASE)
+        return self._regex
+
+class _Table:
+    """Rules of one source: exact phrases plus regexes bucketed by first word"""
+
+    def __init__(self):
+        self.exact: Dict[str, Rule] = {}
+        self.buckets: Dict[str, List[_Entry]] = {}
+        self.anywhere: List[_Entry] = []
+
+    def add(self, pattern: str, rule: Rule):
+        tokens = _TOKEN.findall(" ".join(split_words(pattern)))
+        if not tokens:
+            raise ValueError("empty pattern")
+        for token in tokens:
+            if token[0] in "([" and any(c in token[1:-1] for c in "()[]{}"):
+                raise ValueError(f"nested group {token} in '{pattern}'")
+        if not _PLACEHOLDER.search(pattern):
+            variants = [self._choices(t) for t in tokens]
+            if _product_size(variants) <= MAX_EXPANSIONS:
+                for combo in itertools.product(*variants):
+                    phrase = " ".join(w for w in combo if w)
+                    self.exact.setdefault(phrase, rule)
+                return
+        source, types = self._compile(tokens)
+        if rule.user:
+            re.compile(source)  # Reject a bad user pattern now rather than on first use
+        entry = _Entry(source, types, rule)
+        first = tokens[0]
+        if first.startswith("(") or not first.startswith(("[", "{")):
+            for word in self._choices(first):
+                self.buckets.setdefault(word.split()[0], []).append(entry)
+        else:
+            self.anywhere.append(entry)
+
+    @staticmethod
+    def _choices(token: str) -> List[str]:
+        """Literal variants of a token ('' for an omitted optional one)"""
+        if token.startswith("["):
+            return [""] + [c.strip().lower() for c in token[1:-1].split("|")]
+        if token.startswith("("):
+            return [c.strip().lower() for c in token[1:-1].split("|")]
+        return [token.lower()]
+
+    @staticmethod
+    def _compile(tokens: List[str]) -> Tuple[str, Dict[str, str]]:
+        """Regex source for a token list, matched against " " + query words
+
+        Filler words may appear between literal tokens, at the start and at
+        the end; they are skipped rather than removed so captured text keeps
+        them. Never next to a placeholder: in "delete folder my stuff" the
+        "my" belongs to the value, and skipping it would capture "stuff", so
+        such a query doesn't match and is left to the model.
+        """
+        parts, types = [], {}
+        after_placeholder = False
+        for token in tokens:
+            optional = token.startswith("[")
+            placeholder = _PLACEHOLDER.fullmatch(token)
+            if placeholder:
+                name, kind = placeholder.group(1), placeholder.group(2) or "word"
+                if kind not in TYPES:
+                    raise ValueError(f"unknown placeholder type '{kind}'")
+                types[name] = kind
+                part = f"(?P<{name}>{TYPES[kind][0]})"
+            elif token.startswith(("[", "(")):
+                choices = [re.escape(c.strip()).replace(r"\ ", r"\s+") for c in token[1:-1].split("|")]
+                part = f"(?:{'|'.join(choices)})"
+            else:
+                part = re.escape(token)
+            fillers = "" if placeholder or after_placeholder else f"(?:{_FILLER}\\s+)*"
+            part = f"\\s+{fillers}{part}"
+            parts.append(f"(?:{part})?" if optional else part)
+            after_placeholder = bool(placeholder)
+        if not after_placeholder:
+            parts.append(f"(?:\\s+{_FILLER})*")
+        return "".join(parts), types
+
+def _product_size(variants: List[List[str]]) -> int:
+    size = 1
+    for choices in variants:
+        size *= len(choices)
+    return size
+
+class RuleEngine:
+    """Deterministic fast path for common requests, tried before any model
+
+    Each intent has phrase patterns and a command template per OS
+    ("unix" covers linux and darwin unless they have their own). Patterns
+    are plain words with (a|b) alternatives, [optional] words and typed
+    {name:type} placeholders. Patterns without placeholders are expanded
+    into an exact-phrase table, so most lookups are one dict access; the
+    rest are regexes tried only for queries starting with their first
+    word. User rules (same format, JSON) take precedence over built-ins.
+
+    Lookups, hits and per-intent counts are kept (and persisted) to
+    report the hit rate, alongside the coverage of each OS.
+    """
+
+    def __init__(self, intents: List[Dict], user_rules_path: Optional[str] = USER_RULES_FILE,
+                 stats_path: Optional[str] = RULE_STATS_FILE):
+        self.errors: List[str] = []  # Problems with user rules, for display
+        self.rules: List[Rule] = []
+        self.user = _Table()
+        self.builtin = _Table()
+        for intent in intents:
+            self._add(intent, self.builtin, user=False)
+        if user_rules_path:
+            for intent in self._load_user_rules(user_rules_path):
+                if not isinstance(intent, dict):
+                    self.errors.append(f"{intent!r}: a rule must be an object")
+                    continue
+                try:
+                    self._add(intent, self.user, user=True)
+                except (ValueError, TypeError, KeyError, AttributeError, re.error) as e:
+                    self.errors.append(f"{intent.get('name', '?')}: {e}")
+
+        self._lock = threading.Lock()
+        self._store = JsonStore(stats_path, self._snapshot)
+        self._stats = self._load_stats()
+        self._match_time = 0.0
+        self._session_lookups = 0
+
+    def _load_user_rules(self, path: str) -> List[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            self.errors.append(f"{path}: {e}")
+            return []
+        rules = data.get("rules", []) if isinstance(data, dict) else data
+        if not isinstance(rules, list):
+            self.errors.append(f"{path}: expected a list of rules")
+            return []
+        return rules
+
+    def _add(self, intent: Dict, table: _Table, user: bool):
+        templates = {key: intent[key] for key in OS_KEYS if intent.get(key)}
+        if not intent.get("name") or not intent.get("patterns") or not templates:
+            raise ValueError("a rule needs a name, patterns and at least one command template")
+        rule = Rule(intent["name"], intent.get("explanation", ""), intent.get("risk", "low"), templates, user)
+        patterns = [intent["patterns"]] if isinstance(intent["patterns"], str) else intent["patterns"]
+        for pattern in patterns:
+            names = {m.group(1) for m in _PLACEHOLDER.finditer(pattern)}
+            for template in list(templates.values()) + [rule.explanation]:
+                used = {field.split(".")[0] for _, field, _, _ in Formatter().parse(template) if field}
+                if used - names:
+                    raise ValueError(f"'{pattern}' has no placeholder for {', '.join(sorted(used - names))}")
+            table.add(pattern, rule)
+        self.rules.append(rule)
+
+    def match(self, query: str, os_type: str, record: bool = True) -> Optional[RuleMatch]:
+        """Command for a query on an OS, or None if no rule covers it
+        (record=False leaves the hit-rate statistics alone)"""
+        start = time.perf_counter()
+        words = split_words(query, keep_fillers=True)
+        result = self._match(words, os_type) if words else None
+        if record:
+            self._record(result, time.perf_counter() - start)
+        return result
+
+    def _match(self, words: List[str], os_type: str) -> Optional[RuleMatch]:
+        key = " ".join(w for w in (w.lower() for w in words) if w not in FILLER_WORDS)
+        windows = os_type == "windows"
+        for table in (self.user, self.builtin):
+            rule = table.exact.get(key)
+            if rule is not None and rule.template(os_type) is not None:
+                return self._render(rule, {}, os_type)
+        padded = " " + " ".join(words)
+        first = key.split(" ", 1)[0]
+        for table in (self.user, self.builtin):
+            for entry in table.buckets.get(first, []) + table.anywhere:
+                rule = entry.rule
+                if rule.template(os_type) is None:
+                    continue
+                found = entry.regex.fullmatch(padded)
+                if not found:
+                    continue
+                values = {}
+                for name, kind in entry.types.items():
+                    value = TYPES[kind][1](found.group(name))
+                    if value is None:
+                        break
+                    values[name] = value if isinstance(value, Size) else Arg(value, windows)
+                else:
+                    return self._render(rule, values, os_type)
+        return None
+
+    @staticmethod
+    def _render(rule: Rule, values: Dict, os_type: str) -> RuleMatch:
+        command = rule.template(os_type).format(**values)
+        raw = {name: getattr(value, "raw", value) for name, value in values.items()}
+        explanation = rule.explanation.format(**raw) if rule.explanation else f"Rule: {rule.name}"
+        return RuleMatch(rule.name, command, explanation, rule.risk)
+
+    def coverage(self, os_type: str) -> Dict:
+        """How many intents the engine has, and how many of them work on an OS"""
+        return {
+            "intents": len(self.rules),
+            "for_os": sum(1 for rule in self.rules if rule.template(os_type) is not None),
+            "user": sum(1 for rule in self.rules if rule.user),
+            "phrases": len(self.user.exact) + len(self.builtin.exact),
+        }
+
+    # Hit-rate statistics
+
+    def _load_stats(self) -> Dict:
+        stats = {"lookups": 0, "hits": 0, "intents": {}, "rejected": {}}
+        stats.update(self._store.load() or {})
+        return stats
+
+    def _record(self, result: Optional[RuleMatch], elapsed: float):
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._session_lookups += 1
+            self._match_time += elapsed
+            if result is not None:
+                self._stats["hits"] += 1
+                self._stats["intents"][result.rule] = self._stats["intents"].get(result.rule, 0) + 1
+            self._store.changed()
+        self._store.maybe_save()
+
+    def record_feedback(self, rule: str, accepted: bool):
+        """Count a rule's command the user asked to regenerate"""
+        if accepted:
+            return
+        with self._lock:
+            self._stats["rejected"][rule] = self._stats["rejected"].get(rule, 0) + 1
+            self._store.changed()
+
+    def summary(self, top: int = 5) -> Dict:
+        with self._lock:
+            lookups, hits = self._stats["lookups"], self._stats["hits"]
+            intents = sorted(self._stats["intents"].items(), key=lambda item: -item[1])
+            return {
+                "lookups": lookups,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else None,
+                "rejected": sum(self._stats["rejected"].values()),
+                "match_us": self._match_time / self._session_lookups * 1e6 if self._session_lookups else None,
+                "top": intents[:top],
+            }
+
+    def save(self):
+        """Write the counters to disk if anything changed"""
+        self._store.save()
+
+    def _snapshot(self) -> Dict:
+        with self._lock:
+            return json.loads(json.dumps(self._stats))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_rule_engine() -> Optional[RuleEngine]:
+    """Process-wide rule engine built from the built-in intents and the user rules
+    file, or None when the rule engine is disabled in the config"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            try:
+                from config import config_manager
+                settings = config_manager.get_rules_config()
+            except ImportError:
+                settings = {"enabled": True, "user_rules": USER_RULES_FILE}
+            if not settings["enabled"]:
+                return None
+            from intents import INTENTS
+            _engine = RuleEngine(INTENTS, os.path.expanduser(settings["user_rules"]))
+        return _engine
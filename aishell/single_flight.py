@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from apis.base_provider import run_in_thread
+
+# How often a waiting process checks whether another process's flight finished
+POLL_INTERVAL = 0.05
+
+# (command, explanation, provider, confidence, risk): a flight's result is
+# also what the caller reports about the command it got
+Result = Tuple[Optional[str], Optional[str], Optional[str], Optional[float], Optional[str]]
+
+def flight_key(query: str, *context) -> str:
+    """Coalescing key: the query with case, spacing and trailing punctuation
+    normalized, plus whatever else the answer depends on (target OS, mode)"""
+    normalized = " ".join(query.lower().split()).rstrip(" .?!")
+    return "\x1f".join([normalized] + [str(c) for c in context])
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesces identical in-flight generations
+
+    The first caller for a key starts the generation; callers that arrive
+    while it is running attach to the same task and get the same result.
+    A waiter that is cancelled only detaches - the generation is cancelled
+    once nobody is waiting for it any more.
+
+    With a store (the command cache), flights are also claimed in the
+    cache DB, so a process asking for something another process is
+    already generating waits for that result instead of calling a
+    provider itself.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.coalesced = 0  # callers served by someone else's flight
+        self._flights: Dict[str, _Flight] = {}
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Result]],
+                  timeout: Optional[float] = None) -> Result:
+        """Run factory() for key, or join the flight already running for it"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(self._execute(key, factory, timeout)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # Shielded so one waiter's cancellation doesn't cancel it for everyone
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _execute(self, key: str, factory: Callable[[], Awaitable[Result]],
+                       timeout: Optional[float]) -> Result:
+        if self.store is None:
+            return await factory()
+
+        since = time.time()
+        # A flight older than the query budget belongs to a dead or stuck process
+        stale_after = (timeout or 30) + 5
+        try:
+            # The store blocks on the DB (up to its busy timeout while another
+            # process writes), so it is queried in a thread, off the event loop
+            while not await self._store_query(self.store.acquire_flight, key, self.owner, since, stale_after):
+                result = await self._store_query(self.store.flight_result, key, since)
+                if result is not None:
+                    if not result[0]:
+                        # That process got no command: try for ourselves
+                        return await factory()
+                    self.coalesced += 1
+                    return result
+                if timeout is not None and time.time() - since > timeout:
+                    # Never wait on another process past our own budget
+                    return await factory()
+                await asyncio.sleep(POLL_INTERVAL)
+        except sqlite3.Error:
+            # The shared lock is only an optimisation; never fail a query over it
+            return await factory()
+
+        try:
+            result = await factory()
+        except BaseException:
+            # Cancelled or crashed: let a waiting process take over (in the
+            # background - a cancelled task can't wait for it)
+            run_in_thread(self._store_call, self.store.abandon_flight, key, self.owner)
+            raise
+        await self._store_query(self._store_call, self.store.finish_flight, key, self.owner, tuple(result)[:5])
+        return result
+
+    @staticmethod
+    async def _store_query(fn, *args):
+        return await asyncio.wrap_future(run_in_thread(fn, *args))
+
+    @staticmethod
+    def _store_call(fn, *args):
+        try:
+            fn(*args)
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,173 @@
+import datetime
+import os
+import re
+import threading
+from concurrent.futures import Future
+from difflib import SequenceMatcher
+from typing import Callable, List, Optional
+
+from json_store import JsonStore
+
+# Stored next to the configuration so the daily budget survives restarts
+SPECULATION_FILE = os.path.join(os.path.expanduser("~"), ".ai_shell", "speculation.json")
+
+# Words that don't change what command is wanted
+FILLER = {"a", "an", "the", "please", "pls", "can", "could", "would", "you", "i", "want", "like", "me", "to"}
+
+def _signature(text: str) -> List[str]:
+    return [w for w in re.findall(r"[a-z0-9_./:~*+-]+", text.lower()) if w not in FILLER]
+
+def _numbers(words: List[str]) -> List[str]:
+    return [w for w in words if any(c.isdigit() for c in w)]
+
+class _Speculation:
+    def __init__(self, text: str, future: Future):
+        self.text = text
+        self.future = future
+
+class Speculator:
+    """Generates the query being typed before Enter is pressed
+
+    Hooked to the prompt buffer: once typing pauses for `debounce`
+    seconds on something that looks like a natural-language request, a
+    generation for the current text starts in the background. Further
+    typing that changes the request cancels it. On submit, a speculation
+    for the same request - up to filler words and small typos, never a
+    different number - is waited for and used instead of starting over.
+
+    Speculations that may reach paid providers are limited to
+    `daily_budget` per day; past that, only local providers speculate.
+    """
+
+    def __init__(self, ai, cache, should_speculate: Callable[[str], bool], debounce: float = 0.6,
+                 min_words: int = 3, similarity: float = 0.9, daily_budget: int = 100,
+                 path: str = SPECULATION_FILE):
+        self.ai = ai
+        self.cache = cache
+        self.should_speculate = should_speculate
+        self.debounce = debounce
+        self.min_words = min_words
+        self.similarity = similarity
+        self.daily_budget = daily_budget
+        self._lock = threading.Lock()
+        self._store = JsonStore(path, self._snapshot, indent=None)
+        self._timer = None
+        self._current: Optional[_Speculation] = None
+        self.started = 0
+        self.used = 0
+        self.cancelled = 0
+        self.day, self.spent = self._load()
+
+    def attach(self, buffer):
+        """Watch a prompt_toolkit Buffer (e.g. PromptSession.default_buffer)"""
+        buffer.on_text_changed += self._on_text_changed
+
+    def _on_text_changed(self, buffer):
+        text = buffer.text.strip()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            # An empty buffer is the prompt being reset after submit
+            if text:
+                self._timer = threading.Timer(self.debounce, self._start, (text,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _start(self, text: str):
+        with self._lock:
+            if threading.current_thread() is not self._timer:
+                # Typing went on (or the query was submitted) after this timer fired
+                return
+            current = self._current
+            if current is not None and self.matches(current.text, text):
+                return
+            if current is not None:
+                # The request changed: what is running is stale
+                current.future.cancel()
+                self.cancelled += 1
+                self._current = None
+        if len(text.split()) < self.min_words or not self.should_speculate(text):
+            return
+        if self.cache.contains(text) or self.ai.match_rule(text, record=False):
+            return
+        local_only = not self._spend()
+        if local_only and not any(self.ai.providers[p].is_local for p in self.ai.initialized_providers):
+            return
+        with self._lock:
+            # Checked again: only the latest timer may replace the speculation
+            if threading.current_thread() is not self._timer:
+                return
+            if self._current is not None:
+                self._current.future.cancel()
+                self.cancelled += 1
+            self._current = _Speculation(text, self.ai.speculate(text, local_only))
+            self.started += 1
+
+    def take(self, text: str):
+        """Generation for a submitted query, if one was speculated; None otherwise
+
+        Waits for a matching speculation that is still running (Ctrl-C
+        cancels it) and cancels one that doesn't match.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            current, self._current = self._current, None
+        if current is None:
+            return None
+        if not self.matches(current.text, text.strip()):
+            current.future.cancel()
+            self.cancelled += 1
+            return None
+        generation = self.ai.runtime.wait_future(current.future)
+        if generation.command:
+            self.used += 1
+            return generation
+        return None
+
+    def cancel(self):
+        """Drop whatever is pending or running"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            current, self._current = self._current, None
+        if current is not None:
+            current.future.cancel()
+            self.cancelled += 1
+
+    def matches(self, speculated: str, submitted: str) -> bool:
+        """Whether a speculation answers the submitted query"""
+        a, b = _signature(speculated), _signature(submitted)
+        if a == b:
+            return True
+        # Typos only: same length, same numbers, nearly the same letters
+        if len(a) != len(b) or _numbers(a) != _numbers(b):
+            return False
+        return SequenceMatcher(None, " ".join(a), " ".join(b)).ratio() >= self.similarity
+
+    def _spend(self) -> bool:
+        """Take one paid speculation from today's budget, if any is left"""
+        with self._lock:
+            today = datetime.date.today().isoformat()
+            if self.day != today:
+                self.day, self.spent = today, 0
+            if self.spent >= self.daily_budget:
+                return False
+            self.spent += 1
+            self._store.changed()
+        self._store.save()
+        return True
+
+    def _load(self):
+        data = self._store.load()
+        try:
+            return data.get("day"), int(data.get("spent", 0))
+        except (AttributeError, TypeError, ValueError):
+            return None, 0
+
+    def _snapshot(self):
+        with self._lock:
+            return {"day": self.day, "spent": self.spent}
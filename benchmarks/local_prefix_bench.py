@@ -0,0 +1,124 @@
+"""Prompt prefix cache and shared worker benchmark for the local LLM.
+
+Measures time to first token of local completions with the prefix cache
+off and on, and through the shared worker (whose load time is what a
+second shell session pays to attach to an already loaded model).
+Command and explanation prompts are interleaved, as in a session with
+background explanations, so each prompt finds the other kind's prefix
+in the context. Needs llama-cpp-python and a GGUF model:
+
+    python benchmarks/local_prefix_bench.py --model ~/models/tinyllama.gguf --runs 10
+    python benchmarks/local_prefix_bench.py --json results.jsonl
+
+Without --model the configured local model is used.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "aishell"))
+
+QUERIES = [
+    ("show disk usage", "df -h"),
+    ("find files over 100MB in my home folder", "find ~ -type f -size +100M"),
+    ("what is listening on port 8080", "lsof -i :8080"),
+    ("count lines in all javascript files", "find . -name '*.js' | xargs wc -l"),
+]
+
+def first_token_times(backend, os_type: str, runs: int) -> dict:
+    """Seconds to the first token per prompt kind, command and explanation prompts alternating"""
+    from apis import prompts
+    from apis.deadline import Deadline
+    command_prefix = prompts.system_prompt(os_type, compact=True)
+    samples = {"command": [], "explanation": []}
+    for i in range(runs):
+        query, command = QUERIES[i % len(QUERIES)]
+        for kind, prompt, prefix in (
+            ("command", prompts.completion_prompt(os_type, query, compact=True), command_prefix),
+            ("explanation", prompts.explanation_completion_prompt(os_type, query, command),
+             prompts.explanation_prompt(os_type)),
+        ):
+            start = time.perf_counter()
+            backend.complete(prompt, Deadline(), prefix, max_tokens=1)
+            samples[kind].append(time.perf_counter() - start)
+    return samples
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the local LLM prompt prefix cache")
+    parser.add_argument("--model", help="GGUF model file (default: the configured local model)")
+    parser.add_argument("--runs", type=int, default=8, help="prompts of each kind per measurement")
+    parser.add_argument("--os", default="linux", help="OS type the prompts are built for")
+    parser.add_argument("--json", metavar="FILE", help="append results as JSON lines to FILE")
+    args = parser.parse_args(argv)
+
+    try:
+        import llama_cpp  # noqa: F401
+    except ImportError:
+        print("llama-cpp-python is not installed; nothing to benchmark")
+        return 0
+    from apis import local_worker, prompts
+    from apis.local_engine import LocalEngine
+    from config import config_manager
+
+    config = dict(config_manager.get_local_model_config())
+    if args.model:
+        config["path"] = os.path.expanduser(args.model)
+    if not os.path.exists(config["path"]):
+        print(f"Model file not found: {config['path']}; pass --model")
+        return 0
+
+    prefixes = (prompts.system_prompt(args.os, compact=True), prompts.explanation_prompt(args.os))
+    results = []
+    for label in ("no-cache", "prefix-cache", "worker"):
+        start = time.perf_counter()
+        if label == "worker":
+            if not local_worker.available():
+                continue
+            # A separate socket, so a running shell's worker isn't measured
+            config["worker_idle_timeout"] = 30
+            backend = local_worker.WorkerClient(config)
+            backend.path = backend.path[:-len(".sock")] + "-bench.sock"
+            backend.start()
+        else:
+            backend = LocalEngine(config["path"], config["n_ctx"], config["n_threads"],
+                                  prefix_cache=label == "prefix-cache")
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        if label != "no-cache":
+            for prefix in prefixes:
+                backend.prepare(prefix)
+        warm = time.perf_counter() - start
+        if label == "worker":
+            # What a second shell session pays to start using the loaded model
+            start = time.perf_counter()
+            backend.start()
+            load = time.perf_counter() - start
+        samples = first_token_times(backend, args.os, args.runs)
+        del backend
+        row = {"setup": label, "model": os.path.basename(config["path"]), "load_s": round(load, 3),
+               "warm_s": round(warm, 2), "timestamp": time.time()}
+        for kind, times in samples.items():
+            row[kind] = summarize(times)
+        results.append(row)
+        print(f"{label:<12}  command TTFT {row['command']['median_ms']:>7.1f} ms   "
+              f"explanation TTFT {row['explanation']['median_ms']:>7.1f} ms   "
+              f"(load {row['load_s']:.2f} s, warm-up {row['warm_s']:.2f} s)")
+
+    if args.json and results:
+        with open(args.json, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Response parser benchmark for AI Shell.
+
+Times the response parser on a corpus of typical model responses - bare
+commands, command plus explanation, fenced blocks with a preamble, long
+chatty answers, structured JSON - against the previous multi-pass
+implementation (parser_reference.py), both on complete responses and
+streamed in small token-sized chunks. Also reports how much of each
+streamed response had arrived when the command was decided. Run from
+anywhere:
+
+    python benchmarks/parser_bench.py --runs 2000
+    python benchmarks/parser_bench.py --chunk 8 --json results.jsonl
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "aishell"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apis.response_parser import ResponseParser, StreamingCommandParser  # noqa: E402
+import parser_reference as reference  # noqa: E402
+
+EXPLANATION = "Lists every file in the current directory, including hidden ones, with sizes and permissions."
+CORPUS = {
+    "bare": "ls -la",
+    "explained": f"ls -la\n{EXPLANATION}",
+    "fenced": f"Here is the command:\n```bash\nfind . -type f -size +100M\n```\n{EXPLANATION}",
+    "preamble": f"To do this, run the following:\n\nfind . -type f -size +100M\n\n{EXPLANATION}",
+    "chatty": "Sure! " + " ".join([EXPLANATION] * 12) + f"\n```shell\ndu -sh * | sort -h\n```\n" + EXPLANATION * 4,
+    "invalid-block": f"```\n{{not a command}}\n```\nUse this instead:\ndf -h\n{EXPLANATION}",
+    "no-command": "I'm sorry, I can't help with that.\n[no command]\n```\n```",
+    "structured": json.dumps({"command": "ls -la", "risk": "low", "explanation": EXPLANATION}),
+}
+
+def _chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def legacy_batch(name, text, os_type, strict):
+    if name == "structured":
+        return ResponseParser.parse_structured(text)
+    return reference.parse_claude_response(text, os_type) if strict else reference.parse_response(text)
+
+def legacy_streamed(name, chunks, os_type, strict):
+    # The old providers joined the stream and parsed it once it had ended
+    return legacy_batch(name, "".join(chunks), os_type, strict)
+
+def new_batch(name, text, os_type, strict):
+    # What providers run on a response that arrived complete
+    return ResponseParser.parse(text, os_type, strict, structured=name == "structured")
+
+def new_streamed(name, chunks, os_type, strict):
+    parser = StreamingCommandParser(os_type, strict, structured=name == "structured")
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.finish()
+
+def time_per_call(func, args, runs: int) -> list:
+    """Per-call time in seconds, measured in batches of runs // 20 calls"""
+    batch = max(1, runs // 20)
+    samples = []
+    for _ in range(max(1, runs // batch)):
+        start = time.perf_counter()
+        for _ in range(batch):
+            func(*args)
+        samples.append((time.perf_counter() - start) / batch)
+    return samples
+
+def decided_at(name, chunks, os_type, strict) -> float:
+    """Fraction of the response received when feed() first reported the command"""
+    parser = StreamingCommandParser(os_type, strict, structured=name == "structured")
+    received = 0
+    total = sum(len(c) for c in chunks)
+    for chunk in chunks:
+        received += len(chunk)
+        if parser.feed(chunk):
+            return received / total
+    return 1.0
+
+def summarize(samples):
+    return {
+        "median_us": round(statistics.median(samples) * 1e6, 2),
+        "min_us": round(min(samples) * 1e6, 2),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the AI Shell response parser")
+    parser.add_argument("--runs", type=int, default=1000, help="parses per measurement")
+    parser.add_argument("--chunk", type=int, default=4, help="characters per streamed chunk")
+    parser.add_argument("--os", default="linux", help="OS type passed to the parser")
+    parser.add_argument("--json", metavar="FILE", help="append results as JSON lines to FILE")
+    args = parser.parse_args(argv)
+
+    results = []
+    for strict in (False, True):
+        mode = "strict" if strict else "default"
+        for name, text in CORPUS.items():
+            if name == "structured" and strict:
+                continue
+            chunks = _chunks(text, args.chunk)
+            if new_batch(name, text, args.os, strict)[:2] != legacy_batch(name, text, args.os, strict)[:2]:
+                print(f"{mode:>7} {name:<14} result differs from the reference parser")
+                return 1
+            row = {"mode": mode, "response": name, "chars": len(text), "timestamp": time.time(),
+                   "decided_at": round(decided_at(name, chunks, args.os, strict), 3)}
+            for label, func, data in (("legacy_batch", legacy_batch, text), ("batch", new_batch, text),
+                                      ("legacy_stream", legacy_streamed, chunks), ("stream", new_streamed, chunks)):
+                row[label] = summarize(time_per_call(func, (name, data, args.os, strict), args.runs))
+            results.append(row)
+            print(f"{mode:>7} {name:<14} batch {row['batch']['median_us']:>7.1f} us "
+                  f"(was {row['legacy_batch']['median_us']:>7.1f})   "
+                  f"stream {row['stream']['median_us']:>7.1f} us "
+                  f"(was {row['legacy_stream']['median_us']:>7.1f})   "
+                  f"decided at {row['decided_at']:>4.0%}")
+
+    if args.json and results:
+        with open(args.json, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Fuzz suite for the response parser.
+
+Builds random model responses from fragments - code fences with and
+without a language, preambles, commands, prose, JSON-ish lines, banned
+and dangerous commands, stray whitespace - and checks that:
+
+- parse_response and parse_claude_response return exactly what the
+  previous multi-pass implementation (parser_reference.py) returns, which
+  covers the code-block, line-scan and fallback stages;
+- streaming the same text in random chunks and calling finish() gives the
+  same result as parsing it whole;
+- a command decided early by the default (first line) mode, or by a
+  closed code block in strict mode, is the command finish() returns.
+
+Run from anywhere; exits non-zero and prints a reproducer on the first
+mismatch:
+
+    python benchmarks/parser_fuzz.py --cases 20000 --seed 1
+"""
+import argparse
+import os
+import random
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "aishell"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apis.response_parser import ResponseParser, StreamingCommandParser  # noqa: E402
+import parser_reference as reference  # noqa: E402
+
+COMMANDS = [
+    "ls -la", "df -h", "find . -type f -size +1G", "find . -name '*.py'", "grep -rn \"TODO\" .",
+    "docker ps", "kill $(lsof -t -i :3000)", "tar -czf logs.tar.gz logs", "dir /a",
+    "powershell \"Get-ChildItem -Recurse | Where-Object Length -gt 1GB\"", "Get-ChildItem | where size",
+    "echo 'hi' # comment", "curl http://example.com // note", "$ ls", "Command: pwd", "`whoami`",
+    "rm -rf /tmp/x", "chmod 777 file", "dd if=/dev/zero of=x", "ls |", "cd /tmp &&", "none", "None",
+    "[1, 2]", "{\"command\": \"ls\"}", "\\n", "x" * 260, "a > b", "cat file ] x",
+]
+PROSE = [
+    "Here is the command:", "This lists the files.", "Explanation: shows disk usage", "Run this:",
+    "It finds large files in the current directory.", "Note: needs sudo", "   ", "", "`inline`",
+    "> quoted", "1. first", "- item", "The command is below:",
+]
+FENCES = ["```", "```bash", "```shell", "```cmd", "```powershell", "```python", "```sh", "````", "``` bash"]
+SPACES = ["", " ", "  ", "\t", "\r", "\n"]
+
+def fragment(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.35:
+        return rng.choice(COMMANDS)
+    if kind < 0.65:
+        return rng.choice(PROSE)
+    if kind < 0.85:
+        return rng.choice(FENCES)
+    if kind < 0.95:
+        return rng.choice(SPACES) + rng.choice(COMMANDS + PROSE) + rng.choice(SPACES)
+    return "".join(rng.choice("ab `{}[]>\;|&#/\"'$\n-+1GM") for _ in range(rng.randint(1, 12)))
+
+def response(rng: random.Random) -> str:
+    if rng.random() < 0.3:
+        # Typical shapes: fenced block, command then explanation
+        parts = [rng.choice(PROSE), rng.choice(FENCES), rng.choice(COMMANDS), rng.choice(PROSE), "```"]
+        if rng.random() < 0.5:
+            parts = parts[2:3] + parts[3:4]
+    else:
+        parts = [fragment(rng) for _ in range(rng.randint(0, 8))]
+    separator = rng.choice(["\n", "\n", "\n\n", " \n", "\n  "])
+    return rng.choice(SPACES) + separator.join(parts) + rng.choice(SPACES)
+
+def chunks(rng: random.Random, text: str):
+    i = 0
+    while i < len(text):
+        size = rng.choice([1, 2, 3, 5, 8, 40])
+        yield text[i:i + size]
+        i += size
+
+def check(rng: random.Random, text: str, os_type: str):
+    """None if every property holds, otherwise a description of the failure"""
+    for strict in (False, True):
+        if strict:
+            expected = reference.parse_claude_response(text, os_type)
+            actual = ResponseParser.parse_claude_response(text, os_type)
+        else:
+            expected = reference.parse_response(text)
+            actual = ResponseParser.parse_response(text)
+        if actual != expected:
+            return f"strict={strict}: batch {actual!r} != reference {expected!r}"
+        if not text:
+            continue
+        parser = StreamingCommandParser(os_type, strict)
+        early = None
+        for piece in chunks(rng, text):
+            # In strict mode only a decision made after a code block closed
+            # is final; one made before it is the preamble heuristic
+            block_closed = parser.block is not None and parser.block[0] is not None
+            if parser.feed(piece) and early is None:
+                early = parser.command
+                if strict and not block_closed:
+                    early = False
+        streamed = parser.finish()
+        if streamed != expected:
+            return f"strict={strict}: streamed {streamed!r} != reference {expected!r}"
+        if early is not False and early is not None and early != expected[0]:
+            return f"strict={strict}: decided {early!r} early, finish gave {expected[0]!r}"
+    return None
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fuzz the response parser against the reference implementation")
+    parser.add_argument("--cases", type=int, default=5000, help="random responses to check")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (default: random)")
+    args = parser.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    rng = random.Random(seed)
+    for case in range(args.cases):
+        text = response(rng)
+        os_type = rng.choice(["linux", "darwin", "windows"])
+        failure = check(rng, text, os_type)
+        if failure:
+            print(f"FAIL (seed {seed}, case {case}, os {os_type}): {failure}")
+            print(f"text = {text!r}")
+            return 1
+    print(f"ok: {args.cases} cases (seed {seed})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""The text stages of ResponseParser as they were before the single-pass parser.
+
+Kept as the reference the fuzz suite checks the current parser against
+(parser_fuzz.py) and the baseline the benchmark measures it against
+(parser_bench.py). Not used by AI Shell itself.
+"""
+import re
+from typing import Optional, Tuple
+
+def parse_response(text: str) -> Tuple[Optional[str], Optional[str]]:
+    if not text or not isinstance(text, str):
+        return None, None
+    text = text.strip()
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    if not lines:
+        return None, None
+    command = clean_command(lines[0])
+    explanation = ' '.join(lines[1:]) if len(lines) > 1 else None
+    return command, explanation
+
+def parse_claude_response(text: str, os_type: str) -> Tuple[Optional[str], Optional[str]]:
+    if not text or not isinstance(text, str):
+        return None, None
+    text = text.strip()
+
+    # Stage 1: Check for code blocks
+    code_block_match = re.search(r"```(?:bash|shell|cmd|powershell)?\s*\n?(.+?)\n```", text, re.DOTALL)
+    if code_block_match:
+        content = code_block_match.group(1).strip()
+        lines = [line.strip() for line in content.split('\n') if line.strip()]
+        if lines and is_valid_command(lines[0]):
+            explanation = ' '.join(lines[1:]) if len(lines) > 1 else None
+            return lines[0], explanation
+
+    # Stage 2: Line-by-line parsing
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    for i, line in enumerate(lines):
+        if is_valid_command(line):
+            explanation = ' '.join(lines[i+1:]) if i+1 < len(lines) else None
+            return line, explanation
+
+    # Stage 3: Fallback pattern matching
+    command_match = re.search(r'(?:^|\n)([^\n`{}\]>]+?)(?:\n|$)', text)
+    if os_type == 'windows':
+        powershell_pattern = re.search(r'(powershell.*where.*size|Get-ChildItem.*where)', text, re.IGNORECASE)
+        if powershell_pattern:
+            return powershell_pattern.group().strip(), None
+    else:
+        size_pattern = re.search(r'(find\s+.*-size\s+[-+]\d+[MGK])', text)
+        if size_pattern:
+            return size_pattern.group().strip(), None
+    if command_match and is_valid_command(command_match.group(1)):
+        return command_match.group(1).strip(), None
+    return None, None
+
+def is_valid_command(command: str) -> bool:
+    if not command or command.lower() == "none":
+        return False
+    command = command.strip()
+    if command.startswith('```') or command.endswith('```'):
+        return False
+    banned_patterns = [
+        r'^[`{}\[\]\\]',
+        r'[;&|]\s*$',
+        r'\b(rm\s+-rf|chmod\s+777|dd\s+if=)',
+    ]
+    return (len(command) < 250 and
+            not any(re.search(pattern, command) for pattern in banned_patterns))
+
+def clean_command(command: str) -> Optional[str]:
+    if not command or command.lower() == "none":
+        return None
+    command = re.sub(r'["\']', '', command.split('#')[0].split('//')[0].strip())
+    if len(command) > 200:
+        return None
+    for prefix in ["command:", "cmd:", "$ ", "`"]:
+        if command.lower().startswith(prefix):
+            command = command[len(prefix):].strip()
+    command = command.strip('`')
+    return command if command and is_valid_command(command) else None
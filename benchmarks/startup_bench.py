@@ -0,0 +1,157 @@
+"""Startup benchmark for AI Shell.
+
+Measures launch-to-prompt time of the interactive shell (time until the
+``AI-Shell>`` prompt is drawn) and the wall time of a one-shot cache hit,
+for each launcher. Run from anywhere:
+
+    python benchmarks/startup_bench.py --runs 10
+    python benchmarks/startup_bench.py --launcher node --launcher python --json results.jsonl
+
+By default every run uses a throwaway HOME so no providers are configured and
+only launcher/import overhead is measured; pass --use-config to include
+provider initialization from your real configuration.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI_PATH = os.path.join(ROOT_DIR, "aishell", "cli.py")
+PROMPT_MARKER = b"AI-Shell>"
+CACHED_QUERY = "benchmark cached query"
+
+LAUNCHERS = {
+    "python": lambda: [sys.executable, CLI_PATH],
+    "module": lambda: [sys.executable, "-m", "aishell"],
+    "native": lambda: [os.path.join(ROOT_DIR, "bin", "ai-shell")],
+    "node": lambda: ["node", os.path.join(ROOT_DIR, "bin", "ai-shell.js")],
+}
+
+def _env(home: str) -> dict:
+    env = dict(os.environ)
+    if home:
+        env["HOME"] = home
+        env["USERPROFILE"] = home
+    env["PYTHONPATH"] = ROOT_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def _seed_cache(work_dir: str):
+    """Create the cache entry the one-shot benchmark will hit"""
+    conn = sqlite3.connect(os.path.join(work_dir, "ai_shell.db"))
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS commands (
+        query TEXT PRIMARY KEY,
+        command TEXT NOT NULL,
+        explanation TEXT,
+        usage_count INTEGER DEFAULT 1,
+        last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.execute("INSERT OR REPLACE INTO commands (query, command) VALUES (?, ?)", (CACHED_QUERY, "echo ok"))
+    conn.commit()
+    conn.close()
+
+def time_oneshot(cmd, work_dir, env) -> float:
+    """Wall time of a one-shot cache hit"""
+    start = time.perf_counter()
+    subprocess.run(cmd + ["-c", CACHED_QUERY, "--print-only"], cwd=work_dir, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def time_to_prompt(cmd, work_dir, env, timeout: float = 60.0) -> float:
+    """Time from spawn until the interactive prompt is drawn (needs a pty)"""
+    import pty
+    import select
+
+    master, slave = pty.openpty()
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=work_dir, env=env, stdin=slave, stdout=slave, stderr=slave, close_fds=True)
+    os.close(slave)
+    output = b""
+    try:
+        while PROMPT_MARKER not in output:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"no prompt after {timeout:.0f}s")
+            ready, _, _ = select.select([master], [], [], 0.05)
+            if ready:
+                try:
+                    output += os.read(master, 4096)
+                except OSError:
+                    raise RuntimeError("shell exited before showing the prompt")
+        elapsed = time.perf_counter() - start
+        os.write(master, b"exit\r")
+        proc.wait(timeout=10)
+        return elapsed
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        os.close(master)
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p90 = ordered[min(len(ordered) - 1, int(round(0.9 * (len(ordered) - 1))))]
+    return {
+        "runs": len(samples),
+        "min_ms": round(ordered[0] * 1000, 1),
+        "median_ms": round(statistics.median(ordered) * 1000, 1),
+        "p90_ms": round(p90 * 1000, 1),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark AI Shell startup time")
+    parser.add_argument("--runs", type=int, default=5, help="measured runs per scenario")
+    parser.add_argument("--launcher", action="append", choices=sorted(LAUNCHERS),
+                        help="launcher(s) to measure (default: python and module)")
+    parser.add_argument("--skip-repl", action="store_true", help="only measure the one-shot path")
+    parser.add_argument("--use-config", action="store_true", help="use the real HOME and its configuration")
+    parser.add_argument("--json", metavar="FILE", help="append results as JSON lines to FILE")
+    args = parser.parse_args(argv)
+
+    launchers = args.launcher or ["python", "module"]
+    work_dir = tempfile.mkdtemp(prefix="aishell-bench-")
+    home = None if args.use_config else work_dir
+    env = _env(home)
+    _seed_cache(work_dir)
+
+    results = []
+    try:
+        for name in launchers:
+            cmd = LAUNCHERS[name]()
+            if not shutil.which(cmd[0]) and not os.path.exists(cmd[0]):
+                print(f"{name:>7}: skipped ({cmd[0]} not found)")
+                continue
+
+            scenarios = [("oneshot-cache-hit", time_oneshot)]
+            if not args.skip_repl and os.name != "nt":
+                scenarios.append(("launch-to-prompt", time_to_prompt))
+
+            for scenario, measure in scenarios:
+                try:
+                    measure(cmd, work_dir, env)  # warm-up (bytecode, page cache)
+                    samples = [measure(cmd, work_dir, env) for _ in range(args.runs)]
+                except Exception as e:
+                    print(f"{name:>7} {scenario}: failed ({e})")
+                    continue
+                summary = summarize(samples)
+                summary.update({"launcher": name, "scenario": scenario, "timestamp": time.time()})
+                results.append(summary)
+                print(f"{name:>7} {scenario:<18} median {summary['median_ms']:>8.1f} ms   "
+                      f"p90 {summary['p90_ms']:>8.1f} ms   min {summary['min_ms']:>8.1f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json and results:
+        with open(args.json, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,2 @@
 @echo off 
-py "%~dp0\..\aishell\ai_shell.py" %* 
+py "%~dp0\..\aishell\cli.py" %* 
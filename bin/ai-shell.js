@@ -1,55 +1,67 @@
 #!/usr/bin/env node
 
-console.log('Starting AI Shell...');
-
 const { spawn, execSync } = require('child_process');
+const fs = require('fs');
 const path = require('path');
 const os = require('os');
 
-try {
-  // Get the directory where the script is installed
-  const scriptDir = path.dirname(__dirname);
-  
-  // Path to the Python script - now located in the aishell subdirectory
-  const pythonScriptPath = path.join(scriptDir, 'aishell', 'ai_shell.py');
-  
-  // Find available Python command
-  let pythonCommand = null;
-  const possibleCommands = os.platform() === 'win32' 
-    ? ['py', 'python', 'python3'] 
+// Interpreter resolved by the installer; avoids probing `python --version` on every launch
+function resolvedPython() {
+  try {
+    const pythonPath = fs.readFileSync(path.join(__dirname, '.python-path'), 'utf8').trim();
+    return pythonPath && fs.existsSync(pythonPath) ? pythonPath : null;
+  } catch (err) {
+    return null;
+  }
+}
+
+// Fallback for installs that predate .python-path
+function probePython() {
+  const possibleCommands = os.platform() === 'win32'
+    ? ['py', 'python', 'python3']
     : ['python', 'python3'];
-  
+
   for (const cmd of possibleCommands) {
     try {
       execSync(`${cmd} --version`, { stdio: 'pipe' });
-      pythonCommand = cmd;
-      break;
+      return cmd;
     } catch (err) {
       // Try next command
     }
   }
-  
+  return null;
+}
+
+try {
+  // Get the directory where the script is installed
+  const scriptDir = path.dirname(__dirname);
+
+  // Path to the Python script - now located in the aishell subdirectory
+  const pythonScriptPath = path.join(scriptDir, 'aishell', 'cli.py');
+
+  const pythonCommand = resolvedPython() || probePython();
+
   if (!pythonCommand) {
     console.error('Python is not installed or not in your PATH.');
     console.error('Please install Python from https://www.python.org/downloads/');
     process.exit(1);
   }
-  
-  // Run the Python script
-  const pythonProcess = spawn(pythonCommand, [pythonScriptPath], {
-    stdio: 'inherit',
-    shell: true
+
+  // Run the Python script, forwarding arguments (e.g. -c "query" --print-only).
+  // No shell, so quoted queries reach Python untouched.
+  const pythonProcess = spawn(pythonCommand, [pythonScriptPath, ...process.argv.slice(2)], {
+    stdio: 'inherit'
   });
-  
+
   pythonProcess.on('error', (error) => {
     console.error('Failed to start Python process:', error);
     console.log('If Python is not in your PATH, make sure to install it and try again.');
   });
-  
+
   pythonProcess.on('close', (code) => {
-    console.log(`AI Shell exited with code ${code}`);
+    process.exit(code === null ? 1 : code);
   });
 } catch (error) {
   console.error('Error running AI Shell:', error);
   process.exit(1);
-}
\ No newline at end of file
+}
@@ -25,6 +25,15 @@ try {
     }
   }
   
+  // Resolve the interpreter once, so launchers never have to search for it
+  try {
+    pythonCommand = execSync(`${pythonCommand} -c "import sys; print(sys.executable)"`, { stdio: 'pipe' })
+      .toString().trim() || pythonCommand;
+    fs.writeFileSync(path.join(rootDir, 'bin', '.python-path'), pythonCommand);
+  } catch (err) {
+    // Keep the bare command name
+  }
+  
   // Create platform-specific runner scripts
   if (os.platform() === 'win32') {
     createWindowsBatchFile(rootDir, pythonCommand);
@@ -33,7 +42,7 @@ try {
   }
   
   console.log('\nAI Shell has been installed with limited functionality.');
-  console.log(`You can run it using the "ai-shell" command or directly with "${pythonCommand} aishell/ai_shell.py"`);
+  console.log(`You can run it using the "ai-shell" command or directly with "${pythonCommand} aishell/cli.py"`);
 } catch (error) {
   console.error('Error during fallback installation:', error);
 }
@@ -41,7 +50,7 @@ try {
 function createWindowsBatchFile(rootDir, pythonCommand) {
   const batchPath = path.join(rootDir, 'bin', 'ai-shell.bat');
   const scriptContent = `@echo off
-${pythonCommand} "%~dp0\\..\\aishell\\ai_shell.py" %*
+"${pythonCommand}" "%~dp0\\..\\aishell\\cli.py" %*
 `;
   fs.writeFileSync(batchPath, scriptContent);
   console.log('Created Windows batch file for running AI Shell');
@@ -50,7 +59,7 @@ ${pythonCommand} "%~dp0\\..\\aishell\\ai_shell.py" %*
 function createUnixShellScript(rootDir, pythonCommand) {
   const shellPath = path.join(rootDir, 'bin', 'ai-shell');
   const scriptContent = `#!/bin/sh
-${pythonCommand} "$(dirname "$0")/../aishell/ai_shell.py" "$@"
+exec "${pythonCommand}" "$(dirname "$0")/../aishell/cli.py" "$@"
 `;
   fs.writeFileSync(shellPath, scriptContent);
   try {
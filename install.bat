@@ -28,11 +28,19 @@ rem Install Python dependencies
 echo Installing Python dependencies...
 %PYTHON_CMD% -m pip install -r requirements.txt
 
+rem Resolve the interpreter once, so the launcher never has to search for it
+for /f "delims=" %%P in ('%PYTHON_CMD% -c "import sys; print(sys.executable)"') do set PYTHON_EXE=%%P
+
+rem Precompile bytecode so the first launch doesn't pay for it
+echo Precompiling Python modules...
+"%PYTHON_EXE%" -m compileall -q "%CD%\aishell"
+
 rem Create the batch file launcher
 echo Creating launcher script...
 mkdir bin 2>nul
 echo @echo off > bin\ai-shell.bat
-echo %PYTHON_CMD% "%%~dp0\..\aishell\ai_shell.py" %%* >> bin\ai-shell.bat
+echo "%PYTHON_EXE%" "%CD%\aishell\cli.py" %%* >> bin\ai-shell.bat
+echo %PYTHON_EXE%> bin\.python-path
 
 rem Add to PATH if requested
 echo.
@@ -48,11 +48,23 @@ try {
     }
   }
   
+  // Resolve the interpreter once, so launchers never have to search for it
+  const pythonExecutable = resolvePythonExecutable(pythonCommand);
+  fs.writeFileSync(path.join(__dirname, 'bin', '.python-path'), pythonExecutable);
+  
+  // Precompile bytecode so the first launch doesn't pay for it
+  try {
+    execSync(`"${pythonExecutable}" -m compileall -q "${path.join(__dirname, 'aishell')}"`, { stdio: 'pipe' });
+    console.log('Precompiled Python modules');
+  } catch (err) {
+    console.warn('Could not precompile Python modules; they will be compiled on first run.');
+  }
+  
   // Create a platform-specific runner script
   if (os.platform() === 'win32') {
-    createWindowsBatchFile(pythonCommand);
+    createWindowsBatchFile(pythonExecutable);
   } else {
-    createUnixShellScript(pythonCommand);
+    createUnixShellScript(pythonExecutable);
   }
   
   console.log('\nAI Shell has been installed successfully!');
@@ -62,19 +74,30 @@ try {
   process.exit(1);
 }
 
-function createWindowsBatchFile(pythonCommand) {
+function resolvePythonExecutable(pythonCommand) {
+  try {
+    return execSync(`${pythonCommand} -c "import sys; print(sys.executable)"`, { stdio: 'pipe' })
+      .toString().trim() || pythonCommand;
+  } catch (err) {
+    return pythonCommand;
+  }
+}
+
+function createWindowsBatchFile(pythonExecutable) {
   const batchPath = path.join(__dirname, 'bin', 'ai-shell.bat');
+  const cliPath = path.join(__dirname, 'aishell', 'cli.py');
   const scriptContent = `@echo off
-${pythonCommand} "%~dp0\\..\\aishell\\ai_shell.py" %*
+"${pythonExecutable}" "${cliPath}" %*
 `;
   fs.writeFileSync(batchPath, scriptContent);
   console.log('Created Windows batch file for running AI Shell');
 }
 
-function createUnixShellScript(pythonCommand) {
+function createUnixShellScript(pythonExecutable) {
   const shellPath = path.join(__dirname, 'bin', 'ai-shell');
+  const cliPath = path.join(__dirname, 'aishell', 'cli.py');
   const scriptContent = `#!/bin/sh
-${pythonCommand} "$(dirname "$0")/../aishell/ai_shell.py" "$@"
+exec "${pythonExecutable}" "${cliPath}" "$@"
 `;
   fs.writeFileSync(shellPath, scriptContent);
   fs.chmodSync(shellPath, '755');
@@ -36,15 +36,23 @@ fi
 
 rm -f pip_error.log
 
+# Resolve the interpreter once, so the launcher never has to search for it
+PYTHON_BIN="$($PYTHON_CMD -c 'import sys; print(sys.executable)')"
+ROOT_DIR="$(pwd)"
+
+# Precompile bytecode so the first launch doesn't pay for it
+echo "Precompiling Python modules..."
+"$PYTHON_BIN" -m compileall -q "$ROOT_DIR/aishell"
+
 # Create the shell script launcher
 echo "Creating launcher script..."
 mkdir -p bin
 cat > bin/ai-shell << EOF
-#!/bin/bash
-SCRIPT_DIR="\$(cd "\$(dirname "\${BASH_SOURCE[0]}")" && pwd)"
-$PYTHON_CMD "\$SCRIPT_DIR/../aishell/ai_shell.py" "\$@"
+#!/bin/sh
+exec "$PYTHON_BIN" "$ROOT_DIR/aishell/cli.py" "\$@"
 EOF
 chmod +x bin/ai-shell
+echo "$PYTHON_BIN" > bin/.python-path
 
 # Add to PATH if requested
 echo
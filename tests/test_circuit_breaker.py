@@ -0,0 +1,121 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+import circuit_breaker
+from apis.errors import AUTH, NETWORK, RATE_LIMIT, SERVER, TIMEOUT
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, OfflineDetector
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    assert not breaker.record_failure(SERVER)
+    assert not breaker.record_failure(SERVER)
+    assert breaker.record_failure(SERVER)
+    assert breaker.state == OPEN
+    assert breaker.is_open() and not breaker.allow()
+
+def test_open_half_open_closed(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure(SERVER)
+    clock.now += 29
+    assert breaker.state == OPEN
+    clock.now += 1
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # One trial at a time
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+def test_failed_trial_doubles_the_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, max_reset_timeout=50)
+    breaker.record_failure(SERVER)
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.record_failure(SERVER)
+    assert breaker.remaining_cooldown() == 50  # Doubled, then capped
+    clock.now += 50
+    assert breaker.state == HALF_OPEN
+
+def test_abandoned_trial_frees_the_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure(SERVER)
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 31
+    assert breaker.allow()
+
+@pytest.mark.parametrize("error_class, retry_after, cooldown", [
+    (AUTH, None, 600),
+    (RATE_LIMIT, 12, 12),
+    (RATE_LIMIT, None, 30),
+])
+def test_auth_and_rate_limit_open_at_once(clock, error_class, retry_after, cooldown):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, auth_reset_timeout=600)
+    assert breaker.record_failure(error_class, retry_after)
+    assert breaker.remaining_cooldown() == cooldown
+
+def test_trip_opens_from_outside(clock):
+    breaker = CircuitBreaker()
+    breaker.trip(15)
+    assert breaker.state == OPEN and breaker.last_error_class == NETWORK
+    clock.now += 15
+    assert breaker.state == HALF_OPEN
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure(TIMEOUT)
+    breaker.record_success()
+    assert not breaker.record_failure(TIMEOUT)
+    assert breaker.state == CLOSED
+
+@pytest.fixture
+def detector(clock, monkeypatch):
+    detector = OfflineDetector(error_window=30, offline_timeout=15)
+    monkeypatch.setattr(detector, "_has_route", lambda: True)
+    return detector
+
+def test_one_provider_failing_is_not_offline(detector):
+    assert not detector.report_network_error("openai")
+    assert not detector.report_network_error("openai")
+    assert not detector.is_offline()
+
+def test_two_providers_failing_is_offline(detector, clock):
+    detector.report_network_error("openai")
+    clock.now += 10
+    assert detector.report_network_error("anthropic")
+    assert detector.is_offline()
+    clock.now += 15
+    assert not detector.is_offline()
+
+def test_failures_outside_the_window_do_not_add_up(detector, clock):
+    detector.report_network_error("openai")
+    clock.now += 31
+    assert not detector.report_network_error("anthropic")
+
+def test_no_route_is_offline_after_one_failure(detector, monkeypatch):
+    monkeypatch.setattr(detector, "_has_route", lambda: False)
+    assert detector.report_network_error("openai")
+
+def test_success_clears_offline(detector):
+    detector.report_network_error("openai")
+    detector.report_network_error("anthropic")
+    detector.report_success()
+    assert not detector.is_offline()
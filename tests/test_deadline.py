@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+from apis import aws_bedrock, deadline as deadline_module
+from apis.aws_bedrock import AWSBedrockProvider
+from apis.base_provider import call_within
+from apis.deadline import MIN_TIMEOUT, Deadline
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(deadline_module.time, "monotonic", clock)
+    return clock
+
+def test_timeout_is_what_is_left(clock):
+    deadline = Deadline(10)
+    clock.now += 4
+    assert deadline.remaining() == 6
+    assert deadline.timeout() == 6
+    assert deadline.timeout(cap=2) == 2
+
+def test_timeout_never_drops_below_the_minimum(clock):
+    deadline = Deadline(1)
+    clock.now += 5
+    assert deadline.expired()
+    assert deadline.timeout() == MIN_TIMEOUT
+
+def test_connect_timeout_is_capped(clock):
+    deadline = Deadline(10, connect_timeout=3)
+    assert deadline.connect_timeout() == 3
+    clock.now += 8
+    assert deadline.connect_timeout() == 2
+
+@pytest.mark.parametrize("elapsed, retries", [
+    (0, 2),  # 30s left: capped at max_retries
+    (21, 2),  # 9s left: three 3s attempts
+    (24, 1),
+    (27, 0),  # One attempt only
+    (31, 0),
+])
+def test_retries_fit_the_remaining_budget(clock, elapsed, retries):
+    deadline = Deadline(30, max_retries=2)
+    clock.now += elapsed
+    assert deadline.retries() == retries
+
+def test_unlimited_budget(clock):
+    deadline = Deadline(None, max_retries=2)
+    clock.now += 10000
+    assert deadline.remaining() is None and not deadline.expired()
+    assert deadline.timeout() is None
+    assert deadline.timeout(cap=30) == 30
+    assert deadline.retries() == 2
+
+def test_cancel_expires_at_once():
+    deadline = Deadline(30)
+    deadline.cancel()
+    assert deadline.expired()
+    assert deadline.retries() == 0
+
+def test_call_within_returns_the_result():
+    assert call_within(Deadline(5), lambda a, b=0: a + b, 1, b=2) == 3
+
+def test_call_within_gives_up_at_the_deadline():
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        call_within(Deadline(0.2), time.sleep, 2)
+    assert time.monotonic() - start < 1
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+@pytest.mark.parametrize("status, calls", [(503, 3), (401, 1)])
+def test_bedrock_retries_only_transient_errors_within_the_budget(monkeypatch, status, calls):
+    monkeypatch.setattr(aws_bedrock.time, "sleep", lambda seconds: None)
+    read_timeouts = []
+
+    def call():
+        read_timeouts.append(aws_bedrock._read_timeout.get())
+        raise StatusError(status)
+
+    with pytest.raises(StatusError):
+        AWSBedrockProvider()._attempts(Deadline(30, max_retries=2), call)
+    assert len(read_timeouts) == calls
+    assert all(0 < timeout <= 30 for timeout in read_timeouts)
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+from ai_service import MIN_HEDGE_DELAY, AIService
+from apis.deadline import Deadline
+from provider_stats import ProviderStats
+
+FAILED = (None, None, None, None)
+
+def service(providers, hedge_delay=0.1):
+    """AIService whose providers answer after a delay: {name: (seconds, command or None)}"""
+    ai = AIService.__new__(AIService)
+    ai.providers = {name: SimpleNamespace(description=name) for name in providers}
+    ai.routing = {"hedge_delay": hedge_delay, "confidence_escalation": "off", "confidence_threshold": 0}
+    ai.stats = ProviderStats(path=None)
+    ai.started = []
+
+    async def call_provider(name, user_input, deadline):
+        ai.started.append(name)
+        delay, command = providers[name]
+        await asyncio.sleep(delay)
+        return (command, None, None, None) if command else FAILED
+
+    ai._call_provider = call_provider
+    return ai
+
+def run_chain(ai, hedge=True, timeout=5):
+    order = list(ai.providers)
+    start = time.monotonic()
+    result = asyncio.run(ai._run_chain("list files", order, Deadline(timeout), hedge))
+    return result, time.monotonic() - start
+
+def test_fast_provider_is_not_hedged():
+    ai = service({"a": (0.01, "ls"), "b": (0.01, "dir")})
+    (provider, command, *_), _ = run_chain(ai)
+    assert (provider, command) == ("a", "ls")
+    assert ai.started == ["a"]
+
+def test_slow_provider_is_raced_by_the_next():
+    ai = service({"a": (2, "ls"), "b": (0.01, "dir")})
+    (provider, command, *_), elapsed = run_chain(ai)
+    assert (provider, command) == ("b", "dir")
+    assert ai.started == ["a", "b"]
+    assert elapsed < 1
+
+def test_without_hedging_the_chain_waits():
+    ai = service({"a": (0.3, "ls"), "b": (0.01, "dir")})
+    (provider, _, *_), elapsed = run_chain(ai, hedge=False)
+    assert provider == "a"
+    assert elapsed >= 0.3
+
+def test_failure_starts_the_next_provider_at_once():
+    ai = service({"a": (0.01, None), "b": (0.01, "dir")}, hedge_delay=10)
+    (provider, command, *_), elapsed = run_chain(ai)
+    assert (provider, command) == ("b", "dir")
+    assert elapsed < 1
+
+def test_nothing_is_waited_on_past_the_deadline():
+    ai = service({"a": (5, "ls"), "b": (5, "dir")})
+    result, elapsed = run_chain(ai, timeout=0.3)
+    assert result == (None, None, None, None, None)
+    assert elapsed < 1
+
+def test_hedge_delay_follows_observed_latency():
+    ai = service({"a": (0, "ls")}, hedge_delay=2.0)
+    assert ai._hedge_delay("a") == 2.0  # Not enough samples yet
+    for latency in (0.8, 0.9, 1.0, 1.1, 1.2):
+        ai.stats.record("a", latency, True)
+    assert ai._hedge_delay("a") == pytest.approx(1.2)
+    for _ in range(50):
+        ai.stats.record("a", 5.0, True)
+    assert ai._hedge_delay("a") == 2.0  # Capped by the configured delay
+    for _ in range(50):
+        ai.stats.record("a", 0.01, True)
+    assert ai._hedge_delay("a") == MIN_HEDGE_DELAY
@@ -0,0 +1,43 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+from json_store import JsonStore
+
+def test_saves_only_after_a_change(tmp_path):
+    path = str(tmp_path / "sub" / "state.json")
+    state = {"count": 0}
+    store = JsonStore(path, lambda: dict(state))
+    store.save()
+    assert not os.path.exists(path)
+    state["count"] = 1
+    store.changed()
+    store.save()
+    with open(path) as f:
+        assert json.load(f) == {"count": 1}
+    assert not os.path.exists(path + ".tmp")
+
+def test_maybe_save_waits_for_the_interval(tmp_path):
+    path = str(tmp_path / "state.json")
+    state = {"count": 1}
+    store = JsonStore(path, lambda: dict(state), interval=3600)
+    store.changed()
+    store.maybe_save()  # First save is never held back
+    state["count"] = 2
+    store.changed()
+    store.maybe_save()
+    assert JsonStore(path, dict).load() == {"count": 1}
+
+def test_load_ignores_missing_and_corrupt_files(tmp_path):
+    path = tmp_path / "state.json"
+    assert JsonStore(str(path), dict).load() is None
+    path.write_text("{not json")
+    assert JsonStore(str(path), dict).load() is None
+
+def test_no_path_reads_and_writes_nothing():
+    store = JsonStore(None, dict)
+    store.changed()
+    store.save()
+    assert store.load() is None
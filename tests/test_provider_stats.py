@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+import provider_stats
+from provider_stats import ProviderStats
+
+def record(stats, provider, latency, calls=10, success=True, parse_failure=False):
+    for _ in range(calls):
+        stats.record(provider, latency, success, parse_failure)
+
+def test_no_data_keeps_the_default_order():
+    stats = ProviderStats(path=None)
+    assert stats.rank(["local", "openai", "anthropic"]) == ["local", "openai", "anthropic"]
+
+def test_faster_provider_ranks_first():
+    stats = ProviderStats(path=None)
+    record(stats, "openai", 2.0)
+    record(stats, "anthropic", 0.5)
+    assert stats.rank(["openai", "anthropic"]) == ["anthropic", "openai"]
+
+def test_unreliable_provider_is_demoted():
+    stats = ProviderStats(path=None)
+    record(stats, "openai", 0.5)
+    record(stats, "openai", 0.5, calls=20, success=False)
+    record(stats, "anthropic", 0.8)
+    assert stats.rank(["openai", "anthropic"]) == ["anthropic", "openai"]
+
+def test_parse_failures_count_against_quality():
+    stats = ProviderStats(path=None)
+    record(stats, "openai", 1.0, calls=20, success=False, parse_failure=True)
+    record(stats, "anthropic", 1.0)
+    assert stats.rank(["openai", "anthropic"], speed_weight=0.0) == ["anthropic", "openai"]
+
+def test_percentiles_use_successful_calls_only():
+    stats = ProviderStats(path=None)
+    for latency in (0.1, 0.2, 0.3, 0.4, 10.0):
+        stats.record("openai", latency, True)
+    stats.record("openai", 99.0, False)
+    assert stats.sample_count("openai") == 5
+    assert stats.percentile("openai", 50) == 0.3
+    assert stats.percentile("openai", 90) == 10.0
+    assert stats.percentile("anthropic", 50) is None
+
+def test_exploration_moves_the_stalest_provider_first(monkeypatch):
+    stats = ProviderStats(path=None)
+    record(stats, "openai", 0.5)
+    record(stats, "anthropic", 1.0)
+    monkeypatch.setattr(provider_stats.random, "random", lambda: 0.0)
+    # deepseek has no data, so it is the stalest
+    assert stats.rank(["openai", "anthropic", "deepseek"], explore_rate=0.1)[0] == "deepseek"
+
+def test_stats_survive_a_restart(tmp_path):
+    path = str(tmp_path / "stats.json")
+    stats = ProviderStats(path)
+    record(stats, "openai", 0.5, calls=3)
+    stats.save()
+    reloaded = ProviderStats(path)
+    assert reloaded.sample_count("openai") == 3
+    assert reloaded.summary()["openai"]["calls"] == 3
@@ -0,0 +1,106 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+from apis import rate_limiter
+from apis.deadline import Deadline
+from apis.rate_limiter import RateLimiter, TokenBucket, backoff_delay, parse_reset
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+def test_unlimited_bucket_never_waits(clock):
+    bucket = TokenBucket()
+    assert bucket.reserve(10 ** 6) == 0
+
+def test_refills_at_the_rate(clock):
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    # That reservation is owed; 10s later 10 tokens came back, 9 of them free
+    clock.now += 10
+    assert bucket.reserve(9) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+def test_refill_stops_at_capacity(clock):
+    bucket = TokenBucket(per_minute=60)
+    clock.now += 3600
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) > 0
+
+def test_reservations_queue_in_arrival_order(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+    waits = [bucket.reserve(1) for _ in range(3)]
+    assert waits == pytest.approx([1.0, 2.0, 3.0])
+
+def test_max_wait_takes_nothing(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+    assert bucket.reserve(30, max_wait=5) is None
+    assert bucket.reserve(5) == pytest.approx(5.0)
+
+def test_refund_returns_tokens(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+    bucket.refund(60)
+    assert bucket.reserve(60) == 0
+
+def test_pause_holds_callers_and_accrues_nothing(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.pause(5)
+    assert bucket.reserve(1) == pytest.approx(6.0)
+    clock.now += 5
+    assert bucket.reserve(1) == pytest.approx(2.0)
+
+def test_per_minute_headers_lower_the_rate(clock):
+    limiter = RateLimiter(requests_per_minute=100)
+    limiter.update_from_headers({
+        "x-ratelimit-limit-requests": "50",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1.2s",
+    })
+    assert limiter.requests.per_minute == 50
+    assert limiter.requests.reserve(1) == pytest.approx(1.2 + 60 / 50)
+
+def test_daily_limit_is_not_a_rate(clock):
+    limiter = RateLimiter()
+    limiter.update_from_headers({"x-ratelimit-limit": "1000", "x-ratelimit-remaining": "999",
+                                 "x-ratelimit-reset": "8h"})
+    assert not limiter.requests.limited
+    limiter.update_from_headers({"x-ratelimit-limit": "1000", "x-ratelimit-remaining": "0",
+                                 "x-ratelimit-reset": "8h"})
+    assert limiter.requests.reserve(1) == pytest.approx(8 * 3600)
+
+def test_limit_without_reset_is_ignored(clock):
+    limiter = RateLimiter()
+    limiter.update_from_headers({"x-ratelimit-limit-tokens": "5000", "x-ratelimit-remaining-tokens": "0"})
+    assert not limiter.tokens.limited
+    assert limiter.tokens.reserve(100) == 0
+
+def test_acquire_gives_up_past_the_deadline(clock):
+    limiter = RateLimiter(requests_per_minute=1)
+    assert limiter.reserve(0, Deadline(None)) == 0
+    assert limiter.reserve(0, Deadline(None)) == pytest.approx(60)
+    assert limiter.reserve(0, Deadline(30)) is None
+
+@pytest.mark.parametrize("value, seconds", [("1s", 1), ("6m0s", 360), ("20ms", 0.02), ("1h2m", 3720), ("7", 7)])
+def test_parse_reset_durations(value, seconds):
+    assert parse_reset(value) == pytest.approx(seconds)
+
+def test_backoff_respects_retry_after():
+    assert all(0 <= backoff_delay(attempt) <= min(20, 0.5 * 2 ** attempt) for attempt in range(8))
+    assert 10 <= backoff_delay(0, retry_after=10) <= 10.5
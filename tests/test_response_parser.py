@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+from apis.response_parser import ResponseParser, StreamingCommandParser
+
+EXPLANATION = "Lists every file in the current directory, including hidden ones."
+RESPONSES = [
+    "ls -la",
+    f"ls -la\n{EXPLANATION}",
+    f"Here is the command:\n```bash\nfind . -type f -size +100M\n```\n{EXPLANATION}",
+    f"To do this, run the following:\n\nfind . -type f -size +100M\n\n{EXPLANATION}",
+    f"```\n{{not a command}}\n```\nUse this instead:\ndf -h\n{EXPLANATION}",
+    "I'm sorry, I can't help with that.\n[no command]\n```\n```",
+]
+
+def stream(parser, text, size):
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    return parser.finish()
+
+@pytest.mark.parametrize("strict", [False, True])
+@pytest.mark.parametrize("size", [1, 4, 1000])
+@pytest.mark.parametrize("text", RESPONSES)
+def test_streamed_result_matches_batch(text, size, strict):
+    expected = ResponseParser.parse(text, "linux", strict)[:2]
+    assert stream(StreamingCommandParser("linux", strict), text, size) == expected
+
+@pytest.mark.parametrize("text, command", [
+    ("$ ls -la  # list everything", "ls -la"),
+    ("Command: `df -h`", "df -h"),
+    ("none", None),
+    ("rm -rf /", None),
+])
+def test_parse_response_cleans_the_first_line(text, command):
+    assert ResponseParser.parse_response(text)[0] == command
+
+def test_structured_fields():
+    text = json.dumps({"command": "echo \"hi\"", "risk": "Medium", "explanation": EXPLANATION})
+    assert ResponseParser.parse(text, structured=True) == ('echo "hi"', EXPLANATION, "medium")
+
+def test_structured_cut_short_keeps_complete_fields():
+    assert ResponseParser.parse_structured('{"command": "ls", "risk": "low", "expla') == ("ls", None, "low")
+
+def test_structured_rejects_multiline_and_unknown_risk():
+    assert ResponseParser.parse_structured({"command": "ls\nrm x", "risk": "extreme"}) == (None, None, None)
+
+def test_not_json_falls_back_to_text_rules():
+    assert ResponseParser.parse("ls -la\nLists files", structured=True) == ("ls -la", "Lists files", None)
+
+@pytest.mark.parametrize("size", [1, 3, 7])
+def test_streamed_structured_is_decided_before_the_explanation(size):
+    text = json.dumps({"command": "ls -la", "risk": "low", "explanation": EXPLANATION})
+    parser = StreamingCommandParser(structured=True)
+    received = 0
+    for i in range(0, len(text), size):
+        received += size
+        if parser.feed(text[i:i + size]):
+            break
+    assert (parser.command, parser.risk) == ("ls -la", "low")
+    assert received < text.index('"explanation"') + size
+
+def test_streamed_structured_keeps_only_an_incomplete_field():
+    parser = StreamingCommandParser(structured=True)
+    parser.feed('{"risk": "low", "explanation": "')
+    for _ in range(1000):
+        parser.feed('a "quoted" word ')
+    assert not parser.decided
+    assert len(parser._tail) < 20
+    parser.feed('", "command": "ls"}')
+    assert (parser.command, parser.risk) == ("ls", "low")
+
+def test_streamed_structured_field_split_across_chunks():
+    parser = StreamingCommandParser(structured=True)
+    for chunk in ['{"comm', 'and": "l', 's", "ri', 'sk": "hi', 'gh"', '}']:
+        parser.feed(chunk)
+    assert (parser.command, parser.risk) == ("ls", "high")
+
+def test_parse_explanation_takes_the_first_paragraph():
+    assert ResponseParser.parse_explanation('Explanation: "Lists files."\n\nMore.') == "Lists files."
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+from intents import INTENTS
+from rules import RuleEngine
+
+@pytest.fixture(scope="module")
+def engine():
+    return RuleEngine(INTENTS, user_rules_path=None, stats_path=None)
+
+@pytest.mark.parametrize("query", [
+    "delete folder my stuff",
+    "delete file a b",
+    "go to folder my docs",
+    "copy my file to backup",
+    "delete file stuff a",
+])
+def test_filler_next_to_placeholder_is_not_dropped(engine, query):
+    assert engine.match(query, "linux", record=False) is None
+
+@pytest.mark.parametrize("query, command", [
+    ("delete the folder build", "rm -r build"),
+    ("go to the folder docs", "cd docs"),
+    ("please kill process on port 3000", "kill $(lsof -t -i :3000)"),
+    ("copy file.txt to backup", "cp file.txt backup"),
+])
+def test_filler_between_literals_is_skipped(engine, query, command):
+    assert engine.match(query, "linux", record=False).command == command
+
+@pytest.mark.parametrize("query", ["install requests", "install package left-pad", "uninstall vlc"])
+def test_bare_install_is_left_to_the_model(engine, query):
+    assert engine.match(query, "linux", record=False) is None
+
+@pytest.mark.parametrize("query, os_type, command", [
+    ("apt install htop", "linux", "sudo apt install htop"),
+    ("install htop with brew", "darwin", "brew install htop"),
+    ("winget install Git.Git", "windows", "winget install Git.Git"),
+])
+def test_named_package_manager_install(engine, query, os_type, command):
+    assert engine.match(query, os_type, record=False).command == command
+
+def test_apt_install_is_linux_only(engine):
+    assert engine.match("apt install htop", "darwin", record=False) is None
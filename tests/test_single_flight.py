@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aishell"))
+
+from cache import CommandCache
+from single_flight import SingleFlight, flight_key
+
+RESULT = ("ls -la", "Lists files", "openai", 0.9, "low")
+
+class Factory:
+    """A generation that takes `delay` seconds, counting its calls"""
+
+    def __init__(self, result=RESULT, delay=0.1, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+def test_flight_key_normalizes_the_query():
+    assert flight_key("  List  Files?", "linux") == flight_key("list files", "linux")
+    assert flight_key("list files", "linux") != flight_key("list files", "windows")
+
+def test_identical_calls_share_one_generation():
+    flights, factory = SingleFlight(), Factory()
+
+    async def main():
+        return await asyncio.gather(*(flights.run("k", factory) for _ in range(3)))
+
+    assert asyncio.run(main()) == [RESULT] * 3
+    assert factory.calls == 1
+    assert flights.coalesced == 2
+
+def test_cancelled_waiter_only_detaches():
+    flights, factory = SingleFlight(), Factory()
+
+    async def main():
+        first = asyncio.ensure_future(flights.run("k", factory))
+        second = asyncio.ensure_future(flights.run("k", factory))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == RESULT
+    assert factory.calls == 1
+
+def test_generation_is_cancelled_with_its_last_waiter():
+    flights, factory = SingleFlight(), Factory(delay=10)
+
+    async def main():
+        waiter = asyncio.ensure_future(flights.run("k", factory))
+        await asyncio.sleep(0.01)
+        task = flights._flights["k"].task
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+        return task.cancelled()
+
+    assert asyncio.run(main())
+
+@pytest.fixture
+def store(tmp_path):
+    return CommandCache(str(tmp_path / "cache.db"))
+
+def run_in_two_processes(store, owner_factory, waiter_factory):
+    """Start a flight in one SingleFlight and ask for the same key from another on the same DB"""
+    owner, waiter = SingleFlight(store), SingleFlight(store)
+
+    async def main():
+        first = asyncio.ensure_future(owner.run("k", owner_factory, timeout=5))
+        await asyncio.sleep(0.02)
+        second = await waiter.run("k", waiter_factory, timeout=5)
+        return await asyncio.gather(first, return_exceptions=True), second, waiter
+
+    return asyncio.run(main())
+
+def test_other_process_waits_for_the_result(store):
+    owner_factory, waiter_factory = Factory(), Factory()
+    (first,), second, waiter = run_in_two_processes(store, owner_factory, waiter_factory)
+    assert first == second == RESULT  # Provider, confidence and risk included
+    assert (owner_factory.calls, waiter_factory.calls) == (1, 0)
+    assert waiter.coalesced == 1
+
+def test_other_process_without_a_command_falls_back(store):
+    empty = (None, None, None, None, None)
+    owner_factory, waiter_factory = Factory(result=empty), Factory()
+    (first,), second, _ = run_in_two_processes(store, owner_factory, waiter_factory)
+    assert first == empty
+    assert second == RESULT
+    assert waiter_factory.calls == 1
+
+def test_failed_flight_is_taken_over(store):
+    owner_factory, waiter_factory = Factory(error=RuntimeError("boom")), Factory()
+    (first,), second, _ = run_in_two_processes(store, owner_factory, waiter_factory)
+    assert isinstance(first, RuntimeError)
+    assert second == RESULT
+    assert waiter_factory.calls == 1